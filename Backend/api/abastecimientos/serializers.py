@@ -1,5 +1,11 @@
+from collections import OrderedDict
 from rest_framework import serializers
+from django.db import transaction
+from django.db.models import Sum
+from api.base.sincronizacion import sincronizar
 from .models import Abastecimiento
+from api.insumos.models import MovimientoInsumo
+from api.insumos.stock import aplicar_movimientos, StockInsuficienteError
 from api.manicuristas.models import Manicurista
 from api.manicuristas.serializers import ManicuristaSerializer
 from api.insumoshasabastecimientos.models import InsumoHasAbastecimiento
@@ -21,35 +27,119 @@ class AbastecimientoSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("La cantidad debe ser mayor que cero")
         return value
     
+    def validate_insumos(self, value):
+        """Unifica las líneas repetidas del mismo insumo sumando sus cantidades"""
+        cantidades = OrderedDict()
+        insumos = {}
+        for linea in value:
+            insumo = linea['insumo']
+            insumos[insumo.id] = insumo
+            cantidades[insumo.id] = cantidades.get(insumo.id, 0) + linea['cantidad']
+        return [{'insumo': insumos[pk], 'cantidad': cantidad} for pk, cantidad in cantidades.items()]
+    
+    def validate(self, data):
+        """Verifica de una sola vez que haya stock suficiente para todas las líneas"""
+        insumos_data = data.get('insumos')
+        if not insumos_data:
+            return data
+        
+        previas = self._cantidades_descontadas() if self.instance else {}
+        faltantes = []
+        for linea in insumos_data:
+            insumo = linea['insumo']
+            adicional = linea['cantidad'] - previas.get(insumo.id, 0)
+            if adicional > insumo.cantidad:
+                faltantes.append(
+                    f"{insumo.nombre} (disponible: {insumo.cantidad}, solicitado: {adicional})"
+                )
+        
+        if faltantes:
+            raise serializers.ValidationError({
+                'insumos': [f"Stock insuficiente para: {', '.join(faltantes)}"]
+            })
+        return data
+    
+    def _cantidades_descontadas(self):
+        """
+        Lo que el abastecimiento descontó del stock según el historial de
+        movimientos, como perform_destroy: los registros anteriores al historial
+        no descontaron nada aunque tengan líneas.
+        """
+        descontado = (
+            MovimientoInsumo.objects
+            .filter(abastecimiento=self.instance)
+            .values('insumo_id')
+            .annotate(total=Sum('cantidad'))
+            .values_list('insumo_id', 'total')
+        )
+        return {insumo_id: -total for insumo_id, total in descontado if total}
+    
+    def _descontar_stock(self, abastecimiento, lineas):
+        """Descuenta el stock de todos los insumos en un único UPDATE con guarda de no negativos"""
+        try:
+            aplicar_movimientos(
+                [(insumo_id, -cantidad) for insumo_id, cantidad in lineas],
+                MovimientoInsumo.TIPO_SALIDA_ABASTECIMIENTO,
+                abastecimiento=abastecimiento
+            )
+        except StockInsuficienteError as e:
+            # Otra operación consumió el stock entre la validación y el UPDATE
+            raise serializers.ValidationError({'insumos': [str(e)]})
+    
+    @transaction.atomic
     def create(self, validated_data):
         insumos_data = validated_data.pop('insumos', [])
         abastecimiento = Abastecimiento.objects.create(**validated_data)
         
-        for insumo_data in insumos_data:
-            InsumoHasAbastecimiento.objects.create(abastecimiento=abastecimiento, **insumo_data)
+        InsumoHasAbastecimiento.objects.bulk_create([
+            InsumoHasAbastecimiento(abastecimiento=abastecimiento, **insumo_data)
+            for insumo_data in insumos_data
+        ])
+        self._descontar_stock(
+            abastecimiento,
+            [(d['insumo'].id, d['cantidad']) for d in insumos_data]
+        )
         
         return abastecimiento
     
+    @transaction.atomic
     def update(self, instance, validated_data):
         insumos_data = validated_data.pop('insumos', None)
         instance = super().update(instance, validated_data)
         
         if insumos_data is not None:
-            instance.insumos.all().delete()
-            for insumo_data in insumos_data:
-                InsumoHasAbastecimiento.objects.create(abastecimiento=instance, **insumo_data)
+            previas = self._cantidades_descontadas()
+            self._sincronizar_lineas(instance, insumos_data)
+            
+            # Solo se mueve el stock de la diferencia entre lo ya descontado y lo entregado ahora
+            nuevas = {d['insumo'].id: d['cantidad'] for d in insumos_data}
+            self._descontar_stock(instance, [
+                (pk, nuevas.get(pk, 0) - previas.get(pk, 0))
+                for pk in set(previas) | set(nuevas)
+            ])
         
         return instance
+    
+    def _sincronizar_lineas(self, abastecimiento, insumos_data):
+        """Crea, modifica y elimina solo las líneas que cambiaron"""
+        sincronizar(
+            InsumoHasAbastecimiento,
+            abastecimiento.insumos.all(),
+            {d['insumo'].id: d for d in insumos_data},
+            clave='insumo_id',
+            nueva=lambda pk, d: InsumoHasAbastecimiento(abastecimiento=abastecimiento, **d),
+            campos=['cantidad'],
+        )
 
 
 class AbastecimientoDetailSerializer(serializers.ModelSerializer):
+    """
+    Lee las líneas desde la relación 'insumos'; el queryset debe venir de
+    AbastecimientoViewSet.get_queryset() para no consultar por fila.
+    """
     manicurista = ManicuristaSerializer(read_only=True)
-    insumos = serializers.SerializerMethodField()
+    insumos = InsumoHasAbastecimientoDetailSerializer(many=True, read_only=True)
     
     class Meta:
         model = Abastecimiento
-        fields = ['id', 'fecha', 'cantidad', 'manicurista', 'insumos']
-    
-    def get_insumos(self, obj):
-        abastecimiento_insumos = InsumoHasAbastecimiento.objects.filter(abastecimiento=obj)
-        return InsumoHasAbastecimientoDetailSerializer(abastecimiento_insumos, many=True).data
\ No newline at end of file
+        fields = ['id', 'fecha', 'cantidad', 'manicurista', 'insumos']
\ No newline at end of file
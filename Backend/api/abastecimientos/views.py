@@ -2,10 +2,15 @@ from rest_framework import viewsets, status, filters
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from django_filters.rest_framework import DjangoFilterBackend
+from django.db import transaction
+from django.db.models import Sum, Prefetch, prefetch_related_objects
 
 from .models import Abastecimiento
 from .serializers import AbastecimientoSerializer, AbastecimientoDetailSerializer
 from api.manicuristas.models import Manicurista
+from api.insumoshasabastecimientos.models import InsumoHasAbastecimiento
+from api.insumos.models import MovimientoInsumo
+from api.insumos.stock import aplicar_movimientos
 
 
 class AbastecimientoViewSet(viewsets.ModelViewSet):
@@ -32,17 +37,39 @@ class AbastecimientoViewSet(viewsets.ModelViewSet):
             return AbastecimientoDetailSerializer
         return AbastecimientoSerializer
     
+    @staticmethod
+    def _lineas_detalle():
+        """Líneas con su insumo y categoría en una sola consulta adicional"""
+        return Prefetch(
+            'insumos',
+            queryset=InsumoHasAbastecimiento.objects.select_related('insumo__categoria_insumo')
+        )
+    
+    def get_queryset(self):
+        """
+        Carga la manicurista (con su usuario) en el mismo SELECT y todas las líneas
+        con su insumo y categoría en una consulta adicional, sin importar cuántas filas haya.
+        """
+        return (
+            Abastecimiento.objects
+            .select_related('manicurista__usuario')
+            .prefetch_related(self._lineas_detalle())
+        )
+    
+    def _detalle(self, abastecimiento):
+        """Serializa la instancia recién guardada cargando sus relaciones sin volver a consultarla"""
+        # Las líneas cacheadas antes de guardar podrían estar desactualizadas
+        getattr(abastecimiento, '_prefetched_objects_cache', {}).pop('insumos', None)
+        prefetch_related_objects([abastecimiento], 'manicurista__usuario', self._lineas_detalle())
+        return AbastecimientoDetailSerializer(abastecimiento).data
+    
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         self.perform_create(serializer)
         headers = self.get_success_headers(serializer.data)
         
-        # Obtenemos el objeto recién creado con el serializer de detalle
-        abastecimiento = Abastecimiento.objects.get(pk=serializer.data['id'])
-        detail_serializer = AbastecimientoDetailSerializer(abastecimiento)
-        
-        return Response(detail_serializer.data, status=status.HTTP_201_CREATED, headers=headers)
+        return Response(self._detalle(serializer.instance), status=status.HTTP_201_CREATED, headers=headers)
     
     def update(self, request, *args, **kwargs):
         partial = kwargs.pop('partial', False)
@@ -51,11 +78,27 @@ class AbastecimientoViewSet(viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
         self.perform_update(serializer)
         
-        # Obtenemos el objeto actualizado con el serializer de detalle
-        abastecimiento = Abastecimiento.objects.get(pk=instance.id)
-        detail_serializer = AbastecimientoDetailSerializer(abastecimiento)
-        
-        return Response(detail_serializer.data)
+        return Response(self._detalle(serializer.instance))
+    
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        """
+        Devuelve al stock lo que este abastecimiento descontó según el historial de
+        movimientos (los registros anteriores al historial no descontaron stock).
+        """
+        aplicado = (
+            MovimientoInsumo.objects
+            .filter(abastecimiento=instance)
+            .values('insumo_id')
+            .annotate(total=Sum('cantidad'))
+            .values_list('insumo_id', 'total')
+        )
+        aplicar_movimientos(
+            [(insumo_id, -total) for insumo_id, total in aplicado],
+            MovimientoInsumo.TIPO_REVERSION_ANULACION,
+            motivo=f"Eliminación del abastecimiento #{instance.id}"
+        )
+        instance.delete()
     
     @action(detail=False, methods=['get'])
     def por_manicurista(self, request):
@@ -80,7 +123,7 @@ class AbastecimientoViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        abastecimientos = Abastecimiento.objects.filter(manicurista=manicurista)
+        abastecimientos = self.get_queryset().filter(manicurista=manicurista)
         serializer = AbastecimientoDetailSerializer(abastecimientos, many=True)
         return Response(serializer.data)
     
@@ -102,7 +145,7 @@ class AbastecimientoViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        abastecimientos = Abastecimiento.objects.filter(
+        abastecimientos = self.get_queryset().filter(
             fecha__gte=fecha_inicio,
             fecha__lte=fecha_fin
         )
@@ -0,0 +1,169 @@
+"""
+Autenticación JWT con el usuario en caché.
+
+JWTAuthentication consulta el usuario (y luego su rol) en cada petición. Aquí
+el usuario ya resuelto, con su rol, se guarda en dos niveles:
+
+1. Un LRU del proceso con vigencia corta: durante VERIFICAR_CADA segundos la
+   entrada se usa sin consultar nada.
+2. La caché compartida, con la versión del usuario en la clave. Vencida la
+   vigencia local se lee la versión (una lectura de caché); si no cambió se
+   sigue usando la entrada local, y si cambió se trae el usuario de la caché
+   compartida o, en último caso, de la base de datos.
+
+invalidar_usuario() sube la versión del usuario e invalidar_todos() una versión
+general (cambios de roles). Las señales del AppConfig las llaman al guardar o
+eliminar un usuario o un rol y al poner un token en la lista negra; el proceso
+que hace el cambio lo ve de inmediato y los demás en a lo sumo VERIFICAR_CADA
+segundos. La versión se sube al confirmar la transacción: antes del commit otro
+proceso leería el usuario anterior y lo guardaría con la versión nueva.
+"""
+import pickle
+import threading
+import time as reloj
+from collections import OrderedDict
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from api.usuarios.models import Usuario
+
+CLAVE_VERSION_GENERAL = 'auth:usuarios:version'
+CLAVE_VERSION = 'auth:usuario:{}:version'
+CLAVE_USUARIO = 'auth:usuario:{}:{}:{}'
+# Segundos que una entrada local se usa sin revisar la versión compartida
+VERIFICAR_CADA = 2
+# Segundos que el usuario permanece en la caché compartida
+DURACION_COMPARTIDA = 5 * 60
+MAX_USUARIOS = 1024
+
+_locales = OrderedDict()  # {usuario_id: (versiones, verificado, usuario serializado)}
+_candado = threading.Lock()
+
+
+def _versiones(usuario_id):
+    """(versión general, versión del usuario); None si no hay caché compartida"""
+    clave = CLAVE_VERSION.format(usuario_id)
+    try:
+        valores = cache.get_many([CLAVE_VERSION_GENERAL, clave])
+    except Exception:
+        return None
+    return valores.get(CLAVE_VERSION_GENERAL, 0), valores.get(clave, 0)
+
+
+def _subir(clave):
+    try:
+        cache.incr(clave)
+    except ValueError:
+        cache.set(clave, 1, None)
+    except Exception:
+        pass
+
+
+def _cargar(usuario_id, versiones):
+    """Usuario serializado con su rol: de la caché compartida o de la base de datos"""
+    clave = CLAVE_USUARIO.format(usuario_id, *versiones) if versiones else None
+    if clave:
+        try:
+            datos = cache.get(clave)
+        except Exception:
+            datos = None
+        if datos is not None:
+            return datos
+
+    usuario = Usuario.objects.select_related('rol').filter(**{api_settings.USER_ID_FIELD: usuario_id}).first()
+    if usuario is None:
+        return None
+    datos = pickle.dumps(usuario)
+    if clave:
+        try:
+            cache.set(clave, datos, DURACION_COMPARTIDA)
+        except Exception:
+            pass
+    return datos
+
+
+def obtener_usuario(usuario_id):
+    """
+    Usuario con su rol, o None si no existe. Cada llamada retorna una
+    instancia nueva: las vistas pueden modificarla sin afectar a otras peticiones.
+    """
+    usuario_id = str(usuario_id)
+    ahora = reloj.monotonic()
+    with _candado:
+        entrada = _locales.get(usuario_id)
+        if entrada is not None:
+            _locales.move_to_end(usuario_id)
+
+    if entrada is not None and ahora - entrada[1] < VERIFICAR_CADA:
+        return pickle.loads(entrada[2])
+
+    versiones = _versiones(usuario_id)
+    if entrada is not None and versiones is not None and entrada[0] == versiones:
+        datos = entrada[2]
+    else:
+        datos = _cargar(usuario_id, versiones)
+        if datos is None:
+            return None
+
+    with _candado:
+        _locales[usuario_id] = (versiones, ahora, datos)
+        _locales.move_to_end(usuario_id)
+        while len(_locales) > MAX_USUARIOS:
+            _locales.popitem(last=False)
+    return pickle.loads(datos)
+
+
+def _invalidar(descartar, clave):
+    # Se descarta de nuevo al confirmar: entre tanto otro hilo pudo recargar el dato anterior
+    descartar()
+
+    def publicar():
+        descartar()
+        _subir(clave)
+    transaction.on_commit(publicar)
+
+
+def invalidar_usuario(usuario_id):
+    """Descarta el usuario en este proceso y, al confirmar la transacción, avisa a los demás subiendo su versión"""
+    usuario_id = str(usuario_id)
+
+    def descartar():
+        with _candado:
+            _locales.pop(usuario_id, None)
+    _invalidar(descartar, CLAVE_VERSION.format(usuario_id))
+
+
+def invalidar_todos():
+    """Descarta todos los usuarios en caché (por ejemplo, al cambiar un rol)"""
+    def descartar():
+        with _candado:
+            _locales.clear()
+    _invalidar(descartar, CLAVE_VERSION_GENERAL)
+
+
+class AutenticacionJWTCacheada(JWTAuthentication):
+    """JWTAuthentication que resuelve el usuario con obtener_usuario() en lugar de una consulta por petición"""
+
+    def get_user(self, validated_token):
+        try:
+            usuario_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        usuario = obtener_usuario(usuario_id)
+        if usuario is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not usuario.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(usuario.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return usuario
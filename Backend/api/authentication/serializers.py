@@ -0,0 +1,50 @@
+from django.core.exceptions import ObjectDoesNotExist
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenObtainSerializer
+
+from api.usuarios.models import Usuario
+from api.usuarios.serializers import UsuarioDetailSerializer
+
+
+def perfil_ids(usuario):
+    """(cliente_id, manicurista_id) del usuario por sus relaciones uno a uno; None si no tiene ese perfil"""
+    ids = []
+    for relacion in ('cliente', 'manicurista'):
+        try:
+            ids.append(getattr(usuario, relacion).id)
+        except ObjectDoesNotExist:
+            ids.append(None)
+    return tuple(ids)
+
+
+class LoginSerializer(TokenObtainPairSerializer):
+    """
+    Login con JWT. El token de acceso lleva el rol y los perfiles del usuario
+    (rol, cliente_id, manicurista_id) para que las vistas los lean del token
+    sin consultar la base de datos.
+    """
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        cliente_id, manicurista_id = perfil_ids(user)
+        token['rol'] = user.rol.nombre.lower() if user.rol_id else None
+        token['cliente_id'] = cliente_id
+        token['manicurista_id'] = manicurista_id
+        return token
+
+    def validate(self, attrs):
+        # Autenticación estándar; luego una sola consulta trae rol y perfiles
+        TokenObtainSerializer.validate(self, attrs)
+        self.user = Usuario.objects.select_related('rol', 'cliente', 'manicurista').get(pk=self.user.pk)
+
+        refresh = self.get_token(self.user)
+        data = {
+            'refresh': str(refresh),
+            'access': str(refresh.access_token),
+            'user': UsuarioDetailSerializer(self.user).data,
+        }
+        if refresh['cliente_id']:
+            data['cliente_id'] = refresh['cliente_id']
+        if refresh['manicurista_id']:
+            data['manicurista_id'] = refresh['manicurista_id']
+        return data
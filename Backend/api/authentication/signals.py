@@ -0,0 +1,24 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from api.roles.models import Rol
+from api.usuarios.models import Usuario
+from .jwt import invalidar_todos, invalidar_usuario
+
+
+@receiver([post_save, post_delete], sender=Usuario)
+def invalidar_usuario_cacheado(sender, instance, **kwargs):
+    # Cubre desactivación, cambio de rol y cualquier otro cambio del usuario
+    invalidar_usuario(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Rol)
+def invalidar_usuarios_del_rol(sender, **kwargs):
+    invalidar_todos()
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def invalidar_al_cerrar_sesion(sender, instance, **kwargs):
+    if instance.token.user_id:
+        invalidar_usuario(instance.token.user_id)
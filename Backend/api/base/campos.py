@@ -0,0 +1,70 @@
+"""
+Campos de relación que resuelven listas de ids con una sola consulta.
+
+PrimaryKeyRelatedField(many=True) hace un queryset.get(pk=...) por cada id.
+PKRelacionadoField se usa igual, pero con many=True devuelve un
+PKRelacionadosField que resuelve la lista completa con un filter(pk__in=...),
+conserva el orden recibido y reporta en un solo error todos los ids que no
+existen o que el queryset excluye (por ejemplo, registros inactivos).
+
+En un ModelSerializer, `serializer_related_field = PKRelacionadoField` lo
+aplica también a las relaciones generadas a partir del modelo.
+"""
+from django.core.exceptions import ValidationError as DjangoValidationError
+from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
+
+
+class PKRelacionadosField(serializers.ManyRelatedField):
+    default_error_messages = {
+        'no_existen': 'No existen los registros con id: {ids}.',
+        'no_disponibles': 'Los registros con id {ids} no están disponibles.',
+    }
+
+    def _pk(self, valor):
+        hijo = self.child_relation
+        if isinstance(valor, bool):
+            hijo.fail('incorrect_type', data_type=type(valor).__name__)
+        if hijo.pk_field is not None:
+            valor = hijo.pk_field.to_internal_value(valor)
+        try:
+            return hijo.get_queryset().model._meta.pk.to_python(valor)
+        except (DjangoValidationError, TypeError, ValueError):
+            hijo.fail('incorrect_type', data_type=type(valor).__name__)
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+
+        pks = [self._pk(valor) for valor in data]
+        queryset = self.child_relation.get_queryset()
+        encontrados = queryset.in_bulk(set(pks))
+        faltantes = list(dict.fromkeys(pk for pk in pks if pk not in encontrados))
+        if faltantes:
+            # Solo en el caso de error: distinguir los que no existen de los excluidos por el queryset
+            existentes = set(
+                queryset.model._default_manager.filter(pk__in=faltantes).values_list('pk', flat=True)
+            )
+            errores = []
+            no_existen = [pk for pk in faltantes if pk not in existentes]
+            no_disponibles = [pk for pk in faltantes if pk in existentes]
+            if no_existen:
+                errores.append(self.error_messages['no_existen'].format(ids=no_existen))
+            if no_disponibles:
+                errores.append(self.error_messages['no_disponibles'].format(ids=no_disponibles))
+            raise serializers.ValidationError(' '.join(errores), code='does_not_exist')
+        return [encontrados[pk] for pk in pks]
+
+
+class PKRelacionadoField(serializers.PrimaryKeyRelatedField):
+    """PrimaryKeyRelatedField que con many=True resuelve todos los ids en una consulta"""
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return PKRelacionadosField(**list_kwargs)
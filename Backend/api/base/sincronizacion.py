@@ -0,0 +1,65 @@
+"""
+Sincronización de filas hijas (líneas de detalle o tablas intermedias).
+
+En lugar de borrar todas las filas y volver a crearlas una por una,
+sincronizar() compara las filas guardadas con las deseadas y aplica solo las
+diferencias: un bulk_create para las nuevas, un DELETE filtrado para las que
+sobran y un bulk_update para las que cambiaron. Editar una línea cuesta así
+tres sentencias como máximo, sin importar cuántas tenga el registro.
+"""
+from dataclasses import dataclass, field
+
+
+@dataclass
+class Sincronizacion:
+    creadas: list = field(default_factory=list)
+    modificadas: list = field(default_factory=list)
+    eliminadas: list = field(default_factory=list)  # pks
+
+    @property
+    def hubo_cambios(self):
+        return bool(self.creadas or self.modificadas or self.eliminadas)
+
+
+def sincronizar(modelo, actuales, deseados, clave, nueva, campos=()):
+    """
+    Lleva las filas `actuales` de `modelo` a las `deseados`.
+
+    - actuales: queryset o lista de instancias guardadas (se recorre una vez).
+    - deseados: {clave: valores}; valores se pasa a `nueva` y se indexa por
+      cada campo de `campos`. Las nuevas se crean en este orden.
+    - clave: atributo que identifica la fila dentro del padre (p. ej. 'insumo_id').
+    - nueva: función (clave, valores) -> instancia sin guardar.
+    - campos: campos que se comparan y, si difieren, se actualizan.
+
+    Si hay varias filas guardadas con la misma clave se conserva la primera.
+    """
+    existentes = {}
+    sobrantes = []
+    for fila in actuales:
+        k = getattr(fila, clave)
+        if k in existentes:
+            sobrantes.append(fila.pk)
+        else:
+            existentes[k] = fila
+
+    resultado = Sincronizacion()
+    for k, valores in deseados.items():
+        fila = existentes.get(k)
+        if fila is None:
+            resultado.creadas.append(nueva(k, valores))
+            continue
+        cambios = [c for c in campos if getattr(fila, c) != valores[c]]
+        for campo in cambios:
+            setattr(fila, campo, valores[campo])
+        if cambios:
+            resultado.modificadas.append(fila)
+
+    resultado.eliminadas = sobrantes + [f.pk for k, f in existentes.items() if k not in deseados]
+    if resultado.eliminadas:
+        modelo.objects.filter(pk__in=resultado.eliminadas).delete()
+    if resultado.modificadas:
+        modelo.objects.bulk_update(resultado.modificadas, list(campos))
+    if resultado.creadas:
+        modelo.objects.bulk_create(resultado.creadas)
+    return resultado
@@ -0,0 +1,279 @@
+"""
+Índice de búsqueda por prefijo.
+
+Cada registro indexado aporta a TerminoBusqueda:
+- las palabras de sus campos de texto, sin tildes y en minúscula
+  ("María Gómez" -> "maria", "gomez");
+- sus códigos completos (documento, celular) sin separadores.
+
+Una consulta se parte en términos igual que el texto indexado y cada término
+se busca como prefijo: un rango termino >= t AND termino < t + FIN_PREFIJO
+sobre el índice (entidad, termino, objeto_id), sin recorrer la tabla como un
+LIKE '%q%'. Un registro aparece si todos los términos de la consulta
+coinciden con alguna de sus palabras o códigos.
+
+ENTIDADES registra qué modelos se indexan y con qué campos; signals.py
+mantiene el índice de todos ellos y buscar_global() consulta varios a la vez.
+"""
+import re
+import unicodedata
+from dataclasses import dataclass
+from django.apps import apps
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef, Q
+from .models import TerminoBusqueda
+
+LARGO_TERMINO = 64
+# Mayor que cualquier carácter de un término normalizado: cierra el rango de un prefijo
+FIN_PREFIJO = '\uffff'
+MAX_TERMINOS_CONSULTA = 5
+# Filas que se cuentan por término para elegir el más selectivo
+MUESTRA_SELECTIVIDAD = 1000
+TAMANO_LOTE = 2000
+
+_PALABRA = re.compile(r'\w+')
+_SEPARADORES_CODIGO = re.compile(r'[\s.\-+()/]')
+
+
+@dataclass(frozen=True)
+class Entidad:
+    nombre: str
+    grupo: str  # clave de sus resultados en la búsqueda global
+    modelo: str
+    campos_texto: tuple
+    campos_codigo: tuple = ()
+    campos_resultado: tuple = ('nombre',)
+
+    @property
+    def campos(self):
+        return self.campos_texto + self.campos_codigo
+
+    def get_model(self):
+        return apps.get_model(self.modelo)
+
+
+ENTIDADES = {
+    entidad.nombre: entidad for entidad in [
+        Entidad(
+            TerminoBusqueda.ENTIDAD_CLIENTE, 'clientes', 'clientes.Cliente', ('nombre',), ('documento', 'celular'),
+            ('nombre', 'documento', 'celular', 'estado'),
+        ),
+        Entidad(
+            TerminoBusqueda.ENTIDAD_MANICURISTA, 'manicuristas', 'manicuristas.Manicurista', ('nombre',),
+            ('numero_documento', 'celular'), ('nombre', 'numero_documento', 'celular', 'estado', 'disponible'),
+        ),
+        Entidad(
+            TerminoBusqueda.ENTIDAD_SERVICIO, 'servicios', 'servicios.Servicio', ('nombre', 'descripcion'), (),
+            ('nombre', 'precio', 'duracion', 'estado'),
+        ),
+        Entidad(
+            TerminoBusqueda.ENTIDAD_INSUMO, 'insumos', 'insumos.Insumo', ('nombre',), (),
+            ('nombre', 'cantidad', 'estado'),
+        ),
+        Entidad(
+            TerminoBusqueda.ENTIDAD_PROVEEDOR, 'proveedores', 'proveedores.Proveedor', ('nombre', 'nombre_empresa'),
+            ('nit', 'celular'), ('nombre', 'nombre_empresa', 'nit', 'celular', 'estado'),
+        ),
+    ]
+}
+
+
+def normalizar(texto):
+    """Minúsculas sin tildes ni diacríticos ("Peña" -> "pena")"""
+    descompuesto = unicodedata.normalize('NFKD', str(texto or ''))
+    return ''.join(c for c in descompuesto if not unicodedata.combining(c)).casefold()
+
+
+def palabras(texto):
+    return [p[:LARGO_TERMINO] for p in _PALABRA.findall(normalizar(texto))]
+
+
+def codigo(valor):
+    return _SEPARADORES_CODIGO.sub('', normalizar(valor))[:LARGO_TERMINO]
+
+
+def terminos_de(entidad, objeto):
+    terminos = set()
+    for campo in entidad.campos_texto:
+        terminos.update(palabras(getattr(objeto, campo)))
+    for campo in entidad.campos_codigo:
+        valor = codigo(getattr(objeto, campo))
+        if valor:
+            terminos.add(valor)
+    return terminos
+
+
+def terminos_consulta(consulta):
+    """Términos de una consulta; si solo tiene dígitos y separadores es un único código ("300 111 22")"""
+    compacto = codigo(consulta)
+    if compacto.isdigit():
+        return [compacto]
+    return list(dict.fromkeys(palabras(consulta)))[:MAX_TERMINOS_CONSULTA]
+
+
+def _filas(entidad, objetos):
+    return [
+        TerminoBusqueda(entidad=entidad.nombre, objeto_id=objeto.pk, termino=termino)
+        for objeto in objetos
+        for termino in terminos_de(entidad, objeto)
+    ]
+
+
+@transaction.atomic
+def indexar(nombre_entidad, objetos):
+    """Reemplaza los términos de los objetos: un DELETE filtrado y un INSERT por lote"""
+    entidad = ENTIDADES[nombre_entidad]
+    objetos = list(objetos)
+    TerminoBusqueda.objects.filter(entidad=entidad.nombre, objeto_id__in=[o.pk for o in objetos]).delete()
+    filas = _filas(entidad, objetos)
+    TerminoBusqueda.objects.bulk_create(filas, batch_size=TAMANO_LOTE)
+    return len(filas)
+
+
+def desindexar(nombre_entidad, ids):
+    TerminoBusqueda.objects.filter(entidad=nombre_entidad, objeto_id__in=list(ids)).delete()
+
+
+@transaction.atomic
+def reconstruir(nombre_entidad):
+    """Vuelve a indexar todos los registros de la entidad. Retorna cuántos registros se indexaron"""
+    entidad = ENTIDADES[nombre_entidad]
+    TerminoBusqueda.objects.filter(entidad=entidad.nombre).delete()
+    total = 0
+    lote = []
+    objetos = entidad.get_model().objects.only(*entidad.campos).order_by('pk').iterator(chunk_size=TAMANO_LOTE)
+    for objeto in objetos:
+        lote.append(objeto)
+        if len(lote) == TAMANO_LOTE:
+            TerminoBusqueda.objects.bulk_create(_filas(entidad, lote), batch_size=TAMANO_LOTE)
+            total += len(lote)
+            lote = []
+    TerminoBusqueda.objects.bulk_create(_filas(entidad, lote), batch_size=TAMANO_LOTE)
+    return total + len(lote)
+
+
+def _prefijo(termino):
+    return Q(termino__gte=termino, termino__lt=termino + FIN_PREFIJO)
+
+
+def _guia(terminos, nombres_entidades):
+    """
+    Término que recorre la búsqueda: el de menos coincidencias, contando como
+    máximo MUESTRA_SELECTIVIDAD filas por término. None si alguno no coincide con nada.
+    """
+    if len(terminos) == 1:
+        return terminos[0]
+    base = TerminoBusqueda.objects.filter(entidad__in=nombres_entidades)
+    conteos = {t: base.filter(_prefijo(t))[:MUESTRA_SELECTIVIDAD].count() for t in terminos}
+    guia = min(terminos, key=lambda t: (conteos[t], -len(t)))
+    return guia if conteos[guia] else None
+
+
+def _coincidencias(nombre_entidad, terminos, guia):
+    """
+    Filas (objeto_id, termino) del rango del término guía cuyo registro
+    coincide también con los demás términos, en el orden del índice: primero
+    la coincidencia exacta ("ana" antes que "anabel") y luego las palabras más cercanas.
+    """
+    base = TerminoBusqueda.objects.filter(entidad=nombre_entidad)
+    filas = base.filter(_prefijo(guia))
+    for termino in terminos:
+        if termino != guia:
+            filas = filas.filter(Exists(base.filter(_prefijo(termino), objeto_id=OuterRef('objeto_id'))))
+    return filas.order_by('termino', 'objeto_id')
+
+
+def _distintos(filas, limite, ids=None, desde=0):
+    """
+    Hasta `limite` objeto_id distintos de las filas. Un registro puede
+    coincidir con varias de sus palabras: se piden páginas hasta juntarlos.
+    """
+    ids = dict.fromkeys(ids or ())
+    filas = filas.values_list('objeto_id', flat=True)
+    pagina = limite * 2
+    while len(ids) < limite:
+        lote = list(filas[desde:desde + pagina])
+        ids.update(dict.fromkeys(lote))
+        if len(lote) < pagina:
+            break
+        desde += pagina
+    return list(ids)[:limite]
+
+
+def buscar(nombre_entidad, consulta, limite=10):
+    """
+    IDs de los registros de la entidad que coinciden con todos los términos de
+    la consulta, ordenados por relevancia.
+
+    La consulta recorre en orden del índice el rango del término más selectivo
+    y comprueba los demás con un EXISTS por registro, así que se detiene en
+    cuanto junta `limite` resultados.
+    """
+    terminos = terminos_consulta(consulta)
+    if not terminos or limite <= 0:
+        return []
+    guia = _guia(terminos, [nombre_entidad])
+    if guia is None:
+        return []
+    return _distintos(_coincidencias(nombre_entidad, terminos, guia), limite)
+
+
+def _union(consultas):
+    """
+    Ejecuta las consultas como un solo UNION ALL. Cada una conserva su ORDER BY
+    y LIMIT, algo que el ORM no permite en uniones sobre todos los motores.
+    """
+    partes = []
+    parametros = []
+    for i, consulta in enumerate(consultas):
+        sql, params = consulta.query.sql_with_params()
+        partes.append(f'SELECT * FROM ({sql}) AS parte{i}')
+        parametros.extend(params)
+    with connection.cursor() as cursor:
+        cursor.execute(' UNION ALL '.join(partes), parametros)
+        return cursor.fetchall()
+
+
+def buscar_global(consulta, limite=5, nombres_entidades=None):
+    """
+    Búsqueda en varias entidades a la vez: {entidad: [ids por relevancia]}.
+
+    Las coincidencias de todas las entidades salen de una sola consulta al
+    índice (un UNION ALL de un rango limitado por entidad). Solo si un
+    registro aportó varias filas y la página no alcanzó se completa esa
+    entidad con otra consulta.
+    """
+    nombres = list(nombres_entidades or ENTIDADES)
+    terminos = terminos_consulta(consulta)
+    if not terminos or limite <= 0 or not nombres:
+        return {}
+    guia = _guia(terminos, nombres)
+    if guia is None:
+        return {}
+
+    pagina = limite * 2
+    consultas = [
+        _coincidencias(nombre, terminos, guia).values_list('entidad', 'objeto_id', 'termino')[:pagina]
+        for nombre in nombres
+    ]
+    filas = {nombre: [] for nombre in nombres}
+    for entidad, objeto_id, termino in _union(consultas):
+        filas[entidad].append((termino, objeto_id))
+
+    resultados = {}
+    for nombre in nombres:
+        ids = list(dict.fromkeys(objeto_id for _, objeto_id in sorted(filas[nombre])))
+        if len(ids) < limite and len(filas[nombre]) == pagina:
+            ids = _distintos(_coincidencias(nombre, terminos, guia), limite, ids, desde=pagina)
+        if ids:
+            resultados[nombre] = ids[:limite]
+    return resultados
+
+
+def buscar_objetos(nombre_entidad, consulta, limite=10, queryset=None):
+    """Como buscar(), pero retorna las instancias en orden de relevancia"""
+    ids = buscar(nombre_entidad, consulta, limite)
+    if queryset is None:
+        queryset = ENTIDADES[nombre_entidad].get_model().objects.all()
+    por_id = queryset.in_bulk(ids)
+    return [por_id[pk] for pk in ids if pk in por_id]
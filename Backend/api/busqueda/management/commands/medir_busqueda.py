@@ -0,0 +1,84 @@
+import random
+import statistics
+import time as reloj
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Q
+from api.busqueda.indice import buscar, indexar
+from api.busqueda.models import TerminoBusqueda
+from api.clientes.models import Cliente
+
+NOMBRES = ['María', 'Ana', 'Laura', 'Camila', 'Valentina', 'Andrés', 'Juan', 'Carlos', 'Sofía', 'Daniela', 'Mariana', 'Paula']
+APELLIDOS = ['Gómez', 'Rodríguez', 'Martínez', 'López', 'García', 'Pérez', 'Ruiz', 'Torres', 'Díaz', 'Peña', 'Ríos', 'Castro']
+CONSULTAS = ['mar', 'gomez', 'ana torres', '3001', '10000123']
+TAMANO_LOTE = 5000
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide la búsqueda de clientes con N clientes de prueba. Los clientes se crean "
+        "en una transacción que se revierte al terminar: la base de datos queda igual"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clientes', type=int, default=50000, help="Clientes de prueba a crear")
+        parser.add_argument('--repeticiones', type=int, default=50, help="Veces que se ejecuta cada consulta")
+        parser.add_argument('--semilla', type=int, default=1, help="Semilla de los datos generados (resultados reproducibles)")
+        parser.add_argument('--consulta', action='append', dest='consultas', help="Consulta a medir (repetible)")
+        parser.add_argument('--sin-comparar', action='store_true', help="No medir la búsqueda anterior con icontains")
+
+    def handle(self, *args, **options):
+        if options['clientes'] < 1 or options['repeticiones'] < 1:
+            raise CommandError("--clientes y --repeticiones deben ser enteros positivos")
+
+        with transaction.atomic():
+            inicio = reloj.perf_counter()
+            self._sembrar(options['clientes'], random.Random(options['semilla']))
+            self.stdout.write(
+                f"{options['clientes']} clientes creados e indexados en {reloj.perf_counter() - inicio:.1f} s"
+            )
+
+            for consulta in options['consultas'] or CONSULTAS:
+                self._reportar(consulta, 'indice', lambda: buscar('cliente', consulta), options['repeticiones'])
+                if not options['sin_comparar']:
+                    self._reportar(consulta, 'icontains', lambda: self._icontains(consulta), options['repeticiones'])
+
+            transaction.set_rollback(True)
+
+    def _sembrar(self, total, azar):
+        for desde in range(0, total, TAMANO_LOTE):
+            clientes = Cliente.objects.bulk_create([
+                Cliente(
+                    tipo_documento='CC', documento=str(10000000 + i),
+                    nombre=f"{azar.choice(NOMBRES)} {azar.choice(APELLIDOS)} {azar.choice(APELLIDOS)}",
+                    celular=f"3{azar.randrange(10 ** 9):09d}", correo_electronico=f"cliente{i}@prueba.com",
+                    direccion=f"Calle {i % 200}",
+                )
+                for i in range(desde, min(desde + TAMANO_LOTE, total))
+            ])
+            if any(c.pk is None for c in clientes):
+                # Motores que no retornan los ids de un INSERT múltiple (MySQL)
+                clientes = list(Cliente.objects.filter(documento__in=[c.documento for c in clientes]))
+            indexar(TerminoBusqueda.ENTIDAD_CLIENTE, clientes)
+
+    @staticmethod
+    def _icontains(consulta):
+        # La búsqueda que reemplazó el índice, como referencia
+        return list(
+            Cliente.objects.filter(Q(nombre__icontains=consulta) | Q(documento__icontains=consulta))
+            .values_list('id', flat=True)[:10]
+        )
+
+    def _reportar(self, consulta, metodo, funcion, repeticiones):
+        resultados = funcion()  # la primera ejecución calienta la caché del motor
+        tiempos = []
+        for _ in range(repeticiones):
+            inicio = reloj.perf_counter()
+            funcion()
+            tiempos.append((reloj.perf_counter() - inicio) * 1000)
+        tiempos.sort()
+        p95 = tiempos[min(len(tiempos) - 1, int(len(tiempos) * 0.95))]
+        self.stdout.write(
+            f"{consulta!r} [{metodo}]: {len(resultados)} resultados, "
+            f"mediana {statistics.median(tiempos):.2f} ms, p95 {p95:.2f} ms"
+        )
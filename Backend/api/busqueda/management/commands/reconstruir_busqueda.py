@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand, CommandError
+from api.busqueda.indice import ENTIDADES, reconstruir
+
+
+class Command(BaseCommand):
+    help = "Reconstruye desde cero el índice de búsqueda (todas las entidades o las indicadas)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('entidades', nargs='*', help=f"Entidades a reconstruir: {', '.join(sorted(ENTIDADES))}")
+
+    def handle(self, *args, **options):
+        desconocidas = set(options['entidades']) - set(ENTIDADES)
+        if desconocidas:
+            raise CommandError(f"Entidades desconocidas: {', '.join(sorted(desconocidas))}")
+        for nombre in options['entidades'] or sorted(ENTIDADES):
+            total = reconstruir(nombre)
+            self.stdout.write(self.style.SUCCESS(f"{nombre}: {total} registros indexados"))
@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2026-10-19 06:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TerminoBusqueda',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entidad', models.CharField(choices=[('cliente', 'Cliente')], max_length=20)),
+                ('objeto_id', models.PositiveIntegerField()),
+                ('termino', models.CharField(max_length=64)),
+            ],
+            options={
+                'verbose_name': 'Término de búsqueda',
+                'verbose_name_plural': 'Términos de búsqueda',
+                'indexes': [models.Index(fields=['entidad', 'termino', 'objeto_id'], name='busqueda_termino_idx'), models.Index(fields=['entidad', 'objeto_id', 'termino'], name='busqueda_objeto_idx')],
+            },
+        ),
+    ]
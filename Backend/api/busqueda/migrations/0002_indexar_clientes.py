@@ -0,0 +1,30 @@
+from django.db import migrations
+
+
+def indexar_clientes(apps, schema_editor):
+    """Indexa los clientes existentes (los nuevos se indexan al guardarse)"""
+    from api.busqueda.indice import codigo, palabras
+
+    Cliente = apps.get_model('clientes', 'Cliente')
+    TerminoBusqueda = apps.get_model('busqueda', 'TerminoBusqueda')
+
+    filas = []
+    for pk, nombre, documento, celular in Cliente.objects.values_list('pk', 'nombre', 'documento', 'celular').iterator():
+        terminos = set(palabras(nombre)) | {c for c in (codigo(documento), codigo(celular)) if c}
+        filas.extend(TerminoBusqueda(entidad='cliente', objeto_id=pk, termino=t) for t in terminos)
+        if len(filas) >= 5000:
+            TerminoBusqueda.objects.bulk_create(filas)
+            filas = []
+    TerminoBusqueda.objects.bulk_create(filas)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('busqueda', '0001_initial'),
+        ('clientes', '0004_remove_cliente_password_cliente_usuario_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(indexar_clientes, migrations.RunPython.noop),
+    ]
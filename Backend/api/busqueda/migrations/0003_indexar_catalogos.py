@@ -0,0 +1,56 @@
+# Generated by Django 5.2 on 2026-10-19 06:15
+
+from django.db import migrations, models
+
+# (entidad, modelo, campos de texto, campos de código) al momento de esta migración
+CATALOGOS = [
+    ('manicurista', ('manicuristas', 'Manicurista'), ('nombre',), ('numero_documento', 'celular')),
+    ('servicio', ('servicios', 'Servicio'), ('nombre', 'descripcion'), ()),
+    ('insumo', ('insumos', 'Insumo'), ('nombre',), ()),
+    ('proveedor', ('proveedores', 'Proveedor'), ('nombre', 'nombre_empresa'), ('nit', 'celular')),
+]
+
+
+def indexar_catalogos(apps, schema_editor):
+    """Indexa los registros existentes (los nuevos se indexan al guardarse)"""
+    from api.busqueda.indice import codigo, palabras
+
+    TerminoBusqueda = apps.get_model('busqueda', 'TerminoBusqueda')
+    for entidad, modelo, campos_texto, campos_codigo in CATALOGOS:
+        filas = []
+        campos = campos_texto + campos_codigo
+        for pk, *valores in apps.get_model(*modelo).objects.values_list('pk', *campos).iterator():
+            terminos = set()
+            for valor in valores[:len(campos_texto)]:
+                terminos.update(palabras(valor))
+            terminos.update(c for c in map(codigo, valores[len(campos_texto):]) if c)
+            filas.extend(TerminoBusqueda(entidad=entidad, objeto_id=pk, termino=t) for t in terminos)
+            if len(filas) >= 5000:
+                TerminoBusqueda.objects.bulk_create(filas)
+                filas = []
+        TerminoBusqueda.objects.bulk_create(filas)
+
+
+def desindexar_catalogos(apps, schema_editor):
+    TerminoBusqueda = apps.get_model('busqueda', 'TerminoBusqueda')
+    TerminoBusqueda.objects.filter(entidad__in=[c[0] for c in CATALOGOS]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('busqueda', '0002_indexar_clientes'),
+        ('manicuristas', '0003_manicurista_especialidad'),
+        ('servicios', '0002_serviciohasinsumo'),
+        ('insumos', '0005_insumohasproveedor_insumo_costo_promedio_and_more'),
+        ('proveedores', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='terminobusqueda',
+            name='entidad',
+            field=models.CharField(choices=[('cliente', 'Cliente'), ('manicurista', 'Manicurista'), ('servicio', 'Servicio'), ('insumo', 'Insumo'), ('proveedor', 'Proveedor')], max_length=20),
+        ),
+        migrations.RunPython(indexar_catalogos, desindexar_catalogos),
+    ]
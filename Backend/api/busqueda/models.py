@@ -0,0 +1,40 @@
+from django.db import models
+
+
+class TerminoBusqueda(models.Model):
+    """
+    Índice invertido: un término normalizado (palabra sin tildes en minúscula,
+    o un código completo como documento o celular) por cada registro que lo
+    contiene. Es una tabla derivada: se mantiene con las señales de
+    signals.py y se puede reconstruir con el comando reconstruir_busqueda.
+    """
+    ENTIDAD_CLIENTE = 'cliente'
+    ENTIDAD_MANICURISTA = 'manicurista'
+    ENTIDAD_SERVICIO = 'servicio'
+    ENTIDAD_INSUMO = 'insumo'
+    ENTIDAD_PROVEEDOR = 'proveedor'
+    ENTIDAD_CHOICES = [
+        (ENTIDAD_CLIENTE, 'Cliente'),
+        (ENTIDAD_MANICURISTA, 'Manicurista'),
+        (ENTIDAD_SERVICIO, 'Servicio'),
+        (ENTIDAD_INSUMO, 'Insumo'),
+        (ENTIDAD_PROVEEDOR, 'Proveedor'),
+    ]
+
+    entidad = models.CharField(max_length=20, choices=ENTIDAD_CHOICES)
+    objeto_id = models.PositiveIntegerField()
+    termino = models.CharField(max_length=64)
+
+    class Meta:
+        verbose_name = "Término de búsqueda"
+        verbose_name_plural = "Términos de búsqueda"
+        indexes = [
+            # Búsqueda por prefijo: rango sobre termino recorrido en orden, solo con el índice
+            models.Index(fields=['entidad', 'termino', 'objeto_id'], name='busqueda_termino_idx'),
+            # Comprobar los demás términos de un registro y reindexarlo
+            models.Index(fields=['entidad', 'objeto_id', 'termino'], name='busqueda_objeto_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.entidad} {self.objeto_id}: {self.termino}"
+
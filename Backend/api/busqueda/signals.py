@@ -0,0 +1,23 @@
+from django.db.models.signals import post_delete, post_save
+
+from .indice import ENTIDADES, desindexar, indexar
+
+# {modelo: entidad} de los modelos indexados
+_POR_MODELO = {entidad.get_model(): entidad for entidad in ENTIDADES.values()}
+
+
+def indexar_al_guardar(sender, instance, update_fields=None, **kwargs):
+    entidad = _POR_MODELO[sender]
+    # Guardados parciales que no tocan campos indexados (contraseñas, usuario, stock) no reindexan
+    if update_fields is not None and not set(update_fields) & set(entidad.campos):
+        return
+    indexar(entidad.nombre, [instance])
+
+
+def desindexar_al_eliminar(sender, instance, **kwargs):
+    desindexar(_POR_MODELO[sender].nombre, [instance.pk])
+
+
+for _modelo, _entidad in _POR_MODELO.items():
+    post_save.connect(indexar_al_guardar, sender=_modelo, dispatch_uid=f'busqueda_indexar_{_entidad.nombre}')
+    post_delete.connect(desindexar_al_eliminar, sender=_modelo, dispatch_uid=f'busqueda_desindexar_{_entidad.nombre}')
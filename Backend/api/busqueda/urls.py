@@ -0,0 +1,10 @@
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from .views import BusquedaViewSet
+
+router = DefaultRouter()
+router.register(r'', BusquedaViewSet, basename='buscar')
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
@@ -0,0 +1,48 @@
+from rest_framework import viewsets, status
+from rest_framework.response import Response
+from .indice import ENTIDADES, buscar_global
+
+_POR_GRUPO = {entidad.grupo: entidad for entidad in ENTIDADES.values()}
+
+
+class BusquedaViewSet(viewsets.ViewSet):
+    """
+    Búsqueda global para el buscador de recepción: clientes, manicuristas,
+    servicios, insumos y proveedores en una sola petición.
+    Parámetros: q (requerido), limite por grupo (por defecto 5, máximo 20) y
+    grupos (opcional, separados por coma: clientes,manicuristas,...).
+    Cada palabra de q se busca como prefijo, sin distinguir tildes ni mayúsculas.
+    """
+
+    def list(self, request):
+        query = request.query_params.get('q', '')
+        if not query.strip():
+            return Response({"error": "Se requiere el parámetro q"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limite = max(1, min(int(request.query_params.get('limite', 5)), 20))
+        except ValueError:
+            return Response(
+                {"error": "El parámetro limite debe ser un número entero"}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        grupos = [g.strip() for g in request.query_params.get('grupos', '').split(',') if g.strip()]
+        desconocidos = [g for g in grupos if g not in _POR_GRUPO]
+        if desconocidos:
+            return Response(
+                {"error": f"Grupos desconocidos: {', '.join(desconocidos)}. Opciones: {', '.join(_POR_GRUPO)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        entidades = [_POR_GRUPO[g] for g in grupos] or list(ENTIDADES.values())
+
+        ids = buscar_global(query, limite, [e.nombre for e in entidades])
+        resultados = {}
+        for entidad in entidades:
+            encontrados = ids.get(entidad.nombre, [])
+            filas = {}
+            if encontrados:
+                filas = {
+                    fila['id']: fila
+                    for fila in entidad.get_model().objects.filter(pk__in=encontrados).values('id', *entidad.campos_resultado)
+                }
+            resultados[entidad.grupo] = [filas[pk] for pk in encontrados if pk in filas]
+        return Response(resultados)
@@ -0,0 +1,256 @@
+"""
+Búsqueda automática de horarios para una cita con varios servicios.
+
+La agenda de la ventana se vuelca a matrices booleanas (manicuristas x días x
+minutos del día) y todas las comprobaciones se hacen vectorizadas con numpy:
+
+- Una suma acumulada de los minutos ocupados dice en O(1) si un intervalo
+  [inicio, inicio + duración) está libre, para todos los inicios a la vez.
+- Los inicios válidos son los turnos de la grilla de cada manicurista.
+- Opcionalmente los servicios se dividen entre dos manicuristas seguidas: la
+  primera atiende los primeros servicios y la segunda continúa sin espera.
+
+Las opciones se ordenan por inicio más temprano y, a igual inicio, por la que
+menos fragmenta el día de la manicurista (huecos tan cortos que ya no caben
+servicios).
+"""
+from datetime import timedelta
+import numpy as np
+from api.horarios.grillas import obtener_grilla
+from api.manicuristas.models import Manicurista
+from api.novedades.impacto import ESTADOS_ABIERTOS, bloqueo
+from api.novedades.models import Novedad
+from api.servicios.models import Servicio
+from .models import Cita
+
+MINUTOS_DIA = 24 * 60
+
+
+def _a_hora(minuto):
+    return f"{minuto // 60:02d}:{minuto % 60:02d}"
+
+
+def _duracion(cita):
+    return cita[3] or cita[4] or 0
+
+
+class _Agenda:
+    """Matrices de la ventana: libre (jornada sin citas ni novedades), turnos y cliente libre"""
+
+    def __init__(self, manicuristas, fechas, cliente_id):
+        self.manicuristas = manicuristas
+        self.fechas = fechas
+        self.indice_m = {m.id: i for i, m in enumerate(manicuristas)}
+        self.indice_d = {f: i for i, f in enumerate(fechas)}
+        forma = (len(manicuristas), len(fechas), MINUTOS_DIA)
+
+        self.libre = np.zeros(forma, dtype=bool)
+        self.turno = np.zeros(forma, dtype=bool)
+        self.cliente_libre = np.ones((len(fechas), MINUTOS_DIA), dtype=bool)
+
+        for m in manicuristas:
+            for f in fechas:
+                grilla = obtener_grilla(m.id, f)
+                if grilla.abierta:
+                    i, d = self.indice_m[m.id], self.indice_d[f]
+                    self.libre[i, d, grilla.inicio:grilla.fin] = True
+                    self.turno[i, d, list(grilla.minutos)] = True
+
+        citas = Cita.objects.filter(fecha_cita__in=fechas, estado__in=ESTADOS_ABIERTOS).values_list(
+            'manicurista_id', 'cliente_id', 'fecha_cita', 'duracion_total', 'duracion_estimada', 'hora_cita'
+        )
+        for cita in citas:
+            manicurista_id, cita_cliente, fecha, hora = cita[0], cita[1], cita[2], cita[5]
+            inicio = hora.hour * 60 + hora.minute
+            fin = min(inicio + _duracion(cita), MINUTOS_DIA)
+            d = self.indice_d[fecha]
+            if manicurista_id in self.indice_m:
+                self.libre[self.indice_m[manicurista_id], d, inicio:fin] = False
+            if cita_cliente == cliente_id:
+                self.cliente_libre[d, inicio:fin] = False
+
+        novedades = Novedad.objects.filter(
+            fecha__in=fechas, manicurista_id__in=self.indice_m
+        ).exclude(estado='anulada')
+        for novedad in novedades:
+            intervalo = bloqueo(novedad)
+            if intervalo:
+                self.libre[self.indice_m[novedad.manicurista_id], self.indice_d[novedad.fecha], intervalo[0]:intervalo[1]] = False
+
+        # Sumas acumuladas de minutos no disponibles (con un 0 al inicio para restar sin casos borde)
+        disponible = self.libre & self.cliente_libre[None, :, :]
+        self._ocupado_acumulado = np.concatenate(
+            [np.zeros(forma[:2] + (1,), dtype=np.int32), np.cumsum(~disponible, axis=2, dtype=np.int32)], axis=2
+        )
+
+        # Límites del tramo libre de la manicurista alrededor de cada minuto (solo su agenda, no la del cliente)
+        posiciones = np.arange(MINUTOS_DIA)
+        ocupado = ~self.libre
+        self.ultimo_ocupado = np.maximum.accumulate(np.where(ocupado, posiciones, -1), axis=2)
+        siguiente = np.where(ocupado, posiciones, MINUTOS_DIA)[..., ::-1]
+        self.siguiente_ocupado = np.minimum.accumulate(siguiente, axis=2)[..., ::-1]
+
+    def ventana_libre(self, duracion):
+        """libre[m, d, s]: el intervalo [s, s + duracion) está libre (s < MINUTOS_DIA - duracion + 1)"""
+        acumulado = self._ocupado_acumulado
+        return (acumulado[..., duracion:] - acumulado[..., :-duracion]) == 0
+
+    def huecos(self, m, d, inicio, fin, minimo):
+        """
+        Huecos que deja el intervalo [inicio, fin) dentro del tramo libre de la
+        manicurista: (cantidad de huecos inservibles, minutos inservibles).
+        Todos los argumentos son arreglos del mismo tamaño.
+        """
+        tramo_inicio = np.where(inicio > 0, self.ultimo_ocupado[m, d, np.maximum(inicio - 1, 0)] + 1, 0)
+        tramo_fin = np.where(fin < MINUTOS_DIA, self.siguiente_ocupado[m, d, np.minimum(fin, MINUTOS_DIA - 1)], MINUTOS_DIA)
+        antes = inicio - tramo_inicio
+        despues = tramo_fin - fin
+        inservible_antes = (antes > 0) & (antes < minimo)
+        inservible_despues = (despues > 0) & (despues < minimo)
+        cantidad = inservible_antes.astype(np.int32) + inservible_despues
+        minutos = np.where(inservible_antes, antes, 0) + np.where(inservible_despues, despues, 0)
+        return cantidad, minutos
+
+
+def _desde(agenda, ahora):
+    """Minuto mínimo de inicio por día (no se ofrecen horas ya pasadas)"""
+    desde = np.zeros(len(agenda.fechas), dtype=np.int32)
+    if ahora is not None and ahora.date() in agenda.indice_d:
+        desde[agenda.indice_d[ahora.date()]] = ahora.hour * 60 + ahora.minute + 1
+    return desde
+
+
+def _inicios(agenda, ultimo, desde):
+    """
+    Minutos candidatos a inicio: solo los que son turno de alguna manicurista
+    (unas decenas en lugar de 1440). Retorna (minutos, validos[m, d, columna])
+    con los turnos de cada manicurista que no están en el pasado.
+    """
+    columnas = np.nonzero(agenda.turno[..., :ultimo].any(axis=(0, 1)))[0]
+    validos = agenda.turno[..., columnas] & (columnas[None, None, :] >= desde[None, :, None])
+    return columnas, validos
+
+
+def _opciones_una(agenda, duracion, desde, minimo):
+    columnas, validos = _inicios(agenda, MINUTOS_DIA - duracion + 1, desde)
+    validos &= agenda.ventana_libre(duracion)[..., columnas]
+    m, d, c = np.nonzero(validos)
+    s = columnas[c]
+    cantidad, muertos = agenda.huecos(m, d, s, s + duracion, minimo)
+    return {'m': m, 'd': d, 's': s, 'cantidad': cantidad, 'muertos': muertos}
+
+
+def _opciones_divididas(agenda, duraciones, desde, minimo):
+    """Para cada corte de la lista de servicios: la primera parte con m1 y la segunda con m2 != m1 justo después"""
+    resultados = []
+    total = sum(duraciones)
+    n_m = len(agenda.manicuristas)
+    if n_m < 2:
+        return resultados
+    distintas = ~np.eye(n_m, dtype=bool)
+
+    for corte in range(1, len(duraciones)):
+        primera = sum(duraciones[:corte])
+        segunda = total - primera
+        ultimo = MINUTOS_DIA - total + 1
+        if ultimo <= 0:
+            continue
+        columnas, inicio_a = _inicios(agenda, ultimo, desde)
+        inicio_a &= agenda.ventana_libre(primera)[..., columnas]
+        inicio_b = agenda.ventana_libre(segunda)[..., columnas + primera]
+        # (m1, m2, d, inicio): la segunda continúa justo cuando termina la primera
+        pares = inicio_a[:, None] & inicio_b[None, :] & distintas[:, :, None, None]
+        m1, m2, d, c = np.nonzero(pares)
+        s = columnas[c]
+        cantidad_a, muertos_a = agenda.huecos(m1, d, s, s + primera, minimo)
+        cantidad_b, muertos_b = agenda.huecos(m2, d, s + primera, s + total, minimo)
+        resultados.append({
+            'corte': corte, 'primera': primera, 'm': m1, 'm2': m2, 'd': d, 's': s,
+            'cantidad': cantidad_a + cantidad_b, 'muertos': muertos_a + muertos_b,
+        })
+    return resultados
+
+
+def buscar_opciones(cliente_id, servicios, fecha_inicio, fecha_fin, opciones=5, permitir_division=False, ahora=None):
+    """
+    Mejores `opciones` horarios para atender los `servicios` (en orden) al
+    cliente entre fecha_inicio y fecha_fin. Cada opción tiene uno o dos tramos
+    (manicurista, servicios, hora de inicio y fin). Se ofrece a lo sumo una
+    opción por fecha y hora de inicio: la que menos fragmenta la agenda.
+    """
+    fechas = [fecha_inicio + timedelta(days=i) for i in range((fecha_fin - fecha_inicio).days + 1)]
+    duraciones = [s.duracion for s in servicios]
+    total = sum(duraciones)
+    manicuristas = list(Manicurista.objects.filter(estado='activo', disponible=True).order_by('id'))
+    if not manicuristas or not fechas or not 0 < total <= MINUTOS_DIA:
+        return []
+
+    # Un hueco más corto que el servicio activo más breve ya no se puede vender
+    minimo = min(
+        Servicio.objects.filter(estado=Servicio.ESTADO_ACTIVO).order_by('duracion').values_list('duracion', flat=True)[:1]
+        or [min(duraciones)]
+    )
+
+    agenda = _Agenda(manicuristas, fechas, cliente_id)
+    desde = _desde(agenda, ahora)
+
+    grupos = [dict(_opciones_una(agenda, total, desde, minimo), corte=None, tramos=1)]
+    if permitir_division and len(servicios) > 1:
+        grupos += [dict(g, tramos=2) for g in _opciones_divididas(agenda, duraciones, desde, minimo)]
+
+    # Orden: día, minuto de inicio, una sola manicurista antes que dos, huecos inservibles, minutos perdidos
+    candidatas = []
+    for indice, grupo in enumerate(grupos):
+        n = len(grupo['s'])
+        if not n:
+            continue
+        candidatas.append(np.stack([
+            grupo['d'], grupo['s'], np.full(n, grupo['tramos']), grupo['cantidad'], grupo['muertos'],
+            np.full(n, indice), np.arange(n)
+        ], axis=1))
+    if not candidatas:
+        return []
+    tabla = np.concatenate(candidatas)
+    tabla = tabla[np.lexsort(tabla[:, 4::-1].T)]
+
+    resultado = []
+    vistos = set()
+    for d, s, _, cantidad, muertos, indice, fila in tabla:
+        if (d, s) in vistos:
+            continue
+        vistos.add((d, s))
+        resultado.append(_opcion(agenda, servicios, grupos[indice], fila, int(d), int(s), int(cantidad), int(muertos)))
+        if len(resultado) == opciones:
+            break
+    return resultado
+
+
+def _opcion(agenda, servicios, grupo, fila, d, s, cantidad, muertos):
+    def tramo(m, lista, inicio):
+        manicurista = agenda.manicuristas[m]
+        fin = inicio + sum(x.duracion for x in lista)
+        return {
+            'manicurista': manicurista.id,
+            'manicurista_nombre': manicurista.nombre,
+            'servicios': [x.id for x in lista],
+            'hora_inicio': _a_hora(inicio),
+            'hora_fin': _a_hora(fin),
+        }
+
+    m = int(grupo['m'][fila])
+    if grupo['corte'] is None:
+        tramos = [tramo(m, servicios, s)]
+    else:
+        corte = grupo['corte']
+        tramos = [
+            tramo(m, servicios[:corte], s),
+            tramo(int(grupo['m2'][fila]), servicios[corte:], s + grupo['primera']),
+        ]
+    return {
+        'fecha': agenda.fechas[d],
+        'hora_inicio': tramos[0]['hora_inicio'],
+        'hora_fin': tramos[-1]['hora_fin'],
+        'tramos': tramos,
+        'huecos_inservibles': cantidad,
+        'minutos_inservibles': muertos,
+    }
@@ -0,0 +1,191 @@
+"""
+Simulación de capacidad: cuántas manicuristas programar cada día de la semana.
+
+1. Ajuste: con una consulta al historial de citas se estima, por día de la
+   semana, la llegada media de citas por día (Poisson), la distribución de la
+   hora pedida sobre los turnos de la grilla y la mezcla de servicios (pares
+   duración total / precio total de cada cita, que resumen sus servicios).
+2. Simulación: para cada (día de la semana, dotación) se generan miles de días
+   sintéticos a la vez con numpy. Las citas de todas las réplicas se asignan en
+   paralelo, una posición de llegada por iteración; si ninguna manicurista está
+   libre a la hora pedida la cita se pierde.
+
+Las configuraciones son independientes y se reparten en un pool de procesos.
+El módulo no importa modelos al cargarse para que los procesos hijos no
+necesiten inicializar Django.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import timedelta
+import numpy as np
+
+DIAS_SEMANA = ['lunes', 'martes', 'miércoles', 'jueves', 'viernes', 'sábado', 'domingo']
+# Con menos citas que esto en un día de la semana se usa la mezcla de servicios de toda la semana
+MIN_MUESTRA_MEZCLA = 30
+
+
+@dataclass
+class Demanda:
+    """Demanda ajustada de un día de la semana (solo arreglos numpy, para enviarla a otros procesos)"""
+    dia_semana: int
+    llegadas_media: float
+    apertura: int           # minuto del día
+    cierre: int
+    intervalo: int
+    prob_turnos: np.ndarray
+    duraciones: np.ndarray
+    precios: np.ndarray
+
+
+def ajustar_demanda(dias=180, hoy=None):
+    """Ajusta la demanda de cada día de la semana con las citas de los últimos `dias` días"""
+    from django.utils import timezone
+    from api.horarios.grillas import obtener_grilla
+    from .models import Cita
+
+    hoy = hoy or timezone.localdate()
+    fecha_inicio = hoy - timedelta(days=dias)
+    filas = list(
+        Cita.objects
+        .filter(fecha_cita__gte=fecha_inicio, fecha_cita__lt=hoy)
+        .exclude(estado='cancelada')
+        .values_list('fecha_cita', 'hora_cita', 'duracion_total', 'duracion_estimada', 'precio_total')
+    )
+    n = len(filas)
+    dia = np.fromiter((f[0].weekday() for f in filas), dtype=np.int64, count=n)
+    minuto = np.fromiter((f[1].hour * 60 + f[1].minute for f in filas), dtype=np.int64, count=n)
+    duracion = np.fromiter((f[2] or f[3] or 0 for f in filas), dtype=np.int64, count=n)
+    precio = np.fromiter((f[4] or 0 for f in filas), dtype=float, count=n)
+
+    ocurrencias = np.bincount([(fecha_inicio + timedelta(days=i)).weekday() for i in range(dias)], minlength=7)
+    demanda = {}
+    for dia_semana in range(7):
+        # Jornada general del spa ese día de la semana (próxima fecha que cae en él)
+        fecha = hoy + timedelta(days=(dia_semana - hoy.weekday()) % 7)
+        grilla = obtener_grilla(None, fecha)
+        if not grilla.abierta:
+            continue
+
+        del_dia = dia == dia_semana
+        turnos = np.clip((minuto[del_dia] - grilla.inicio) // grilla.intervalo, 0, len(grilla.minutos) - 1)
+        conteo = np.bincount(turnos, minlength=len(grilla.minutos)).astype(float)
+        prob_turnos = conteo / conteo.sum() if conteo.sum() else np.full(len(grilla.minutos), 1 / len(grilla.minutos))
+
+        mezcla = del_dia if del_dia.sum() >= MIN_MUESTRA_MEZCLA else np.ones(n, dtype=bool)
+        demanda[dia_semana] = Demanda(
+            dia_semana=dia_semana,
+            llegadas_media=del_dia.sum() / ocurrencias[dia_semana] if ocurrencias[dia_semana] else 0.0,
+            apertura=grilla.inicio,
+            cierre=grilla.fin,
+            intervalo=grilla.intervalo,
+            prob_turnos=prob_turnos,
+            duraciones=duracion[mezcla],
+            precios=precio[mezcla],
+        )
+    return demanda
+
+
+def simular_dia(demanda, dotacion, replicas, semilla=None):
+    """Métricas de `replicas` días sintéticos con `dotacion` manicuristas"""
+    rng = np.random.default_rng(semilla)
+    jornada = demanda.cierre - demanda.apertura
+    resultado = {
+        'dotacion': dotacion,
+        'citas_demandadas': 0.0,
+        'citas_atendidas': 0.0,
+        'utilizacion': 0.0,
+        'tasa_rechazo': 0.0,
+        'ingresos_esperados': 0.0,
+        'ingresos_p10': 0.0,
+        'ingresos_p90': 0.0,
+    }
+    if demanda.llegadas_media <= 0 or not len(demanda.duraciones):
+        return resultado
+
+    llegadas = rng.poisson(demanda.llegadas_media, replicas)
+    k = int(llegadas.max())
+    if k == 0:
+        return resultado
+
+    # Matrices (réplicas x llegadas); las posiciones más allá de llegadas[r] quedan inactivas
+    activa = np.arange(k)[None, :] < llegadas[:, None]
+    inicio = demanda.apertura + rng.choice(len(demanda.prob_turnos), size=(replicas, k), p=demanda.prob_turnos) * demanda.intervalo
+    mezcla = rng.integers(0, len(demanda.duraciones), size=(replicas, k))
+    duracion = demanda.duraciones[mezcla]
+    precio = demanda.precios[mezcla]
+
+    orden = np.argsort(np.where(activa, inicio, np.iinfo(np.int64).max), axis=1, kind='stable')
+    inicio = np.take_along_axis(inicio, orden, axis=1)
+    duracion = np.take_along_axis(duracion, orden, axis=1)
+    precio = np.take_along_axis(precio, orden, axis=1)
+    activa = np.take_along_axis(activa, orden, axis=1)
+
+    libre_desde = np.full((replicas, dotacion), demanda.apertura, dtype=np.int64)
+    aceptada = np.zeros((replicas, k), dtype=bool)
+    filas = np.arange(replicas)
+    for j in range(k):
+        hora = inicio[:, j]
+        fin = hora + duracion[:, j]
+        libres = libre_desde <= hora[:, None]
+        # Entre las libres, la que quedó libre más tarde: deja menos tiempo muerto
+        elegida = np.where(libres, libre_desde, -1).argmax(axis=1)
+        ok = activa[:, j] & libres.any(axis=1) & (fin <= demanda.cierre)
+        libre_desde[filas[ok], elegida[ok]] = fin[ok]
+        aceptada[:, j] = ok
+
+    ingresos = (precio * aceptada).sum(axis=1)
+    demandadas = activa.sum()
+    atendidas = aceptada.sum()
+    resultado.update({
+        'citas_demandadas': round(float(demandadas) / replicas, 2),
+        'citas_atendidas': round(float(atendidas) / replicas, 2),
+        'utilizacion': round(float((duracion * aceptada).sum()) / (replicas * dotacion * jornada), 4),
+        'tasa_rechazo': round(float(demandadas - atendidas) / demandadas, 4),
+        'ingresos_esperados': round(float(ingresos.mean()), 2),
+        'ingresos_p10': round(float(np.percentile(ingresos, 10)), 2),
+        'ingresos_p90': round(float(np.percentile(ingresos, 90)), 2),
+    })
+    return resultado
+
+
+def _simular_tarea(tarea):
+    demanda, dotacion, replicas, semilla = tarea
+    return demanda.dia_semana, simular_dia(demanda, dotacion, replicas, semilla)
+
+
+def simular_capacidad(dotaciones, dias=180, replicas=1000, rechazo_maximo=0.05, semilla=None, procesos=1, hoy=None):
+    """
+    Simula cada día de la semana abierto con cada dotación de `dotaciones`.
+    Con procesos > 1 las configuraciones se reparten en un pool de procesos.
+    Retorna una lista por día de la semana con la demanda ajustada, las
+    métricas de cada dotación y la menor dotación con rechazo <= rechazo_maximo.
+    """
+    demanda = ajustar_demanda(dias, hoy)
+    dotaciones = sorted(set(dotaciones))
+    tareas = [(d, n) for d in demanda.values() for n in dotaciones]
+    semillas = np.random.SeedSequence(semilla).spawn(len(tareas))
+    tareas = [(d, n, replicas, s) for (d, n), s in zip(tareas, semillas)]
+
+    procesos = min(procesos or os.cpu_count() or 1, len(tareas))
+    if procesos > 1:
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            resultados = list(pool.map(_simular_tarea, tareas))
+    else:
+        resultados = [_simular_tarea(t) for t in tareas]
+
+    por_dia = {}
+    for dia_semana, metricas in resultados:
+        por_dia.setdefault(dia_semana, []).append(metricas)
+
+    reporte = []
+    for dia_semana, configuraciones in por_dia.items():
+        suficientes = [c['dotacion'] for c in configuraciones if c['tasa_rechazo'] <= rechazo_maximo]
+        reporte.append({
+            'dia_semana': dia_semana,
+            'dia': DIAS_SEMANA[dia_semana],
+            'citas_por_dia': round(float(demanda[dia_semana].llegadas_media), 2),
+            'configuraciones': configuraciones,
+            'dotacion_recomendada': min(suficientes) if suficientes else None,
+        })
+    return reporte
@@ -0,0 +1,83 @@
+import logging
+from django.db.models import Sum
+from api.insumos.models import MovimientoInsumo
+from api.insumos.stock import registrar_movimientos, StockInsuficienteError
+from api.servicios.models import ServicioHasInsumo
+
+logger = logging.getLogger(__name__)
+
+
+def _limitar_a_disponible(movimientos, faltantes):
+    """
+    Reduce los consumos de los insumos sin stock suficiente a lo que realmente hay,
+    repartiéndolo en el orden de las citas. El servicio ya se prestó, así que la
+    cita no se bloquea: la diferencia queda anotada en el motivo del movimiento.
+    """
+    disponible = {f['insumo_id']: f['disponible'] for f in faltantes}
+    for movimiento in movimientos:
+        if movimiento.insumo_id not in disponible:
+            continue
+        solicitado = -movimiento.cantidad
+        usado = min(solicitado, disponible[movimiento.insumo_id])
+        disponible[movimiento.insumo_id] -= usado
+        if usado < solicitado:
+            movimiento.cantidad = -usado
+            movimiento.motivo = f"Consumo parcial: faltaron {solicitado - usado} unidades en stock"
+    return movimientos
+
+
+def registrar_consumo_citas(cita_ids):
+    """
+    Descuenta del inventario los insumos que consumen los servicios de las citas
+    finalizadas, según la receta (ServicioHasInsumo) de cada servicio.
+
+    - Una consulta agrupada calcula el consumo por (cita, insumo) de todo el lote.
+    - Un único UPDATE descuenta el stock de todos los insumos y un bulk_create
+      registra un movimiento por cita e insumo.
+    - Las citas que ya tienen consumo registrado se omiten, por lo que es seguro
+      llamarla más de una vez para la misma cita.
+
+    Debe llamarse después del commit de la finalización (transaction.on_commit).
+    Retorna la lista de movimientos creados.
+    """
+    cita_ids = set(cita_ids)
+    ya_registradas = set(
+        MovimientoInsumo.objects.filter(
+            cita_id__in=cita_ids,
+            tipo=MovimientoInsumo.TIPO_CONSUMO_SERVICIO
+        ).values_list('cita_id', flat=True)
+    )
+    pendientes = cita_ids - ya_registradas
+    if not pendientes:
+        return []
+
+    consumos = (
+        ServicioHasInsumo.objects
+        .filter(servicio__cita__in=pendientes)
+        .values('servicio__cita', 'insumo_id')
+        .annotate(total=Sum('cantidad'))
+        .order_by('servicio__cita', 'insumo_id')
+    )
+    movimientos = [
+        MovimientoInsumo(
+            insumo_id=consumo['insumo_id'],
+            tipo=MovimientoInsumo.TIPO_CONSUMO_SERVICIO,
+            cantidad=-consumo['total'],
+            cita_id=consumo['servicio__cita']
+        )
+        for consumo in consumos
+    ]
+
+    try:
+        return registrar_movimientos(movimientos)
+    except StockInsuficienteError as e:
+        movimientos = _limitar_a_disponible(movimientos, e.faltantes)
+
+    try:
+        return registrar_movimientos(movimientos)
+    except StockInsuficienteError as e:
+        # El stock cambió entre los dos intentos. La finalización ya se confirmó, así que
+        # no se relanza: las citas quedan sin consumo y la conciliación ('consumos') las
+        # reporta y lo vuelve a intentar al corregir
+        logger.error("No se registró el consumo de insumos de las citas %s: %s", sorted(pendientes), e)
+        return []
@@ -0,0 +1,45 @@
+import os
+from django.core.management.base import BaseCommand, CommandError
+from api.citas.capacidad import simular_capacidad
+
+
+class Command(BaseCommand):
+    help = "Simula con el historial de citas cuántas manicuristas programar cada día de la semana"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dotaciones', default='1,2,3,4,5,6', help="Cantidades de manicuristas a evaluar, separadas por coma")
+        parser.add_argument('--dias', type=int, default=180, help="Días de historial para ajustar la demanda")
+        parser.add_argument('--replicas', type=int, default=5000, help="Días sintéticos por configuración")
+        parser.add_argument('--rechazo-maximo', type=float, default=0.05, help="Tasa de rechazo aceptable para recomendar")
+        parser.add_argument('--semilla', type=int, default=None, help="Semilla para resultados reproducibles")
+        parser.add_argument('--procesos', type=int, default=os.cpu_count(), help="Procesos en paralelo")
+
+    def handle(self, *args, **options):
+        try:
+            dotaciones = [int(n) for n in options['dotaciones'].split(',') if n.strip()]
+        except ValueError:
+            raise CommandError("--dotaciones debe ser una lista de enteros separados por coma")
+        if not dotaciones or min(dotaciones) < 1:
+            raise CommandError("--dotaciones debe tener al menos un entero positivo")
+        if options['semilla'] is not None and options['semilla'] < 0:
+            raise CommandError("--semilla debe ser un entero no negativo")
+
+        reporte = simular_capacidad(
+            dotaciones,
+            dias=options['dias'],
+            replicas=options['replicas'],
+            rechazo_maximo=options['rechazo_maximo'],
+            semilla=options['semilla'],
+            procesos=options['procesos'],
+        )
+
+        for dia in reporte:
+            self.stdout.write(self.style.SUCCESS(
+                f"{dia['dia']}: {dia['citas_por_dia']} citas/día, recomendado {dia['dotacion_recomendada'] or 'más de ' + str(max(dotaciones))}"
+            ))
+            for c in dia['configuraciones']:
+                self.stdout.write(
+                    f"  {c['dotacion']} manicuristas: utilización {c['utilizacion']:.0%}, "
+                    f"rechazo {c['tasa_rechazo']:.1%}, ingresos {c['ingresos_esperados']:,.0f} "
+                    f"(p10 {c['ingresos_p10']:,.0f} - p90 {c['ingresos_p90']:,.0f})"
+                )
@@ -5,6 +5,7 @@ from api.base.base import BaseModel
 from api.clientes.models import Cliente
 from api.servicios.models import Servicio
 from api.manicuristas.models import Manicurista
+from api.horarios.grillas import obtener_grilla
 from datetime import datetime, time
 
 
@@ -119,11 +120,11 @@ class Cita(BaseModel):
         if self.fecha_cita and self.fecha_cita < datetime.now().date():
             raise ValidationError({'fecha_cita': 'La fecha de la cita no puede ser en el pasado'})
         
-        # Validar horario de trabajo (10:00 AM - 8:00 PM)
-        if self.hora_cita:
-            # --- CAMBIO AQUÍ: Horario de 10:00 AM a 8:00 PM ---
-            if self.hora_cita < time(10, 0) or self.hora_cita >= time(20, 0):
-                raise ValidationError({'hora_cita': 'La hora debe estar entre 10:00 AM y 8:00 PM'})
+        # Validar horario de trabajo de la manicurista ese día
+        if self.hora_cita and self.fecha_cita and self.manicurista_id:
+            grilla = obtener_grilla(self.manicurista_id, self.fecha_cita)
+            if not grilla.en_jornada(self.hora_cita):
+                raise ValidationError({'hora_cita': f'La hora debe estar dentro de la jornada ({grilla.descripcion})'})
         
         # Validar que la manicurista esté disponible
         if self.manicurista and self.manicurista.estado != 'activo':
@@ -8,6 +8,9 @@ from api.manicuristas.models import Manicurista
 from api.clientes.serializers import ClienteSerializer
 from api.servicios.serializers import ServicioSerializer
 from api.manicuristas.serializers import ManicuristaSerializer
+from api.horarios.grillas import obtener_grilla
+from api.base.campos import PKRelacionadoField
+from api.base.sincronizacion import sincronizar
 
 
 class CitaSerializer(serializers.ModelSerializer):
@@ -25,7 +28,7 @@ class CitaSerializer(serializers.ModelSerializer):
     puede_cancelar = serializers.ReadOnlyField()
     
     # NUEVO: Campos para múltiples servicios
-    servicios = serializers.PrimaryKeyRelatedField(
+    servicios = PKRelacionadoField(
         queryset=Servicio.objects.filter(estado='activo'),
         many=True,
         required=False
@@ -41,13 +44,6 @@ class CitaSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("La fecha de la cita no puede ser en el pasado")
         return value
 
-    def validate_hora_cita(self, value):
-        """Validar horario de trabajo"""
-        # --- CAMBIO AQUÍ: Horario de 10:00 AM a 8:00 PM ---
-        if value < time(10, 0) or value >= time(20, 0):
-            raise serializers.ValidationError("La hora debe estar entre 10:00 AM y 8:00 PM")
-        return value
-
     def validate_cliente(self, value):
         """Validar que el cliente esté activo"""
         if not value.estado:
@@ -69,21 +65,24 @@ class CitaSerializer(serializers.ModelSerializer):
         return value
 
     def validate_servicios(self, value):
-        """Validar que todos los servicios estén activos"""
+        """Validar que se seleccionen servicios (el campo ya descarta los inactivos)"""
         if not value:
             raise serializers.ValidationError("Debe seleccionar al menos un servicio")
-        
-        for servicio in value:
-            if servicio.estado != 'activo':
-                raise serializers.ValidationError(f"El servicio '{servicio.nombre}' no está activo")
-        
         return value
 
     def validate(self, data):
         """Validaciones a nivel de objeto"""
-        fecha_cita = data.get('fecha_cita')
-        hora_cita = data.get('hora_cita')
-        manicurista = data.get('manicurista')
+        fecha_cita = data.get('fecha_cita', getattr(self.instance, 'fecha_cita', None))
+        hora_cita = data.get('hora_cita', getattr(self.instance, 'hora_cita', None))
+        manicurista = data.get('manicurista', getattr(self.instance, 'manicurista', None))
+
+        # Validar la hora contra la jornada de la manicurista ese día
+        if fecha_cita and hora_cita and manicurista:
+            grilla = obtener_grilla(manicurista.id, fecha_cita)
+            if not grilla.en_jornada(hora_cita):
+                raise serializers.ValidationError({
+                    'hora_cita': f"La hora debe estar dentro de la jornada de la manicurista ({grilla.descripcion})"
+                })
 
         # Verificar disponibilidad de la manicurista en esa fecha y hora
         if fecha_cita and hora_cita and manicurista:
@@ -109,7 +108,7 @@ class CitaSerializer(serializers.ModelSerializer):
 class CitaCreateSerializer(serializers.ModelSerializer):
     """Serializer específico para crear citas con múltiples servicios"""
     
-    servicios = serializers.PrimaryKeyRelatedField(
+    servicios = PKRelacionadoField(
         queryset=Servicio.objects.filter(estado='activo'),
         many=True,
         required=True
@@ -166,7 +165,16 @@ class CitaCreateSerializer(serializers.ModelSerializer):
         
         # Actualizar servicios si se proporcionaron
         if servicios_data is not None:
-            instance.servicios.set(servicios_data)
+            Through = Cita.servicios.through
+            sincronizar(
+                Through,
+                Through.objects.filter(cita=instance),
+                {servicio.id: servicio for servicio in servicios_data},
+                clave='servicio_id',
+                nueva=lambda pk, servicio: Through(cita=instance, servicio=servicio),
+            )
+            # La relación cambió por fuera del manager: se descarta lo precargado
+            getattr(instance, '_prefetched_objects_cache', {}).pop('servicios', None)
             
             # Recalcular totales
             precio_total = sum(servicio.precio for servicio in servicios_data)
@@ -236,3 +244,27 @@ class BuscarClienteSerializer(serializers.Serializer):
                 "La búsqueda debe tener al menos 2 caracteres"
             )
         return value.strip()
+
+
+class AgendamientoAutomaticoSerializer(serializers.Serializer):
+    """Parámetros de la búsqueda automática de horarios para varios servicios"""
+    MAX_DIAS = 14
+    MAX_OPCIONES = 20
+
+    cliente = serializers.PrimaryKeyRelatedField(queryset=Cliente.objects.filter(estado=True))
+    # Servicios activos en el orden pedido, con una sola consulta
+    servicios = PKRelacionadoField(queryset=Servicio.objects.filter(estado='activo'), many=True, allow_empty=False)
+    fecha_inicio = serializers.DateField()
+    fecha_fin = serializers.DateField(required=False)
+    opciones = serializers.IntegerField(default=5, min_value=1, max_value=MAX_OPCIONES)
+    permitir_division = serializers.BooleanField(default=False)
+
+    def validate(self, data):
+        data.setdefault('fecha_fin', data['fecha_inicio'])
+        if data['fecha_inicio'] < timezone.localdate():
+            raise serializers.ValidationError({'fecha_inicio': 'La fecha de inicio no puede ser en el pasado'})
+        if data['fecha_fin'] < data['fecha_inicio']:
+            raise serializers.ValidationError({'fecha_fin': 'La fecha final debe ser igual o posterior a la inicial'})
+        if (data['fecha_fin'] - data['fecha_inicio']).days >= self.MAX_DIAS:
+            raise serializers.ValidationError({'fecha_fin': f'La ventana no puede superar {self.MAX_DIAS} días'})
+        return data
@@ -1,32 +1,40 @@
+import logging
 from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from django.db import transaction
 from django.db.models import Q, Count, Sum, Avg
 from django.utils import timezone
 from datetime import datetime, timedelta, time
 from .models import Cita
+from .consumo import registrar_consumo_citas
 from .serializers import (
     CitaSerializer,
     CitaCreateSerializer,
     CitaUpdateEstadoSerializer,
-    BuscarClienteSerializer
+    BuscarClienteSerializer,
+    AgendamientoAutomaticoSerializer
 )
+from .agendamiento import buscar_opciones
+from .capacidad import simular_capacidad
+from api.busqueda.indice import buscar_objetos
+from api.busqueda.models import TerminoBusqueda
 from api.clientes.models import Cliente
 from api.clientes.serializers import ClienteSerializer
 from api.servicios.models import Servicio
 from api.servicios.serializers import ServicioSerializer
 from api.manicuristas.models import Manicurista
 from api.manicuristas.serializers import ManicuristaSerializer
+from api.horarios.grillas import obtener_grilla
+
+logger = logging.getLogger(__name__)
 
 
 class CitaViewSet(viewsets.ModelViewSet):
     queryset = Cita.objects.all()
     serializer_class = CitaSerializer
 
-    # CONFIGURACIÓN DE HORARIOS DE CITAS - UNIFICADO 10:00 AM - 8:00 PM
-    HORA_INICIO_CITAS = time(10, 0)  # 10:00 AM
-    HORA_FIN_CITAS = time(20, 0)     # 8:00 PM
-    INTERVALO_MINUTOS = 30           # Citas cada 30 minutos
+    # Los horarios de atención salen de las grillas de api.horarios (por manicurista y fecha)
 
     def get_serializer_class(self):
         """Retorna el serializer apropiado según la acción"""
@@ -212,11 +220,12 @@ class CitaViewSet(viewsets.ModelViewSet):
                     'razon': 'Manicurista no encontrada'
                 }
 
-            # 2. Verificar horario de trabajo (UNIFICADO 10:00 AM - 8:00 PM)
-            if hora < self.HORA_INICIO_CITAS or hora >= self.HORA_FIN_CITAS:
+            # 2. Verificar horario de trabajo de la manicurista ese día
+            grilla = obtener_grilla(manicurista.id, fecha)
+            if not grilla.en_jornada(hora):
                 return {
                     'disponible': False,
-                    'razon': f'Horario fuera del rango de atención (10:00 AM - 8:00 PM)'
+                    'razon': f'Horario fuera del rango de atención ({grilla.descripcion})'
                 }
 
             # 3. Verificar novedades (ausencias y tardanzas)
@@ -337,18 +346,6 @@ class CitaViewSet(viewsets.ModelViewSet):
                 'razon': 'Error al verificar disponibilidad del cliente'
             }
 
-    def _generar_horarios_disponibles(self, fecha):
-        """Generar lista de horarios disponibles para el día (10:00 AM - 8:00 PM cada 30 min)"""
-        horarios = []
-        hora_actual = datetime.combine(fecha, self.HORA_INICIO_CITAS)
-        hora_fin = datetime.combine(fecha, self.HORA_FIN_CITAS)
-
-        while hora_actual < hora_fin:
-            horarios.append(hora_actual.time().strftime('%H:%M'))
-            hora_actual += timedelta(minutes=self.INTERVALO_MINUTOS)
-
-        return horarios
-
     @action(detail=False, methods=['post'])
     def buscar_clientes(self, request):
         """Buscar clientes por nombre o documento"""
@@ -357,10 +354,8 @@ class CitaViewSet(viewsets.ModelViewSet):
 
         query = serializer.validated_data['query']
 
-        # Buscar por nombre o documento
-        clientes = Cliente.objects.filter(
-            Q(nombre__icontains=query) | Q(documento__icontains=query)
-        ).order_by('nombre')[:10]  # Limitar a 10 resultados
+        # Buscar por nombre, documento o celular en el índice de búsqueda
+        clientes = buscar_objetos(TerminoBusqueda.ENTIDAD_CLIENTE, query, 10)
 
         serializer = ClienteSerializer(clientes, many=True)
         return Response(serializer.data)
@@ -402,9 +397,128 @@ class CitaViewSet(viewsets.ModelViewSet):
                 # Log del error pero no fallar la actualización de la cita
                 print(f"Error creando ventas automáticas: {e}")
 
+            # Descontar los insumos de la receta de sus servicios una vez confirmada la finalización
+            transaction.on_commit(lambda: registrar_consumo_citas([cita_actualizada.id]))
+
         response_serializer = CitaSerializer(cita_actualizada)
         return Response(response_serializer.data)
 
+    @action(detail=False, methods=['post'])
+    def finalizar_lote(self, request):
+        """
+        Finalizar varias citas en proceso a la vez.
+        Body: {"citas": [1, 2, 3]}
+        El consumo de insumos de todas las citas se descuenta en un solo lote.
+        """
+        citas_ids = request.data.get('citas')
+        if not isinstance(citas_ids, list) or not citas_ids:
+            return Response(
+                {'error': 'Se requiere una lista de citas'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            citas_ids = {int(cid) for cid in citas_ids}
+        except (TypeError, ValueError):
+            return Response(
+                {'error': 'Los IDs de las citas deben ser números enteros'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        with transaction.atomic():
+            finalizables = list(
+                Cita.objects.select_for_update()
+                .filter(pk__in=citas_ids, estado='en_proceso')
+                .values_list('id', flat=True)
+            )
+            Cita.objects.filter(pk__in=finalizables).update(
+                estado='finalizada',
+                fecha_finalizacion=timezone.now(),
+                updated_at=timezone.now()
+            )
+            transaction.on_commit(lambda: registrar_consumo_citas(finalizables))
+
+        citas = self.get_queryset().filter(pk__in=finalizables)
+        for cita in citas:
+            try:
+                self.crear_ventas_automaticas(cita)
+            except Exception:
+                # La cita ya quedó finalizada: se registra el fallo y se sigue con el lote
+                logger.exception("No se crearon las ventas automáticas de la cita %s", cita.id)
+
+        return Response({
+            'finalizadas': CitaSerializer(citas, many=True).data,
+            'no_finalizadas': sorted(citas_ids - set(finalizables)),
+        })
+
+    @action(detail=False, methods=['post'])
+    def agendar_automatico(self, request):
+        """
+        Propone los mejores horarios para atender varios servicios a un cliente.
+        Body: {"cliente": 1, "servicios": [2, 5], "fecha_inicio": "2025-01-18",
+               "fecha_fin": "2025-01-18", "opciones": 5, "permitir_division": true}
+        Con permitir_division los servicios pueden repartirse entre dos
+        manicuristas seguidas. No crea citas: solo retorna las opciones.
+        """
+        serializer = AgendamientoAutomaticoSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        datos = serializer.validated_data
+        opciones = buscar_opciones(
+            datos['cliente'].id,
+            datos['servicios'],
+            datos['fecha_inicio'],
+            datos['fecha_fin'],
+            opciones=datos['opciones'],
+            permitir_division=datos['permitir_division'],
+            ahora=timezone.localtime().replace(tzinfo=None)
+        )
+        return Response({
+            'duracion_total': sum(s.duracion for s in datos['servicios']),
+            'total_opciones': len(opciones),
+            'opciones': opciones,
+        })
+
+    @action(detail=False, methods=['get'])
+    def simulacion_capacidad(self, request):
+        """
+        Simula la dotación de manicuristas por día de la semana con el historial de citas.
+        Endpoint: /api/citas/simulacion_capacidad/
+        Parámetros opcionales:
+        - dotaciones: cantidades a evaluar separadas por coma (por defecto 1,2,3,4,5,6)
+        - dias: días de historial (por defecto 180)
+        - replicas: días sintéticos por configuración (por defecto 2000)
+        - rechazo_maximo: tasa de rechazo aceptable (por defecto 0.05)
+        - semilla: para resultados reproducibles
+        Corre en el proceso de la petición; para simulaciones grandes use el
+        comando simular_capacidad, que reparte el trabajo entre procesos.
+        """
+        datos = request.query_params
+        try:
+            dotaciones = [int(n) for n in datos.get('dotaciones', '1,2,3,4,5,6').split(',') if n.strip()]
+            dias = int(datos.get('dias', 180))
+            replicas = int(datos.get('replicas', 2000))
+            rechazo_maximo = float(datos.get('rechazo_maximo', 0.05))
+            semilla = int(datos['semilla']) if datos.get('semilla') else None
+        except ValueError:
+            return Response({'error': 'Parámetros numéricos inválidos'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not dotaciones or not all(1 <= n <= 50 for n in dotaciones) or len(dotaciones) > 20:
+            return Response({'error': 'dotaciones debe tener entre 1 y 20 valores entre 1 y 50'}, status=status.HTTP_400_BAD_REQUEST)
+        if not 7 <= dias <= 730 or not 1 <= replicas <= 20000 or not 0 <= rechazo_maximo <= 1:
+            return Response(
+                {'error': 'dias debe estar entre 7 y 730, replicas entre 1 y 20000 y rechazo_maximo entre 0 y 1'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if semilla is not None and semilla < 0:
+            return Response({'error': 'semilla debe ser un entero no negativo'}, status=status.HTTP_400_BAD_REQUEST)
+
+        reporte = simular_capacidad(
+            dotaciones, dias=dias, replicas=replicas, rechazo_maximo=rechazo_maximo, semilla=semilla
+        )
+        return Response({'dias': dias, 'replicas': replicas, 'resultados': reporte})
+
     def crear_ventas_automaticas(self, cita):
         """Crear ventas automáticamente para todos los servicios cuando se finaliza una cita"""
         try:
@@ -525,8 +639,15 @@ class CitaViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Generar todos los horarios posibles (10:00 AM - 8:00 PM)
-        todos_los_horarios = self._generar_horarios_disponibles(fecha_obj)
+        if not str(manicurista_id).isdigit():
+            return Response(
+                {'error': 'El parámetro manicurista debe ser un id numérico'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # Turnos de la jornada de la manicurista ese día (grilla precompilada)
+        grilla = obtener_grilla(int(manicurista_id), fecha_obj)
+        todos_los_horarios = list(grilla.etiquetas)
 
         # Obtener horarios ocupados por citas
         citas_ocupadas = Cita.objects.filter(
@@ -539,7 +660,7 @@ class CitaViewSet(viewsets.ModelViewSet):
 
         # Verificar novedades (ausencias y tardanzas)
         horarios_ocupados_novedades = []
-        razon_no_disponible = None
+        razon_no_disponible = None if grilla.abierta else 'La manicurista no atiende este día'
 
         try:
             from api.novedades.models import Novedad
@@ -547,28 +668,28 @@ class CitaViewSet(viewsets.ModelViewSet):
             novedad = Novedad.objects.filter(
                 manicurista_id=manicurista_id,
                 fecha=fecha_obj
-            ).first()
+            ).exclude(estado='anulada').first()
 
             if novedad:
                 if novedad.estado == 'ausente':
                     if novedad.tipo_ausencia == 'completa':
                         # Toda la jornada no disponible
                         horarios_ocupados_novedades = todos_los_horarios.copy()
-                        razon_no_disponible = f"Ausencia completa (10:00 - 20:00)"
+                        razon_no_disponible = f"Ausencia completa ({grilla.descripcion})"
 
                     elif novedad.tipo_ausencia == 'por_horas' and novedad.hora_inicio_ausencia and novedad.hora_fin_ausencia:
                         # Marcar horarios específicos como no disponibles
-                        for horario_str in todos_los_horarios:
-                            horario_time = datetime.strptime(horario_str, '%H:%M').time()
-                            if novedad.hora_inicio_ausencia <= horario_time < novedad.hora_fin_ausencia:
-                                horarios_ocupados_novedades.append(horario_str)
+                        horarios_ocupados_novedades = [
+                            etiqueta for hora, etiqueta in zip(grilla.horas, grilla.etiquetas)
+                            if novedad.hora_inicio_ausencia <= hora < novedad.hora_fin_ausencia
+                        ]
 
                 elif novedad.estado == 'tardanza' and novedad.hora_entrada:
                     # Marcar horarios antes de la llegada como no disponibles
-                    for horario_str in todos_los_horarios:
-                        horario_time = datetime.strptime(horario_str, '%H:%M').time()
-                        if horario_time < novedad.hora_entrada:
-                            horarios_ocupados_novedades.append(horario_str)
+                    horarios_ocupados_novedades = [
+                        etiqueta for hora, etiqueta in zip(grilla.horas, grilla.etiquetas)
+                        if hora < novedad.hora_entrada
+                    ]
 
         except ImportError:
             # Si no existe el módulo de novedades, continuar sin verificar
@@ -588,11 +709,7 @@ class CitaViewSet(viewsets.ModelViewSet):
             'horarios_ocupados_novedades': horarios_ocupados_novedades,
             'total_disponibles': len(horarios_disponibles),
             'total_ocupados': len(todos_ocupados),
-            'horario_trabajo': {
-                'inicio': self.HORA_INICIO_CITAS.strftime('%H:%M'),
-                'fin': self.HORA_FIN_CITAS.strftime('%H:%M'),
-                'intervalo_minutos': self.INTERVALO_MINUTOS
-            },
+            'horario_trabajo': grilla.a_dict(),
             'razon_no_disponible': razon_no_disponible
         })
 
@@ -0,0 +1,147 @@
+def mensaje_bienvenida(cliente, contraseña_temporal):
+    """
+    Correo de bienvenida con contraseña temporal y enlace de login, como dict
+    con los argumentos de encolar_correo / encolar_correos.
+    """
+    asunto = 'Bienvenido al sistema - Contraseña temporal'
+
+    # URL del login principal - MODIFICA ESTA URL SEGÚN TU APLICACIÓN
+    login_url = f"http://localhost:5173/login?email={cliente.correo_electronico}&type=cliente"
+
+    # Crear el mensaje HTML
+    mensaje_html = f"""
+    <html>
+    <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
+        <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
+            <h2 style="color: #3b82f6;">¡Bienvenido al sistema, {cliente.nombre}!</h2>
+            <p>Tu cuenta ha sido creada exitosamente. Aquí están tus datos de acceso:</p>
+
+            <div style="background-color: #f8f9fa; padding: 20px; border-radius: 8px; margin: 20px 0; border-left: 4px solid #3b82f6;">
+                <h3 style="margin-top: 0; color: #3b82f6;">Datos de acceso:</h3>
+                <p><strong>Número de documento:</strong> {cliente.documento}</p>
+                <p><strong>Contraseña temporal:</strong> <span style="color: #dc3545; font-weight: bold; font-size: 18px;">{contraseña_temporal}</span></p>
+            </div>
+
+            <div style="background-color: #e3f2fd; padding: 15px; border-radius: 8px; margin: 20px 0; border-left: 4px solid #2196f3;">
+                <h3 style="margin-top: 0; color: #1976d2;">🔗 Enlace de acceso:</h3>
+                <p>Para iniciar sesión, haz clic en el siguiente enlace:</p>
+                <p style="text-align: center; margin: 15px 0;">
+                    <a href="{login_url}" style="background-color: #3b82f6; color: white; padding: 12px 24px; text-decoration: none; border-radius: 6px; font-weight: bold; display: inline-block;">
+                        🔑 Iniciar Sesión
+                    </a>
+                </p>
+                <p style="font-size: 12px; color: #666;">
+                    Si el botón no funciona, copia y pega este enlace en tu navegador:<br>
+                    <a href="{login_url}" style="color: #3b82f6;">{login_url}</a>
+                </p>
+            </div>
+
+            <div style="background-color: #fff3cd; padding: 15px; border-radius: 8px; margin: 20px 0; border-left: 4px solid #ffc107;">
+                <h3 style="margin-top: 0; color: #856404;">⚠️ IMPORTANTE - Proceso de cambio de contraseña:</h3>
+                <ol style="margin: 10px 0; padding-left: 20px;">
+                    <li><strong>Inicia sesión</strong> con tu número de documento y la contraseña temporal</li>
+                    <li><strong>El sistema detectará automáticamente</strong> que tienes una contraseña temporal</li>
+                    <li><strong>Te aparecerá un formulario</strong> con los siguientes campos:
+                        <ul style="margin: 8px 0; padding-left: 20px;">
+                            <li>Contraseña temporal (la que te enviamos)</li>
+                            <li>Nueva contraseña (mínimo 8 caracteres)</li>
+                            <li>Confirmar nueva contraseña</li>
+                        </ul>
+                    </li>
+                    <li><strong>Después del cambio exitoso</strong>, recibirás un correo de confirmación</li>
+                    <li><strong>Serás redirigido al login</strong> para ingresar con tu nueva contraseña</li>
+                </ol>
+            </div>
+
+            <div style="text-align: center; margin: 30px 0; padding: 20px; background-color: #e8f5e8; border-radius: 8px;">
+                <p style="margin: 0; color: #2e7d32; font-weight: bold;">¡Gracias y bienvenido! 🎉</p>
+                <p style="margin: 5px 0 0 0; color: #666; font-size: 14px;">
+                    Si tienes alguna pregunta, contacta al administrador.
+                </p>
+            </div>
+        </div>
+    </body>
+    </html>
+    """
+
+    # Mensaje de texto plano (fallback)
+    mensaje_texto = f"""
+    ¡Bienvenido al sistema, {cliente.nombre}!
+
+    Tu cuenta ha sido creada exitosamente.
+
+    DATOS DE ACCESO:
+    - Número de documento: {cliente.documento}
+    - Contraseña temporal: {contraseña_temporal}
+
+    ENLACE DE ACCESO:
+    {login_url}
+
+    IMPORTANTE: Esta contraseña temporal debe ser cambiada en tu primer inicio de sesión por seguridad.
+
+    ¡Gracias y bienvenido!
+    """
+
+    return {
+        'asunto': asunto,
+        'mensaje': mensaje_texto,
+        'destinatarios': [cliente.correo_electronico],
+        'html': mensaje_html,
+    }
+
+
+def mensaje_activacion(cliente, codigo):
+    """
+    Correo de bienvenida de una cuenta importada sin contraseña: lleva el código
+    de un solo uso con el que la persona define la suya (flujo de
+    /api/codigo-recuperacion/confirmar-codigo/). Mismo formato que mensaje_bienvenida.
+    """
+    asunto = 'Bienvenido al sistema - Activa tu cuenta'
+
+    # URL del login principal - MODIFICA ESTA URL SEGÚN TU APLICACIÓN
+    login_url = f"http://localhost:5173/login?email={cliente.correo_electronico}&type=cliente"
+
+    mensaje_html = f"""
+    <html>
+    <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
+        <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
+            <h2 style="color: #3b82f6;">¡Bienvenido al sistema, {cliente.nombre}!</h2>
+            <p>Tu cuenta ha sido creada. Para empezar a usarla, define tu contraseña con este código:</p>
+
+            <div style="background-color: #f8f9fa; padding: 20px; border-radius: 8px; margin: 20px 0; border-left: 4px solid #3b82f6;">
+                <p><strong>Correo electrónico:</strong> {cliente.correo_electronico}</p>
+                <p><strong>Código de activación:</strong> <span style="color: #dc3545; font-weight: bold; font-size: 18px;">{codigo}</span></p>
+            </div>
+
+            <div style="background-color: #fff3cd; padding: 15px; border-radius: 8px; margin: 20px 0; border-left: 4px solid #ffc107;">
+                <h3 style="margin-top: 0; color: #856404;">⚠️ Cómo activar tu cuenta:</h3>
+                <ol style="margin: 10px 0; padding-left: 20px;">
+                    <li>Abre el <a href="{login_url}" style="color: #3b82f6;">inicio de sesión</a> y elige <strong>¿Olvidaste tu contraseña?</strong></li>
+                    <li>Ingresa tu correo, el código y tu nueva contraseña (mínimo 8 caracteres)</li>
+                    <li>Inicia sesión con tu número de documento y la contraseña que definiste</li>
+                </ol>
+                <p style="font-size: 12px; color: #666;">El código sirve una sola vez.</p>
+            </div>
+        </div>
+    </body>
+    </html>
+    """
+
+    mensaje_texto = f"""
+    ¡Bienvenido al sistema, {cliente.nombre}!
+
+    Tu cuenta ha sido creada. Para empezar a usarla, define tu contraseña con este código:
+
+    - Correo electrónico: {cliente.correo_electronico}
+    - Código de activación: {codigo}
+
+    En {login_url} elige "¿Olvidaste tu contraseña?" e ingresa tu correo, el código
+    y tu nueva contraseña. El código sirve una sola vez.
+    """
+
+    return {
+        'asunto': asunto,
+        'mensaje': mensaje_texto,
+        'destinatarios': [cliente.correo_electronico],
+        'html': mensaje_html,
+    }
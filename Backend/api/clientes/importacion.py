@@ -0,0 +1,303 @@
+"""
+Importación masiva de clientes desde CSV o JSON lines.
+
+El archivo se lee como flujo y se procesa por lotes de TAMANO_LOTE filas.
+Por cada lote:
+
+1. Cada fila se valida con las mismas reglas del registro
+   (ImportarClienteSerializer), salvo la unicidad.
+2. La unicidad de documento y correo se comprueba para todo el lote con una
+   consulta por clave, y también contra las filas anteriores del archivo.
+3. Solo se derivan las contraseñas que trae el archivo, en un pool de procesos:
+   es el paso más costoso y cada hash es independiente. Usuario y cliente
+   comparten el mismo hash. Las filas sin contraseña no cuestan un hash: la
+   cuenta queda con una contraseña inutilizable y un código de un solo uso
+   (CodigoRecuperacion) con el que la persona define la suya.
+4. Usuarios, clientes y códigos se crean con bulk_create dentro de una
+   transacción, los clientes se agregan al índice de búsqueda (bulk_create no
+   dispara señales) y los correos de activación se encolan con un solo INSERT.
+   Si el INSERT del lote choca con un registro concurrente, el lote se
+   reintenta fila por fila y solo las filas en conflicto se reportan.
+
+Las filas con errores no detienen la importación: se reportan con su número
+de fila (la primera fila de datos es la 1).
+"""
+import csv
+import io
+import json
+import os
+import secrets
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import timedelta
+from django.contrib.auth.hashers import get_hasher
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.serializers import as_serializer_error
+from api.busqueda.indice import indexar
+from api.busqueda.models import TerminoBusqueda
+from api.codigorecuperacion.models import CodigoRecuperacion
+from api.correos.bandeja import encolar_correos
+from api.roles.models import Rol
+from api.usuarios.models import Usuario
+from .correos import mensaje_activacion
+from .models import Cliente
+from .serializers import RegistroClienteSerializer
+
+TAMANO_LOTE = 1000
+# Con menos contraseñas que esto en un lote no se usa el pool (no compensa iniciarlo)
+MIN_PARA_POOL = 32
+FORMATOS = ('csv', 'jsonl')
+# Vigencia del código con el que quien no trae contraseña la define
+VIGENCIA_ACTIVACION = timedelta(days=7)
+
+
+class ImportarClienteSerializer(RegistroClienteSerializer):
+    """Validación de una fila: la del registro, sin las consultas de unicidad (se hacen por lote)"""
+
+    def validate_documento(self, value):
+        return value
+
+    def validate_correo_electronico(self, value):
+        return Usuario.objects.normalize_email(value)
+
+
+@dataclass
+class ResultadoImportacion:
+    procesadas: int = 0
+    creados: int = 0
+    errores: list = field(default_factory=list)  # [{'fila': n, 'errores': {...}}]
+
+    def as_dict(self):
+        return {'procesadas': self.procesadas, 'creados': self.creados, 'errores': self.errores}
+
+
+def formato_de(nombre_archivo):
+    extension = os.path.splitext(nombre_archivo or '')[1].lower().lstrip('.')
+    return {'csv': 'csv', 'jsonl': 'jsonl', 'ndjson': 'jsonl'}.get(extension)
+
+
+def leer_filas(archivo, formato):
+    """
+    Filas del archivo (binario) como (número, dict), sin cargarlo completo.
+    Los valores vacíos se omiten para que apliquen los valores por defecto.
+    """
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato no soportado: {formato}. Opciones: {', '.join(FORMATOS)}")
+    texto = io.TextIOWrapper(archivo, encoding='utf-8-sig', newline='' if formato == 'csv' else None)
+
+    if formato == 'csv':
+        for numero, fila in enumerate(csv.DictReader(texto), start=1):
+            yield numero, {k.strip(): v.strip() for k, v in fila.items() if k and v and v.strip()}
+        return
+
+    numero = 0
+    for linea in texto:
+        if not linea.strip():
+            continue
+        numero += 1
+        try:
+            fila = json.loads(linea)
+        except ValueError as e:
+            yield numero, {'__error__': f"JSON inválido: {e}"}
+            continue
+        if not isinstance(fila, dict):
+            yield numero, {'__error__': "Cada línea debe ser un objeto JSON"}
+            continue
+        yield numero, {k: v for k, v in fila.items() if v not in (None, '')}
+
+
+def _hashear(tarea):
+    hasher, contraseña, sal = tarea
+    return hasher.encode(contraseña, sal)
+
+
+class _Importador:
+
+    def __init__(self, procesos, enviar_correos):
+        self.procesos = procesos
+        self.pool = None
+        self.enviar_correos = enviar_correos
+        self.resultado = ResultadoImportacion()
+        # Claves ya vistas en filas anteriores del archivo
+        self.documentos = set()
+        self.correos = set()
+        self.rol = None
+        self.serializer = ImportarClienteSerializer()
+
+    def _error(self, numero, errores):
+        self.resultado.errores.append({'fila': numero, 'errores': errores})
+
+    def _validar(self, lote):
+        # Una sola instancia para todo el lote, como hace ListSerializer: crear
+        # un serializer por fila copia sus campos cada vez
+        validas = []
+        for numero, datos in lote:
+            if '__error__' in datos:
+                self._error(numero, {'fila': [datos['__error__']]})
+                continue
+            try:
+                validas.append((numero, self.serializer.run_validation(datos)))
+            except (ValidationError, DjangoValidationError) as e:
+                self._error(numero, as_serializer_error(e))
+        return validas
+
+    def _unicas(self, validas):
+        """Descarta las filas con documento o correo ya registrados: una consulta por clave y tabla"""
+        documentos = {d['documento'] for _, d in validas}
+        correos = {d['correo_electronico'] for _, d in validas}
+        clientes = set(Cliente.objects.filter(documento__in=documentos).values_list('documento', flat=True))
+        usuarios = set(Usuario.objects.filter(documento__in=documentos).values_list('documento', flat=True))
+        correos_usados = set(
+            Usuario.objects.filter(correo_electronico__in=correos).values_list('correo_electronico', flat=True)
+        )
+
+        unicas = []
+        for numero, datos in validas:
+            errores = {}
+            documento, correo = datos['documento'], datos['correo_electronico']
+            if documento in clientes:
+                errores['documento'] = ["Ya existe un cliente con este número de documento."]
+            elif documento in usuarios:
+                errores['documento'] = ["Ya existe un usuario con este número de documento."]
+            elif documento in self.documentos:
+                errores['documento'] = ["Documento repetido en el archivo."]
+            if correo in correos_usados:
+                errores['correo_electronico'] = ["Ya existe un usuario con este correo electrónico."]
+            elif correo in self.correos:
+                errores['correo_electronico'] = ["Correo electrónico repetido en el archivo."]
+            if errores:
+                self._error(numero, errores)
+                continue
+            self.documentos.add(documento)
+            self.correos.add(correo)
+            unicas.append((numero, datos))
+        return unicas
+
+    def _hashes(self, contraseñas):
+        """Hash de cada contraseña con el hasher por defecto, en el pool si el lote lo amerita"""
+        hasher = get_hasher()
+        tareas = [(hasher, c, hasher.salt()) for c in contraseñas]
+        if self.procesos <= 1 or len(tareas) < MIN_PARA_POOL:
+            return [_hashear(t) for t in tareas]
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(max_workers=self.procesos)
+        return list(self.pool.map(_hashear, tareas, chunksize=max(1, len(tareas) // (self.procesos * 4))))
+
+    def _rol_cliente(self):
+        if self.rol is None:
+            self.rol = Rol.objects.filter(nombre__iexact='cliente').first()
+            if self.rol is None:
+                self.rol = Rol.objects.create(nombre='Cliente', estado='activo')
+        return self.rol
+
+    def _preparar(self, filas):
+        """
+        Agrega a cada fila el hash de su contraseña y, si no trae, el código de
+        activación: (número, datos, hash o None, código o None)
+        """
+        con_contraseña = [datos['password'] for _, datos in filas if datos.get('password')]
+        hashes = iter(self._hashes(con_contraseña))
+        return [
+            (numero, datos, next(hashes), None) if datos.get('password')
+            else (numero, datos, None, f"{secrets.randbelow(900000) + 100000}")
+            for numero, datos in filas
+        ]
+
+    def _crear(self, preparadas):
+        """Crea usuarios, clientes y códigos de activación. Retorna los clientes con su código (o None)"""
+        rol = self._rol_cliente()
+        usuarios = []
+        for _, d, h, _ in preparadas:
+            usuario = Usuario(
+                nombre=d['nombre'], tipo_documento=d['tipo_documento'], documento=d['documento'],
+                direccion=d['direccion'], celular=d['celular'], correo_electronico=d['correo_electronico'],
+                rol=rol, is_active=True, password=h,
+            )
+            if h is None:
+                usuario.set_unusable_password()
+            usuarios.append(usuario)
+        clientes = [
+            Cliente(
+                nombre=d['nombre'], tipo_documento=d['tipo_documento'], documento=d['documento'],
+                celular=d['celular'], correo_electronico=d['correo_electronico'], direccion=d['direccion'],
+                genero=d['genero'], estado=d.get('estado', True),
+                contraseña_temporal=u.password, debe_cambiar_contraseña=codigo is not None,
+            )
+            for (_, d, _, codigo), u in zip(preparadas, usuarios)
+        ]
+
+        with transaction.atomic():
+            Usuario.objects.bulk_create(usuarios)
+            if any(u.pk is None for u in usuarios):
+                # Motores que no retornan los ids de un INSERT múltiple (MySQL)
+                ids = dict(Usuario.objects.filter(documento__in=[u.documento for u in usuarios]).values_list('documento', 'id'))
+                for u in usuarios:
+                    u.pk = ids[u.documento]
+            for cliente, usuario in zip(clientes, usuarios):
+                cliente.usuario = usuario
+            Cliente.objects.bulk_create(clientes)
+            if any(c.pk is None for c in clientes):
+                ids = dict(Cliente.objects.filter(documento__in=[c.documento for c in clientes]).values_list('documento', 'id'))
+                for c in clientes:
+                    c.pk = ids[c.documento]
+            expiracion = timezone.now() + VIGENCIA_ACTIVACION
+            CodigoRecuperacion.objects.bulk_create([
+                CodigoRecuperacion(usuario=u, codigo=codigo, expiracion=expiracion)
+                for u, (_, _, _, codigo) in zip(usuarios, preparadas) if codigo
+            ])
+            indexar(TerminoBusqueda.ENTIDAD_CLIENTE, clientes)
+        return [(c, codigo) for c, (_, _, _, codigo) in zip(clientes, preparadas)]
+
+    def _crear_por_fila(self, preparadas):
+        """
+        Reintento de un lote rechazado: cada fila en su propia transacción (o
+        savepoint), para reportar como conflicto solo las que lo causan
+        """
+        creados = []
+        for preparada in preparadas:
+            try:
+                creados.extend(self._crear([preparada]))
+            except IntegrityError:
+                # Otro proceso registró este documento o correo entre la validación y el INSERT
+                self._error(preparada[0], {'fila': ["Conflicto al guardar: el documento o el correo ya fue registrado."]})
+        return creados
+
+    def procesar(self, lote):
+        self.resultado.procesadas += len(lote)
+        filas = self._unicas(self._validar(lote))
+        if not filas:
+            return
+        preparadas = self._preparar(filas)
+        try:
+            creados = self._crear(preparadas)
+        except IntegrityError:
+            creados = self._crear_por_fila(preparadas)
+
+        self.resultado.creados += len(creados)
+        if self.enviar_correos:
+            encolar_correos([mensaje_activacion(c, codigo) for c, codigo in creados if codigo])
+
+
+def importar_clientes(filas, tamano_lote=TAMANO_LOTE, procesos=1, enviar_correos=True):
+    """
+    Importa las filas ((número, dict) como las de leer_filas) por lotes.
+    Con procesos > 1 las contraseñas se derivan en un pool de procesos
+    (None: uno por CPU). Retorna un ResultadoImportacion.
+    """
+    importador = _Importador(procesos or os.cpu_count() or 1, enviar_correos)
+    try:
+        lote = []
+        for fila in filas:
+            lote.append(fila)
+            if len(lote) == tamano_lote:
+                importador.procesar(lote)
+                lote = []
+        if lote:
+            importador.procesar(lote)
+    finally:
+        if importador.pool is not None:
+            importador.pool.shutdown()
+    return importador.resultado
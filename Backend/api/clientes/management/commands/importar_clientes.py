@@ -0,0 +1,40 @@
+import os
+from django.core.management.base import BaseCommand, CommandError
+from api.clientes.importacion import FORMATOS, TAMANO_LOTE, formato_de, importar_clientes, leer_filas
+
+
+class Command(BaseCommand):
+    help = "Importa clientes (con su usuario) desde un archivo CSV o JSON lines"
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help="Ruta del archivo")
+        parser.add_argument('--formato', choices=FORMATOS, help="Por defecto según la extensión del archivo")
+        parser.add_argument('--lote', type=int, default=TAMANO_LOTE, help="Filas por lote")
+        parser.add_argument('--procesos', type=int, default=os.cpu_count(), help="Procesos para derivar las contraseñas")
+        parser.add_argument('--sin-correos', action='store_true', help="No encolar los correos de activación")
+
+    def handle(self, *args, **options):
+        formato = options['formato'] or formato_de(options['archivo'])
+        if formato is None:
+            raise CommandError(f"No se reconoce el formato del archivo; use --formato ({', '.join(FORMATOS)})")
+        if options['lote'] < 1:
+            raise CommandError("--lote debe ser un entero positivo")
+
+        try:
+            with open(options['archivo'], 'rb') as archivo:
+                resultado = importar_clientes(
+                    leer_filas(archivo, formato),
+                    tamano_lote=options['lote'],
+                    procesos=options['procesos'],
+                    enviar_correos=not options['sin_correos'],
+                )
+        except OSError as e:
+            raise CommandError(f"No se pudo leer el archivo: {e}")
+
+        for error in resultado.errores:
+            detalle = '; '.join(f"{campo}: {' '.join(map(str, msgs))}" for campo, msgs in error['errores'].items())
+            self.stdout.write(self.style.WARNING(f"Fila {error['fila']}: {detalle}"))
+        self.stdout.write(self.style.SUCCESS(
+            f"{resultado.procesadas} filas procesadas, {resultado.creados} clientes creados, "
+            f"{len(resultado.errores)} con errores"
+        ))
@@ -58,16 +58,16 @@ class Cliente(BaseModel):
         return check_password(contraseña, self.contraseña_temporal)
     
     def cambiar_contraseña(self, nueva_contraseña):
-        """Cambia la contraseña temporal por una nueva"""
+        """Cambia la contraseña temporal por una nueva (un solo hash, compartido con el usuario)"""
         print(f"Cambiando contraseña para cliente {self.id}")
         self.contraseña_temporal = make_password(nueva_contraseña)
         self.debe_cambiar_contraseña = False
         self.save(update_fields=['contraseña_temporal', 'debe_cambiar_contraseña'])
         print(f"Contraseña cambiada. debe_cambiar_contraseña: {self.debe_cambiar_contraseña}")
         
-        # También actualizar la contraseña del usuario relacionado si existe
+        # El usuario relacionado comparte el mismo hash (sin volver a derivarlo)
         if self.usuario:
-            self.usuario.set_password(nueva_contraseña)
+            self.usuario.asignar_hash(nueva_contraseña, self.contraseña_temporal)
             self.usuario.save(update_fields=['password'])
             print(f"Contraseña del usuario {self.usuario.id} también actualizada")
     
@@ -94,14 +94,11 @@ class Cliente(BaseModel):
             correo_electronico=self.correo_electronico,
             rol=rol_cliente,
             is_active=True,
-            is_staff=False
+            is_staff=False,
+            # Mismo hash que la contraseña temporal, en el mismo INSERT
+            password=self.contraseña_temporal or ''
         )
         
-        # Establecer la misma contraseña temporal
-        if self.contraseña_temporal:
-            usuario.password = self.contraseña_temporal
-            usuario.save(update_fields=['password'])
-        
         # Relacionar con el cliente
         self.usuario = usuario
         self.save(update_fields=['usuario'])
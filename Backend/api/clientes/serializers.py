@@ -150,10 +150,11 @@ class RegistroClienteSerializer(serializers.Serializer):
         }
         
         try:
-            # Crear el usuario con la contraseña
+            # Crear el usuario con la contraseña; si es temporal se reutiliza el hash del cliente
             usuario = Usuario.objects.create_user(
                 correo_electronico=usuario_data['correo_electronico'],
                 password=password_to_use,
+                password_hash=cliente.contraseña_temporal if contraseña_generada else None,
                 **{k: v for k, v in usuario_data.items() if k != 'correo_electronico'}
             )
             
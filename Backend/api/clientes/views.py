@@ -1,11 +1,17 @@
 from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from rest_framework.permissions import IsAdminUser
 from django.shortcuts import get_object_or_404
 from django.contrib.auth import get_user_model
+from itertools import islice
 from django.db import transaction
-from django.core.mail import send_mail
-from django.conf import settings
+from api.authentication.jwt import invalidar_usuario
+from api.busqueda.indice import buscar_objetos
+from api.busqueda.models import TerminoBusqueda
+from api.correos.bandeja import encolar_correo
+from .correos import mensaje_bienvenida
+from .importacion import FORMATOS, formato_de, importar_clientes, leer_filas
 from .models import Cliente
 from .serializers import (
     ClienteSerializer, 
@@ -16,6 +22,13 @@ from .serializers import (
 
 Usuario = get_user_model()
 
+# Límites de la importación por petición; los archivos más grandes, o con más
+# contraseñas, se importan con el comando importar_clientes (pool de procesos).
+# Cada contraseña del archivo es un hash (~0.2 s); las filas sin contraseña no
+# derivan ninguno (reciben un código de activación)
+MAX_FILAS_IMPORTACION = 2000
+MAX_CONTRASEÑAS_IMPORTACION = 20
+
 class ClienteViewSet(viewsets.ModelViewSet):
     """
     ViewSet para el modelo Cliente.
@@ -86,93 +99,7 @@ class ClienteViewSet(viewsets.ModelViewSet):
         """
         Envía correo de bienvenida con contraseña temporal y enlace de login
         """
-        asunto = 'Bienvenido al sistema - Contraseña temporal'
-        
-        # URL del login principal - MODIFICA ESTA URL SEGÚN TU APLICACIÓN
-        login_url = f"http://localhost:5173/login?email={cliente.correo_electronico}&type=cliente"
-        
-        # Crear el mensaje HTML
-        mensaje_html = f"""
-        <html>
-        <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
-            <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
-                <h2 style="color: #3b82f6;">¡Bienvenido al sistema, {cliente.nombre}!</h2>
-                <p>Tu cuenta ha sido creada exitosamente. Aquí están tus datos de acceso:</p>
-                
-                <div style="background-color: #f8f9fa; padding: 20px; border-radius: 8px; margin: 20px 0; border-left: 4px solid #3b82f6;">
-                    <h3 style="margin-top: 0; color: #3b82f6;">Datos de acceso:</h3>
-                    <p><strong>Número de documento:</strong> {cliente.documento}</p>
-                    <p><strong>Contraseña temporal:</strong> <span style="color: #dc3545; font-weight: bold; font-size: 18px;">{contraseña_temporal}</span></p>
-                </div>
-                
-                <div style="background-color: #e3f2fd; padding: 15px; border-radius: 8px; margin: 20px 0; border-left: 4px solid #2196f3;">
-                    <h3 style="margin-top: 0; color: #1976d2;">🔗 Enlace de acceso:</h3>
-                    <p>Para iniciar sesión, haz clic en el siguiente enlace:</p>
-                    <p style="text-align: center; margin: 15px 0;">
-                        <a href="{login_url}" style="background-color: #3b82f6; color: white; padding: 12px 24px; text-decoration: none; border-radius: 6px; font-weight: bold; display: inline-block;">
-                            🔑 Iniciar Sesión
-                        </a>
-                    </p>
-                    <p style="font-size: 12px; color: #666;">
-                        Si el botón no funciona, copia y pega este enlace en tu navegador:<br>
-                        <a href="{login_url}" style="color: #3b82f6;">{login_url}</a>
-                    </p>
-                </div>
-                
-                <div style="background-color: #fff3cd; padding: 15px; border-radius: 8px; margin: 20px 0; border-left: 4px solid #ffc107;">
-                    <h3 style="margin-top: 0; color: #856404;">⚠️ IMPORTANTE - Proceso de cambio de contraseña:</h3>
-                    <ol style="margin: 10px 0; padding-left: 20px;">
-                        <li><strong>Inicia sesión</strong> con tu número de documento y la contraseña temporal</li>
-                        <li><strong>El sistema detectará automáticamente</strong> que tienes una contraseña temporal</li>
-                        <li><strong>Te aparecerá un formulario</strong> con los siguientes campos:
-                            <ul style="margin: 8px 0; padding-left: 20px;">
-                                <li>Contraseña temporal (la que te enviamos)</li>
-                                <li>Nueva contraseña (mínimo 8 caracteres)</li>
-                                <li>Confirmar nueva contraseña</li>
-                            </ul>
-                        </li>
-                        <li><strong>Después del cambio exitoso</strong>, recibirás un correo de confirmación</li>
-                        <li><strong>Serás redirigido al login</strong> para ingresar con tu nueva contraseña</li>
-                    </ol>
-                </div>
-                
-                <div style="text-align: center; margin: 30px 0; padding: 20px; background-color: #e8f5e8; border-radius: 8px;">
-                    <p style="margin: 0; color: #2e7d32; font-weight: bold;">¡Gracias y bienvenido! 🎉</p>
-                    <p style="margin: 5px 0 0 0; color: #666; font-size: 14px;">
-                        Si tienes alguna pregunta, contacta al administrador.
-                    </p>
-                </div>
-            </div>
-        </body>
-        </html>
-        """
-        
-        # Mensaje de texto plano (fallback)
-        mensaje_texto = f"""
-        ¡Bienvenido al sistema, {cliente.nombre}!
-        
-        Tu cuenta ha sido creada exitosamente.
-        
-        DATOS DE ACCESO:
-        - Número de documento: {cliente.documento}
-        - Contraseña temporal: {contraseña_temporal}
-        
-        ENLACE DE ACCESO:
-        {login_url}
-        
-        IMPORTANTE: Esta contraseña temporal debe ser cambiada en tu primer inicio de sesión por seguridad.
-        
-        ¡Gracias y bienvenido!
-        """
-        
-        send_mail(
-            asunto,
-            mensaje_texto,
-            settings.DEFAULT_FROM_EMAIL,
-            [cliente.correo_electronico],
-            html_message=mensaje_html,
-            fail_silently=False,
-        )
+        encolar_correo(**mensaje_bienvenida(cliente, contraseña_temporal))
     
     @action(detail=False, methods=['post'])
     def login(self, request):
@@ -304,14 +231,7 @@ class ClienteViewSet(viewsets.ModelViewSet):
         ¡Tu cuenta está segura!
         """
         
-        send_mail(
-            asunto,
-            mensaje_texto,
-            settings.DEFAULT_FROM_EMAIL,
-            [cliente.correo_electronico],
-            html_message=mensaje_html,
-            fail_silently=False,
-        )
+        encolar_correo(asunto, mensaje_texto, [cliente.correo_electronico], html=mensaje_html)
     
     @action(detail=True, methods=['post'])
     def resetear_password(self, request, pk=None):
@@ -321,6 +241,10 @@ class ClienteViewSet(viewsets.ModelViewSet):
         cliente = self.get_object()
         nueva_contraseña_temporal = cliente.generar_contraseña_temporal()
         cliente.save()
+        # El usuario relacionado recibe el mismo hash para iniciar sesión con la temporal
+        if cliente.usuario_id:
+            Usuario.objects.filter(pk=cliente.usuario_id).update(password=cliente.contraseña_temporal)
+            invalidar_usuario(cliente.usuario_id)
         
         # Enviar correo con nueva contraseña
         try:
@@ -394,14 +318,7 @@ class ClienteViewSet(viewsets.ModelViewSet):
         IMPORTANTE: Debes cambiar esta contraseña temporal inmediatamente por seguridad.
         """
         
-        send_mail(
-            asunto,
-            mensaje_texto,
-            settings.DEFAULT_FROM_EMAIL,
-            [cliente.correo_electronico],
-            html_message=mensaje_html,
-            fail_silently=False,
-        )
+        encolar_correo(asunto, mensaje_texto, [cliente.correo_electronico], html=mensaje_html)
     
     @transaction.atomic
     def destroy(self, request, *args, **kwargs):
@@ -460,6 +377,44 @@ class ClienteViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
     
+    @action(detail=False, methods=['post'], permission_classes=[IsAdminUser])
+    def importar(self, request):
+        """
+        Importación masiva de clientes desde un archivo CSV o JSON lines
+        (campo archivo; formato opcional, por defecto según la extensión).
+        Solo para administradores, hasta MAX_FILAS_IMPORTACION filas y
+        MAX_CONTRASEÑAS_IMPORTACION contraseñas. Las columnas son las del
+        registro. A quien no trae password se le encola un correo con un código
+        de activación para definirla.
+        Retorna las filas procesadas, los clientes creados y los errores por fila.
+        """
+        archivo = request.FILES.get('archivo')
+        if archivo is None:
+            return Response({"error": "Se requiere el archivo"}, status=status.HTTP_400_BAD_REQUEST)
+        formato = request.data.get('formato') or formato_de(archivo.name)
+        if formato not in FORMATOS:
+            return Response(
+                {"error": f"Formato no soportado. Opciones: {', '.join(FORMATOS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        filas = list(islice(leer_filas(archivo, formato), MAX_FILAS_IMPORTACION + 1))
+        if len(filas) > MAX_FILAS_IMPORTACION:
+            return Response(
+                {"error": f"El archivo supera las {MAX_FILAS_IMPORTACION} filas; use el comando importar_clientes"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if sum(1 for _, datos in filas if datos.get('password')) > MAX_CONTRASEÑAS_IMPORTACION:
+            return Response(
+                {"error": f"El archivo trae más de {MAX_CONTRASEÑAS_IMPORTACION} contraseñas; "
+                          "omítalas (se envía un código de activación) o use el comando importar_clientes"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # Dentro de la petición las contraseñas se derivan en el mismo proceso
+        resultado = importar_clientes(filas, procesos=1)
+        return Response(resultado.as_dict(), status=status.HTTP_200_OK)
+
     @action(detail=False, methods=['get'])
     def by_documento(self, request):
         """
@@ -485,7 +440,9 @@ class ClienteViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def search(self, request):
         """
-        Endpoint para buscar clientes por nombre o documento.
+        Endpoint para buscar clientes por nombre, documento o celular.
+        Usa el índice de búsqueda: cada palabra de q se busca como prefijo
+        ("mar gom" encuentra a "María Gómez"). Parámetro limite (por defecto 10, máximo 50).
         """
         query = request.query_params.get('q', '')
         if not query:
@@ -493,12 +450,15 @@ class ClienteViewSet(viewsets.ModelViewSet):
                 {"error": "Se requiere el parámetro q"}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
+        try:
+            limite = max(1, min(int(request.query_params.get('limite', 10)), 50))
+        except ValueError:
+            return Response(
+                {"error": "El parámetro limite debe ser un número entero"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        clientes = self.get_queryset().filter(
-            nombre__icontains=query
-        ) | self.get_queryset().filter(
-            documento__icontains=query
-        )
+        clientes = buscar_objetos(TerminoBusqueda.ENTIDAD_CLIENTE, query, limite, self.get_queryset())
         
         serializer = self.get_serializer(clientes, many=True)
         return Response(serializer.data)
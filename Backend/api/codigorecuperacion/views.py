@@ -9,6 +9,8 @@ from datetime import timedelta
 from api.solicitudcodigoSerializer import SolicitudCodigoSerializer
 from .serializers import ConfirmacionCodigoSerializer
 from api.usuarios.models import Usuario
+from api.clientes.models import Cliente
+from api.manicuristas.models import Manicurista
 from .models import CodigoRecuperacion
 from api.utils.email_utils import enviar_correo
 
@@ -52,8 +54,15 @@ class ConfirmarCodigoRecuperacionView(APIView):
         nueva_password = request.data.get('nueva_password')
         registro = serializer.validated_data['registro']
 
-        usuario.set_password(nueva_password)
-        usuario.save()
+        # Clientes y manicuristas inician sesión con su propio campo: se actualiza
+        # junto con el usuario, con un solo hash (también activa las cuentas importadas)
+        perfil = Cliente.objects.filter(usuario=usuario).first() or Manicurista.objects.filter(usuario=usuario).first()
+        if perfil is not None:
+            perfil.usuario = usuario
+            perfil.cambiar_contraseña(nueva_password)
+        else:
+            usuario.set_password(nueva_password)
+            usuario.save()
         registro.delete()
 
         return Response({"mensaje": "Contraseña actualizada correctamente."}, status=status.HTTP_200_OK)
@@ -5,6 +5,9 @@ from django.shortcuts import get_object_or_404
 from django.db.models import Sum
 from .models import CompraHasInsumo
 from .serializers import CompraHasInsumoSerializer, CompraHasInsumoDetailSerializer
+from api.insumos.models import Insumo
+from api.popularidad.contadores import top
+from api.popularidad.models import ContadorPopularidad
 
 
 class CompraHasInsumoViewSet(viewsets.ModelViewSet):
@@ -67,18 +70,23 @@ class CompraHasInsumoViewSet(viewsets.ModelViewSet):
     def top_insumos(self, request):
         """
         Endpoint para obtener los insumos más comprados.
+        Usa los contadores de popularidad; ventana opcional (7d, 30d, 365d, all).
         """
         limit = request.query_params.get('limit', 10)
         try:
             limit = int(limit)
         except ValueError:
             limit = 10
-            
-        top_insumos = (
-            CompraHasInsumo.objects
-            .values('insumo', 'insumo__nombre')
-            .annotate(total_comprado=Sum('cantidad'))
-            .order_by('-total_comprado')[:limit]
-        )
+        
+        try:
+            filas = top(ContadorPopularidad.TIPO_INSUMO_COMPRADO, request.query_params.get('ventana', 'all'), limit)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        nombres = dict(Insumo.objects.filter(pk__in=[f['objeto_id'] for f in filas]).values_list('id', 'nombre'))
+        top_insumos = [
+            {'insumo': f['objeto_id'], 'insumo__nombre': nombres.get(f['objeto_id']), 'total_comprado': f['cantidad']}
+            for f in filas
+        ]
         
         return Response(top_insumos)
@@ -1,5 +1,7 @@
 from django.db import models
+from django.db.models import F, Sum
 from django.core.validators import MinValueValidator
+from django.utils import timezone
 from decimal import Decimal
 from api.base.base import BaseModel
 from api.insumos.models import Insumo
@@ -47,10 +49,13 @@ class Compra(BaseModel):
         return f"Compra #{self.id} - {proveedor_nombre} - {self.fecha.strftime('%d/%m/%Y')}"
     
     def calcular_total(self):
-        """Calcula el total de la compra basado en los detalles"""
-        total = sum(detalle.subtotal for detalle in self.detalles.all())
+        """Calcula el total de la compra basado en los detalles (un solo aggregate)"""
+        total = self.detalles.aggregate(
+            total=Sum(F('cantidad') * F('precio_unitario'), output_field=models.DecimalField(max_digits=12, decimal_places=2))
+        )['total'] or Decimal('0.00')
         self.total = total
-        self.save()
+        self.updated_at = timezone.now()
+        Compra.objects.filter(pk=self.pk).update(total=total, updated_at=self.updated_at)
         return total
 
 
@@ -4,8 +4,12 @@ from django.db import transaction
 # from django.utils import timezone  # Eliminar esta importación
 from .models import Compra, DetalleCompra
 from api.comprahasinsumos.models import CompraHasInsumo
-from api.insumos.models import Insumo
+from api.insumos.models import Insumo, MovimientoInsumo
+from api.insumos.stock import aplicar_movimientos, StockInsuficienteError
+from api.insumos.costos import registrar_costos
+from api.popularidad.contadores import registrar_insumos_comprados
 from api.proveedores.models import Proveedor
+from api.base.sincronizacion import sincronizar
 
 
 class DetalleCompraSerializer(serializers.ModelSerializer):
@@ -73,6 +77,7 @@ class CompraCreateSerializer(serializers.ModelSerializer):
         if not value:
             raise serializers.ValidationError("Debe agregar al menos un insumo a la compra.")
         
+        vistos = set()
         for i, detalle in enumerate(value):
             if 'insumo_id' not in detalle:
                 raise serializers.ValidationError(f"El detalle {i+1} debe tener un insumo_id.")
@@ -90,12 +95,24 @@ class CompraCreateSerializer(serializers.ModelSerializer):
             precio = detalle.get('precio_unitario')
             if not isinstance(precio, (int, float, Decimal)) or precio <= 0:
                 raise serializers.ValidationError(f"El detalle {i+1}: El precio unitario debe ser mayor a 0")
+            detalle['precio_unitario'] = Decimal(str(precio)).quantize(Decimal('0.01'))
             
-            # Validar que el insumo existe
+            # Un insumo solo puede aparecer una vez por compra
             try:
-                Insumo.objects.get(id=detalle['insumo_id'])
-            except Insumo.DoesNotExist:
-                raise serializers.ValidationError(f"El insumo con ID {detalle['insumo_id']} no existe.")
+                detalle['insumo_id'] = int(detalle['insumo_id'])
+            except (TypeError, ValueError):
+                raise serializers.ValidationError(f"El detalle {i+1}: insumo_id inválido.")
+            if detalle['insumo_id'] in vistos:
+                raise serializers.ValidationError(f"El detalle {i+1}: el insumo con ID {detalle['insumo_id']} está repetido.")
+            vistos.add(detalle['insumo_id'])
+        
+        # Validar que los insumos existen (una sola consulta para todas las líneas)
+        self._insumos = Insumo.objects.in_bulk(vistos)
+        faltantes = [str(pk) for pk in vistos if pk not in self._insumos]
+        if len(faltantes) == 1:
+            raise serializers.ValidationError(f"El insumo con ID {faltantes[0]} no existe.")
+        if faltantes:
+            raise serializers.ValidationError(f"Los insumos con ID {', '.join(sorted(faltantes))} no existen.")
         
         return value
     
@@ -105,43 +122,33 @@ class CompraCreateSerializer(serializers.ModelSerializer):
         validated_data.pop('motivo_anulacion', None) # Asegurarse de que motivo_anulacion no se guarde en la creación si no es relevante
         compra = Compra.objects.create(**validated_data)
         
-        # Lista para almacenar los movimientos de stock
-        movimientos_stock = []
+        # Insertar todas las líneas en una sola sentencia (bulk_create no llama a save(),
+        # así que el total se calcula una sola vez al final)
+        DetalleCompra.objects.bulk_create([
+            DetalleCompra(
+                compra=compra,
+                insumo=self._insumos[d['insumo_id']],
+                cantidad=d['cantidad'],
+                precio_unitario=d['precio_unitario']
+            )
+            for d in detalles_data
+        ])
         
-        for detalle_data in detalles_data:
-            insumo_id = detalle_data.get('insumo_id')
-            cantidad = detalle_data.get('cantidad')
-            precio_unitario = detalle_data.get('precio_unitario')
-            
-            try:
-                insumo = Insumo.objects.get(id=insumo_id)
-                
-                # Crear en DetalleCompra
-                DetalleCompra.objects.create(
-                    compra=compra,
-                    insumo=insumo,
-                    cantidad=cantidad,
-                    precio_unitario=precio_unitario
-                )
-                
-                # Actualizar stock si la compra está finalizada
-                if compra.estado == 'finalizada':
-                    stock_anterior = insumo.cantidad
-                    insumo.cantidad += cantidad
-                    insumo.save()
-                    
-                    movimientos_stock.append({
-                        'insumo': insumo.nombre,
-                        'cantidad_agregada': cantidad,
-                        'stock_anterior': stock_anterior,
-                        'stock_nuevo': insumo.cantidad
-                    })
-                    
-                    print(f"Stock actualizado: {insumo.nombre} - Cantidad agregada: {cantidad} - Nuevo stock: {insumo.cantidad}")
-                
-            except Insumo.DoesNotExist:
-                # Si llegamos aquí, la validación falló
-                pass
+        # Actualizar costos y stock si la compra está finalizada (un solo UPDATE para todas las líneas)
+        if compra.estado == 'finalizada':
+            registrar_costos(
+                (compra.proveedor_id, d['insumo_id'], d['cantidad'], d['precio_unitario'])
+                for d in detalles_data
+            )
+            registrar_insumos_comprados(
+                compra,
+                [(d['insumo_id'], d['cantidad'], d['precio_unitario']) for d in detalles_data]
+            )
+            aplicar_movimientos(
+                [(d['insumo_id'], d['cantidad']) for d in detalles_data],
+                MovimientoInsumo.TIPO_ENTRADA_COMPRA,
+                compra=compra
+            )
         
         # Calcular total
         compra.calcular_total()
@@ -150,8 +157,9 @@ class CompraCreateSerializer(serializers.ModelSerializer):
     
     @transaction.atomic
     def update(self, instance, validated_data):
-        detalles_data = validated_data.pop('detalles', [])
+        detalles_data = validated_data.pop('detalles', None)
         estado_anterior = instance.estado
+        proveedor_anterior = instance.proveedor_id
         
         # Actualizar campos de la compra
         for attr, value in validated_data.items():
@@ -173,48 +181,75 @@ class CompraCreateSerializer(serializers.ModelSerializer):
             # La reversión del stock ahora se maneja en el ViewSet
             pass
         
-        # Eliminar detalles existentes
-        instance.detalles.all().delete()
+        # Cantidades por insumo antes de la edición (para el ajuste de stock)
+        actuales = {d.insumo_id: d for d in instance.detalles.all()}
+        lineas_previas = {pk: (d.cantidad, d.precio_unitario) for pk, d in actuales.items()}
         
-        # Lista para almacenar los movimientos de stock
-        movimientos_stock = []
+        if detalles_data is not None:
+            self._sincronizar_detalles(instance, actuales, detalles_data)
+            lineas_nuevas = {d['insumo_id']: (d['cantidad'], d['precio_unitario']) for d in detalles_data}
+        else:
+            lineas_nuevas = lineas_previas
+        cantidades_previas = {pk: cantidad for pk, (cantidad, _) in lineas_previas.items()}
+        cantidades_nuevas = {pk: cantidad for pk, (cantidad, _) in lineas_nuevas.items()}
         
-        for detalle_data in detalles_data:
-            insumo_id = detalle_data.get('insumo_id')
-            cantidad = detalle_data.get('cantidad')
-            precio_unitario = detalle_data.get('precio_unitario')
-            
+        # Actualizar stock (un solo UPDATE para todas las líneas):
+        # - si la compra pasa a finalizada se suman todas las cantidades
+        # - si ya estaba finalizada solo se aplica la diferencia de las líneas editadas
+        if instance.estado == 'finalizada':
+            if estado_anterior != 'finalizada':
+                lineas = cantidades_nuevas.items()
+            else:
+                lineas = [
+                    (pk, cantidades_nuevas.get(pk, 0) - cantidades_previas.get(pk, 0))
+                    for pk in set(cantidades_previas) | set(cantidades_nuevas)
+                ]
+            lineas_costo = self._lineas_costo(
+                lineas_previas if estado_anterior == 'finalizada' else {},
+                lineas_nuevas,
+                proveedor_anterior,
+                instance.proveedor_id
+            )
+            registrar_costos(lineas_costo)
+            registrar_insumos_comprados(instance, [(pk, q, p) for _, pk, q, p in lineas_costo])
             try:
-                insumo = Insumo.objects.get(id=insumo_id)
-                
-                # Crear en DetalleCompra
-                DetalleCompra.objects.create(
-                    compra=instance,
-                    insumo=insumo,
-                    cantidad=cantidad,
-                    precio_unitario=precio_unitario
-                )
-                
-                # Actualizar stock si la compra está finalizada
-                if instance.estado == 'finalizada' and estado_anterior != 'finalizada':
-                    stock_anterior = insumo.cantidad
-                    insumo.cantidad += cantidad
-                    insumo.save()
-                    
-                    movimientos_stock.append({
-                        'insumo': insumo.nombre,
-                        'cantidad_agregada': cantidad,
-                        'stock_anterior': stock_anterior,
-                        'stock_nuevo': insumo.cantidad
-                    })
-                    
-                    print(f"Stock actualizado: {insumo.nombre} - Cantidad agregada: {cantidad} - Nuevo stock: {insumo.cantidad}")
-                
-            except Insumo.DoesNotExist:
-                # Si llegamos aquí, la validación falló
-                pass
+                aplicar_movimientos(lineas, MovimientoInsumo.TIPO_ENTRADA_COMPRA, compra=instance)
+            except StockInsuficienteError as e:
+                raise serializers.ValidationError({'detalles': str(e)})
         
         # Calcular total
         instance.calcular_total()
         
         return instance
+    
+    def _lineas_costo(self, previas, nuevas, proveedor_anterior, proveedor_nuevo):
+        """
+        Líneas para el costo promedio: se retiran las líneas previas que cambiaron
+        y se agregan las nuevas (todas si cambió el proveedor).
+        """
+        lineas = []
+        for pk in set(previas) | set(nuevas):
+            previa, nueva = previas.get(pk), nuevas.get(pk)
+            if previa == nueva and proveedor_anterior == proveedor_nuevo:
+                continue
+            if previa:
+                lineas.append((proveedor_anterior, pk, -previa[0], previa[1]))
+            if nueva:
+                lineas.append((proveedor_nuevo, pk, nueva[0], nueva[1]))
+        return lineas
+    
+    def _sincronizar_detalles(self, compra, actuales, detalles_data):
+        """Aplica solo las diferencias entre las líneas guardadas y las recibidas"""
+        sincronizar(
+            DetalleCompra,
+            actuales.values(),
+            {d['insumo_id']: d for d in detalles_data},
+            clave='insumo_id',
+            nueva=lambda pk, d: DetalleCompra(
+                compra=compra,
+                insumo=self._insumos[pk],
+                cantidad=d['cantidad'],
+                precio_unitario=d['precio_unitario']
+            ),
+            campos=['cantidad', 'precio_unitario'],
+        )
@@ -1,10 +1,15 @@
 from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from django.db import transaction
 from django.db.models import F, Sum
 # from django.utils import timezone # Eliminar esta importación
 from .models import Compra
 from .serializers import CompraSerializer, CompraCreateSerializer
+from api.insumos.models import MovimientoInsumo
+from api.insumos.stock import aplicar_movimientos, StockInsuficienteError
+from api.insumos.costos import registrar_costos
+from api.popularidad.contadores import registrar_insumos_comprados
 
 
 class CompraViewSet(viewsets.ModelViewSet):
@@ -41,23 +46,37 @@ class CompraViewSet(viewsets.ModelViewSet):
         if len(motivo_anulacion) < 10:
             return Response({"error": "El motivo de anulación debe tener al menos 10 caracteres."}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Revertir stock de insumos
-        for detalle in compra.detalles.all():
-            insumo = detalle.insumo
-            if insumo.cantidad >= detalle.cantidad:
-                insumo.cantidad -= detalle.cantidad
-                insumo.save()
-            else:
-                # Esto no debería pasar si el stock se manejó correctamente al finalizar la compra
-                # Pero es una salvaguarda
-                return Response(
-                    {"error": f"No se pudo revertir el stock del insumo {insumo.nombre}. Cantidad insuficiente."},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-        
-        compra.estado = 'anulada'
-        compra.motivo_anulacion = motivo_anulacion # Guardar el motivo
-        compra.save()
+        # Revertir stock de insumos en un solo UPDATE (solo las compras finalizadas
+        # sumaron stock); si algún insumo no tiene stock suficiente no se revierte
+        # nada ni se anula la compra
+        try:
+            with transaction.atomic():
+                if compra.estado == 'finalizada':
+                    detalles = list(compra.detalles.all())
+                    registrar_costos(
+                        (compra.proveedor_id, d.insumo_id, -d.cantidad, d.precio_unitario)
+                        for d in detalles
+                    )
+                    registrar_insumos_comprados(
+                        compra,
+                        [(d.insumo_id, -d.cantidad, d.precio_unitario) for d in detalles]
+                    )
+                    aplicar_movimientos(
+                        [(detalle.insumo_id, -detalle.cantidad) for detalle in detalles],
+                        MovimientoInsumo.TIPO_REVERSION_ANULACION,
+                        compra=compra,
+                        motivo=motivo_anulacion
+                    )
+                
+                compra.estado = 'anulada'
+                compra.motivo_anulacion = motivo_anulacion # Guardar el motivo
+                compra.save()
+        except StockInsuficienteError as e:
+            nombres = ', '.join(f['nombre'] for f in e.faltantes)
+            return Response(
+                {"error": f"No se pudo revertir el stock del insumo {nombres}. Cantidad insuficiente."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
         serializer = CompraSerializer(compra)
         return Response(serializer.data, status=status.HTTP_200_OK)
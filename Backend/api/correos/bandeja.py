@@ -0,0 +1,148 @@
+"""
+Bandeja de salida de correos.
+
+Las peticiones no hablan con el servidor SMTP: encolar_correo() guarda el
+mensaje ya renderizado como una fila de CorreoSaliente dentro de la transacción
+en curso, de modo que solo queda en cola si el cambio que lo origina se
+confirma. El comando enviar_correos llama a enviar_pendientes(), que toma un
+lote, lo envía por una sola conexión (get_connection) y registra el resultado.
+
+Un correo que falla se reintenta con espera exponencial; al agotar
+MAX_INTENTOS queda como fallido para revisarlo o reencolarlo a mano.
+Cualquier EMAIL_BACKEND sirve (locmem o filebased en desarrollo y pruebas).
+"""
+from datetime import timedelta
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.utils import timezone
+from .models import CorreoSaliente
+
+TAMANO_LOTE = 50
+MAX_INTENTOS = 5
+# Segundos de espera antes del primer reintento; se duplica en cada fallo
+ESPERA_BASE = 60
+ESPERA_MAXIMA = 6 * 60 * 60
+# Segundos que un proceso reserva los correos que tomó (si muere, otro los retoma)
+RESERVA = 5 * 60
+
+
+def _fila(asunto, mensaje, destinatarios, html=None, remitente=None):
+    return CorreoSaliente(
+        asunto=asunto[:255],
+        cuerpo=mensaje,
+        cuerpo_html=html,
+        remitente=remitente or settings.DEFAULT_FROM_EMAIL,
+        destinatarios=[d for d in destinatarios if d],
+    )
+
+
+def encolar_correo(asunto, mensaje, destinatarios, html=None, remitente=None):
+    """Deja el correo en la bandeja de salida. Retorna la fila creada, o None si no hay destinatarios"""
+    correo = _fila(asunto, mensaje, destinatarios, html, remitente)
+    if not correo.destinatarios:
+        return None
+    correo.save()
+    return correo
+
+
+def encolar_correos(mensajes):
+    """Encola varios correos con un solo INSERT. mensajes: dicts con los argumentos de encolar_correo"""
+    filas = [_fila(**m) for m in mensajes]
+    return CorreoSaliente.objects.bulk_create([f for f in filas if f.destinatarios])
+
+
+def _espera(intentos):
+    return timedelta(seconds=min(ESPERA_BASE * 2 ** (intentos - 1), ESPERA_MAXIMA))
+
+
+def _tomar_lote(limite, ahora):
+    """Reserva hasta `limite` correos vencidos; con varios procesos cada uno toma filas distintas"""
+    with transaction.atomic():
+        correos = list(
+            CorreoSaliente.objects
+            .select_for_update(skip_locked=True)
+            .filter(
+                estado__in=[CorreoSaliente.ESTADO_PENDIENTE, CorreoSaliente.ESTADO_ENVIANDO],
+                proximo_intento__lte=ahora
+            )
+            .order_by('id')[:limite]
+        )
+        if correos:
+            CorreoSaliente.objects.filter(pk__in=[c.pk for c in correos]).update(
+                estado=CorreoSaliente.ESTADO_ENVIANDO,
+                proximo_intento=ahora + timedelta(seconds=RESERVA),
+                updated_at=ahora
+            )
+    return correos
+
+
+def _mensaje(correo, conexion):
+    mensaje = EmailMultiAlternatives(
+        correo.asunto, correo.cuerpo, correo.remitente or None, correo.destinatarios, connection=conexion
+    )
+    if correo.cuerpo_html:
+        mensaje.attach_alternative(correo.cuerpo_html, 'text/html')
+    return mensaje
+
+
+def enviar_pendientes(limite=TAMANO_LOTE):
+    """
+    Envía un lote de correos vencidos por una sola conexión. Retorna un dict
+    con la cantidad de enviados, reprogramados y fallidos definitivamente.
+    """
+    ahora = timezone.now()
+    correos = _tomar_lote(limite, ahora)
+    resumen = {'enviados': 0, 'reintentos': 0, 'fallidos': 0}
+    if not correos:
+        return resumen
+
+    enviados = []
+    errores = {}
+    conexion = get_connection(fail_silently=False)
+    try:
+        conexion.open()
+    except Exception as e:
+        errores = {c.pk: f"Conexión: {e}" for c in correos}
+    else:
+        try:
+            for correo in correos:
+                try:
+                    conexion.send_messages([_mensaje(correo, conexion)])
+                    enviados.append(correo.pk)
+                except Exception as e:
+                    errores[correo.pk] = str(e)
+        finally:
+            conexion.close()
+
+    ahora = timezone.now()
+    if enviados:
+        CorreoSaliente.objects.filter(pk__in=enviados).update(
+            estado=CorreoSaliente.ESTADO_ENVIADO, enviado_en=ahora, ultimo_error=None, updated_at=ahora
+        )
+        resumen['enviados'] = len(enviados)
+
+    fallidos = [c for c in correos if c.pk in errores]
+    for correo in fallidos:
+        correo.intentos += 1
+        correo.ultimo_error = errores[correo.pk][:2000]
+        correo.updated_at = ahora
+        if correo.intentos >= MAX_INTENTOS:
+            correo.estado = CorreoSaliente.ESTADO_FALLIDO
+            resumen['fallidos'] += 1
+        else:
+            correo.estado = CorreoSaliente.ESTADO_PENDIENTE
+            correo.proximo_intento = ahora + _espera(correo.intentos)
+            resumen['reintentos'] += 1
+    if fallidos:
+        CorreoSaliente.objects.bulk_update(
+            fallidos, ['estado', 'intentos', 'proximo_intento', 'ultimo_error', 'updated_at']
+        )
+    return resumen
+
+
+def reencolar_fallidos():
+    """Devuelve a la cola los correos que agotaron sus intentos. Retorna cuántos"""
+    return CorreoSaliente.objects.filter(estado=CorreoSaliente.ESTADO_FALLIDO).update(
+        estado=CorreoSaliente.ESTADO_PENDIENTE, intentos=0, proximo_intento=timezone.now(), updated_at=timezone.now()
+    )
@@ -0,0 +1,39 @@
+import time
+from django.core.management.base import BaseCommand
+from api.correos.bandeja import TAMANO_LOTE, enviar_pendientes, reencolar_fallidos
+
+
+class Command(BaseCommand):
+    help = "Envía los correos de la bandeja de salida por lotes, reutilizando una conexión por lote"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=TAMANO_LOTE, help="Correos por conexión")
+        parser.add_argument('--continuo', action='store_true', help="No termina: revisa la bandeja cada --intervalo segundos")
+        parser.add_argument('--intervalo', type=float, default=5, help="Segundos entre revisiones en modo continuo")
+        parser.add_argument('--reencolar-fallidos', action='store_true', help="Vuelve a intentar los correos fallidos")
+
+    def _vaciar(self, lote):
+        totales = {'enviados': 0, 'reintentos': 0, 'fallidos': 0}
+        while True:
+            resumen = enviar_pendientes(lote)
+            for clave, valor in resumen.items():
+                totales[clave] += valor
+            # Lote incompleto: no quedan correos vencidos
+            if sum(resumen.values()) < lote:
+                return totales
+
+    def handle(self, *args, **options):
+        if options['reencolar_fallidos']:
+            self.stdout.write(f"Correos reencolados: {reencolar_fallidos()}")
+
+        while True:
+            totales = self._vaciar(options['lote'])
+            if any(totales.values()) or not options['continuo']:
+                estilo = self.style.WARNING if totales['reintentos'] or totales['fallidos'] else self.style.SUCCESS
+                self.stdout.write(estilo(
+                    f"Enviados: {totales['enviados']}, reprogramados: {totales['reintentos']}, "
+                    f"fallidos: {totales['fallidos']}"
+                ))
+            if not options['continuo']:
+                break
+            time.sleep(options['intervalo'])
@@ -0,0 +1,39 @@
+# Generated by Django 5.2 on 2026-10-19 05:48
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CorreoSaliente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('asunto', models.CharField(max_length=255, verbose_name='Asunto')),
+                ('cuerpo', models.TextField(verbose_name='Cuerpo en texto plano')),
+                ('cuerpo_html', models.TextField(blank=True, null=True, verbose_name='Cuerpo HTML')),
+                ('remitente', models.CharField(blank=True, max_length=254, verbose_name='Remitente')),
+                ('destinatarios', models.JSONField(default=list, verbose_name='Destinatarios')),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('enviando', 'Enviando'), ('enviado', 'Enviado'), ('fallido', 'Fallido')], default='pendiente', max_length=10, verbose_name='Estado')),
+                ('intentos', models.PositiveSmallIntegerField(default=0, verbose_name='Intentos')),
+                ('proximo_intento', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Próximo intento')),
+                ('ultimo_error', models.TextField(blank=True, null=True, verbose_name='Último error')),
+                ('enviado_en', models.DateTimeField(blank=True, null=True, verbose_name='Enviado en')),
+            ],
+            options={
+                'verbose_name': 'Correo saliente',
+                'verbose_name_plural': 'Correos salientes',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['estado', 'proximo_intento'], name='correos_cor_estado_14d55d_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,42 @@
+from django.db import models
+from django.utils import timezone
+from api.base.base import BaseModel
+
+
+class CorreoSaliente(BaseModel):
+    """
+    Correo ya renderizado a la espera de ser enviado. Las peticiones solo
+    insertan la fila (en la misma transacción que el cambio que lo origina) y el
+    comando enviar_correos los despacha por lotes con una conexión reutilizada.
+    """
+    ESTADO_PENDIENTE = 'pendiente'
+    ESTADO_ENVIANDO = 'enviando'
+    ESTADO_ENVIADO = 'enviado'
+    ESTADO_FALLIDO = 'fallido'
+    ESTADO_CHOICES = [
+        (ESTADO_PENDIENTE, 'Pendiente'),
+        (ESTADO_ENVIANDO, 'Enviando'),
+        (ESTADO_ENVIADO, 'Enviado'),
+        (ESTADO_FALLIDO, 'Fallido'),
+    ]
+
+    asunto = models.CharField(max_length=255, verbose_name="Asunto")
+    cuerpo = models.TextField(verbose_name="Cuerpo en texto plano")
+    cuerpo_html = models.TextField(blank=True, null=True, verbose_name="Cuerpo HTML")
+    remitente = models.CharField(max_length=254, blank=True, verbose_name="Remitente")
+    destinatarios = models.JSONField(default=list, verbose_name="Destinatarios")
+    estado = models.CharField(max_length=10, choices=ESTADO_CHOICES, default=ESTADO_PENDIENTE, verbose_name="Estado")
+    intentos = models.PositiveSmallIntegerField(default=0, verbose_name="Intentos")
+    # Pendiente: cuándo reintentar. Enviando: hasta cuándo lo reserva el proceso que lo tomó
+    proximo_intento = models.DateTimeField(default=timezone.now, verbose_name="Próximo intento")
+    ultimo_error = models.TextField(blank=True, null=True, verbose_name="Último error")
+    enviado_en = models.DateTimeField(blank=True, null=True, verbose_name="Enviado en")
+
+    class Meta:
+        verbose_name = "Correo saliente"
+        verbose_name_plural = "Correos salientes"
+        ordering = ['id']
+        indexes = [models.Index(fields=['estado', 'proximo_intento'])]
+
+    def __str__(self):
+        return f"{self.asunto} -> {', '.join(self.destinatarios)} ({self.estado})"
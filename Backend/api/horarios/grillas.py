@@ -0,0 +1,205 @@
+"""
+Grillas de turnos compiladas a partir de los horarios.
+
+Las reglas (horarios semanales, excepciones y festivos) se cargan una vez por
+proceso y se reutilizan hasta que cambia la versión compartida en la caché, que
+las señales de los modelos incrementan en cada cambio. Cada jornada distinta se
+compila una sola vez en una Grilla inmutable compartida por todas las consultas.
+
+Orden de precedencia para (manicurista, fecha):
+1. Excepción de la manicurista para esa fecha.
+2. Día festivo.
+3. Horario semanal de la manicurista para ese día de la semana.
+4. Horario semanal general del spa.
+5. Horario base (10:00 - 20:00 cada 30 minutos).
+"""
+import threading
+import time as reloj
+from dataclasses import dataclass
+from datetime import time
+from functools import lru_cache
+from django.core.cache import cache
+from django.db import transaction
+
+HORA_INICIO_BASE = time(10, 0)
+HORA_FIN_BASE = time(20, 0)
+INTERVALO_BASE = 30
+
+CLAVE_VERSION = 'horarios:version'
+# Segundos entre lecturas de la versión compartida (los cambios del propio proceso se ven de inmediato)
+VERIFICAR_CADA = 2
+
+
+def minutos(hora):
+    return hora.hour * 60 + hora.minute
+
+
+def _hora(minutos_dia):
+    return time(*divmod(minutos_dia, 60))
+
+
+@dataclass(frozen=True)
+class Grilla:
+    """Jornada [inicio, fin) en minutos del día con sus turnos precalculados"""
+    inicio: int
+    fin: int
+    intervalo: int
+    minutos: tuple
+    horas: tuple
+    etiquetas: tuple
+    _conjunto: frozenset
+
+    @property
+    def abierta(self):
+        return bool(self.minutos)
+
+    @property
+    def hora_inicio(self):
+        return _hora(self.inicio) if self.abierta else None
+
+    @property
+    def hora_fin(self):
+        return _hora(self.fin) if self.abierta else None
+
+    @property
+    def descripcion(self):
+        if not self.abierta:
+            return "sin atención"
+        return f"{self.hora_inicio.strftime('%H:%M')} - {self.hora_fin.strftime('%H:%M')}"
+
+    def en_jornada(self, hora):
+        """La hora cae dentro de la jornada (aunque no coincida con el inicio de un turno)"""
+        return self.abierta and self.inicio <= minutos(hora) < self.fin
+
+    def es_turno(self, hora):
+        return minutos(hora) in self._conjunto
+
+    def cabe(self, hora, duracion):
+        """Una cita de `duracion` minutos que empieza en `hora` termina dentro de la jornada"""
+        return self.en_jornada(hora) and minutos(hora) + duracion <= self.fin
+
+    def a_dict(self):
+        return {
+            'inicio': self.hora_inicio.strftime('%H:%M') if self.abierta else None,
+            'fin': self.hora_fin.strftime('%H:%M') if self.abierta else None,
+            'intervalo_minutos': self.intervalo,
+        }
+
+
+@lru_cache(maxsize=256)
+def compilar(inicio, fin, intervalo):
+    """Grilla de la jornada; cada combinación se compila una sola vez por proceso"""
+    turnos = tuple(range(inicio, fin, intervalo)) if inicio < fin else ()
+    horas = tuple(_hora(m) for m in turnos)
+    return Grilla(
+        inicio=inicio,
+        fin=fin,
+        intervalo=intervalo,
+        minutos=turnos,
+        horas=horas,
+        etiquetas=tuple(h.strftime('%H:%M') for h in horas),
+        _conjunto=frozenset(turnos),
+    )
+
+
+@dataclass(frozen=True)
+class _Reglas:
+    semanal: dict      # {(manicurista_id | None, dia_semana): (inicio | None, fin | None, intervalo)}
+    excepciones: dict  # {(manicurista_id, fecha): (inicio | None, fin | None)}
+    festivos: dict     # {fecha: (inicio | None, fin | None)}
+
+
+_estado = {'version': None, 'reglas': None, 'verificado': 0.0}
+_candado = threading.Lock()
+
+
+def _a_minutos(hora_inicio, hora_fin):
+    if hora_inicio is None or hora_fin is None:
+        return None, None
+    return minutos(hora_inicio), minutos(hora_fin)
+
+
+def _cargar():
+    from .models import DiaFestivo, ExcepcionHorario, HorarioSemanal
+
+    semanal = {
+        (h.manicurista_id, h.dia_semana): (*_a_minutos(h.hora_inicio, h.hora_fin), h.intervalo_minutos)
+        for h in HorarioSemanal.objects.all()
+    }
+    excepciones = {
+        (e.manicurista_id, e.fecha): _a_minutos(e.hora_inicio, e.hora_fin)
+        for e in ExcepcionHorario.objects.all()
+    }
+    festivos = {f.fecha: _a_minutos(f.hora_inicio, f.hora_fin) for f in DiaFestivo.objects.all()}
+    return _Reglas(semanal, excepciones, festivos)
+
+
+def _version_compartida():
+    try:
+        return cache.get(CLAVE_VERSION, 0)
+    except Exception:
+        # Sin caché compartida se recargan las reglas en cada verificación
+        return None
+
+
+def _reglas():
+    ahora = reloj.monotonic()
+    reglas = _estado['reglas']
+    if reglas is not None and ahora - _estado['verificado'] < VERIFICAR_CADA:
+        return reglas
+
+    version = _version_compartida()
+    with _candado:
+        if _estado['reglas'] is None or version is None or version != _estado['version']:
+            _estado['reglas'] = _cargar()
+            _estado['version'] = version
+        _estado['verificado'] = ahora
+        return _estado['reglas']
+
+
+def _publicar():
+    # Se descarta de nuevo: entre tanto otro hilo pudo recargar lo anterior
+    _estado['reglas'] = None
+    try:
+        cache.incr(CLAVE_VERSION)
+    except ValueError:
+        cache.set(CLAVE_VERSION, 1, None)
+    except Exception:
+        pass
+
+
+def invalidar():
+    """
+    Descarta las reglas de este proceso y, al confirmar la transacción, avisa a
+    los demás subiendo la versión compartida (antes del commit otro proceso
+    recargaría las reglas anteriores y las tomaría por la versión nueva)
+    """
+    _estado['reglas'] = None
+    transaction.on_commit(_publicar)
+
+
+def grilla_base():
+    return compilar(minutos(HORA_INICIO_BASE), minutos(HORA_FIN_BASE), INTERVALO_BASE)
+
+
+def obtener_grilla(manicurista_id, fecha):
+    """
+    Grilla de turnos de la manicurista en la fecha. Con manicurista_id=None se
+    obtiene la del spa (festivos y horario general).
+    """
+    reglas = _reglas()
+    dia = fecha.weekday()
+    plantilla = reglas.semanal.get((manicurista_id, dia)) or reglas.semanal.get((None, dia))
+    if plantilla:
+        inicio, fin, intervalo = plantilla
+    else:
+        inicio, fin, intervalo = minutos(HORA_INICIO_BASE), minutos(HORA_FIN_BASE), INTERVALO_BASE
+
+    if (manicurista_id, fecha) in reglas.excepciones:
+        inicio, fin = reglas.excepciones[(manicurista_id, fecha)]
+    elif fecha in reglas.festivos:
+        inicio, fin = reglas.festivos[fecha]
+
+    if inicio is None:
+        return compilar(0, 0, intervalo)
+    return compilar(inicio, fin, intervalo)
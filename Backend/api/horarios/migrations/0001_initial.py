@@ -0,0 +1,72 @@
+# Generated by Django 5.2 on 2026-10-19 05:39
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('manicuristas', '0003_manicurista_especialidad'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DiaFestivo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('fecha', models.DateField(unique=True)),
+                ('nombre', models.CharField(max_length=100)),
+                ('hora_inicio', models.TimeField(blank=True, null=True)),
+                ('hora_fin', models.TimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Día festivo',
+                'verbose_name_plural': 'Días festivos',
+                'ordering': ['fecha'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ExcepcionHorario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('fecha', models.DateField()),
+                ('hora_inicio', models.TimeField(blank=True, null=True)),
+                ('hora_fin', models.TimeField(blank=True, null=True)),
+                ('motivo', models.CharField(blank=True, max_length=200, null=True)),
+                ('manicurista', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='excepciones_horario', to='manicuristas.manicurista')),
+            ],
+            options={
+                'verbose_name': 'Excepción de horario',
+                'verbose_name_plural': 'Excepciones de horario',
+                'ordering': ['-fecha'],
+                'unique_together': {('manicurista', 'fecha')},
+            },
+        ),
+        migrations.CreateModel(
+            name='HorarioSemanal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('dia_semana', models.PositiveSmallIntegerField(choices=[(0, 'Lunes'), (1, 'Martes'), (2, 'Miércoles'), (3, 'Jueves'), (4, 'Viernes'), (5, 'Sábado'), (6, 'Domingo')])),
+                ('hora_inicio', models.TimeField(blank=True, null=True)),
+                ('hora_fin', models.TimeField(blank=True, null=True)),
+                ('intervalo_minutos', models.PositiveSmallIntegerField(default=30, validators=[django.core.validators.MinValueValidator(5), django.core.validators.MaxValueValidator(240)])),
+                ('manicurista', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='horarios', to='manicuristas.manicurista')),
+            ],
+            options={
+                'verbose_name': 'Horario semanal',
+                'verbose_name_plural': 'Horarios semanales',
+                'ordering': ['manicurista', 'dia_semana'],
+                'unique_together': {('manicurista', 'dia_semana')},
+            },
+        ),
+    ]
@@ -0,0 +1,113 @@
+from django.db import models
+from django.core.exceptions import ValidationError
+from django.core.validators import MaxValueValidator, MinValueValidator
+from api.base.base import BaseModel
+from api.manicuristas.models import Manicurista
+
+
+def _validar_rango(hora_inicio, hora_fin):
+    if (hora_inicio is None) != (hora_fin is None):
+        raise ValidationError("Indique hora de inicio y de fin, o ninguna para un día sin atención.")
+    if hora_inicio is not None and hora_inicio >= hora_fin:
+        raise ValidationError("La hora de inicio debe ser anterior a la de fin.")
+
+
+class HorarioSemanal(BaseModel):
+    """
+    Jornada de un día de la semana. Sin manicurista es el horario general del
+    spa; con manicurista reemplaza al general para ella (medio tiempo, turnos).
+    """
+    DIA_CHOICES = (
+        (0, 'Lunes'),
+        (1, 'Martes'),
+        (2, 'Miércoles'),
+        (3, 'Jueves'),
+        (4, 'Viernes'),
+        (5, 'Sábado'),
+        (6, 'Domingo'),
+    )
+
+    manicurista = models.ForeignKey(
+        Manicurista, on_delete=models.CASCADE, null=True, blank=True, related_name='horarios'
+    )
+    dia_semana = models.PositiveSmallIntegerField(choices=DIA_CHOICES)
+    # Sin horas: no se atiende ese día
+    hora_inicio = models.TimeField(null=True, blank=True)
+    hora_fin = models.TimeField(null=True, blank=True)
+    intervalo_minutos = models.PositiveSmallIntegerField(
+        default=30, validators=[MinValueValidator(5), MaxValueValidator(240)]
+    )
+
+    class Meta:
+        verbose_name = "Horario semanal"
+        verbose_name_plural = "Horarios semanales"
+        unique_together = ['manicurista', 'dia_semana']
+        ordering = ['manicurista', 'dia_semana']
+
+    def clean(self):
+        super().clean()
+        _validar_rango(self.hora_inicio, self.hora_fin)
+        # unique_together no aplica a filas con manicurista nulo
+        if self.manicurista_id is None:
+            existente = HorarioSemanal.objects.filter(manicurista__isnull=True, dia_semana=self.dia_semana)
+            if existente.exclude(pk=self.pk).exists():
+                raise ValidationError("Ya existe un horario general para ese día.")
+
+    def __str__(self):
+        quien = self.manicurista.nombre if self.manicurista_id else "Spa"
+        return f"{quien} - {self.get_dia_semana_display()}"
+
+
+class ExcepcionHorario(BaseModel):
+    """Jornada distinta para una manicurista en una fecha puntual (o día libre si no tiene horas)"""
+    manicurista = models.ForeignKey(Manicurista, on_delete=models.CASCADE, related_name='excepciones_horario')
+    fecha = models.DateField()
+    hora_inicio = models.TimeField(null=True, blank=True)
+    hora_fin = models.TimeField(null=True, blank=True)
+    motivo = models.CharField(max_length=200, blank=True, null=True)
+
+    class Meta:
+        verbose_name = "Excepción de horario"
+        verbose_name_plural = "Excepciones de horario"
+        unique_together = ['manicurista', 'fecha']
+        ordering = ['-fecha']
+
+    def clean(self):
+        super().clean()
+        _validar_rango(self.hora_inicio, self.hora_fin)
+
+    def __str__(self):
+        return f"{self.manicurista.nombre} - {self.fecha}"
+
+
+class DiaFestivo(BaseModel):
+    """Festivo o cierre del spa: horario especial para todas, o cerrado si no tiene horas"""
+    fecha = models.DateField(unique=True)
+    nombre = models.CharField(max_length=100)
+    hora_inicio = models.TimeField(null=True, blank=True)
+    hora_fin = models.TimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Día festivo"
+        verbose_name_plural = "Días festivos"
+        ordering = ['fecha']
+
+    def clean(self):
+        super().clean()
+        _validar_rango(self.hora_inicio, self.hora_fin)
+
+    def __str__(self):
+        return f"{self.nombre} ({self.fecha})"
+
+
+# Cualquier cambio en los horarios invalida las grillas compiladas
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+
+@receiver([post_save, post_delete], sender=HorarioSemanal)
+@receiver([post_save, post_delete], sender=ExcepcionHorario)
+@receiver([post_save, post_delete], sender=DiaFestivo)
+def invalidar_grillas(sender, **kwargs):
+    from .grillas import invalidar
+    invalidar()
@@ -0,0 +1,45 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
+from rest_framework import serializers
+from .models import DiaFestivo, ExcepcionHorario, HorarioSemanal
+
+
+class _ValidarConModeloMixin:
+    """Aplica Model.clean() para que la API y el admin compartan las reglas"""
+
+    def validate(self, data):
+        instancia = self.Meta.model(**{**self._actuales(), **data})
+        if self.instance:
+            instancia.pk = self.instance.pk
+        try:
+            instancia.clean()
+        except DjangoValidationError as e:
+            raise serializers.ValidationError(e.messages)
+        return data
+
+    def _actuales(self):
+        if not self.instance:
+            return {}
+        return {campo: getattr(self.instance, campo) for campo in self.Meta.campos_modelo}
+
+
+class HorarioSemanalSerializer(_ValidarConModeloMixin, serializers.ModelSerializer):
+    dia_semana_display = serializers.CharField(source='get_dia_semana_display', read_only=True)
+
+    class Meta:
+        model = HorarioSemanal
+        fields = '__all__'
+        campos_modelo = ['manicurista', 'dia_semana', 'hora_inicio', 'hora_fin', 'intervalo_minutos']
+
+
+class ExcepcionHorarioSerializer(_ValidarConModeloMixin, serializers.ModelSerializer):
+    class Meta:
+        model = ExcepcionHorario
+        fields = '__all__'
+        campos_modelo = ['manicurista', 'fecha', 'hora_inicio', 'hora_fin', 'motivo']
+
+
+class DiaFestivoSerializer(_ValidarConModeloMixin, serializers.ModelSerializer):
+    class Meta:
+        model = DiaFestivo
+        fields = '__all__'
+        campos_modelo = ['fecha', 'nombre', 'hora_inicio', 'hora_fin']
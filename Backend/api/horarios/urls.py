@@ -0,0 +1,12 @@
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from .views import DiaFestivoViewSet, ExcepcionHorarioViewSet, HorarioSemanalViewSet
+
+router = DefaultRouter()
+router.register(r'semanal', HorarioSemanalViewSet, basename='horario-semanal')
+router.register(r'excepciones', ExcepcionHorarioViewSet, basename='excepcion-horario')
+router.register(r'festivos', DiaFestivoViewSet, basename='dia-festivo')
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
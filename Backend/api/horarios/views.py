@@ -0,0 +1,64 @@
+from datetime import datetime
+from rest_framework import viewsets, status
+from rest_framework.response import Response
+from rest_framework.decorators import action
+from .grillas import obtener_grilla
+from .models import DiaFestivo, ExcepcionHorario, HorarioSemanal
+from .serializers import DiaFestivoSerializer, ExcepcionHorarioSerializer, HorarioSemanalSerializer
+
+
+class HorarioSemanalViewSet(viewsets.ModelViewSet):
+    """Horarios por día de la semana: generales del spa (sin manicurista) o de una manicurista"""
+    serializer_class = HorarioSemanalSerializer
+
+    def get_queryset(self):
+        queryset = HorarioSemanal.objects.select_related('manicurista')
+        manicurista_id = self.request.query_params.get('manicurista')
+        if manicurista_id == 'general':
+            queryset = queryset.filter(manicurista__isnull=True)
+        elif manicurista_id:
+            queryset = queryset.filter(manicurista_id=manicurista_id)
+        return queryset
+
+    @action(detail=False, methods=['get'])
+    def grilla(self, request):
+        """
+        Turnos que resultan de aplicar todas las reglas a una manicurista y fecha.
+        URL: /api/horarios/semanal/grilla/?fecha=2025-01-15&manicurista=1 (sin manicurista: horario del spa)
+        """
+        fecha = request.query_params.get('fecha')
+        manicurista_id = request.query_params.get('manicurista')
+        try:
+            fecha = datetime.strptime(fecha or '', '%Y-%m-%d').date()
+            manicurista_id = int(manicurista_id) if manicurista_id else None
+        except ValueError:
+            return Response(
+                {'error': 'Se requiere fecha en formato YYYY-MM-DD y un id de manicurista válido'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        grilla = obtener_grilla(manicurista_id, fecha)
+        return Response({
+            'fecha': fecha,
+            'manicurista': manicurista_id,
+            'horario_trabajo': grilla.a_dict(),
+            'horarios': list(grilla.etiquetas),
+        })
+
+
+class ExcepcionHorarioViewSet(viewsets.ModelViewSet):
+    """Jornadas distintas (o días libres) de una manicurista en fechas puntuales"""
+    serializer_class = ExcepcionHorarioSerializer
+
+    def get_queryset(self):
+        queryset = ExcepcionHorario.objects.select_related('manicurista')
+        manicurista_id = self.request.query_params.get('manicurista')
+        if manicurista_id:
+            queryset = queryset.filter(manicurista_id=manicurista_id)
+        return queryset
+
+
+class DiaFestivoViewSet(viewsets.ModelViewSet):
+    """Festivos y cierres del spa"""
+    queryset = DiaFestivo.objects.all()
+    serializer_class = DiaFestivoSerializer
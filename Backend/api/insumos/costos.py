@@ -0,0 +1,121 @@
+from collections import OrderedDict
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Case, DecimalField, ExpressionWrapper, F, Q, Value, When
+from django.utils import timezone
+from .models import Insumo, InsumoHasProveedor
+
+COSTO = DecimalField(max_digits=14, decimal_places=4)
+
+
+def _agrupar_por_insumo(lineas):
+    """Suma cantidad y valor (cantidad x precio) por insumo"""
+    totales = OrderedDict()
+    for _, insumo_id, cantidad, precio in lineas:
+        dq, dv = totales.get(insumo_id, (0, Decimal('0')))
+        totales[insumo_id] = (dq + cantidad, dv + cantidad * precio)
+    return totales
+
+
+def _actualizar_costo_promedio(totales):
+    """
+    Recalcula el costo promedio de todos los insumos del lote en un único UPDATE:
+        costo = (cantidad * costo + valor) / (cantidad + delta)
+    usando la cantidad en stock antes del movimiento. Si el insumo no tenía costo
+    se toma directamente el precio de la compra; si el stock resultante no es
+    positivo se conserva el costo actual.
+    """
+    condiciones = []
+    for pk, (dq, dv) in totales.items():
+        if dq > 0:
+            condiciones.append(When(pk=pk, costo_promedio=0, then=Value(dv / dq, output_field=COSTO)))
+        if dq == 0 and dv == 0:
+            continue
+        condiciones.append(When(
+            Q(pk=pk, cantidad__gt=-dq),
+            then=ExpressionWrapper(
+                (F('cantidad') * F('costo_promedio') + Value(dv, output_field=COSTO)) / (F('cantidad') + Value(dq)),
+                output_field=COSTO
+            )
+        ))
+    if not condiciones:
+        return 0
+
+    return Insumo.objects.filter(pk__in=list(totales)).update(
+        costo_promedio=Case(*condiciones, default=F('costo_promedio'), output_field=COSTO)
+    )
+
+
+def _actualizar_precios_proveedor(lineas):
+    """
+    Acumula cantidad, valor y número de compras por (insumo, proveedor).
+    Las filas existentes se bloquean y actualizan con un bulk_update; las nuevas
+    se insertan con un bulk_create.
+    """
+    acumulado = OrderedDict()
+    for proveedor_id, insumo_id, cantidad, precio in lineas:
+        clave = (insumo_id, proveedor_id)
+        dq, dv, dn, ultimo = acumulado.get(clave, (0, Decimal('0'), 0, None))
+        acumulado[clave] = (
+            dq + cantidad,
+            dv + cantidad * precio,
+            dn + (1 if cantidad > 0 else -1),
+            precio if cantidad > 0 else ultimo
+        )
+
+    proveedores = {proveedor_id for _, proveedor_id in acumulado}
+    insumos = {insumo_id for insumo_id, _ in acumulado}
+    existentes = {
+        (p.insumo_id, p.proveedor_id): p
+        for p in InsumoHasProveedor.objects.select_for_update().filter(
+            proveedor_id__in=proveedores, insumo_id__in=insumos
+        )
+    }
+
+    ahora = timezone.now()
+    nuevos, modificados = [], []
+    for (insumo_id, proveedor_id), (dq, dv, dn, ultimo) in acumulado.items():
+        precio = existentes.get((insumo_id, proveedor_id))
+        if precio is None:
+            precio = InsumoHasProveedor(insumo_id=insumo_id, proveedor_id=proveedor_id)
+            nuevos.append(precio)
+        else:
+            modificados.append(precio)
+        precio.cantidad_comprada += dq
+        precio.valor_comprado += dv
+        precio.numero_compras += dn
+        if ultimo is not None:
+            precio.ultimo_precio = ultimo
+            precio.fecha_ultima_compra = ahora
+
+    if modificados:
+        InsumoHasProveedor.objects.bulk_update(
+            modificados,
+            ['cantidad_comprada', 'valor_comprado', 'numero_compras', 'ultimo_precio', 'fecha_ultima_compra']
+        )
+    if nuevos:
+        InsumoHasProveedor.objects.bulk_create(nuevos)
+
+
+@transaction.atomic
+def registrar_costos(lineas):
+    """
+    Actualiza de forma incremental el costo promedio de los insumos y el índice
+    de precios por proveedor a partir de líneas de compra.
+
+    - lineas: iterable de (proveedor_id, insumo_id, cantidad, precio_unitario),
+      con cantidad positiva al finalizar una compra y negativa al anularla o
+      retirar una línea de una compra ya finalizada.
+
+    Debe llamarse antes de aplicar el movimiento de stock de esas mismas líneas,
+    porque el promedio se pondera con la cantidad en stock previa.
+    """
+    lineas = [
+        (proveedor_id, int(insumo_id), int(cantidad), Decimal(precio))
+        for proveedor_id, insumo_id, cantidad, precio in lineas
+        if cantidad
+    ]
+    if not lineas:
+        return
+    _actualizar_costo_promedio(_agrupar_por_insumo(lineas))
+    _actualizar_precios_proveedor(lineas)
@@ -0,0 +1,36 @@
+# Generated by Django 5.2 on 2026-10-19 05:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('abastecimientos', '0002_initial'),
+        ('compras', '0002_compra_motivo_anulacion'),
+        ('insumos', '0002_remove_insumo_cantidad_minima'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MovimientoInsumo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('tipo', models.CharField(choices=[('entrada_compra', 'Entrada por compra'), ('salida_abastecimiento', 'Salida por abastecimiento'), ('ajuste', 'Ajuste'), ('reversion_anulacion', 'Reversión por anulación')], max_length=30, verbose_name='Tipo')),
+                ('cantidad', models.IntegerField(verbose_name='Cantidad')),
+                ('motivo', models.TextField(blank=True, null=True, verbose_name='Motivo')),
+                ('abastecimiento', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='movimientos_insumo', to='abastecimientos.abastecimiento', verbose_name='Abastecimiento')),
+                ('compra', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='movimientos_insumo', to='compras.compra', verbose_name='Compra')),
+                ('insumo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movimientos', to='insumos.insumo', verbose_name='Insumo')),
+            ],
+            options={
+                'verbose_name': 'Movimiento de insumo',
+                'verbose_name_plural': 'Movimientos de insumos',
+                'ordering': ['-created_at', '-id'],
+                'indexes': [models.Index(fields=['insumo', 'created_at'], name='insumos_mov_insumo__c3db2c_idx')],
+            },
+        ),
+    ]
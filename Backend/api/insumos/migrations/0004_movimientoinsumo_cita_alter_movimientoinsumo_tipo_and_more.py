@@ -0,0 +1,31 @@
+# Generated by Django 5.2 on 2026-10-19 05:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('abastecimientos', '0002_initial'),
+        ('citas', '0004_alter_cita_duracion_estimada_alter_cita_manicurista_and_more'),
+        ('compras', '0002_compra_motivo_anulacion'),
+        ('insumos', '0003_movimientoinsumo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='movimientoinsumo',
+            name='cita',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='movimientos_insumo', to='citas.cita', verbose_name='Cita'),
+        ),
+        migrations.AlterField(
+            model_name='movimientoinsumo',
+            name='tipo',
+            field=models.CharField(choices=[('entrada_compra', 'Entrada por compra'), ('salida_abastecimiento', 'Salida por abastecimiento'), ('ajuste', 'Ajuste'), ('reversion_anulacion', 'Reversión por anulación'), ('consumo_servicio', 'Consumo por servicio')], max_length=30, verbose_name='Tipo'),
+        ),
+        migrations.AddIndex(
+            model_name='movimientoinsumo',
+            index=models.Index(fields=['tipo', 'created_at'], name='insumos_mov_tipo_0f3557_idx'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2 on 2026-10-19 05:23
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categoriainsumos', '0001_initial'),
+        ('insumos', '0004_movimientoinsumo_cita_alter_movimientoinsumo_tipo_and_more'),
+        ('proveedores', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InsumoHasProveedor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('cantidad_comprada', models.IntegerField(default=0, verbose_name='Cantidad comprada')),
+                ('valor_comprado', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14, verbose_name='Valor comprado')),
+                ('numero_compras', models.IntegerField(default=0, verbose_name='Número de compras')),
+                ('ultimo_precio', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='Último precio')),
+                ('fecha_ultima_compra', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de última compra')),
+            ],
+            options={
+                'verbose_name': 'Insumo - Proveedor',
+                'verbose_name_plural': 'Insumos - Proveedores',
+            },
+        ),
+        migrations.AddField(
+            model_name='insumo',
+            name='costo_promedio',
+            field=models.DecimalField(decimal_places=4, default=Decimal('0'), max_digits=14, verbose_name='Costo promedio'),
+        ),
+        migrations.AddIndex(
+            model_name='insumo',
+            index=models.Index(fields=['categoria_insumo', 'cantidad', 'costo_promedio'], name='insumos_ins_categor_3a0264_idx'),
+        ),
+        migrations.AddField(
+            model_name='insumohasproveedor',
+            name='insumo',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='precios_proveedor', to='insumos.insumo', verbose_name='Insumo'),
+        ),
+        migrations.AddField(
+            model_name='insumohasproveedor',
+            name='proveedor',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='precios_insumos', to='proveedores.proveedor', verbose_name='Proveedor'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='insumohasproveedor',
+            unique_together={('insumo', 'proveedor')},
+        ),
+    ]
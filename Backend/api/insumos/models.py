@@ -25,11 +25,133 @@ class Insumo(BaseModel):
         related_name='insumos',
         verbose_name="Categoría"
     )
+    # Costo unitario promedio ponderado; se actualiza de forma incremental con
+    # cada compra finalizada o anulada (ver costos.py)
+    costo_promedio = models.DecimalField(
+        max_digits=14,
+        decimal_places=4,
+        default=Decimal('0'),
+        verbose_name="Costo promedio"
+    )
     
     class Meta:
         verbose_name = "Insumo"
         verbose_name_plural = "Insumos"
         ordering = ['nombre']
+        indexes = [
+            # Cubre la valorización del inventario por categoría sin leer la tabla
+            models.Index(fields=['categoria_insumo', 'cantidad', 'costo_promedio']),
+        ]
     
     def __str__(self):
         return self.nombre
+
+
+class MovimientoInsumo(BaseModel):
+    """Registro histórico de cada cambio aplicado a la cantidad de un insumo"""
+    TIPO_ENTRADA_COMPRA = 'entrada_compra'
+    TIPO_SALIDA_ABASTECIMIENTO = 'salida_abastecimiento'
+    TIPO_AJUSTE = 'ajuste'
+    TIPO_REVERSION_ANULACION = 'reversion_anulacion'
+    TIPO_CONSUMO_SERVICIO = 'consumo_servicio'
+    TIPO_CHOICES = [
+        (TIPO_ENTRADA_COMPRA, 'Entrada por compra'),
+        (TIPO_SALIDA_ABASTECIMIENTO, 'Salida por abastecimiento'),
+        (TIPO_AJUSTE, 'Ajuste'),
+        (TIPO_REVERSION_ANULACION, 'Reversión por anulación'),
+        (TIPO_CONSUMO_SERVICIO, 'Consumo por servicio'),
+    ]
+
+    insumo = models.ForeignKey(
+        Insumo,
+        on_delete=models.CASCADE,
+        related_name='movimientos',
+        verbose_name="Insumo"
+    )
+    tipo = models.CharField(max_length=30, choices=TIPO_CHOICES, verbose_name="Tipo")
+    # Positiva para entradas, negativa para salidas
+    cantidad = models.IntegerField(verbose_name="Cantidad")
+    compra = models.ForeignKey(
+        'compras.Compra',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='movimientos_insumo',
+        verbose_name="Compra"
+    )
+    abastecimiento = models.ForeignKey(
+        'abastecimientos.Abastecimiento',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='movimientos_insumo',
+        verbose_name="Abastecimiento"
+    )
+    cita = models.ForeignKey(
+        'citas.Cita',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='movimientos_insumo',
+        verbose_name="Cita"
+    )
+    motivo = models.TextField(blank=True, null=True, verbose_name="Motivo")
+
+    class Meta:
+        verbose_name = "Movimiento de insumo"
+        verbose_name_plural = "Movimientos de insumos"
+        ordering = ['-created_at', '-id']
+        indexes = [
+            models.Index(fields=['insumo', 'created_at']),
+            models.Index(fields=['tipo', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.insumo_id} - {self.get_tipo_display()} ({self.cantidad:+d})"
+
+
+class InsumoHasProveedor(BaseModel):
+    """Acumulado de compras de un insumo a un proveedor (índice de precios)"""
+    insumo = models.ForeignKey(
+        Insumo,
+        on_delete=models.CASCADE,
+        related_name='precios_proveedor',
+        verbose_name="Insumo"
+    )
+    proveedor = models.ForeignKey(
+        'proveedores.Proveedor',
+        on_delete=models.CASCADE,
+        related_name='precios_insumos',
+        verbose_name="Proveedor"
+    )
+    cantidad_comprada = models.IntegerField(default=0, verbose_name="Cantidad comprada")
+    valor_comprado = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name="Valor comprado"
+    )
+    numero_compras = models.IntegerField(default=0, verbose_name="Número de compras")
+    ultimo_precio = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        verbose_name="Último precio"
+    )
+    fecha_ultima_compra = models.DateTimeField(null=True, blank=True, verbose_name="Fecha de última compra")
+
+    class Meta:
+        verbose_name = "Insumo - Proveedor"
+        verbose_name_plural = "Insumos - Proveedores"
+        unique_together = ['insumo', 'proveedor']
+
+    def __str__(self):
+        return f"{self.insumo_id} - {self.proveedor_id} ({self.precio_promedio})"
+
+    @property
+    def precio_promedio(self):
+        """Precio unitario promedio ponderado pagado a este proveedor"""
+        if self.cantidad_comprada <= 0:
+            return None
+        return (self.valor_comprado / self.cantidad_comprada).quantize(Decimal('0.01'))
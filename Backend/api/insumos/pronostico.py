@@ -0,0 +1,180 @@
+import math
+from collections import OrderedDict
+from datetime import timedelta
+from decimal import Decimal
+import numpy as np
+from django.db import transaction
+from django.db.models import OuterRef, Subquery, Sum
+from django.utils import timezone
+from .models import MovimientoInsumo
+
+# Factor de servicio para el stock de seguridad (~95% de ciclos sin agotarse)
+Z_NIVEL_SERVICIO = 1.65
+# Más allá de este horizonte (días) el insumo se reporta como que no se agota:
+# con stock grande y consumo mínimo la fecha se saldría del rango de date
+HORIZONTE_AGOTAMIENTO = 5 * 365
+
+
+def _matriz_consumo(ids, fecha_inicio, dias):
+    """
+    Construye la matriz (insumos x días) de consumo diario de la ventana.
+    Suma las líneas de abastecimiento (por fecha del abastecimiento) y el consumo
+    por recetas de servicios registrado en el historial. Cada fuente es una sola
+    consulta agrupada por (insumo, día) y se vuelca a la matriz con numpy.
+    """
+    from api.insumoshasabastecimientos.models import InsumoHasAbastecimiento
+
+    fecha_fin = fecha_inicio + timedelta(days=dias - 1)
+    abastecimientos = (
+        InsumoHasAbastecimiento.objects
+        .filter(abastecimiento__fecha__gte=fecha_inicio, abastecimiento__fecha__lte=fecha_fin)
+        .values_list('insumo_id', 'abastecimiento__fecha')
+        .annotate(total=Sum('cantidad'))
+        .order_by()
+    )
+    consumos = (
+        MovimientoInsumo.objects
+        .filter(
+            tipo=MovimientoInsumo.TIPO_CONSUMO_SERVICIO,
+            created_at__date__gte=fecha_inicio,
+            created_at__date__lte=fecha_fin
+        )
+        .values_list('insumo_id', 'created_at__date')
+        .annotate(total=-Sum('cantidad'))
+        .order_by()
+    )
+
+    matriz = np.zeros((len(ids), dias))
+    filas = list(abastecimientos) + list(consumos)
+    if not filas or not len(ids):
+        return matriz
+
+    insumo_ids = np.fromiter((f[0] for f in filas), dtype=np.int64, count=len(filas))
+    columnas = np.fromiter(((f[1] - fecha_inicio).days for f in filas), dtype=np.int64, count=len(filas))
+    totales = np.fromiter((f[2] for f in filas), dtype=float, count=len(filas))
+
+    # ids viene ordenado: searchsorted ubica la fila de cada insumo sin un dict en Python
+    posiciones = np.searchsorted(ids, insumo_ids)
+    posiciones = np.minimum(posiciones, len(ids) - 1)
+    validas = ids[posiciones] == insumo_ids
+    np.add.at(matriz, (posiciones[validas], columnas[validas]), totales[validas])
+    return matriz
+
+
+def pronosticar_insumos(insumos, dias=90, cobertura=30, tiempo_entrega=7, hoy=None):
+    """
+    Estima el ritmo de consumo y la fecha de agotamiento de cada insumo del queryset
+    y sugiere cuánto pedir.
+
+    - dias: ventana de historial (días hacia atrás desde hoy, inclusive).
+    - cobertura: días de consumo que debe cubrir el pedido sugerido.
+    - tiempo_entrega: días que tarda el proveedor en entregar.
+
+    El consumo diario se pondera exponencialmente (vida media de un tercio de la
+    ventana) para dar más peso a lo reciente. Todos los cálculos se hacen sobre
+    la matriz completa en una sola pasada vectorizada.
+    Retorna una lista de dicts ordenada por días para agotarse.
+    """
+    hoy = hoy or timezone.localdate()
+    fecha_inicio = hoy - timedelta(days=dias - 1)
+
+    datos = list(insumos.order_by('id').values_list('id', 'nombre', 'cantidad'))
+    if not datos:
+        return []
+    ids = np.array([d[0] for d in datos], dtype=np.int64)
+    stock = np.array([d[2] for d in datos], dtype=float)
+
+    matriz = _matriz_consumo(ids, fecha_inicio, dias)
+
+    edad = np.arange(dias - 1, -1, -1)
+    pesos = 0.5 ** (edad / max(dias / 3, 1))
+    tasa = matriz @ pesos / pesos.sum()
+    desviacion = matriz.std(axis=1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        dias_agotamiento = np.where(tasa > 0, stock / tasa, np.inf)
+    dias_agotamiento[dias_agotamiento > HORIZONTE_AGOTAMIENTO] = np.inf
+
+    seguridad = Z_NIVEL_SERVICIO * desviacion * math.sqrt(tiempo_entrega)
+    punto_reorden = tasa * tiempo_entrega + seguridad
+    objetivo = tasa * (tiempo_entrega + cobertura) + seguridad
+    sugerido = np.where(
+        (tasa > 0) & (stock <= punto_reorden),
+        np.ceil(np.maximum(objetivo - stock, 0)),
+        0
+    )
+
+    orden = np.argsort(dias_agotamiento, kind='stable')
+    resultado = []
+    for i in orden.tolist():
+        dias_restantes = dias_agotamiento[i]
+        se_agota = math.isfinite(dias_restantes)
+        resultado.append({
+            'insumo_id': datos[i][0],
+            'nombre': datos[i][1],
+            'cantidad': datos[i][2],
+            'consumo_diario': round(float(tasa[i]), 2),
+            'consumo_total': int(matriz[i].sum()),
+            'dias_para_agotarse': round(float(dias_restantes), 1) if se_agota else None,
+            'fecha_agotamiento': (hoy + timedelta(days=int(dias_restantes))).isoformat() if se_agota else None,
+            'punto_reorden': int(math.ceil(punto_reorden[i])),
+            'cantidad_sugerida': int(sugerido[i]),
+        })
+    return resultado
+
+
+@transaction.atomic
+def generar_compras_sugeridas(sugerencias):
+    """
+    Crea compras en estado 'pendiente' (borradores) con las cantidades sugeridas,
+    una por proveedor: cada insumo se asigna al proveedor y precio de su última
+    compra no anulada. Los insumos que nunca se han comprado se devuelven aparte.
+    Retorna (compras, insumos_sin_proveedor).
+    """
+    from api.compras.models import Compra, DetalleCompra
+    from .models import Insumo
+
+    cantidades = {s['insumo_id']: s['cantidad_sugerida'] for s in sugerencias if s['cantidad_sugerida'] > 0}
+    if not cantidades:
+        return [], []
+
+    ultima_compra = (
+        DetalleCompra.objects
+        .filter(insumo=OuterRef('pk'))
+        .exclude(compra__estado='anulada')
+        .order_by('-compra__fecha', '-compra_id')
+    )
+    insumos = (
+        Insumo.objects
+        .filter(pk__in=cantidades)
+        .annotate(
+            ultimo_proveedor=Subquery(ultima_compra.values('compra__proveedor')[:1]),
+            ultimo_precio=Subquery(ultima_compra.values('precio_unitario')[:1])
+        )
+        .values_list('id', 'nombre', 'ultimo_proveedor', 'ultimo_precio')
+    )
+
+    por_proveedor = OrderedDict()
+    sin_proveedor = []
+    for insumo_id, nombre, proveedor_id, precio in insumos:
+        if proveedor_id is None:
+            sin_proveedor.append({'insumo_id': insumo_id, 'nombre': nombre, 'cantidad_sugerida': cantidades[insumo_id]})
+            continue
+        por_proveedor.setdefault(proveedor_id, []).append((insumo_id, cantidades[insumo_id], Decimal(precio)))
+
+    compras = []
+    detalles = []
+    for proveedor_id, lineas in por_proveedor.items():
+        compra = Compra.objects.create(
+            proveedor_id=proveedor_id,
+            estado='pendiente',
+            observaciones="Borrador generado a partir del pronóstico de stock",
+            total=sum(cantidad * precio for _, cantidad, precio in lineas)
+        )
+        compras.append(compra)
+        detalles.extend(
+            DetalleCompra(compra=compra, insumo_id=insumo_id, cantidad=cantidad, precio_unitario=precio)
+            for insumo_id, cantidad, precio in lineas
+        )
+    DetalleCompra.objects.bulk_create(detalles)
+    return compras, sin_proveedor
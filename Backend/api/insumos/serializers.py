@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Insumo
+from .models import Insumo, MovimientoInsumo, InsumoHasProveedor
 from api.categoriainsumos.serializers import CategoriaInsumoSerializer
 
 
@@ -10,9 +10,10 @@ class InsumoSerializer(serializers.ModelSerializer):
         model = Insumo
         fields = [
             'id', 'nombre', 'cantidad', 'estado', 
-            'categoria_insumo', 'categoria_nombre',
+            'categoria_insumo', 'categoria_nombre', 'costo_promedio',
             'created_at', 'updated_at'
         ]
+        read_only_fields = ['costo_promedio']
     
     def validate_nombre(self, value):
         if len(value.strip()) < 2:
@@ -32,5 +33,32 @@ class InsumoDetailSerializer(serializers.ModelSerializer):
         model = Insumo
         fields = [
             'id', 'nombre', 'cantidad', 'estado', 
-            'categoria_insumo', 'created_at', 'updated_at'
+            'categoria_insumo', 'costo_promedio', 'created_at', 'updated_at'
+        ]
+
+
+
+class MovimientoInsumoSerializer(serializers.ModelSerializer):
+    insumo_nombre = serializers.CharField(source='insumo.nombre', read_only=True)
+    tipo_display = serializers.CharField(source='get_tipo_display', read_only=True)
+    
+    class Meta:
+        model = MovimientoInsumo
+        fields = [
+            'id', 'insumo', 'insumo_nombre', 'tipo', 'tipo_display', 'cantidad',
+            'compra', 'abastecimiento', 'cita', 'motivo', 'created_at'
+        ]
+
+
+class InsumoHasProveedorSerializer(serializers.ModelSerializer):
+    insumo_nombre = serializers.CharField(source='insumo.nombre', read_only=True)
+    proveedor_nombre = serializers.CharField(source='proveedor.nombre_empresa', read_only=True)
+    precio_promedio = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
+    
+    class Meta:
+        model = InsumoHasProveedor
+        fields = [
+            'id', 'insumo', 'insumo_nombre', 'proveedor', 'proveedor_nombre',
+            'precio_promedio', 'ultimo_precio', 'cantidad_comprada', 'valor_comprado',
+            'numero_compras', 'fecha_ultima_compra'
         ]
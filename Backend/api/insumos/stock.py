@@ -0,0 +1,120 @@
+from collections import OrderedDict
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Q, Value, When
+from django.utils import timezone
+from .models import Insumo, MovimientoInsumo
+
+
+class StockInsuficienteError(Exception):
+    """Se lanza cuando un movimiento dejaría la cantidad de algún insumo en negativo"""
+
+    def __init__(self, faltantes):
+        # faltantes: lista de dicts {'insumo_id', 'nombre', 'disponible', 'solicitado'}
+        self.faltantes = faltantes
+        detalle = ', '.join(
+            f"{f['nombre']} (disponible: {f['disponible']}, solicitado: {f['solicitado']})"
+            for f in faltantes
+        )
+        super().__init__(f"Stock insuficiente para: {detalle}")
+
+
+def agrupar_cantidades(lineas):
+    """
+    Suma las cantidades por insumo conservando el orden de aparición.
+    lineas: iterable de tuplas (insumo_id, cantidad)
+    """
+    deltas = OrderedDict()
+    for insumo_id, cantidad in lineas:
+        insumo_id = int(insumo_id)
+        deltas[insumo_id] = deltas.get(insumo_id, 0) + int(cantidad)
+    return OrderedDict((pk, d) for pk, d in deltas.items() if d != 0)
+
+
+def _actualizar_cantidades(deltas):
+    """
+    Aplica todos los deltas del lote en un único UPDATE:
+        UPDATE insumo SET cantidad = cantidad + CASE id WHEN .. END
+        WHERE (id = a) OR (id = b AND cantidad >= n) ...
+    Las filas cuyo resultado sería negativo no cumplen el WHERE y no se tocan.
+    Retorna el número de filas actualizadas.
+    """
+    delta = Case(
+        *[When(pk=pk, then=Value(d)) for pk, d in deltas.items()],
+        output_field=IntegerField()
+    )
+    guarda = Q()
+    for pk, d in deltas.items():
+        guarda |= Q(pk=pk, cantidad__gte=-d) if d < 0 else Q(pk=pk)
+
+    return Insumo.objects.filter(guarda).update(
+        cantidad=F('cantidad') + delta,
+        updated_at=timezone.now()
+    )
+
+
+def _faltantes(deltas):
+    """Determina qué insumos no tienen stock suficiente para su delta negativo"""
+    negativos = {pk: d for pk, d in deltas.items() if d < 0}
+    actuales = Insumo.objects.filter(pk__in=deltas).values_list('id', 'nombre', 'cantidad')
+    encontrados = {pk: (nombre, cantidad) for pk, nombre, cantidad in actuales}
+
+    faltantes = []
+    for pk, d in deltas.items():
+        if pk not in encontrados:
+            faltantes.append({'insumo_id': pk, 'nombre': f"#{pk}", 'disponible': 0, 'solicitado': abs(d)})
+            continue
+        nombre, cantidad = encontrados[pk]
+        if pk in negativos and cantidad < -d:
+            faltantes.append({'insumo_id': pk, 'nombre': nombre, 'disponible': cantidad, 'solicitado': -d})
+    return faltantes
+
+
+@transaction.atomic
+def registrar_movimientos(movimientos):
+    """
+    Aplica una lista de MovimientoInsumo sin guardar y los inserta en el historial.
+
+    Los movimientos pueden referenciar distintas compras, abastecimientos o citas;
+    las cantidades se agrupan por insumo y se aplican con una sola sentencia UPDATE
+    atómica (sin leer-modificar-escribir en Python), por lo que operaciones
+    concurrentes no pierden actualizaciones. Si algún insumo quedaría en negativo
+    se lanza StockInsuficienteError y no se aplica nada del lote.
+
+    Los movimientos con cantidad 0 se registran sin tocar el stock (p. ej. un
+    consumo que no se pudo descontar por falta de existencias).
+    """
+    movimientos = list(movimientos)
+    if not movimientos:
+        return []
+
+    deltas = agrupar_cantidades((m.insumo_id, m.cantidad) for m in movimientos)
+    if deltas:
+        actualizados = _actualizar_cantidades(deltas)
+        if actualizados != len(deltas):
+            # Al salir del bloque atómico con la excepción se revierte lo ya aplicado
+            raise StockInsuficienteError(_faltantes(deltas))
+
+    return MovimientoInsumo.objects.bulk_create(movimientos)
+
+
+def aplicar_movimientos(lineas, tipo, compra=None, abastecimiento=None, motivo=None):
+    """
+    Aplica un lote de movimientos de stock y registra el historial.
+
+    - lineas: iterable de (insumo_id, cantidad con signo). Varias líneas del mismo
+      insumo se suman en un único movimiento.
+    - tipo: uno de MovimientoInsumo.TIPO_*.
+
+    Retorna la lista de MovimientoInsumo creados.
+    """
+    return registrar_movimientos([
+        MovimientoInsumo(
+            insumo_id=pk,
+            tipo=tipo,
+            cantidad=d,
+            compra=compra,
+            abastecimiento=abastecimiento,
+            motivo=motivo
+        )
+        for pk, d in agrupar_cantidades(lineas).items()
+    ])
@@ -1,9 +1,18 @@
 from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
-from django.db.models import F, Sum
-from .models import Insumo
-from .serializers import InsumoSerializer, InsumoDetailSerializer
+from django.db.models import F, Sum, Count, DecimalField
+from datetime import datetime
+from .models import Insumo, MovimientoInsumo, InsumoHasProveedor
+from .serializers import (
+    InsumoSerializer,
+    InsumoDetailSerializer,
+    MovimientoInsumoSerializer,
+    InsumoHasProveedorSerializer
+)
+from .stock import aplicar_movimientos, StockInsuficienteError
+from .pronostico import pronosticar_insumos, generar_compras_sugeridas
+from api.compras.serializers import CompraSerializer
 
 
 class InsumoViewSet(viewsets.ModelViewSet):
@@ -133,24 +142,186 @@ class InsumoViewSet(viewsets.ModelViewSet):
         Endpoint: /api/insumos/<pk>/ajustar_stock/
         Parámetros:
         - cantidad: Cantidad a ajustar (positivo para aumentar, negativo para disminuir)
+        - motivo: Motivo del ajuste (opcional, queda en el historial de movimientos)
         """
         insumo = self.get_object()
         
         try:
             cantidad = int(request.data.get('cantidad', 0))
-            if cantidad < 0 and abs(cantidad) > insumo.cantidad:
-                return Response(
-                    {"error": "No se puede reducir más de lo que hay en stock"}, 
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            
-            insumo.cantidad += cantidad
-            insumo.save()
-            
-            serializer = InsumoDetailSerializer(insumo)
-            return Response(serializer.data)
-        except ValueError:
+        except (TypeError, ValueError):
             return Response(
                 {"error": "La cantidad debe ser un número entero"}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
+        
+        try:
+            aplicar_movimientos(
+                [(insumo.id, cantidad)],
+                MovimientoInsumo.TIPO_AJUSTE,
+                motivo=request.data.get('motivo')
+            )
+        except StockInsuficienteError:
+            return Response(
+                {"error": "No se puede reducir más de lo que hay en stock"}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        insumo.refresh_from_db(fields=['cantidad', 'updated_at'])
+        serializer = InsumoDetailSerializer(insumo)
+        return Response(serializer.data)
+    
+    @action(detail=True, methods=['get'])
+    def movimientos(self, request, pk=None):
+        """
+        Historial de movimientos de stock del insumo, del más reciente al más antiguo.
+        Endpoint: /api/insumos/<pk>/movimientos/
+        Parámetros opcionales:
+        - tipo: filtra por tipo de movimiento
+        """
+        insumo = self.get_object()
+        movimientos = MovimientoInsumo.objects.filter(insumo=insumo).select_related('insumo')
+        
+        tipo = request.query_params.get('tipo', None)
+        if tipo:
+            movimientos = movimientos.filter(tipo=tipo)
+        
+        serializer = MovimientoInsumoSerializer(movimientos, many=True)
+        return Response(serializer.data)
+    
+    @action(detail=True, methods=['get'])
+    def costos(self, request, pk=None):
+        """
+        Costo promedio ponderado del insumo y precios por proveedor, del más barato al más caro.
+        Endpoint: /api/insumos/<pk>/costos/
+        """
+        insumo = self.get_object()
+        precios = sorted(
+            InsumoHasProveedor.objects.filter(insumo=insumo, cantidad_comprada__gt=0).select_related('insumo', 'proveedor'),
+            key=lambda p: p.precio_promedio
+        )
+        
+        return Response({
+            'insumo_id': insumo.id,
+            'nombre': insumo.nombre,
+            'cantidad': insumo.cantidad,
+            'costo_promedio': insumo.costo_promedio,
+            'proveedores': InsumoHasProveedorSerializer(precios, many=True).data
+        })
+    
+    @action(detail=False, methods=['get'])
+    def valorizacion(self, request):
+        """
+        Valor del inventario (cantidad x costo promedio) por categoría, en una sola consulta agrupada.
+        Endpoint: /api/insumos/valorizacion/
+        """
+        categorias = list(
+            Insumo.objects
+            .values('categoria_insumo_id', 'categoria_insumo__nombre')
+            .annotate(
+                insumos=Count('id'),
+                unidades=Sum('cantidad'),
+                valor=Sum(F('cantidad') * F('costo_promedio'), output_field=DecimalField(max_digits=18, decimal_places=2))
+            )
+            .order_by('categoria_insumo__nombre')
+        )
+        
+        return Response({
+            'valor_total': sum(c['valor'] or 0 for c in categorias),
+            'categorias': categorias
+        })
+    
+    @action(detail=False, methods=['get'])
+    def consumo(self, request):
+        """
+        Reporte de consumo de insumos por servicios en un período (una sola consulta agrupada).
+        Endpoint: /api/insumos/consumo/?fecha_inicio=YYYY-MM-DD&fecha_fin=YYYY-MM-DD
+        """
+        try:
+            fecha_inicio = datetime.strptime(request.query_params.get('fecha_inicio', ''), '%Y-%m-%d').date()
+            fecha_fin = datetime.strptime(request.query_params.get('fecha_fin', ''), '%Y-%m-%d').date()
+        except ValueError:
+            return Response(
+                {"error": "Debe proporcionar fecha_inicio y fecha_fin (formato YYYY-MM-DD)"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        consumo = (
+            MovimientoInsumo.objects
+            .filter(
+                tipo=MovimientoInsumo.TIPO_CONSUMO_SERVICIO,
+                created_at__date__gte=fecha_inicio,
+                created_at__date__lte=fecha_fin
+            )
+            .values('insumo_id', 'insumo__nombre', 'insumo__categoria_insumo__nombre')
+            .annotate(total_consumido=-Sum('cantidad'), citas=Count('cita', distinct=True))
+            .order_by('-total_consumido')
+        )
+        
+        return Response({
+            'fecha_inicio': fecha_inicio.isoformat(),
+            'fecha_fin': fecha_fin.isoformat(),
+            'insumos': list(consumo)
+        })
+    
+    def _parametros_pronostico(self, datos):
+        """Lee y valida los parámetros del pronóstico (enteros positivos)"""
+        parametros = {}
+        for nombre, defecto, maximo in [('dias', 90, 730), ('cobertura', 30, 365), ('tiempo_entrega', 7, 180)]:
+            try:
+                valor = int(datos.get(nombre, defecto))
+            except (TypeError, ValueError):
+                raise ValueError(f"El parámetro {nombre} debe ser un número entero")
+            if not 1 <= valor <= maximo:
+                raise ValueError(f"El parámetro {nombre} debe estar entre 1 y {maximo}")
+            parametros[nombre] = valor
+        return parametros
+    
+    @action(detail=False, methods=['get'])
+    def pronostico(self, request):
+        """
+        Pronóstico de agotamiento y cantidades sugeridas de reposición.
+        Endpoint: /api/insumos/pronostico/
+        Parámetros opcionales (además de los filtros del listado):
+        - dias: días de historial a analizar (por defecto 90)
+        - cobertura: días de consumo que debe cubrir el pedido (por defecto 30)
+        - tiempo_entrega: días de entrega del proveedor (por defecto 7)
+        - solo_reponer: 'true' para devolver solo los insumos con pedido sugerido
+        """
+        try:
+            parametros = self._parametros_pronostico(request.query_params)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        resultado = pronosticar_insumos(self.get_queryset(), **parametros)
+        if request.query_params.get('solo_reponer') == 'true':
+            resultado = [r for r in resultado if r['cantidad_sugerida'] > 0]
+        
+        return Response({**parametros, 'insumos': resultado})
+    
+    @action(detail=False, methods=['post'])
+    def generar_compras(self, request):
+        """
+        Genera compras pendientes (borradores) con las cantidades sugeridas por el
+        pronóstico, agrupadas por el último proveedor de cada insumo.
+        Endpoint: /api/insumos/generar_compras/
+        Body opcional: {"dias": 90, "cobertura": 30, "tiempo_entrega": 7, "insumos": [1, 2]}
+        """
+        try:
+            parametros = self._parametros_pronostico(request.data)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            insumos_ids = [int(pk) for pk in request.data.get('insumos') or []]
+        except (TypeError, ValueError):
+            return Response({"error": "insumos debe ser una lista de IDs"}, status=status.HTTP_400_BAD_REQUEST)
+        
+        insumos = self.get_queryset()
+        if insumos_ids:
+            insumos = insumos.filter(pk__in=insumos_ids)
+        
+        compras, sin_proveedor = generar_compras_sugeridas(pronosticar_insumos(insumos, **parametros))
+        return Response({
+            'compras': CompraSerializer(compras, many=True).data,
+            'sin_proveedor': sin_proveedor
+        }, status=status.HTTP_201_CREATED if compras else status.HTTP_200_OK)
@@ -2,8 +2,8 @@ from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from django.db.models import Count, Sum
-from django.core.mail import send_mail
-from django.conf import settings
+from api.authentication.jwt import invalidar_usuario
+from api.correos.bandeja import encolar_correo
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
 from django.db import transaction
@@ -225,14 +225,7 @@ class ManicuristaViewSet(viewsets.ModelViewSet):
         Si tienes alguna pregunta, contacta al administrador.
         """
         
-        send_mail(
-            asunto,
-            mensaje_texto,
-            settings.DEFAULT_FROM_EMAIL,
-            [manicurista.correo],
-            html_message=mensaje_html,
-            fail_silently=False,
-        )
+        encolar_correo(asunto, mensaje_texto, [manicurista.correo], html=mensaje_html)
     
     @action(detail=False, methods=['post'])
     def login(self, request):
@@ -393,14 +386,7 @@ class ManicuristaViewSet(viewsets.ModelViewSet):
         Gracias por mantener tu información actualizada.
         """
         
-        send_mail(
-            asunto,
-            mensaje_texto,
-            settings.DEFAULT_FROM_EMAIL,
-            [manicurista.correo],
-            html_message=mensaje_html,
-            fail_silently=False,
-        )
+        encolar_correo(asunto, mensaje_texto, [manicurista.correo], html=mensaje_html)
     
     @action(detail=True, methods=['post'])
     def resetear_password(self, request, pk=None):
@@ -410,6 +396,10 @@ class ManicuristaViewSet(viewsets.ModelViewSet):
         manicurista = self.get_object()
         nueva_contraseña_temporal = manicurista.generar_contraseña_temporal()
         manicurista.save()
+        # El usuario relacionado recibe el mismo hash para iniciar sesión con la temporal
+        if manicurista.usuario_id:
+            Usuario.objects.filter(pk=manicurista.usuario_id).update(password=manicurista.contraseña_temporal)
+            invalidar_usuario(manicurista.usuario_id)
         
         # Enviar correo con nueva contraseña
         try:
@@ -519,14 +509,7 @@ class ManicuristaViewSet(viewsets.ModelViewSet):
         ¿Necesitas ayuda? Contacta al administrador.
         """
         
-        send_mail(
-            asunto,
-            mensaje_texto,
-            settings.DEFAULT_FROM_EMAIL,
-            [manicurista.correo],
-            html_message=mensaje_html,
-            fail_silently=False,
-        )
+        encolar_correo(asunto, mensaje_texto, [manicurista.correo], html=mensaje_html)
     
     @action(detail=False, methods=['get'])
     def activos(self, request):
@@ -0,0 +1,236 @@
+"""
+Impacto de las novedades sobre las citas agendadas.
+
+Una novedad (ausencia o tardanza) deja a la manicurista sin atender en un
+intervalo del día. Las citas abiertas que se solapan con ese intervalo se
+reasignan a otra manicurista libre a la misma hora o, si no hay ninguna, se
+cancelan. Cada cambio queda registrado en NovedadHasCita para poder revertirlo
+al anular la novedad y para avisar al cliente fuera de la petición.
+"""
+from collections import defaultdict
+from django.db import transaction
+from django.db.models import Case, CharField, Q, Value, When
+from django.utils import timezone
+from api.citas.models import Cita
+from api.horarios.grillas import obtener_grilla
+from api.manicuristas.models import Manicurista
+from .models import Novedad, NovedadHasCita
+from .notificaciones import encolar_al_confirmar
+
+ESTADOS_ABIERTOS = ['pendiente', 'en_proceso']
+MINUTOS_DIA = 24 * 60
+
+
+def _minutos(hora):
+    return hora.hour * 60 + hora.minute
+
+
+def _intervalo_cita(hora, duracion_total, duracion_estimada):
+    inicio = _minutos(hora)
+    return inicio, inicio + (duracion_total or duracion_estimada or 0)
+
+
+def _se_solapan(a, b):
+    return a[0] < b[1] and b[0] < a[1]
+
+
+def bloqueo(novedad):
+    """Intervalo [inicio, fin) en minutos del día en que la novedad deja sin atención, o None"""
+    if novedad.estado == 'ausente':
+        if novedad.tipo_ausencia == 'completa':
+            return 0, MINUTOS_DIA
+        if novedad.tipo_ausencia == 'por_horas' and novedad.hora_inicio_ausencia and novedad.hora_fin_ausencia:
+            return _minutos(novedad.hora_inicio_ausencia), _minutos(novedad.hora_fin_ausencia)
+    elif novedad.estado == 'tardanza' and novedad.hora_entrada:
+        return 0, _minutos(novedad.hora_entrada)
+    return None
+
+
+def citas_afectadas(novedades):
+    """
+    Citas abiertas que se solapan (según su duración) con el bloqueo de cada
+    novedad, en una sola consulta para todas. Retorna {novedad_id: [citas]}.
+    """
+    por_clave = defaultdict(list)
+    for novedad in novedades:
+        intervalo = bloqueo(novedad)
+        if intervalo:
+            por_clave[(novedad.manicurista_id, novedad.fecha)].append((novedad, intervalo))
+    if not por_clave:
+        return {}
+
+    # Un filtro compacto (manicuristas x fechas) aunque el lote sea grande; el
+    # solapamiento exacto se resuelve en memoria con la duración de cada cita
+    afectadas = defaultdict(list)
+    citas = (
+        Cita.objects.filter(
+            manicurista_id__in={m for m, _ in por_clave},
+            fecha_cita__in={f for _, f in por_clave},
+            estado__in=ESTADOS_ABIERTOS
+        )
+        .select_related('cliente')
+        .order_by('fecha_cita', 'hora_cita', 'id')
+    )
+    for cita in citas:
+        intervalo_cita = _intervalo_cita(cita.hora_cita, cita.duracion_total, cita.duracion_estimada)
+        for novedad, intervalo in por_clave.get((cita.manicurista_id, cita.fecha_cita), []):
+            if _se_solapan(intervalo_cita, intervalo):
+                afectadas[novedad.id].append(cita)
+                break
+    return afectadas
+
+
+def _agenda(fechas):
+    """
+    Ocupación de todas las manicuristas en las fechas dadas, con dos consultas:
+    - ocupado: {(manicurista_id, fecha): [(inicio, fin), ...]} por citas abiertas y novedades activas.
+    - carga: {(manicurista_id, fecha): minutos agendados}, para repartir las reasignaciones.
+    - tomadas: {(manicurista_id, fecha, hora)} de cualquier cita, también cancelada o
+      finalizada: la restricción única (manicurista, fecha_cita, hora_cita) las incluye.
+    """
+    ocupado = defaultdict(list)
+    carga = defaultdict(int)
+    tomadas = set()
+    citas = Cita.objects.filter(fecha_cita__in=fechas).values_list(
+        'manicurista_id', 'fecha_cita', 'hora_cita', 'duracion_total', 'duracion_estimada', 'estado'
+    )
+    for manicurista_id, fecha, hora, duracion_total, duracion_estimada, estado in citas:
+        tomadas.add((manicurista_id, fecha, hora))
+        if estado not in ESTADOS_ABIERTOS:
+            continue
+        intervalo = _intervalo_cita(hora, duracion_total, duracion_estimada)
+        ocupado[(manicurista_id, fecha)].append(intervalo)
+        carga[(manicurista_id, fecha)] += intervalo[1] - intervalo[0]
+
+    for novedad in Novedad.objects.filter(fecha__in=fechas).exclude(estado='anulada'):
+        intervalo = bloqueo(novedad)
+        if intervalo:
+            ocupado[(novedad.manicurista_id, novedad.fecha)].append(intervalo)
+    return ocupado, carga, tomadas
+
+
+def planificar(novedades, reasignar=True):
+    """
+    Calcula, sin aplicar nada, qué pasará con cada cita afectada: reasignación a
+    la manicurista libre con menos carga ese día o, si no hay ninguna, cancelación.
+    Una manicurista está libre si la cita cabe en su grilla de ese día, no se
+    solapa con su ocupación y no tiene otra cita (en cualquier estado) a esa hora.
+    Retorna instancias de NovedadHasCita sin guardar.
+    """
+    afectadas = citas_afectadas(novedades)
+    if not afectadas:
+        return []
+
+    if reasignar:
+        fechas = {cita.fecha_cita for citas in afectadas.values() for cita in citas}
+        ocupado, carga, tomadas = _agenda(fechas)
+        candidatas = list(Manicurista.objects.filter(estado='activo').order_by('id').values_list('id', flat=True))
+
+    plan = []
+    for novedad in novedades:
+        for cita in afectadas.get(novedad.id, []):
+            nueva = None
+            if reasignar:
+                fecha = cita.fecha_cita
+                intervalo = _intervalo_cita(cita.hora_cita, cita.duracion_total, cita.duracion_estimada)
+                duracion = intervalo[1] - intervalo[0]
+                libres = [
+                    m for m in candidatas
+                    if m != cita.manicurista_id
+                    and (m, fecha, cita.hora_cita) not in tomadas
+                    and obtener_grilla(m, fecha).cabe(cita.hora_cita, duracion)
+                    and not any(_se_solapan(intervalo, otro) for otro in ocupado[(m, fecha)])
+                ]
+                if libres:
+                    nueva = min(libres, key=lambda m: carga[(m, fecha)])
+                    tomadas.add((nueva, fecha, cita.hora_cita))
+                    ocupado[(nueva, fecha)].append(intervalo)
+                    carga[(nueva, fecha)] += intervalo[1] - intervalo[0]
+
+            plan.append(NovedadHasCita(
+                novedad=novedad,
+                cita=cita,
+                accion=NovedadHasCita.ACCION_REASIGNADA if nueva else NovedadHasCita.ACCION_CANCELADA,
+                estado_anterior=cita.estado,
+                manicurista_anterior_id=cita.manicurista_id,
+                manicurista_nueva_id=nueva,
+            ))
+    return plan
+
+
+def aplicar(novedades, reasignar=True):
+    """
+    Aplica el plan de las novedades con actualizaciones masivas: un bulk_update
+    para las reasignaciones, un UPDATE para las cancelaciones y un bulk_create
+    del registro. Retorna los impactos creados.
+    """
+    with transaction.atomic():
+        plan = planificar(novedades, reasignar)
+        if not plan:
+            return []
+
+        reasignadas = []
+        for impacto in plan:
+            if impacto.accion == NovedadHasCita.ACCION_REASIGNADA:
+                impacto.cita.manicurista_id = impacto.manicurista_nueva_id
+                impacto.cita.updated_at = timezone.now()
+                reasignadas.append(impacto.cita)
+        if reasignadas:
+            Cita.objects.bulk_update(reasignadas, ['manicurista', 'updated_at'])
+
+        canceladas = [i.cita_id for i in plan if i.accion == NovedadHasCita.ACCION_CANCELADA]
+        if canceladas:
+            Cita.objects.filter(pk__in=canceladas).update(estado='cancelada', updated_at=timezone.now())
+
+        impactos = NovedadHasCita.objects.bulk_create(plan)
+        encolar_al_confirmar()
+        return impactos
+
+
+def revertir(novedad):
+    """
+    Deshace los impactos vigentes de la novedad. Solo se tocan las citas que
+    siguen como la novedad las dejó (canceladas, o abiertas con la manicurista
+    de reemplazo); las que cambiaron después se dejan como están.
+    Retorna la cantidad de citas restauradas.
+    """
+    with transaction.atomic():
+        impactos = list(novedad.impactos.filter(revertido=False))
+        if not impactos:
+            return 0
+
+        canceladas = {i.cita_id: i for i in impactos if i.accion == NovedadHasCita.ACCION_CANCELADA}
+        reasignadas = {i.cita_id: i for i in impactos if i.accion == NovedadHasCita.ACCION_REASIGNADA}
+
+        intactas = Q(pk__in=list(canceladas), estado='cancelada')
+        for cita_id, impacto in reasignadas.items():
+            intactas |= Q(pk=cita_id, manicurista_id=impacto.manicurista_nueva_id, estado__in=ESTADOS_ABIERTOS)
+        restaurables = set(Cita.objects.filter(intactas).values_list('id', flat=True))
+
+        restaurar_estado = [c for c in canceladas if c in restaurables]
+        if restaurar_estado:
+            Cita.objects.filter(pk__in=restaurar_estado).update(
+                estado=Case(
+                    *[When(pk=c, then=Value(canceladas[c].estado_anterior)) for c in restaurar_estado],
+                    output_field=CharField()
+                ),
+                updated_at=timezone.now()
+            )
+
+        restaurar_manicurista = [
+            Cita(pk=c, manicurista_id=i.manicurista_anterior_id, updated_at=timezone.now())
+            for c, i in reasignadas.items() if c in restaurables
+        ]
+        if restaurar_manicurista:
+            Cita.objects.bulk_update(restaurar_manicurista, ['manicurista', 'updated_at'])
+
+        # Las restauradas vuelven a la cola para avisar al cliente
+        novedad.impactos.filter(pk__in=[i.pk for i in impactos if i.cita_id in restaurables]).update(
+            revertido=True, notificacion_pendiente=True
+        )
+        novedad.impactos.filter(pk__in=[i.pk for i in impactos if i.cita_id not in restaurables]).update(
+            revertido=True, notificacion_pendiente=False
+        )
+        if restaurables:
+            encolar_al_confirmar()
+        return len(restaurables)
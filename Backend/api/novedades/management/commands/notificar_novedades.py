@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from api.novedades.notificaciones import TAMANO_LOTE, encolar_notificaciones_pendientes
+
+
+class Command(BaseCommand):
+    help = "Encola en la bandeja de salida los avisos pendientes por citas canceladas, reasignadas o reactivadas por novedades"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=TAMANO_LOTE, help="Avisos por lote")
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            encolados = encolar_notificaciones_pendientes(options['lote'])
+            if not encolados:
+                break
+            total += encolados
+        self.stdout.write(self.style.SUCCESS(f"Avisos encolados: {total} (los envía el comando enviar_correos)"))
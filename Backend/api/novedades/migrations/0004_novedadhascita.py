@@ -0,0 +1,36 @@
+# Generated by Django 5.2 on 2026-10-19 05:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('citas', '0004_alter_cita_duracion_estimada_alter_cita_manicurista_and_more'),
+        ('manicuristas', '0003_manicurista_especialidad'),
+        ('novedades', '0003_alter_novedad_unique_together_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NovedadHasCita',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('accion', models.CharField(choices=[('cancelada', 'Cancelada'), ('reasignada', 'Reasignada')], max_length=10)),
+                ('estado_anterior', models.CharField(max_length=20)),
+                ('revertido', models.BooleanField(default=False)),
+                ('notificacion_pendiente', models.BooleanField(db_index=True, default=True)),
+                ('cita', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='impactos_novedad', to='citas.cita')),
+                ('manicurista_anterior', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='manicuristas.manicurista')),
+                ('manicurista_nueva', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='manicuristas.manicurista')),
+                ('novedad', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='impactos', to='novedades.novedad')),
+            ],
+            options={
+                'verbose_name': 'Novedad - Cita',
+                'verbose_name_plural': 'Novedades - Citas',
+            },
+        ),
+    ]
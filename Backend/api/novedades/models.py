@@ -18,9 +18,7 @@ class Novedad(BaseModel):
         ('por_horas', 'Por Horas'),
     )
 
-    # Horarios base del negocio (10am - 8pm)
-    HORA_ENTRADA_BASE = time(10, 0)  # 10:00 AM
-    HORA_SALIDA_BASE = time(20, 0)   # 8:00 PM
+    # La jornada de cada día sale de api.horarios (plantillas, excepciones y festivos)
     HORA_MIN_PERMITIDA = time(7, 0)  # 7:00 AM
     HORA_MAX_PERMITIDA = time(22, 0) # 10:00 PM
 
@@ -98,3 +96,38 @@ class Novedad(BaseModel):
         verbose_name_plural = "Novedades"
         ordering = ['-fecha', '-created_at']
         # Remover unique_together para permitir múltiples registros (incluyendo anuladas)
+
+
+class NovedadHasCita(BaseModel):
+    """
+    Cambio que una novedad aplicó sobre una cita (cancelación o reasignación a
+    otra manicurista). Guarda el estado previo para que la anulación de la
+    novedad revierta exactamente lo aplicado, y sirve de cola para avisar al
+    cliente fuera de la petición.
+    """
+    ACCION_CANCELADA = 'cancelada'
+    ACCION_REASIGNADA = 'reasignada'
+    ACCION_CHOICES = (
+        (ACCION_CANCELADA, 'Cancelada'),
+        (ACCION_REASIGNADA, 'Reasignada'),
+    )
+
+    novedad = models.ForeignKey(Novedad, on_delete=models.CASCADE, related_name='impactos')
+    cita = models.ForeignKey('citas.Cita', on_delete=models.CASCADE, related_name='impactos_novedad')
+    accion = models.CharField(max_length=10, choices=ACCION_CHOICES)
+    estado_anterior = models.CharField(max_length=20)
+    manicurista_anterior = models.ForeignKey(
+        Manicurista, on_delete=models.CASCADE, related_name='+'
+    )
+    manicurista_nueva = models.ForeignKey(
+        Manicurista, on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
+    revertido = models.BooleanField(default=False)
+    notificacion_pendiente = models.BooleanField(default=True, db_index=True)
+
+    class Meta:
+        verbose_name = "Novedad - Cita"
+        verbose_name_plural = "Novedades - Citas"
+
+    def __str__(self):
+        return f"Novedad {self.novedad_id} - Cita {self.cita_id} ({self.accion})"
@@ -0,0 +1,73 @@
+"""
+Avisos a los clientes por los cambios que las novedades hicieron en sus citas.
+Los impactos con notificacion_pendiente=True se renderizan en lote a la bandeja
+de salida (api.correos) al confirmarse la transacción que los creó; el comando
+notificar_novedades encola los que hubieran quedado pendientes.
+"""
+from django.db import transaction
+from api.correos.bandeja import encolar_correos
+from .models import NovedadHasCita
+
+TAMANO_LOTE = 100
+
+
+def _mensaje(impacto):
+    cita = impacto.cita
+    cuando = f"el {cita.fecha_cita.strftime('%d/%m/%Y')} a las {cita.hora_cita.strftime('%H:%M')}"
+    saludo = f"Hola {cita.cliente.nombre},\n\n"
+
+    if impacto.revertido:
+        return (
+            'Tu cita ha sido reactivada',
+            saludo + f"Tu cita {cuando} vuelve a estar a cargo de {impacto.manicurista_anterior.nombre}.\n\n"
+                     f"La novedad que había afectado tu cita fue anulada.\n\n¡Te esperamos!"
+        )
+    if impacto.accion == NovedadHasCita.ACCION_REASIGNADA:
+        return (
+            'Cambio de manicurista en tu cita',
+            saludo + f"Por una novedad de {impacto.manicurista_anterior.nombre}, tu cita {cuando} "
+                     f"será atendida por {impacto.manicurista_nueva.nombre}. La fecha y la hora no cambian.\n\n"
+                     f"¡Te esperamos!"
+        )
+    return (
+        'Cancelación de tu cita en Spa',
+        saludo + f"Lamentamos informarte que tu cita con {impacto.manicurista_anterior.nombre} {cuando} "
+                 f"ha sido cancelada debido a una novedad de la manicurista.\n\n"
+                 f"Motivo: {impacto.novedad.get_estado_display()}\n\n"
+                 f"Te invitamos a agendar una nueva cita desde nuestra plataforma.\n\n"
+                 f"Gracias por tu comprensión."
+    )
+
+
+def encolar_notificaciones_pendientes(limite=TAMANO_LOTE):
+    """
+    Pasa hasta `limite` avisos pendientes a la bandeja de salida con un solo
+    INSERT y los marca como notificados. Retorna la cantidad de avisos procesados.
+    """
+    with transaction.atomic():
+        impactos = list(
+            NovedadHasCita.objects
+            .select_for_update()
+            .filter(notificacion_pendiente=True)
+            .select_related('novedad', 'cita__cliente', 'manicurista_anterior', 'manicurista_nueva')
+            .order_by('id')[:limite]
+        )
+        if not impactos:
+            return 0
+
+        mensajes = []
+        for impacto in impactos:
+            asunto, cuerpo = _mensaje(impacto)
+            mensajes.append({'asunto': asunto, 'mensaje': cuerpo, 'destinatarios': [impacto.cita.cliente.correo_electronico]})
+        encolar_correos(mensajes)
+
+        NovedadHasCita.objects.filter(pk__in=[i.pk for i in impactos]).update(notificacion_pendiente=False)
+    return len(impactos)
+
+
+def encolar_al_confirmar():
+    """Programa el encolado de los avisos para cuando se confirme la transacción en curso"""
+    def encolar():
+        while encolar_notificaciones_pendientes():
+            pass
+    transaction.on_commit(encolar)
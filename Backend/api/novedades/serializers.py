@@ -1,12 +1,78 @@
 from rest_framework import serializers
-from api.novedades.models import Novedad
+from api.novedades.models import Novedad, NovedadHasCita
+from api.manicuristas.models import Manicurista
 from api.manicuristas.serializers import ManicuristaSerializer
+from api.horarios.grillas import grilla_base, obtener_grilla
 from datetime import time, date, timedelta
 from django.utils import timezone
 from datetime import datetime, time
 from django.utils.timezone import localdate
 
 
+def _validar_fecha_por_estado(fecha, estado):
+    """Ausencias desde mañana, tardanzas desde hoy"""
+    today = timezone.now().date()
+    tomorrow = today + timedelta(days=1)
+
+    if fecha and estado:
+        if estado == 'ausente' and fecha < tomorrow:
+            raise serializers.ValidationError({
+                'fecha': 'Para ausencias, debe seleccionar una fecha a partir de mañana.'
+            })
+        elif estado == 'tardanza' and fecha < today:
+            raise serializers.ValidationError({
+                'fecha': 'Para tardanzas, debe seleccionar una fecha a partir de hoy.'
+            })
+
+
+def _normalizar_horario(data, grilla):
+    """Valida y completa las horas según el estado, el tipo de ausencia y la jornada del día"""
+    estado = data.get('estado')
+    tipo_ausencia = data.get('tipo_ausencia')
+
+    if not grilla.abierta:
+        raise serializers.ValidationError("La manicurista no tiene jornada de atención en la fecha indicada.")
+    entrada, salida = grilla.hora_inicio, grilla.hora_fin
+
+    if estado == 'tardanza':
+        hora_entrada = data.get('hora_entrada')
+        if not hora_entrada:
+            raise serializers.ValidationError("Debe ingresar la hora de entrada para una tardanza.")
+        if hora_entrada <= entrada:
+            raise serializers.ValidationError(
+                f"Para registrar tardanza, la hora debe ser posterior a {entrada.strftime('%H:%M')}."
+            )
+        data['hora_salida'] = salida
+        data['tipo_ausencia'] = None
+        data['hora_inicio_ausencia'] = None
+        data['hora_fin_ausencia'] = None
+
+    elif estado == 'ausente':
+        if not tipo_ausencia:
+            raise serializers.ValidationError("Debe indicar el tipo de ausencia.")
+
+        if tipo_ausencia == 'completa':
+            data['hora_entrada'] = None
+            data['hora_salida'] = None
+            data['hora_inicio_ausencia'] = entrada
+            data['hora_fin_ausencia'] = salida
+
+        elif tipo_ausencia == 'por_horas':
+            hora_inicio = data.get('hora_inicio_ausencia')
+            hora_fin = data.get('hora_fin_ausencia')
+            if not hora_inicio:
+                raise serializers.ValidationError("Debe ingresar la hora de inicio de ausencia.")
+            if not hora_fin:
+                data['hora_fin_ausencia'] = salida
+                hora_fin = data['hora_fin_ausencia']
+            if hora_inicio >= hora_fin:
+                raise serializers.ValidationError(
+                    "La hora de inicio de ausencia debe ser anterior a la de fin."
+                )
+            data['hora_entrada'] = entrada
+            data['hora_salida'] = salida
+
+
 class NovedadSerializer(serializers.ModelSerializer):
     class Meta:
         model = Novedad
@@ -84,61 +150,65 @@ class NovedadSerializer(serializers.ModelSerializer):
                     "Ya existe una novedad activa para esta manicurista en la fecha indicada."
                 )
 
-        estado = data.get('estado')
-        tipo_ausencia = data.get('tipo_ausencia')
-        fecha = data.get('fecha')
+        _validar_fecha_por_estado(data.get('fecha'), data.get('estado'))
+        manicurista = data.get('manicurista') or getattr(self.instance, 'manicurista', None)
+        fecha = data.get('fecha') or getattr(self.instance, 'fecha', None)
+        _normalizar_horario(data, obtener_grilla(manicurista.id, fecha) if manicurista and fecha else grilla_base())
+        return data
 
-        today = timezone.now().date()
-        tomorrow = today + timedelta(days=1)
 
-        if fecha and estado:
-            if estado == 'ausente' and fecha < tomorrow:
-                raise serializers.ValidationError({
-                    'fecha': 'Para ausencias, debe seleccionar una fecha a partir de mañana.'
-                })
-            elif estado == 'tardanza' and fecha < today:
-                raise serializers.ValidationError({
-                    'fecha': 'Para tardanzas, debe seleccionar una fecha a partir de hoy.'
-                })
-
-        if estado == 'tardanza':
-            hora_entrada = data.get('hora_entrada')
-            if not hora_entrada:
-                raise serializers.ValidationError("Debe ingresar la hora de entrada para una tardanza.")
-            if hora_entrada <= Novedad.HORA_ENTRADA_BASE:
-                raise serializers.ValidationError(
-                    f"Para registrar tardanza, la hora debe ser posterior a {Novedad.HORA_ENTRADA_BASE.strftime('%H:%M')}."
-                )
-            data['hora_salida'] = Novedad.HORA_SALIDA_BASE
-            data['tipo_ausencia'] = None
-            data['hora_inicio_ausencia'] = None
-            data['hora_fin_ausencia'] = None
-
-        elif estado == 'ausente':
-            if not tipo_ausencia:
-                raise serializers.ValidationError("Debe indicar el tipo de ausencia.")
-
-            if tipo_ausencia == 'completa':
-                data['hora_entrada'] = None
-                data['hora_salida'] = None
-                data['hora_inicio_ausencia'] = Novedad.HORA_ENTRADA_BASE
-                data['hora_fin_ausencia'] = Novedad.HORA_SALIDA_BASE
-
-            elif tipo_ausencia == 'por_horas':
-                hora_inicio = data.get('hora_inicio_ausencia')
-                hora_fin = data.get('hora_fin_ausencia')
-                if not hora_inicio:
-                    raise serializers.ValidationError("Debe ingresar la hora de inicio de ausencia.")
-                if not hora_fin:
-                    data['hora_fin_ausencia'] = Novedad.HORA_SALIDA_BASE
-                    hora_fin = data['hora_fin_ausencia']
-                if hora_inicio >= hora_fin:
-                    raise serializers.ValidationError(
-                        "La hora de inicio de ausencia debe ser anterior a la de fin."
-                    )
-                data['hora_entrada'] = Novedad.HORA_ENTRADA_BASE
-                data['hora_salida'] = Novedad.HORA_SALIDA_BASE
+class NovedadMasivaSerializer(serializers.Serializer):
+    """Una misma novedad para varias manicuristas en un rango de fechas"""
+    MAX_DIAS = 62
+    # Campos que _normalizar_horario completa según la jornada de cada par
+    CAMPOS_HORARIO = ('estado', 'tipo_ausencia', 'hora_entrada', 'hora_salida', 'hora_inicio_ausencia', 'hora_fin_ausencia')
+
+    manicuristas = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
+    fecha_inicio = serializers.DateField()
+    fecha_fin = serializers.DateField()
+    estado = serializers.ChoiceField(choices=['ausente', 'tardanza'])
+    tipo_ausencia = serializers.ChoiceField(choices=Novedad.TIPO_AUSENCIA_CHOICES, required=False, allow_null=True)
+    hora_entrada = serializers.TimeField(required=False, allow_null=True)
+    hora_inicio_ausencia = serializers.TimeField(required=False, allow_null=True)
+    hora_fin_ausencia = serializers.TimeField(required=False, allow_null=True)
+    motivo = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+    reasignar = serializers.BooleanField(default=True)
+
+    validate_hora_entrada = NovedadSerializer.validate_hora_entrada
+    validate_hora_inicio_ausencia = NovedadSerializer.validate_hora_inicio_ausencia
+    validate_hora_fin_ausencia = NovedadSerializer.validate_hora_fin_ausencia
+
+    def validate_manicuristas(self, value):
+        ids = list(dict.fromkeys(value))
+        existentes = set(Manicurista.objects.filter(pk__in=ids).values_list('id', flat=True))
+        faltantes = [pk for pk in ids if pk not in existentes]
+        if faltantes:
+            raise serializers.ValidationError(f"Manicuristas no encontradas: {faltantes}")
+        return ids
 
+    def validate(self, data):
+        if data['fecha_fin'] < data['fecha_inicio']:
+            raise serializers.ValidationError({'fecha_fin': 'La fecha final debe ser igual o posterior a la inicial.'})
+        if (data['fecha_fin'] - data['fecha_inicio']).days >= self.MAX_DIAS:
+            raise serializers.ValidationError({'fecha_fin': f'El rango no puede superar {self.MAX_DIAS} días.'})
+
+        _validar_fecha_por_estado(data['fecha_inicio'], data['estado'])
+        # Cada (manicurista, fecha) se valida contra su propia jornada (las reglas
+        # están en el proceso: no consulta nada). Los pares que no encajan se
+        # reportan como conflictos y el resto del lote se registra
+        data['horarios'], data['rechazos'] = {}, []
+        fechas = [data['fecha_inicio'] + timedelta(days=i) for i in range((data['fecha_fin'] - data['fecha_inicio']).days + 1)]
+        for manicurista_id in data['manicuristas']:
+            for fecha in fechas:
+                horario = {campo: data.get(campo) for campo in self.CAMPOS_HORARIO}
+                try:
+                    _normalizar_horario(horario, obtener_grilla(manicurista_id, fecha))
+                except serializers.ValidationError as e:
+                    data['rechazos'].append({'manicurista': manicurista_id, 'fecha': fecha, 'error': str(e.detail[0])})
+                    continue
+                data['horarios'][(manicurista_id, fecha)] = horario
+        if not data['horarios']:
+            raise serializers.ValidationError(sorted({r['error'] for r in data['rechazos']}))
         return data
 
 
@@ -154,9 +224,10 @@ class NovedadDetailSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
     def get_horario_base(self, obj):
+        horario = obtener_grilla(obj.manicurista_id, obj.fecha).a_dict()
         return {
-            'entrada': Novedad.HORA_ENTRADA_BASE.strftime('%H:%M'),
-            'salida': Novedad.HORA_SALIDA_BASE.strftime('%H:%M')
+            'entrada': horario['inicio'],
+            'salida': horario['fin']
         }
 
     def get_validacion_fecha(self, obj):
@@ -172,7 +243,7 @@ class NovedadDetailSerializer(serializers.ModelSerializer):
         }
 
     def get_mensaje_personalizado(self, obj):
-        nombre = obj.manicurista.nombres
+        nombre = obj.manicurista.nombre
         if obj.estado == 'tardanza':
             if obj.hora_entrada:
                 return f"La manicurista {nombre} llegó tarde a las {obj.hora_entrada.strftime('%I:%M %p')}."
@@ -180,7 +251,14 @@ class NovedadDetailSerializer(serializers.ModelSerializer):
                 return f"La manicurista {nombre} llegó tarde, sin hora registrada."
         elif obj.estado == 'ausente':
             if obj.tipo_ausencia == 'completa':
-                return f"La manicurista {nombre} se ausentó todo el día (10:00 AM - 8:00 PM)."
+                # La jornada del día quedó guardada en el rango de la ausencia al registrarla
+                grilla = obtener_grilla(obj.manicurista_id, obj.fecha)
+                inicio = obj.hora_inicio_ausencia or grilla.hora_inicio
+                fin = obj.hora_fin_ausencia or grilla.hora_fin
+                if not (inicio and fin):
+                    return f"La manicurista {nombre} se ausentó todo el día."
+                return (f"La manicurista {nombre} se ausentó todo el día "
+                        f"({inicio.strftime('%I:%M %p').lstrip('0')} - {fin.strftime('%I:%M %p').lstrip('0')}).")
             elif obj.tipo_ausencia == 'por_horas':
                 if obj.hora_inicio_ausencia and obj.hora_fin_ausencia:
                     return (f"La manicurista {nombre} se ausentó desde "
@@ -193,12 +271,34 @@ class NovedadDetailSerializer(serializers.ModelSerializer):
         return f"La manicurista {nombre} tiene una novedad registrada."
 
     def get_citas_afectadas(self, obj):
-        """Obtener información de citas afectadas por esta novedad"""
-        try:
-            from api.citas.models import Cita
-            citas = Cita.objects.filter(
-                novedad_relacionada=obj
-            ).values('id', 'hora_cita', 'estado', 'cliente__nombre')
-            return list(citas)
-        except:
-            return []
+        """
+        Citas que la novedad canceló o reasignó. Se leen de obj.impactos, que la
+        vista precarga para todas las novedades del listado en una consulta.
+        """
+        return [
+            {
+                'id': impacto.cita_id,
+                'hora_cita': impacto.cita.hora_cita,
+                'estado': impacto.cita.estado,
+                'cliente__nombre': impacto.cita.cliente.nombre,
+                'accion': impacto.accion,
+                'manicurista_nueva': impacto.manicurista_nueva_id,
+                'revertido': impacto.revertido,
+            }
+            for impacto in obj.impactos.all()
+        ]
+
+
+class NovedadHasCitaSerializer(serializers.ModelSerializer):
+    """Cambio aplicado (o propuesto) por una novedad sobre una cita"""
+    fecha_cita = serializers.DateField(source='cita.fecha_cita', read_only=True)
+    hora_cita = serializers.TimeField(source='cita.hora_cita', read_only=True)
+    cliente_nombre = serializers.CharField(source='cita.cliente.nombre', read_only=True)
+
+    class Meta:
+        model = NovedadHasCita
+        fields = [
+            'id', 'novedad', 'cita', 'fecha_cita', 'hora_cita', 'cliente_nombre', 'accion',
+            'estado_anterior', 'manicurista_anterior', 'manicurista_nueva', 'revertido',
+            'notificacion_pendiente'
+        ]
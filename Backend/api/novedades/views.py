@@ -3,11 +3,14 @@ from rest_framework.response import Response
 from rest_framework.decorators import action
 from django.utils import timezone
 from django.db import transaction
-from api.novedades.models import Novedad
-from api.novedades.serializers import NovedadSerializer, NovedadDetailSerializer
-from api.citas.models import Cita
-from django.core.mail import send_mail
-from django.conf import settings
+from django.db.models import Prefetch, prefetch_related_objects
+from datetime import datetime, timedelta
+from api.horarios.grillas import obtener_grilla
+from api.novedades.models import Novedad, NovedadHasCita
+from api.novedades.serializers import (
+    NovedadSerializer, NovedadDetailSerializer, NovedadHasCitaSerializer, NovedadMasivaSerializer
+)
+from api.novedades import impacto
 
 
 class NovedadViewSet(viewsets.ModelViewSet):
@@ -19,7 +22,7 @@ class NovedadViewSet(viewsets.ModelViewSet):
         return NovedadSerializer
 
     def get_queryset(self):
-        queryset = Novedad.objects.select_related('manicurista').all()
+        queryset = Novedad.objects.select_related('manicurista__usuario').prefetch_related(self._impactos())
         
         # Filtros opcionales
         manicurista_id = self.request.query_params.get('manicurista')
@@ -48,14 +51,15 @@ class NovedadViewSet(viewsets.ModelViewSet):
             # Crear la novedad
             novedad = serializer.save()
             
-            # Conectar con citas - cancelar citas afectadas
-            self._manejar_citas_afectadas(novedad)
+            # Reasignar o cancelar las citas afectadas
+            impacto.aplicar([novedad], reasignar=self._reasignar(request))
             
             # Retornar con serializer de detalle
-            detail_serializer = NovedadDetailSerializer(novedad)
-            return Response(detail_serializer.data, status=status.HTTP_201_CREATED)
+            return Response(self._detalle(novedad), status=status.HTTP_201_CREATED)
             
         except Exception as e:
+            # La respuesta de error no debe confirmar lo que alcanzó a escribirse
+            transaction.set_rollback(True)
             return Response(
                 {'error': str(e)}, 
                 status=status.HTTP_400_BAD_REQUEST
@@ -69,24 +73,29 @@ class NovedadViewSet(viewsets.ModelViewSet):
             instance = self.get_object()
             serializer = self.get_serializer(instance, data=request.data, partial=partial)
             serializer.is_valid(raise_exception=True)
+            antes = (instance.manicurista_id, instance.fecha, impacto.bloqueo(instance))
             
             # Actualizar la novedad
             novedad = serializer.save()
             
-            # Reconectar con citas si es necesario
-            self._manejar_citas_afectadas(novedad)
+            # Si cambió el horario afectado, se deshace lo aplicado y se recalcula
+            if antes != (novedad.manicurista_id, novedad.fecha, impacto.bloqueo(novedad)):
+                impacto.revertir(novedad)
+                impacto.aplicar([novedad], reasignar=self._reasignar(request))
 
             # Retornar con serializer de detalle
-            detail_serializer = NovedadDetailSerializer(novedad)
-            return Response(detail_serializer.data)
+            return Response(self._detalle(novedad))
             
         except Exception as e:
+            # La respuesta de error no debe confirmar lo que alcanzó a escribirse
+            transaction.set_rollback(True)
             return Response(
                 {'error': str(e)}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
 
     @action(detail=True, methods=['patch'])
+    @transaction.atomic
     def anular(self, request, pk=None):
         """Anular una novedad con motivo"""
         try:
@@ -105,16 +114,18 @@ class NovedadViewSet(viewsets.ModelViewSet):
             novedad.fecha_anulacion = timezone.now()
             novedad.save()
             
-            # Reactivar citas que fueron canceladas por esta novedad
-            self._reactivar_citas_canceladas(novedad)
+            # Restaurar las citas que esta novedad canceló o reasignó
+            citas_restauradas = impacto.revertir(novedad)
             
-            detail_serializer = NovedadDetailSerializer(novedad)
             return Response({
                 'message': 'Novedad anulada exitosamente',
-                'data': detail_serializer.data
+                'citas_restauradas': citas_restauradas,
+                'data': self._detalle(novedad)
             })
             
         except Exception as e:
+            # La respuesta de error no debe confirmar lo que alcanzó a escribirse
+            transaction.set_rollback(True)
             return Response(
                 {'error': str(e)}, 
                 status=status.HTTP_400_BAD_REQUEST
@@ -133,6 +144,10 @@ class NovedadViewSet(viewsets.ModelViewSet):
             )
         
         try:
+            grilla = obtener_grilla(int(manicurista_id), datetime.strptime(fecha, '%Y-%m-%d').date())
+            horario = grilla.a_dict()
+            jornada = f"{horario['inicio']}-{horario['fin']}"
+
             # Buscar novedades activas para esa manicurista en esa fecha
             novedades = Novedad.objects.filter(
                 manicurista_id=manicurista_id,
@@ -144,12 +159,12 @@ class NovedadViewSet(viewsets.ModelViewSet):
                 'fecha': fecha,
                 'manicurista_id': manicurista_id,
                 'horario_base': {
-                    'entrada': '10:00',
-                    'salida': '20:00'
+                    'entrada': horario['inicio'],
+                    'salida': horario['fin']
                 },
                 'novedades': [],
                 'horarios_no_disponibles': [],
-                'mensaje': 'Horario normal disponible'
+                'mensaje': 'Horario normal disponible' if grilla.abierta else 'La manicurista no atiende este día'
             }
             
             for novedad in novedades:
@@ -162,9 +177,9 @@ class NovedadViewSet(viewsets.ModelViewSet):
                 
                 if novedad.estado == 'ausente':
                     if novedad.tipo_ausencia == 'completa':
-                        disponibilidad['horarios_no_disponibles'] = ['10:00-20:00']
+                        disponibilidad['horarios_no_disponibles'] = [jornada]
                         disponibilidad['mensaje'] = 'Manicurista ausente todo el día'
-                        novedad_info['horarios_afectados'] = '10:00-20:00'
+                        novedad_info['horarios_afectados'] = jornada
                     elif novedad.tipo_ausencia == 'por_horas':
                         horario_ausencia = f"{novedad.hora_inicio_ausencia.strftime('%H:%M')}-{novedad.hora_fin_ausencia.strftime('%H:%M')}"
                         disponibilidad['horarios_no_disponibles'].append(horario_ausencia)
@@ -172,7 +187,7 @@ class NovedadViewSet(viewsets.ModelViewSet):
                         
                 elif novedad.estado == 'tardanza':
                     hora_llegada = novedad.hora_entrada.strftime('%H:%M')
-                    horario_tardanza = f"10:00-{hora_llegada}"
+                    horario_tardanza = f"{horario['inicio']}-{hora_llegada}"
                     disponibilidad['horarios_no_disponibles'].append(horario_tardanza)
                     disponibilidad['mensaje'] = f'Manicurista llega tarde a las {hora_llegada}'
                     novedad_info['horarios_afectados'] = horario_tardanza
@@ -210,104 +225,106 @@ class NovedadViewSet(viewsets.ModelViewSet):
         
         return Response(stats)
 
-    def _manejar_citas_afectadas(self, novedad):
-        """Manejar citas afectadas por la novedad"""
-        try:
-            # Buscar citas activas para esa manicurista en esa fecha
-            citas_afectadas = Cita.objects.filter(
-                manicurista=novedad.manicurista,
-                fecha_cita=novedad.fecha,
-                estado__in=['pendiente', 'confirmada', 'en_proceso']
+    @action(detail=False, methods=['post'])
+    @transaction.atomic
+    def registro_masivo(self, request):
+        """
+        Registra la misma novedad para varias manicuristas en un rango de fechas.
+        Los duplicados de todas las combinaciones se detectan con una consulta, las
+        novedades se insertan con bulk_create y el impacto sobre las citas se
+        calcula una sola vez para todo el lote. Las combinaciones que ya tenían
+        una novedad activa, o cuya jornada no admite la novedad, se devuelven en
+        'conflictos'.
+        """
+        serializer = NovedadMasivaSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        datos = dict(serializer.validated_data)
+        manicuristas = datos.pop('manicuristas')
+        fecha_inicio = datos.pop('fecha_inicio')
+        fecha_fin = datos.pop('fecha_fin')
+        reasignar = datos.pop('reasignar')
+        # Horas de cada (manicurista, fecha) según su jornada, y los pares que no encajan en ella
+        horarios = datos.pop('horarios')
+        rechazados = {(r['manicurista'], r['fecha']): r['error'] for r in datos.pop('rechazos')}
+
+        fechas = [fecha_inicio + timedelta(days=i) for i in range((fecha_fin - fecha_inicio).days + 1)]
+        existentes = set(
+            Novedad.objects.filter(
+                manicurista_id__in=manicuristas, fecha__range=(fecha_inicio, fecha_fin)
+            ).exclude(estado='anulada').values_list('manicurista_id', 'fecha')
+        )
+        pares = [(m, f) for m in manicuristas for f in fechas]
+        nuevos = [par for par in pares if par not in existentes and par not in rechazados]
+        conflictos = [
+            {
+                'manicurista': par[0],
+                'fecha': par[1],
+                'error': (
+                    "Ya existe una novedad activa para esta manicurista en la fecha indicada."
+                    if par in existentes else rechazados[par]
+                )
+            }
+            for par in pares if par in existentes or par in rechazados
+        ]
+
+        if not nuevos:
+            return Response({'creadas': 0, 'conflictos': conflictos}, status=status.HTTP_400_BAD_REQUEST)
+
+        Novedad.objects.bulk_create(
+            [Novedad(manicurista_id=m, fecha=f, **{**datos, **horarios[(m, f)]}) for m, f in nuevos],
+            batch_size=500
+        )
+        # Se releen para tener los ids también en bases que no los devuelven en bulk_create (MySQL)
+        creadas = [
+            n for n in Novedad.objects.filter(
+                manicurista_id__in=manicuristas, fecha__range=(fecha_inicio, fecha_fin), estado=datos['estado']
             )
+            if (n.manicurista_id, n.fecha) not in existentes
+        ]
+        impactos = impacto.aplicar(creadas, reasignar=reasignar)
 
-            for cita in citas_afectadas:
-                # Verificar si la cita está en el horario afectado
-                if self._cita_en_horario_afectado(cita, novedad):
-                    # Cancelar la cita
-                    cita.estado = 'cancelada_por_novedad'
-                    cita.motivo_cancelacion = f"Novedad de manicurista: {novedad.get_estado_display()}"
-                    cita.novedad_relacionada = novedad
-                    cita.save()
+        return Response({
+            'creadas': len(creadas),
+            'novedades': sorted(n.id for n in creadas),
+            'conflictos': conflictos,
+            'citas_reasignadas': sum(1 for i in impactos if i.accion == NovedadHasCita.ACCION_REASIGNADA),
+            'citas_canceladas': sum(1 for i in impactos if i.accion == NovedadHasCita.ACCION_CANCELADA),
+        }, status=status.HTTP_201_CREATED)
 
-                    # Enviar notificación al cliente
-                    self._notificar_cliente_cancelacion(cita, novedad)
-                    
-        except Exception as e:
-            print(f"Error manejando citas afectadas: {e}")
+    @action(detail=True, methods=['get'])
+    def impactos(self, request, pk=None):
+        """Cancelaciones y reasignaciones que esta novedad aplicó sobre las citas"""
+        novedad = self.get_object()
+        impactos = novedad.impactos.select_related('cita__cliente').order_by('cita__fecha_cita', 'cita__hora_cita')
+        return Response(NovedadHasCitaSerializer(impactos, many=True).data)
 
-    def _cita_en_horario_afectado(self, cita, novedad):
-        """Verificar si una cita está en el horario afectado por la novedad"""
-        if novedad.estado == 'ausente':
-            if novedad.tipo_ausencia == 'completa':
-                return True  # Toda la jornada afectada
-            elif novedad.tipo_ausencia == 'por_horas':
-                # Verificar si la hora de la cita está en el rango de ausencia
-                hora_cita = cita.hora_cita
-                return (novedad.hora_inicio_ausencia <= hora_cita <= novedad.hora_fin_ausencia)
-        
-        elif novedad.estado == 'tardanza':
-            # Verificar si la cita es antes de la hora de llegada
-            hora_cita = cita.hora_cita
-            return hora_cita < novedad.hora_entrada
-        
-        return False
+    @action(detail=False, methods=['post'])
+    def simular_impacto(self, request):
+        """
+        Propuesta para una novedad que aún no se registra: qué citas se
+        reasignarían (y a quién) y cuáles se cancelarían. No guarda nada.
+        """
+        serializer = NovedadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        novedad = Novedad(**serializer.validated_data)
+        plan = impacto.planificar([novedad], reasignar=self._reasignar(request))
+        return Response(NovedadHasCitaSerializer(plan, many=True).data)
 
-    def _reactivar_citas_canceladas(self, novedad):
-        """Reactivar citas que fueron canceladas por esta novedad"""
-        try:
-            citas_canceladas = Cita.objects.filter(
-                novedad_relacionada=novedad,
-                estado='cancelada_por_novedad'
-            )
-            
-            for cita in citas_canceladas:
-                cita.estado = 'pendiente'
-                cita.motivo_cancelacion = None
-                cita.novedad_relacionada = None
-                cita.save()
-                
-                # Notificar al cliente que su cita fue reactivada
-                self._notificar_cliente_reactivacion(cita)
-                
-        except Exception as e:
-            print(f"Error reactivando citas: {e}")
+    @staticmethod
+    def _impactos():
+        """Citas afectadas de todas las novedades listadas, en una sola consulta"""
+        return Prefetch(
+            'impactos',
+            queryset=NovedadHasCita.objects.select_related('cita__cliente').order_by('cita__fecha_cita', 'cita__hora_cita')
+        )
 
-    def _notificar_cliente_cancelacion(self, cita, novedad):
-        """Notificar al cliente sobre la cancelación de su cita"""
-        try:
-            if hasattr(cita, 'cliente') and cita.cliente.email:
-                send_mail(
-                    subject='Cancelación de tu cita en Spa',
-                    message=f"Hola {cita.cliente.nombre},\n\n"
-                            f"Lamentamos informarte que tu cita con {novedad.manicurista.nombres} "
-                            f"el {novedad.fecha.strftime('%d/%m/%Y')} a las {cita.hora_cita.strftime('%H:%M')} "
-                            f"ha sido cancelada debido a una novedad de la manicurista.\n\n"
-                            f"Motivo: {novedad.get_estado_display()}\n\n"
-                            f"Te invitamos a agendar una nueva cita desde nuestra plataforma.\n\n"
-                            f"Gracias por tu comprensión.",
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[cita.cliente.email],
-                    fail_silently=True
-                )
-        except Exception as e:
-            print(f"Error enviando notificación de cancelación: {e}")
+    def _detalle(self, novedad):
+        """Serializa la novedad recién guardada con sus citas afectadas ya actualizadas"""
+        # Los impactos cacheados antes de aplicar o revertir podrían estar desactualizados
+        getattr(novedad, '_prefetched_objects_cache', {}).pop('impactos', None)
+        prefetch_related_objects([novedad], 'manicurista__usuario', self._impactos())
+        return NovedadDetailSerializer(novedad).data
 
-    def _notificar_cliente_reactivacion(self, cita):
-        """Notificar al cliente que su cita fue reactivada"""
-        try:
-            if hasattr(cita, 'cliente') and cita.cliente.email:
-                send_mail(
-                    subject='Tu cita ha sido reactivada',
-                    message=f"Hola {cita.cliente.nombre},\n\n"
-                            f"Te informamos que tu cita con {cita.manicurista.nombres} "
-                            f"el {cita.fecha_cita.strftime('%d/%m/%Y')} a las {cita.hora_cita.strftime('%H:%M')} "
-                            f"ha sido reactivada.\n\n"
-                            f"La novedad que causó la cancelación ha sido anulada.\n\n"
-                            f"Tu cita está confirmada nuevamente.\n\n"
-                            f"¡Te esperamos!",
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[cita.cliente.email],
-                    fail_silently=True
-                )
-        except Exception as e:
-            print(f"Error enviando notificación de reactivación: {e}")
+    def _reasignar(self, request):
+        """Por defecto las citas afectadas se reasignan; con reasignar=false solo se cancelan"""
+        return str(request.data.get('reasignar', True)).lower() not in ('false', '0')
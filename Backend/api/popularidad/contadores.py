@@ -0,0 +1,138 @@
+import re
+from collections import OrderedDict
+from datetime import timedelta
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, IntegerField, Q, Sum, Value, When
+from django.utils import timezone
+from .models import ContadorPopularidad
+
+VENTANAS = ['7d', '30d', '365d', 'all']
+# Hasta este tamaño la ventana se suma solo con filas diarias
+MAX_DIAS_SIN_MESES = 62
+
+
+def registrar(tipo, fecha, lineas):
+    """
+    Suma unidades y valor a los contadores del día y del mes de `fecha`.
+
+    - lineas: iterable de (objeto_id, cantidad, valor) con signo; las negativas
+      descuentan (p. ej. al anular una compra).
+
+    Crea las filas que falten con un INSERT que ignora duplicados y luego aplica
+    todos los incrementos en un único UPDATE (sin leer-modificar-escribir), así
+    que registros concurrentes no pierden conteos.
+    """
+    totales = OrderedDict()
+    for objeto_id, cantidad, valor in lineas:
+        q, v = totales.get(objeto_id, (0, Decimal('0')))
+        totales[objeto_id] = (q + int(cantidad), v + Decimal(valor or 0))
+    totales = OrderedDict((pk, t) for pk, t in totales.items() if t != (0, 0))
+    if not totales:
+        return
+
+    periodos = [(ContadorPopularidad.PERIODO_DIA, fecha), (ContadorPopularidad.PERIODO_MES, fecha.replace(day=1))]
+    with transaction.atomic():
+        ContadorPopularidad.objects.bulk_create([
+            ContadorPopularidad(tipo=tipo, periodo=periodo, fecha=inicio, objeto_id=objeto_id)
+            for periodo, inicio in periodos
+            for objeto_id in totales
+        ], ignore_conflicts=True)
+
+        ContadorPopularidad.objects.filter(
+            Q(periodo=periodos[0][0], fecha=periodos[0][1]) | Q(periodo=periodos[1][0], fecha=periodos[1][1]),
+            tipo=tipo,
+            objeto_id__in=list(totales)
+        ).update(
+            cantidad=F('cantidad') + Case(
+                *[When(objeto_id=pk, then=Value(q)) for pk, (q, _) in totales.items()],
+                output_field=IntegerField()
+            ),
+            ingresos=F('ingresos') + Case(
+                *[When(objeto_id=pk, then=Value(v)) for pk, (_, v) in totales.items()],
+                output_field=DecimalField(max_digits=14, decimal_places=2)
+            ),
+            updated_at=timezone.now()
+        )
+
+
+def _filtro_ventana(ventana, hoy):
+    """
+    Traduce la ventana ('7d', '30d', '365d', 'all' o cualquier 'Nd') a un filtro
+    sobre los contadores. Las ventanas largas combinan meses completos con los
+    días sueltos de los extremos, por lo que nunca se suman más de ~75 filas por
+    objeto y año.
+    """
+    if ventana == 'all':
+        return Q(periodo=ContadorPopularidad.PERIODO_MES)
+
+    coincidencia = re.fullmatch(r'(\d+)d', str(ventana))
+    if not coincidencia or int(coincidencia.group(1)) < 1:
+        raise ValueError(f"Ventana inválida: {ventana}. Use {', '.join(VENTANAS)} o un número de días como '90d'")
+    dias = int(coincidencia.group(1))
+    inicio = hoy - timedelta(days=dias - 1)
+
+    if dias <= MAX_DIAS_SIN_MESES:
+        return Q(periodo=ContadorPopularidad.PERIODO_DIA, fecha__gte=inicio, fecha__lte=hoy)
+
+    primer_mes = inicio if inicio.day == 1 else (inicio.replace(day=28) + timedelta(days=4)).replace(day=1)
+    mes_actual = hoy.replace(day=1)
+    return (
+        Q(periodo=ContadorPopularidad.PERIODO_MES, fecha__gte=primer_mes, fecha__lt=mes_actual)
+        | Q(periodo=ContadorPopularidad.PERIODO_DIA, fecha__gte=inicio, fecha__lt=primer_mes)
+        | Q(periodo=ContadorPopularidad.PERIODO_DIA, fecha__gte=mes_actual, fecha__lte=hoy)
+    )
+
+
+def top(tipo, ventana='30d', limite=10, hoy=None):
+    """
+    Los `limite` objetos con más unidades en la ventana, en una sola consulta agrupada.
+    Retorna una lista de dicts {'objeto_id', 'cantidad', 'ingresos'}.
+    """
+    filtro = _filtro_ventana(ventana, hoy or timezone.localdate())
+    return list(
+        ContadorPopularidad.objects
+        .filter(filtro, tipo=tipo)
+        .values('objeto_id')
+        .annotate(cantidad=Sum('cantidad'), ingresos=Sum('ingresos'))
+        .filter(cantidad__gt=0)
+        .order_by('-cantidad', 'objeto_id')[:limite]
+    )
+
+
+def registrar_insumos_comprados(compra, lineas):
+    """
+    Contabiliza las líneas de una compra en el día de la compra.
+    lineas: iterable de (insumo_id, cantidad con signo, precio_unitario).
+    """
+    registrar(
+        ContadorPopularidad.TIPO_INSUMO_COMPRADO,
+        timezone.localdate(compra.fecha),
+        [(insumo_id, cantidad, cantidad * precio) for insumo_id, cantidad, precio in lineas]
+    )
+
+
+def registrar_venta_pagada(venta_id):
+    """
+    Contabiliza los servicios de una venta pagada en el día de la venta. Marca la
+    venta con un UPDATE condicional para que cada venta se cuente una sola vez
+    aunque la función se llame varias veces.
+    """
+    from api.ventaservicios.models import VentaServicio, DetalleVentaServicio
+
+    with transaction.atomic():
+        marcada = VentaServicio.objects.filter(
+            pk=venta_id, estado='pagada', popularidad_registrada=False
+        ).update(popularidad_registrada=True)
+        if not marcada:
+            return
+
+        venta = VentaServicio.objects.only('fecha_venta', 'servicio', 'cantidad', 'total').get(pk=venta_id)
+        lineas = list(
+            DetalleVentaServicio.objects.filter(venta_id=venta_id).values_list('servicio_id', 'cantidad', 'subtotal')
+        )
+        if not lineas and venta.servicio_id:
+            # Ventas antiguas sin detalles: se usa el servicio principal
+            lineas = [(venta.servicio_id, venta.cantidad, venta.total)]
+
+        registrar(ContadorPopularidad.TIPO_SERVICIO_VENDIDO, timezone.localdate(venta.fecha_venta), lineas)
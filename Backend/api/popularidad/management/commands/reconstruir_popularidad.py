@@ -0,0 +1,67 @@
+from collections import defaultdict
+from decimal import Decimal
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import DecimalField, F, Sum
+from django.db.models.functions import TruncDate
+from api.compras.models import DetalleCompra
+from api.popularidad.models import ContadorPopularidad
+from api.ventaservicios.models import VentaServicio, DetalleVentaServicio
+
+
+class Command(BaseCommand):
+    help = "Recalcula desde cero los contadores de popularidad a partir del historial de compras y ventas"
+
+    def _acumular(self, contadores, tipo, filas):
+        for objeto_id, dia, cantidad, valor in filas:
+            for periodo, fecha in [(ContadorPopularidad.PERIODO_DIA, dia), (ContadorPopularidad.PERIODO_MES, dia.replace(day=1))]:
+                clave = (tipo, periodo, fecha, objeto_id)
+                q, v = contadores[clave]
+                contadores[clave] = (q + cantidad, v + (valor or Decimal('0')))
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        contadores = defaultdict(lambda: (0, Decimal('0')))
+
+        compras = (
+            DetalleCompra.objects
+            .filter(compra__estado='finalizada')
+            .annotate(dia=TruncDate('compra__fecha'))
+            .values_list('insumo_id', 'dia')
+            .annotate(
+                unidades=Sum('cantidad'),
+                valor=Sum(F('cantidad') * F('precio_unitario'), output_field=DecimalField(max_digits=14, decimal_places=2))
+            )
+            .order_by()
+        )
+        self._acumular(contadores, ContadorPopularidad.TIPO_INSUMO_COMPRADO, compras)
+
+        detalles = (
+            DetalleVentaServicio.objects
+            .filter(venta__estado='pagada')
+            .annotate(dia=TruncDate('venta__fecha_venta'))
+            .values_list('servicio_id', 'dia')
+            .annotate(unidades=Sum('cantidad'), valor=Sum('subtotal'))
+            .order_by()
+        )
+        self._acumular(contadores, ContadorPopularidad.TIPO_SERVICIO_VENDIDO, detalles)
+
+        # Ventas antiguas sin detalles: cuentan por su servicio principal
+        sin_detalles = (
+            VentaServicio.objects
+            .filter(estado='pagada', detalles__isnull=True, servicio__isnull=False)
+            .annotate(dia=TruncDate('fecha_venta'))
+            .values_list('servicio_id', 'dia')
+            .annotate(unidades=Sum('cantidad'), valor=Sum('total'))
+            .order_by()
+        )
+        self._acumular(contadores, ContadorPopularidad.TIPO_SERVICIO_VENDIDO, sin_detalles)
+
+        ContadorPopularidad.objects.all().delete()
+        ContadorPopularidad.objects.bulk_create([
+            ContadorPopularidad(tipo=tipo, periodo=periodo, fecha=fecha, objeto_id=objeto_id, cantidad=q, ingresos=v)
+            for (tipo, periodo, fecha, objeto_id), (q, v) in contadores.items()
+        ], batch_size=1000)
+        VentaServicio.objects.filter(estado='pagada').update(popularidad_registrada=True)
+
+        self.stdout.write(self.style.SUCCESS(f"Contadores reconstruidos: {len(contadores)} filas"))
@@ -0,0 +1,34 @@
+# Generated by Django 5.2 on 2026-10-19 05:27
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContadorPopularidad',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('tipo', models.CharField(choices=[('insumo_comprado', 'Insumo comprado'), ('servicio_vendido', 'Servicio vendido')], max_length=20, verbose_name='Tipo')),
+                ('objeto_id', models.PositiveIntegerField(verbose_name='Objeto')),
+                ('periodo', models.CharField(choices=[('dia', 'Día'), ('mes', 'Mes')], max_length=3, verbose_name='Período')),
+                ('fecha', models.DateField(verbose_name='Fecha')),
+                ('cantidad', models.IntegerField(default=0, verbose_name='Cantidad')),
+                ('ingresos', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14, verbose_name='Valor')),
+            ],
+            options={
+                'verbose_name': 'Contador de popularidad',
+                'verbose_name_plural': 'Contadores de popularidad',
+                'unique_together': {('tipo', 'periodo', 'fecha', 'objeto_id')},
+            },
+        ),
+    ]
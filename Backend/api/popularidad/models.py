@@ -0,0 +1,47 @@
+from django.db import models
+from decimal import Decimal
+from api.base.base import BaseModel
+
+
+class ContadorPopularidad(BaseModel):
+    """
+    Acumulado de unidades e ingresos de un insumo comprado o un servicio vendido
+    en un período (día o mes). Se actualiza de forma incremental con cada compra
+    o venta, de modo que los rankings suman pocas filas en lugar de recorrer
+    todo el historial.
+    """
+    TIPO_INSUMO_COMPRADO = 'insumo_comprado'
+    TIPO_SERVICIO_VENDIDO = 'servicio_vendido'
+    TIPO_CHOICES = [
+        (TIPO_INSUMO_COMPRADO, 'Insumo comprado'),
+        (TIPO_SERVICIO_VENDIDO, 'Servicio vendido'),
+    ]
+
+    PERIODO_DIA = 'dia'
+    PERIODO_MES = 'mes'
+    PERIODO_CHOICES = [
+        (PERIODO_DIA, 'Día'),
+        (PERIODO_MES, 'Mes'),
+    ]
+
+    tipo = models.CharField(max_length=20, choices=TIPO_CHOICES, verbose_name="Tipo")
+    # ID del insumo o del servicio según el tipo
+    objeto_id = models.PositiveIntegerField(verbose_name="Objeto")
+    periodo = models.CharField(max_length=3, choices=PERIODO_CHOICES, verbose_name="Período")
+    # Primer día del período
+    fecha = models.DateField(verbose_name="Fecha")
+    cantidad = models.IntegerField(default=0, verbose_name="Cantidad")
+    ingresos = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name="Valor"
+    )
+
+    class Meta:
+        verbose_name = "Contador de popularidad"
+        verbose_name_plural = "Contadores de popularidad"
+        unique_together = ['tipo', 'periodo', 'fecha', 'objeto_id']
+
+    def __str__(self):
+        return f"{self.get_tipo_display()} {self.objeto_id} - {self.fecha} ({self.cantidad})"
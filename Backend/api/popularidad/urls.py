@@ -0,0 +1,10 @@
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from .views import PopularidadViewSet
+
+router = DefaultRouter()
+router.register(r'', PopularidadViewSet, basename='popularidad')
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
@@ -0,0 +1,38 @@
+from rest_framework import viewsets, status
+from rest_framework.response import Response
+from rest_framework.decorators import action
+from api.insumos.models import Insumo
+from api.servicios.models import Servicio
+from .contadores import top
+from .models import ContadorPopularidad
+
+
+class PopularidadViewSet(viewsets.ViewSet):
+    """
+    Rankings de insumos más comprados y servicios más vendidos a partir de los
+    contadores incrementales (no recorren el historial de compras ni de ventas).
+    Parámetros: ventana (7d, 30d, 365d, all o 'Nd'; por defecto 30d) y limite (por defecto 10).
+    """
+    
+    def _top(self, request, tipo, modelo):
+        try:
+            limite = max(1, min(int(request.query_params.get('limite', 10)), 100))
+            filas = top(tipo, request.query_params.get('ventana', '30d'), limite)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        nombres = dict(modelo.objects.filter(pk__in=[f['objeto_id'] for f in filas]).values_list('id', 'nombre'))
+        return Response([
+            {'id': f['objeto_id'], 'nombre': nombres.get(f['objeto_id']), 'cantidad': f['cantidad'], 'valor': f['ingresos']}
+            for f in filas
+        ])
+    
+    @action(detail=False, methods=['get'])
+    def insumos(self, request):
+        """Insumos más comprados en la ventana"""
+        return self._top(request, ContadorPopularidad.TIPO_INSUMO_COMPRADO, Insumo)
+    
+    @action(detail=False, methods=['get'])
+    def servicios(self, request):
+        """Servicios más vendidos (ventas pagadas) en la ventana"""
+        return self._top(request, ContadorPopularidad.TIPO_SERVICIO_VENDIDO, Servicio)
@@ -3,6 +3,8 @@ from rest_framework.response import Response
 from rest_framework.decorators import action
 from .models import Proveedor
 from .serializers import ProveedorSerializer
+from api.insumos.models import InsumoHasProveedor
+from api.insumos.serializers import InsumoHasProveedorSerializer
 
 
 class ProveedorViewSet(viewsets.ModelViewSet):
@@ -83,4 +85,19 @@ class ProveedorViewSet(viewsets.ModelViewSet):
         proveedor.save()
         
         serializer = self.get_serializer(proveedor)
-        return Response(serializer.data)
\ No newline at end of file
+        return Response(serializer.data)
+    
+    @action(detail=True, methods=['get'])
+    def precios(self, request, pk=None):
+        """
+        Índice de precios del proveedor: precio promedio y último precio de cada insumo que le hemos comprado.
+        """
+        proveedor = self.get_object()
+        precios = (
+            InsumoHasProveedor.objects
+            .filter(proveedor=proveedor, cantidad_comprada__gt=0)
+            .select_related('insumo', 'proveedor')
+            .order_by('insumo__nombre')
+        )
+        serializer = InsumoHasProveedorSerializer(precios, many=True)
+        return Response(serializer.data)
@@ -0,0 +1,31 @@
+from django.db import migrations
+
+MODULOS = ['usuarios', 'roles']
+ACCIONES = ['ver', 'crear', 'editar', 'eliminar']
+
+
+def crear_permisos_base(apps, schema_editor):
+    """Crea los permisos que exigen los viewsets y los asigna al rol Administrador si existe"""
+    Permiso = apps.get_model('roles', 'Permiso')
+    Rol = apps.get_model('roles', 'Rol')
+    RolHasPermiso = apps.get_model('roles', 'RolHasPermiso')
+
+    permisos = [
+        Permiso.objects.get_or_create(nombre=f"{accion}_{modulo}")[0]
+        for modulo in MODULOS for accion in ACCIONES
+    ]
+    administrador = Rol.objects.filter(nombre__iexact='administrador').first()
+    if administrador:
+        for permiso in permisos:
+            RolHasPermiso.objects.get_or_create(rol=administrador, permiso=permiso)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('roles', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_permisos_base, migrations.RunPython.noop),
+    ]
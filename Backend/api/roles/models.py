@@ -42,4 +42,15 @@ class RolHasPermiso(BaseModel):
     class Meta:
         unique_together = ('rol', 'permiso')
         verbose_name = "Rol - Permiso"
-        verbose_name_plural = "Roles - Permisos"
\ No newline at end of file
+        verbose_name_plural = "Roles - Permisos"
+
+# Un rol o permiso desactivado o renombrado cambia la matriz de permisos compilada
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+
+@receiver([post_save, post_delete], sender=Rol)
+@receiver([post_save, post_delete], sender=Permiso)
+def invalidar_matriz_permisos(sender, **kwargs):
+    from .permisos import invalidar
+    invalidar()
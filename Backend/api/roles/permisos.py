@@ -0,0 +1,86 @@
+"""
+Matriz de permisos compilada.
+
+La matriz {rol_id: frozenset de nombres de permiso} se arma con una sola
+consulta (roles y permisos activos) y se guarda en el proceso. Se vuelve a
+armar cuando cambia el contador de versión de la caché compartida, que suben
+invalidar() y las señales de Rol y Permiso. Entre lecturas del contador
+(VERIFICAR_CADA segundos) comprobar un permiso no consulta nada.
+
+Los nombres se normalizan ("Ver usuarios" -> "ver_usuarios") para que los
+viewsets los pidan sin depender de mayúsculas ni espacios.
+"""
+import threading
+import time as reloj
+from django.core.cache import cache
+from django.db import transaction
+
+CLAVE_VERSION = 'roles:permisos:version'
+# Segundos entre lecturas del contador compartido
+VERIFICAR_CADA = 2
+
+_estado = {'version': None, 'matriz': None, 'verificado': 0.0}
+_candado = threading.Lock()
+
+
+def normalizar(nombre):
+    return '_'.join(nombre.lower().split())
+
+
+def _cargar():
+    from .models import RolHasPermiso
+
+    matriz = {}
+    filas = RolHasPermiso.objects.filter(
+        rol__estado='activo', permiso__estado='activo'
+    ).values_list('rol_id', 'permiso__nombre')
+    for rol_id, nombre in filas:
+        matriz.setdefault(rol_id, set()).add(normalizar(nombre))
+    return {rol_id: frozenset(nombres) for rol_id, nombres in matriz.items()}
+
+
+def _version_compartida():
+    try:
+        return cache.get(CLAVE_VERSION, 0)
+    except Exception:
+        return None
+
+
+def matriz():
+    ahora = reloj.monotonic()
+    actual = _estado['matriz']
+    if actual is not None and ahora - _estado['verificado'] < VERIFICAR_CADA:
+        return actual
+
+    version = _version_compartida()
+    with _candado:
+        if _estado['matriz'] is None or version is None or version != _estado['version']:
+            _estado['matriz'] = _cargar()
+            _estado['version'] = version
+        _estado['verificado'] = ahora
+        return _estado['matriz']
+
+
+def permisos_de(rol_id):
+    return matriz().get(rol_id, frozenset())
+
+
+def tiene_permiso(rol_id, permiso):
+    return normalizar(permiso) in permisos_de(rol_id)
+
+
+def _publicar():
+    # Se descarta de nuevo: entre tanto otro hilo pudo recargar lo anterior
+    _estado['matriz'] = None
+    try:
+        cache.incr(CLAVE_VERSION)
+    except ValueError:
+        cache.set(CLAVE_VERSION, 1, None)
+    except Exception:
+        pass
+
+
+def invalidar():
+    """Descarta la matriz de este proceso y, al confirmar la transacción, sube el contador para los demás"""
+    _estado['matriz'] = None
+    transaction.on_commit(_publicar)
@@ -0,0 +1,46 @@
+from rest_framework.permissions import SAFE_METHODS, BasePermission
+from .permisos import tiene_permiso
+
+ACCIONES = {
+    'list': 'ver',
+    'retrieve': 'ver',
+    'create': 'crear',
+    'update': 'editar',
+    'partial_update': 'editar',
+    'destroy': 'eliminar',
+}
+
+
+def permiso_requerido(request, view):
+    """
+    Permiso que exige la acción del viewset. El viewset define `modulo_permiso`
+    y, si lo necesita, `permisos_por_accion` ({accion: permiso o None}); None
+    deja la acción libre. Las demás acciones personalizadas piden
+    'ver_<modulo>' si son de lectura y 'editar_<modulo>' si no.
+    """
+    accion = getattr(view, 'action', None)
+    especiales = getattr(view, 'permisos_por_accion', {})
+    if accion in especiales:
+        return especiales[accion]
+    modulo = getattr(view, 'modulo_permiso', None)
+    if modulo is None:
+        return None
+    if accion in ACCIONES:
+        return f"{ACCIONES[accion]}_{modulo}"
+    return f"ver_{modulo}" if request.method in SAFE_METHODS else f"editar_{modulo}"
+
+
+class TienePermiso(BasePermission):
+    """Comprueba el permiso de la acción contra la matriz compilada del rol del usuario (sin consultas)"""
+    message = "No tiene permiso para realizar esta acción"
+
+    def has_permission(self, request, view):
+        requerido = permiso_requerido(request, view)
+        if requerido is None:
+            return True
+        usuario = request.user
+        if not usuario or not usuario.is_authenticated:
+            return False
+        if usuario.is_superuser:
+            return True
+        return tiene_permiso(getattr(usuario, 'rol_id', None), requerido)
@@ -1,5 +1,8 @@
 from rest_framework import serializers
+from api.base.campos import PKRelacionadoField
+from api.base.sincronizacion import sincronizar
 from .models import Permiso, Rol, RolHasPermiso
+from .permisos import invalidar as invalidar_permisos
 
 
 class PermisoSerializer(serializers.ModelSerializer):
@@ -21,7 +24,7 @@ class RolHasPermisoSerializer(serializers.ModelSerializer):
 
 
 class RolSerializer(serializers.ModelSerializer):
-    permisos_ids = serializers.PrimaryKeyRelatedField(
+    permisos_ids = PKRelacionadoField(
         many=True, 
         queryset=Permiso.objects.all(),
         source='permisos',
@@ -43,8 +46,9 @@ class RolSerializer(serializers.ModelSerializer):
         permisos = validated_data.pop('permisos', [])
         rol = Rol.objects.create(**validated_data)
         
-        for permiso in permisos:
-            RolHasPermiso.objects.create(rol=rol, permiso=permiso)
+        RolHasPermiso.objects.bulk_create([RolHasPermiso(rol=rol, permiso=permiso) for permiso in permisos])
+        if permisos:
+            invalidar_permisos()
         
         return rol
     
@@ -53,11 +57,15 @@ class RolSerializer(serializers.ModelSerializer):
         instance = super().update(instance, validated_data)
         
         if permisos is not None:
-            # Eliminar todas las relaciones existentes
-            RolHasPermiso.objects.filter(rol=instance).delete()
-            # Crear las nuevas relaciones
-            for permiso in permisos:
-                RolHasPermiso.objects.create(rol=instance, permiso=permiso)
+            cambios = sincronizar(
+                RolHasPermiso,
+                RolHasPermiso.objects.filter(rol=instance),
+                {permiso.id: permiso for permiso in permisos},
+                clave='permiso_id',
+                nueva=lambda pk, permiso: RolHasPermiso(rol=instance, permiso=permiso),
+            )
+            if cambios.hubo_cambios:
+                invalidar_permisos()
         
         return instance
         
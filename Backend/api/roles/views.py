@@ -5,6 +5,8 @@ from django.shortcuts import get_object_or_404
 from django.db.models import Q
 from django.apps import apps
 from .models import Rol, Permiso, RolHasPermiso
+from .permisos import invalidar as invalidar_permisos
+from .permissions import TienePermiso
 from .serializers import (
     RolSerializer,
     RolDetailSerializer,
@@ -19,6 +21,8 @@ class RolViewSet(viewsets.ModelViewSet):
     Proporciona operaciones CRUD completas y algunos endpoints adicionales.
     """
     queryset = Rol.objects.all()
+    permission_classes = [TienePermiso]
+    modulo_permiso = 'roles'
 
     def get_serializer_class(self):
         """
@@ -178,6 +182,7 @@ class RolViewSet(viewsets.ModelViewSet):
 
         # Crear la relación
         RolHasPermiso.objects.create(rol=rol, permiso=permiso)
+        invalidar_permisos()
 
         return Response(
             {"mensaje": "Permiso añadido correctamente"},
@@ -201,6 +206,7 @@ class RolViewSet(viewsets.ModelViewSet):
         try:
             relacion = RolHasPermiso.objects.get(rol=rol, permiso_id=permiso_id)
             relacion.delete()
+            invalidar_permisos()
             return Response(
                 {"mensaje": "Permiso eliminado correctamente"},
                 status=status.HTTP_200_OK
@@ -219,6 +225,8 @@ class PermisoViewSet(viewsets.ModelViewSet):
     """
     queryset = Permiso.objects.all()
     serializer_class = PermisoSerializer
+    permission_classes = [TienePermiso]
+    modulo_permiso = 'roles'
 
 
 class RolHasPermisoViewSet(viewsets.ModelViewSet):
@@ -228,6 +236,20 @@ class RolHasPermisoViewSet(viewsets.ModelViewSet):
     """
     queryset = RolHasPermiso.objects.all()
     serializer_class = RolHasPermisoSerializer
+    permission_classes = [TienePermiso]
+    modulo_permiso = 'roles'
+
+    def perform_create(self, serializer):
+        serializer.save()
+        invalidar_permisos()
+
+    def perform_update(self, serializer):
+        serializer.save()
+        invalidar_permisos()
+
+    def perform_destroy(self, instance):
+        instance.delete()
+        invalidar_permisos()
 
     @action(detail=False, methods=['get'])
     def by_rol(self, request):
@@ -0,0 +1,32 @@
+# Generated by Django 5.2 on 2026-10-19 05:18
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('insumos', '0004_movimientoinsumo_cita_alter_movimientoinsumo_tipo_and_more'),
+        ('servicios', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ServicioHasInsumo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('cantidad', models.PositiveIntegerField(validators=[django.core.validators.MinValueValidator(1)], verbose_name='Cantidad por servicio')),
+                ('insumo', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='servicios_receta', to='insumos.insumo')),
+                ('servicio', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='receta', to='servicios.servicio')),
+            ],
+            options={
+                'verbose_name': 'Servicio - Insumo',
+                'verbose_name_plural': 'Servicios - Insumos',
+                'unique_together': {('servicio', 'insumo')},
+            },
+        ),
+    ]
@@ -88,3 +88,21 @@ class Servicio(BaseModel):
                 return f"{horas}h"
             else:
                 return f"{horas}h {minutos}min"
+
+
+class ServicioHasInsumo(BaseModel):
+    """Receta del servicio: insumos que consume cada vez que se realiza"""
+    servicio = models.ForeignKey(Servicio, on_delete=models.CASCADE, related_name='receta')
+    insumo = models.ForeignKey('insumos.Insumo', on_delete=models.PROTECT, related_name='servicios_receta')
+    cantidad = models.PositiveIntegerField(
+        validators=[MinValueValidator(1)],
+        verbose_name="Cantidad por servicio"
+    )
+
+    class Meta:
+        unique_together = ('servicio', 'insumo')
+        verbose_name = "Servicio - Insumo"
+        verbose_name_plural = "Servicios - Insumos"
+
+    def __str__(self):
+        return f"{self.servicio.nombre} - {self.insumo.nombre} ({self.cantidad})"
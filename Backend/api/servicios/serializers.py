@@ -1,6 +1,6 @@
 from rest_framework import serializers
 from decimal import Decimal, InvalidOperation
-from .models import Servicio
+from .models import Servicio, ServicioHasInsumo
 
 
 class ServicioSerializer(serializers.ModelSerializer):
@@ -89,3 +89,16 @@ class ServicioSerializer(serializers.ModelSerializer):
                 pass  # Las validaciones individuales ya manejan estos errores
         
         return data
+
+
+class ServicioHasInsumoSerializer(serializers.ModelSerializer):
+    insumo_nombre = serializers.CharField(source='insumo.nombre', read_only=True)
+
+    class Meta:
+        model = ServicioHasInsumo
+        fields = ['id', 'insumo', 'insumo_nombre', 'cantidad']
+
+    def validate_cantidad(self, value):
+        if value <= 0:
+            raise serializers.ValidationError("La cantidad debe ser mayor que cero")
+        return value
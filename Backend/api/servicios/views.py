@@ -1,10 +1,13 @@
 from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
-from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+from django.db import transaction
 from django.db.models import Q, Avg, Count
-from .models import Servicio
-from .serializers import ServicioSerializer
+from .models import Servicio, ServicioHasInsumo
+from .serializers import ServicioSerializer, ServicioHasInsumoSerializer
+from api.popularidad.contadores import top
+from api.popularidad.models import ContadorPopularidad
 import requests
 import base64
 
@@ -180,6 +183,40 @@ class ServicioViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(servicio)
         return Response(serializer.data)
 
+    @action(detail=True, methods=['get', 'put'], parser_classes=[JSONParser])
+    def receta(self, request, pk=None):
+        """
+        Consultar o reemplazar la receta (insumos consumidos) del servicio.
+        PUT body: [{"insumo": 1, "cantidad": 2}, ...]
+        """
+        servicio = self.get_object()
+
+        if request.method == 'PUT':
+            serializer = ServicioHasInsumoSerializer(data=request.data, many=True)
+            serializer.is_valid(raise_exception=True)
+
+            cantidades = {}
+            for linea in serializer.validated_data:
+                cantidades[linea['insumo'].id] = cantidades.get(linea['insumo'].id, 0) + linea['cantidad']
+
+            with transaction.atomic():
+                actuales = {r.insumo_id: r for r in servicio.receta.all()}
+                servicio.receta.exclude(insumo_id__in=cantidades).delete()
+                modificadas = []
+                for insumo_id, cantidad in cantidades.items():
+                    if insumo_id in actuales and actuales[insumo_id].cantidad != cantidad:
+                        actuales[insumo_id].cantidad = cantidad
+                        modificadas.append(actuales[insumo_id])
+                ServicioHasInsumo.objects.bulk_update(modificadas, ['cantidad'])
+                ServicioHasInsumo.objects.bulk_create([
+                    ServicioHasInsumo(servicio=servicio, insumo_id=insumo_id, cantidad=cantidad)
+                    for insumo_id, cantidad in cantidades.items()
+                    if insumo_id not in actuales
+                ])
+
+        receta = servicio.receta.select_related('insumo')
+        return Response(ServicioHasInsumoSerializer(receta, many=True).data)
+
     @action(detail=False, methods=['get'])
     def por_precio(self, request):
         """Ordenar servicios por precio"""
@@ -227,26 +264,22 @@ class ServicioViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'])
     def top_vendidos(self, request):
-        """Obtener servicios más vendidos"""
+        """Obtener servicios más vendidos (ventana opcional: 7d, 30d, 365d, all)"""
         try:
-            from ventaservicios.models import VentaServicio
-            from django.db.models import Case, When, IntegerField
-
             limit = int(request.query_params.get('limit', 5))
-
-            servicios_ids = VentaServicio.objects.values('servicio') \
-                .annotate(total=Count('servicio')) \
-                .order_by('-total')[:limit] \
-                .values_list('servicio', flat=True)
-
-            order = Case(*[When(pk=pk, then=pos) for pos, pk in enumerate(servicios_ids)],
-                         output_field=IntegerField())
-
-            servicios = Servicio.objects.filter(pk__in=servicios_ids).order_by(order)
-            serializer = self.get_serializer(servicios, many=True)
-            return Response(serializer.data)
-        except ImportError:
-            # Si no existe el modelo VentaServicio, retornar servicios activos
+            filas = top(ContadorPopularidad.TIPO_SERVICIO_VENDIDO, request.query_params.get('ventana', 'all'), limit)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if not filas:
+            # Sin ventas registradas, retornar servicios activos
             servicios = Servicio.objects.filter(estado='activo')[:5]
             serializer = self.get_serializer(servicios, many=True)
             return Response(serializer.data)
+        
+        servicios = Servicio.objects.in_bulk([f['objeto_id'] for f in filas])
+        serializer = self.get_serializer(
+            [servicios[f['objeto_id']] for f in filas if f['objeto_id'] in servicios],
+            many=True
+        )
+        return Response(serializer.data)
@@ -0,0 +1,163 @@
+import unittest
+from datetime import date
+from django.test import TestCase
+from rest_framework.test import APIClient
+from api.abastecimientos.models import Abastecimiento
+from api.abastecimientos.serializers import AbastecimientoSerializer
+from api.categoriainsumos.models import CategoriaInsumo
+from api.insumos.models import Insumo, MovimientoInsumo
+from api.insumoshasabastecimientos.models import InsumoHasAbastecimiento
+from api.manicuristas.models import Manicurista
+
+
+class AbastecimientoTest(TestCase):
+
+    def setUp(self):
+        self.manicurista = Manicurista.objects.create(nombre="Ana Pérez")
+        categoria = CategoriaInsumo.objects.create(nombre="Esmaltes")
+        self.gel = Insumo.objects.create(nombre="Gel", cantidad=10, categoria_insumo=categoria)
+        self.acetona = Insumo.objects.create(nombre="Acetona", cantidad=4, categoria_insumo=categoria)
+        self.lima = Insumo.objects.create(nombre="Lima", cantidad=6, categoria_insumo=categoria)
+
+    def _guardar(self, insumos, instance=None):
+        serializer = AbastecimientoSerializer(instance, data={
+            'fecha': date.today(),
+            'cantidad': 1,
+            'manicurista': self.manicurista.id,
+            'insumos': insumos
+        })
+        serializer.is_valid(raise_exception=True)
+        return serializer.save()
+
+    def _cantidades(self):
+        return dict(Insumo.objects.values_list('nombre', 'cantidad'))
+
+    def test_crear_descuenta_stock_de_todas_las_lineas(self):
+        abastecimiento = self._guardar([
+            {'insumo': self.gel.id, 'cantidad': 3},
+            {'insumo': self.acetona.id, 'cantidad': 4},
+        ])
+        self.assertEqual(self._cantidades(), {'Gel': 7, 'Acetona': 0, 'Lima': 6})
+        self.assertEqual(abastecimiento.insumos.count(), 2)
+        self.assertEqual(
+            MovimientoInsumo.objects.filter(
+                abastecimiento=abastecimiento,
+                tipo=MovimientoInsumo.TIPO_SALIDA_ABASTECIMIENTO
+            ).count(),
+            2
+        )
+
+    def test_stock_insuficiente_reporta_todas_las_lineas(self):
+        serializer = AbastecimientoSerializer(data={
+            'fecha': date.today(),
+            'cantidad': 1,
+            'manicurista': self.manicurista.id,
+            'insumos': [
+                {'insumo': self.gel.id, 'cantidad': 11},
+                {'insumo': self.acetona.id, 'cantidad': 5},
+                {'insumo': self.lima.id, 'cantidad': 1},
+            ]
+        })
+        self.assertFalse(serializer.is_valid())
+        error = str(serializer.errors['insumos'])
+        self.assertIn('Gel', error)
+        self.assertIn('Acetona', error)
+        self.assertNotIn('Lima', error)
+        self.assertFalse(Abastecimiento.objects.exists())
+
+    def test_editar_concilia_diferencias(self):
+        abastecimiento = self._guardar([
+            {'insumo': self.gel.id, 'cantidad': 3},
+            {'insumo': self.acetona.id, 'cantidad': 2},
+        ])
+        linea_gel = abastecimiento.insumos.get(insumo=self.gel)
+
+        self._guardar([
+            {'insumo': self.gel.id, 'cantidad': 5},
+            {'insumo': self.lima.id, 'cantidad': 1},
+        ], instance=abastecimiento)
+
+        # La línea existente se actualiza en sitio en lugar de borrarse y recrearse
+        linea_gel.refresh_from_db()
+        self.assertEqual(linea_gel.cantidad, 5)
+        self.assertFalse(InsumoHasAbastecimiento.objects.filter(abastecimiento=abastecimiento, insumo=self.acetona).exists())
+        self.assertEqual(self._cantidades(), {'Gel': 5, 'Acetona': 4, 'Lima': 5})
+
+
+    def test_editar_registro_anterior_al_historial(self):
+        # Creado antes del historial: tiene líneas pero nunca descontó stock
+        abastecimiento = Abastecimiento.objects.create(fecha=date.today(), cantidad=1, manicurista=self.manicurista)
+        InsumoHasAbastecimiento.objects.create(abastecimiento=abastecimiento, insumo=self.gel, cantidad=3)
+
+        self._guardar([{'insumo': self.gel.id, 'cantidad': 1}], instance=abastecimiento)
+        # No devuelve lo que nunca se descontó y descuenta la nueva línea completa
+        self.assertEqual(self._cantidades()['Gel'], 9)
+
+        self._guardar([{'insumo': self.gel.id, 'cantidad': 4}], instance=abastecimiento)
+        self.assertEqual(self._cantidades()['Gel'], 6)
+
+        # Editar y eliminar quedan de acuerdo: se devuelve exactamente lo descontado
+        response = APIClient().delete(f'/api/abastecimientos/{abastecimiento.id}/')
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self._cantidades()['Gel'], 10)
+
+class AbastecimientoListadoTest(TestCase):
+    """El listado y sus variantes usan un número fijo de consultas sin importar las filas"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.manicurista = Manicurista.objects.create(nombre="Ana Pérez")
+        categoria = CategoriaInsumo.objects.create(nombre="Esmaltes")
+        self.insumos = Insumo.objects.bulk_create([
+            Insumo(nombre=f"Insumo {i}", cantidad=100, categoria_insumo=categoria)
+            for i in range(3)
+        ])
+
+    def _crear(self, total):
+        Abastecimiento.objects.all().delete()
+        Abastecimiento.objects.bulk_create([
+            Abastecimiento(fecha=date(2025, 1, 1 + i % 28), cantidad=1, manicurista=self.manicurista)
+            for i in range(total)
+        ])
+        InsumoHasAbastecimiento.objects.bulk_create([
+            InsumoHasAbastecimiento(abastecimiento=abastecimiento, insumo=insumo, cantidad=1)
+            for abastecimiento in Abastecimiento.objects.all()
+            for insumo in self.insumos[:2]
+        ])
+
+    def test_consultas_constantes(self):
+        # SELECT abastecimientos con manicurista y usuario + prefetch de líneas con insumo y categoría
+        # (por_manicurista valida además la manicurista)
+        consultas = [
+            ('/api/abastecimientos/', 2),
+            ('/api/abastecimientos/{pk}/', 2),
+            (f'/api/abastecimientos/por_manicurista/?manicurista_id={self.manicurista.id}', 3),
+            ('/api/abastecimientos/por_periodo/?fecha_inicio=2025-01-01&fecha_fin=2025-01-31', 2),
+        ]
+        for total in (1, 10, 1000):
+            self._crear(total)
+            pk = Abastecimiento.objects.values_list('pk', flat=True).first()
+            for url, esperadas in consultas:
+                with self.subTest(filas=total, url=url), self.assertNumQueries(esperadas):
+                    response = self.client.get(url.format(pk=pk))
+                    self.assertEqual(response.status_code, 200)
+
+        lineas = response.data[0]['insumos']
+        self.assertEqual(len(lineas), 2)
+        self.assertEqual(lineas[0]['insumo']['categoria_nombre'], "Esmaltes")
+
+    def test_crear_responde_con_detalle(self):
+        response = self.client.post('/api/abastecimientos/', {
+            'fecha': '2025-01-10',
+            'cantidad': 1,
+            'manicurista': self.manicurista.id,
+            'insumos': [{'insumo': self.insumos[0].id, 'cantidad': 4}]
+        }, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['manicurista']['nombre'], "Ana Pérez")
+        self.assertEqual([l['cantidad'] for l in response.data['insumos']], [4])
+
+
+if __name__ == '__main__':
+    unittest.main()
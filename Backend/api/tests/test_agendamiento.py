@@ -0,0 +1,110 @@
+import unittest
+from datetime import date, time, timedelta
+from django.test import TestCase
+from rest_framework.test import APIClient
+from api.citas.agendamiento import buscar_opciones
+from api.citas.models import Cita
+from api.clientes.models import Cliente
+from api.horarios.grillas import obtener_grilla
+from api.manicuristas.models import Manicurista
+from api.novedades.models import Novedad
+from api.servicios.models import Servicio
+
+
+class AgendamientoAutomaticoTest(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        hoy = date.today()
+        self.fecha = hoy + timedelta(days=7 - hoy.weekday())
+        self.ana = Manicurista.objects.create(nombre="Ana Pérez")
+        self.bea = Manicurista.objects.create(nombre="Bea Ríos")
+        self.manicure = Servicio.objects.create(nombre="Manicure", precio=30000, descripcion="Manicure clásico", duracion=90)
+        self.pedicure = Servicio.objects.create(nombre="Pedicure", precio=40000, descripcion="Pedicure spa", duracion=60)
+        self.cliente = Cliente.objects.create(
+            tipo_documento="CC", documento="1001", nombre="Laura Gómez",
+            celular="3001112233", correo_electronico="laura@mail.com", direccion="Calle 1"
+        )
+        self.otro_cliente = Cliente.objects.create(
+            tipo_documento="CC", documento="1002", nombre="Marta Ruiz",
+            celular="3001112234", correo_electronico="marta@mail.com", direccion="Calle 2"
+        )
+        # Las reglas de horario se cargan una vez por proceso, no por petición
+        obtener_grilla(None, self.fecha)
+
+    def _cita(self, manicurista, hora, cliente=None):
+        return Cita.objects.create(
+            cliente=cliente or self.otro_cliente, manicurista=manicurista, servicio=self.manicure,
+            fecha_cita=self.fecha, hora_cita=hora
+        )
+
+    def _ausencia(self, manicurista, inicio, fin):
+        return Novedad.objects.create(
+            manicurista=manicurista, fecha=self.fecha, estado='ausente',
+            tipo_ausencia='por_horas', hora_inicio_ausencia=inicio, hora_fin_ausencia=fin
+        )
+
+    def _buscar(self, servicios, **extra):
+        return buscar_opciones(self.cliente.id, servicios, self.fecha, self.fecha, **extra)
+
+    def test_prefiere_la_que_no_deja_huecos_inservibles(self):
+        self._cita(self.ana, time(11, 30))  # 11:30-13:00: un pedicure a las 10:00 le dejaría 30 minutos sueltos
+
+        opciones = self._buscar([self.pedicure], opciones=3)
+
+        self.assertEqual([o['hora_inicio'] for o in opciones], ['10:00', '10:30', '11:00'])
+        self.assertEqual(opciones[0]['tramos'][0]['manicurista'], self.bea.id)
+        self.assertEqual(opciones[0]['huecos_inservibles'], 0)
+        self.assertEqual(opciones[0]['hora_fin'], '11:00')
+
+    def test_divide_entre_dos_manicuristas_seguidas(self):
+        self._ausencia(self.ana, time(11, 30), time(20, 0))
+        self._ausencia(self.bea, time(10, 0), time(11, 30))
+
+        self.assertEqual(self._buscar([self.manicure, self.pedicure])[0]['tramos'][0]['hora_inicio'], '11:30')
+        opcion = self._buscar([self.manicure, self.pedicure], permitir_division=True)[0]
+
+        self.assertEqual(opcion['hora_inicio'], '10:00')
+        self.assertEqual(opcion['hora_fin'], '12:30')
+        self.assertEqual(
+            [(t['manicurista'], t['servicios'], t['hora_inicio']) for t in opcion['tramos']],
+            [(self.ana.id, [self.manicure.id], '10:00'), (self.bea.id, [self.pedicure.id], '11:30')]
+        )
+
+    def test_respeta_las_citas_del_cliente(self):
+        self._cita(self.ana, time(10, 0), cliente=self.cliente)
+
+        opciones = self._buscar([self.pedicure])
+
+        self.assertEqual(opciones[0]['hora_inicio'], '11:30')
+
+    def test_consultas_constantes(self):
+        for i in range(6):
+            Manicurista.objects.create(nombre=f"Manicurista {i}")
+            self._cita(Manicurista.objects.last(), time(10 + i, 0))
+
+        # manicuristas, servicio más corto, citas, novedades
+        with self.assertNumQueries(4):
+            buscar_opciones(
+                self.cliente.id, [self.manicure, self.pedicure], self.fecha, self.fecha + timedelta(days=13),
+                permitir_division=True
+            )
+
+    def test_endpoint(self):
+        response = self.client.post('/api/citas/agendar_automatico/', {
+            'cliente': self.cliente.id, 'servicios': [self.manicure.id, self.pedicure.id],
+            'fecha_inicio': self.fecha.isoformat(), 'opciones': 2
+        }, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['duracion_total'], 150)
+        self.assertEqual(response.data['total_opciones'], 2)
+
+        response = self.client.post('/api/citas/agendar_automatico/', {
+            'cliente': self.cliente.id, 'servicios': [999], 'fecha_inicio': self.fecha.isoformat()
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
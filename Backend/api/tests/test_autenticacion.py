@@ -0,0 +1,160 @@
+import unittest
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from api.authentication import jwt
+from api.clientes.models import Cliente
+from api.manicuristas.models import Manicurista
+from api.roles.models import Rol
+from api.usuarios.models import Usuario
+
+
+class LoginTest(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.rol_cliente = Rol.objects.create(nombre="Cliente")
+        self.rol_manicurista = Rol.objects.create(nombre="Manicurista")
+
+    def _usuario(self, correo, rol, documento):
+        return Usuario.objects.create_user(
+            correo_electronico=correo, password='Clave123!', nombre='Laura Gómez', tipo_documento='CC',
+            documento=documento, celular='3001112233', rol=rol
+        )
+
+    def _login(self, correo):
+        return self.client.post('/api/auth/login/', {'correo_electronico': correo, 'password': 'Clave123!'}, format='json')
+
+    def test_cliente_por_relacion_y_claims(self):
+        usuario = self._usuario('laura@mail.com', self.rol_cliente, '1001')
+        # Documento distinto al del usuario: el perfil se resuelve por la relación, no por documento
+        cliente = Cliente.objects.create(
+            tipo_documento='CC', documento='2002', nombre='Laura Gómez', celular='3001112233',
+            correo_electronico='laura@mail.com', direccion='Calle 1', usuario=usuario
+        )
+
+        # Autenticación + una consulta con rol y perfiles + registro del refresh token
+        with self.assertNumQueries(3):
+            response = self._login('laura@mail.com')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['cliente_id'], cliente.id)
+        self.assertNotIn('manicurista_id', response.data)
+        self.assertEqual(response.data['user']['rol']['nombre'], 'Cliente')
+        token = AccessToken(response.data['access'])
+        self.assertEqual(token['rol'], 'cliente')
+        self.assertEqual(token['cliente_id'], cliente.id)
+        self.assertIsNone(token['manicurista_id'])
+
+    def test_manicurista(self):
+        usuario = self._usuario('bea@mail.com', self.rol_manicurista, '1002')
+        manicurista = Manicurista.objects.create(nombre='Bea Ríos', usuario=usuario)
+
+        response = self._login('bea@mail.com')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['manicurista_id'], manicurista.id)
+        self.assertEqual(AccessToken(response.data['access'])['manicurista_id'], manicurista.id)
+
+    def test_credenciales_invalidas(self):
+        self._usuario('laura@mail.com', self.rol_cliente, '1001')
+        response = self.client.post(
+            '/api/auth/login/', {'correo_electronico': 'laura@mail.com', 'password': 'Otra'}, format='json'
+        )
+        self.assertEqual(response.status_code, 401)
+
+
+
+class AutenticacionCacheadaTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        jwt._locales.clear()
+        self.client = APIClient()
+        self.rol = Rol.objects.create(nombre="Cliente")
+        self.usuario = Usuario.objects.create_user(
+            correo_electronico='laura@mail.com', password='Clave123!', nombre='Laura Gómez', tipo_documento='CC',
+            documento='1001', celular='3001112233', rol=self.rol
+        )
+        response = self.client.post(
+            '/api/auth/login/', {'correo_electronico': 'laura@mail.com', 'password': 'Clave123!'}, format='json'
+        )
+        self.refresh = response.data['refresh']
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+
+    def _consultas_de_usuario(self):
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get('/api/roles/')
+        self.assertEqual(response.status_code, 200)
+        return sum(Usuario._meta.db_table in q['sql'] for q in consultas.captured_queries)
+
+    def _vencer_vigencia_local(self):
+        with jwt._candado:
+            versiones, _, datos = jwt._locales[str(self.usuario.pk)]
+            jwt._locales[str(self.usuario.pk)] = (versiones, 0.0, datos)
+
+    def test_sin_consulta_para_usuarios_frecuentes(self):
+        self.assertEqual(self._consultas_de_usuario(), 1)
+        self.assertEqual(self._consultas_de_usuario(), 0)
+
+        # Vencida la vigencia local, la versión compartida no cambió: sigue sin consultar
+        self._vencer_vigencia_local()
+        self.assertEqual(self._consultas_de_usuario(), 0)
+
+    def test_instancia_nueva_por_peticion(self):
+        primero = jwt.obtener_usuario(self.usuario.pk)
+        primero.nombre = 'Otro'
+        self.assertEqual(jwt.obtener_usuario(self.usuario.pk).nombre, 'Laura Gómez')
+
+    def test_invalidacion_por_cambios(self):
+        self._consultas_de_usuario()
+
+        otro_rol = Rol.objects.create(nombre="Manicurista")
+        self.usuario.rol = otro_rol
+        with self.captureOnCommitCallbacks(execute=True):
+            self.usuario.save()
+        self.assertEqual(jwt.obtener_usuario(self.usuario.pk).rol.nombre, 'Manicurista')
+
+        otro_rol.nombre = 'Manicurista senior'
+        with self.captureOnCommitCallbacks(execute=True):
+            otro_rol.save()
+        self.assertEqual(jwt.obtener_usuario(self.usuario.pk).rol.nombre, 'Manicurista senior')
+
+        self.usuario.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.usuario.save()
+        self.assertEqual(self.client.get('/api/roles/').status_code, 401)
+
+    def test_version_se_sube_al_confirmar(self):
+        clave = jwt.CLAVE_VERSION.format(self.usuario.pk)
+        antes = jwt._versiones(self.usuario.pk)
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.usuario.save()
+        # Antes del commit otro proceso recargaría el usuario anterior con la versión nueva
+        self.assertEqual(jwt._versiones(self.usuario.pk), antes)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(cache.get(clave), antes[1] + 1)
+
+    def test_otro_proceso_ve_la_invalidacion(self):
+        self._consultas_de_usuario()
+        Usuario.objects.filter(pk=self.usuario.pk).update(is_active=False)
+        # Otro proceso sube la versión compartida; aquí la entrada local ya venció
+        jwt._subir(jwt.CLAVE_VERSION.format(self.usuario.pk))
+        self._vencer_vigencia_local()
+
+        self.assertEqual(self.client.get('/api/roles/').status_code, 401)
+
+    def test_logout_invalida(self):
+        self._consultas_de_usuario()
+        response = self.client.post('/api/auth/logout/', {'refresh_token': self.refresh}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(str(self.usuario.pk), jwt._locales)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,157 @@
+import unittest
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.test import APIClient
+from api.busqueda.indice import buscar, buscar_global, terminos_consulta
+from api.busqueda.models import TerminoBusqueda
+from api.categoriainsumos.models import CategoriaInsumo
+from api.clientes.models import Cliente
+from api.insumos.models import Insumo
+from api.manicuristas.models import Manicurista
+from api.proveedores.models import Proveedor
+from api.servicios.models import Servicio
+
+
+class IndiceBusquedaClientesTest(TestCase):
+
+    def setUp(self):
+        datos = [
+            ("1001", "María Gómez Peña", "300 111 2233"),
+            ("1002", "Mariana Ruiz", "3104445566"),
+            ("1003", "Ana María Torres", "3207778899"),
+            ("2001", "Andrés Gómez", "3151112233"),
+        ]
+        self.clientes = [
+            Cliente.objects.create(
+                tipo_documento="CC", documento=documento, nombre=nombre, celular=celular,
+                correo_electronico=f"c{documento}@mail.com", direccion="Calle 1"
+            )
+            for documento, nombre, celular in datos
+        ]
+        self.maria, self.mariana, self.ana, self.andres = self.clientes
+
+    def test_sin_tildes_y_por_prefijo(self):
+        self.assertEqual(set(buscar('cliente', 'pena')), {self.maria.id})
+        self.assertEqual(set(buscar('cliente', 'GÓM')), {self.maria.id, self.andres.id})
+        self.assertEqual(set(buscar('cliente', 'mar gom')), {self.maria.id})
+        self.assertEqual(buscar('cliente', 'zz'), [])
+        self.assertEqual(buscar('cliente', '  '), [])
+
+    def test_codigos(self):
+        self.assertEqual(terminos_consulta('300 111-22'), ['30011122'])
+        self.assertEqual(buscar('cliente', '100'), [self.maria.id, self.mariana.id, self.ana.id])
+        self.assertEqual(buscar('cliente', '300 111'), [self.maria.id])
+        self.assertEqual(buscar('cliente', '3151112233'), [self.andres.id])
+
+    def test_exactos_primero(self):
+        ids = buscar('cliente', 'maria')
+        # "maria" exacto antes que "mariana"
+        self.assertEqual(ids[-1], self.mariana.id)
+        self.assertEqual(set(ids[:2]), {self.maria.id, self.ana.id})
+        self.assertEqual(len(buscar('cliente', 'a', limite=2)), 2)
+
+    def test_se_mantiene_al_guardar_y_eliminar(self):
+        self.maria.nombre = "Marta Gómez"
+        self.maria.save()
+        self.assertNotIn(self.maria.id, buscar('cliente', 'pena'))
+        self.assertIn(self.maria.id, buscar('cliente', 'marta'))
+
+        self.andres.delete()
+        self.assertFalse(TerminoBusqueda.objects.filter(objeto_id=self.andres.id).exists())
+
+    def test_guardado_parcial_no_reindexa(self):
+        with self.assertNumQueries(1):
+            self.maria.save(update_fields=['direccion'])
+
+    def test_comando_reconstruye(self):
+        TerminoBusqueda.objects.all().delete()
+        out = StringIO()
+        call_command('reconstruir_busqueda', stdout=out)
+        self.assertIn("cliente: 4 registros indexados", out.getvalue())
+        self.assertIn("insumo: 0 registros indexados", out.getvalue())
+        self.assertEqual(buscar('cliente', 'torres'), [self.ana.id])
+
+    def test_comando_de_medicion_no_deja_datos(self):
+        out = StringIO()
+        call_command('medir_busqueda', '--clientes', '30', '--repeticiones', '2', '--consulta', 'gomez', stdout=out)
+        self.assertIn("30 clientes creados e indexados", out.getvalue())
+        self.assertIn("'gomez' [indice]", out.getvalue())
+        self.assertIn("'gomez' [icontains]", out.getvalue())
+        self.assertEqual(Cliente.objects.count(), 4)
+        self.assertEqual(TerminoBusqueda.objects.values('objeto_id').distinct().count(), 4)
+
+    def test_endpoints(self):
+        client = APIClient()
+        response = client.get('/api/clientes/search/', {'q': 'gom', 'limite': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(client.get('/api/clientes/search/', {'q': 'gom', 'limite': 'x'}).status_code, 400)
+
+        response = client.post('/api/citas/buscar_clientes/', {'query': 'ruiz'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([c['id'] for c in response.data], [self.mariana.id])
+
+
+class BusquedaGlobalTest(TestCase):
+
+    def setUp(self):
+        self.cliente = Cliente.objects.create(
+            tipo_documento="CC", documento="1001", nombre="Paula Gel", celular="3001112233",
+            correo_electronico="paula@mail.com", direccion="Calle 1"
+        )
+        self.manicurista = Manicurista.objects.create(nombre="Gelen Ríos", numero_documento="5005", celular="3115556677")
+        self.servicio = Servicio.objects.create(
+            nombre="Uñas en gel", precio=50000, duracion=60, descripcion="Esmaltado semipermanente"
+        )
+        categoria = CategoriaInsumo.objects.create(nombre="Esmaltes")
+        self.insumo = Insumo.objects.create(nombre="Gel constructor", cantidad=3, categoria_insumo=categoria)
+        self.proveedor = Proveedor.objects.create(
+            tipo_persona="juridica", nombre_empresa="Geles SAS", nit="900123", nombre="Pedro Díaz",
+            direccion="Calle 2", correo_electronico="ventas@geles.com", celular="3209998877"
+        )
+
+    def test_agrupa_en_una_consulta(self):
+        with self.assertNumQueries(1):
+            resultados = buscar_global('gel')
+        self.assertEqual(resultados, {
+            'cliente': [self.cliente.id], 'manicurista': [self.manicurista.id], 'servicio': [self.servicio.id],
+            'insumo': [self.insumo.id], 'proveedor': [self.proveedor.id],
+        })
+        self.assertEqual(buscar_global('semiperm'), {'servicio': [self.servicio.id]})
+        self.assertEqual(buscar_global('gel pedro'), {'proveedor': [self.proveedor.id]})
+        self.assertEqual(buscar_global('gel', nombres_entidades=['insumo']), {'insumo': [self.insumo.id]})
+
+    def test_registro_con_varias_coincidencias(self):
+        # Sus cuatro palabras llenan la página del UNION: la entidad se completa con otra consulta
+        otro = Servicio.objects.create(
+            nombre="Gelish", precio=40000, duracion=45, descripcion="Gelatina geles gelificados"
+        )
+        resultados = buscar_global('gel', limite=2, nombres_entidades=['servicio'])
+        self.assertEqual(resultados, {'servicio': [self.servicio.id, otro.id]})
+
+    def test_se_mantiene_en_cada_entidad(self):
+        self.insumo.nombre = "Acrílico"
+        self.insumo.save()
+        self.manicurista.delete()
+        self.assertEqual(set(buscar_global('gel')), {'cliente', 'servicio', 'proveedor'})
+        self.assertEqual(buscar_global('acri'), {'insumo': [self.insumo.id]})
+
+    def test_endpoint(self):
+        client = APIClient()
+        response = client.get('/api/buscar/', {'q': 'GEL', 'limite': 3})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            set(response.data), {'clientes', 'manicuristas', 'servicios', 'insumos', 'proveedores'}
+        )
+        self.assertEqual(response.data['insumos'][0]['nombre'], "Gel constructor")
+        self.assertEqual(response.data['proveedores'][0]['nit'], "900123")
+
+        response = client.get('/api/buscar/', {'q': 'gel', 'grupos': 'servicios'})
+        self.assertEqual(list(response.data), ['servicios'])
+        self.assertEqual(client.get('/api/buscar/', {'q': 'gel', 'grupos': 'citas'}).status_code, 400)
+        self.assertEqual(client.get('/api/buscar/').status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
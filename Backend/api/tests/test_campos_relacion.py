@@ -0,0 +1,88 @@
+import unittest
+from datetime import date, time, timedelta
+from django.test import TestCase
+from api.citas.models import Cita
+from api.citas.serializers import CitaCreateSerializer
+from api.clientes.models import Cliente
+from api.manicuristas.models import Manicurista
+from api.roles.models import Permiso, Rol
+from api.roles.serializers import RolSerializer
+from api.servicios.models import Servicio
+from api.ventaservicios.serializers import VentaServicioCreateSerializer
+
+
+class PKRelacionadosTest(TestCase):
+
+    def setUp(self):
+        self.servicios = [
+            Servicio.objects.create(nombre=f"Servicio {i}", precio=10000, descripcion="Servicio", duracion=30)
+            for i in range(6)
+        ]
+        self.inactivo = Servicio.objects.create(
+            nombre="Retirado", precio=10000, descripcion="Servicio", duracion=30, estado='inactivo'
+        )
+        self.cliente = Cliente.objects.create(
+            tipo_documento="CC", documento="1001", nombre="Laura Gómez",
+            celular="3001112233", correo_electronico="laura@mail.com", direccion="Calle 1"
+        )
+        self.manicurista = Manicurista.objects.create(nombre="Ana Pérez")
+        self.fecha = date.today() + timedelta(days=7 - date.today().weekday())
+
+    def _cita(self, servicios):
+        return CitaCreateSerializer(data={
+            'cliente': self.cliente.id, 'manicurista': self.manicurista.id, 'servicio': self.servicios[0].id,
+            'servicios': servicios, 'fecha_cita': self.fecha, 'hora_cita': '10:00'
+        })
+
+    def test_una_consulta_y_orden_conservado(self):
+        ids = [s.id for s in reversed(self.servicios)]
+        serializer = self._cita(ids)
+        campo = serializer.fields['servicios']
+
+        with self.assertNumQueries(1):
+            resueltos = campo.run_validation(ids + [ids[0]])
+
+        self.assertEqual([s.id for s in resueltos], ids + [ids[0]])
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+
+    def test_reporta_todos_los_ids_invalidos_juntos(self):
+        serializer = self._cita([self.servicios[0].id, 9998, self.inactivo.id, 9999, 'abc'])
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('servicios', serializer.errors)
+
+        serializer = self._cita([self.servicios[0].id, 9998, self.inactivo.id, 9999])
+        self.assertFalse(serializer.is_valid())
+        mensaje = str(serializer.errors['servicios'][0])
+        self.assertIn('[9998, 9999]', mensaje)
+        self.assertIn(f'[{self.inactivo.id}] no están disponibles', mensaje)
+
+    def test_permisos_del_rol(self):
+        permisos = [Permiso.objects.create(nombre=f"Permiso {i}") for i in range(5)]
+        serializer = RolSerializer(data={'nombre': 'Recepción', 'permisos_ids': [p.id for p in permisos]})
+        with self.assertNumQueries(2):  # nombre único + permisos
+            self.assertTrue(serializer.is_valid(), serializer.errors)
+        rol = serializer.save()
+        self.assertEqual(set(rol.permisos.values_list('id', flat=True)), {p.id for p in permisos})
+
+        serializer = RolSerializer(data={'nombre': 'Caja', 'permisos_ids': [permisos[0].id, 9999]})
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('9999', str(serializer.errors['permisos_ids'][0]))
+
+    def test_citas_de_la_venta_deben_estar_finalizadas(self):
+        abierta = Cita.objects.create(
+            cliente=self.cliente, manicurista=self.manicurista, servicio=self.servicios[0],
+            fecha_cita=self.fecha, hora_cita=time(10, 0)
+        )
+        serializer = VentaServicioCreateSerializer(data={
+            'cliente': self.cliente.id, 'manicurista': self.manicurista.id, 'citas': [abierta.id],
+            'detalles': [{'servicio': self.servicios[0].id, 'cantidad': 1, 'precio_unitario': 10000}]
+        })
+
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(
+            str(serializer.errors['citas'][0]), f"Las siguientes citas no están finalizadas: [{abierta.id}]"
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+from io import StringIO
+from datetime import date, time, timedelta
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from rest_framework.test import APIClient
+from api.citas.capacidad import ajustar_demanda, simular_capacidad
+from api.citas.models import Cita
+from api.clientes.models import Cliente
+from api.horarios.grillas import obtener_grilla
+from api.manicuristas.models import Manicurista
+from api.servicios.models import Servicio
+
+
+class SimulacionCapacidadTest(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.hoy = date(2025, 6, 2)  # lunes
+        manicure = Servicio.objects.create(nombre="Manicure", precio=30000, descripcion="Manicure clásico", duracion=60)
+        cliente = Cliente.objects.create(
+            tipo_documento="CC", documento="1001", nombre="Laura Gómez",
+            celular="3001112233", correo_electronico="laura@mail.com", direccion="Calle 1"
+        )
+        manicuristas = [Manicurista.objects.create(nombre=f"Manicurista {i}") for i in range(4)]
+        # Cuatro lunes con 8 citas cada uno, concentradas en la mañana
+        for semana in range(1, 5):
+            fecha = self.hoy - timedelta(weeks=semana)
+            for i in range(8):
+                Cita.objects.create(
+                    cliente=cliente, manicurista=manicuristas[i % 4], servicio=manicure,
+                    fecha_cita=fecha, hora_cita=time(10 + i // 4, 0)
+                )
+        obtener_grilla(None, self.hoy)
+
+    def test_ajusta_la_demanda_por_dia_de_semana(self):
+        with self.assertNumQueries(1):
+            demanda = ajustar_demanda(dias=28, hoy=self.hoy)
+
+        self.assertEqual(demanda[0].llegadas_media, 8)
+        self.assertEqual(demanda[1].llegadas_media, 0)
+        self.assertAlmostEqual(demanda[0].prob_turnos[0], 0.5)
+        self.assertAlmostEqual(demanda[0].prob_turnos[2], 0.5)
+        self.assertEqual(set(demanda[0].duraciones), {60})
+
+    def test_mas_dotacion_menos_rechazo(self):
+        reporte = simular_capacidad([1, 2, 4, 6], dias=28, replicas=2000, rechazo_maximo=0.1, semilla=7, hoy=self.hoy)
+        lunes = next(d for d in reporte if d['dia_semana'] == 0)
+        rechazo = [c['tasa_rechazo'] for c in lunes['configuraciones']]
+        utilizacion = [c['utilizacion'] for c in lunes['configuraciones']]
+
+        self.assertEqual(rechazo, sorted(rechazo, reverse=True))
+        self.assertEqual(utilizacion, sorted(utilizacion, reverse=True))
+        self.assertGreater(rechazo[0], 0.5)
+        self.assertIn(lunes['dotacion_recomendada'], [4, 6])
+        self.assertGreater(lunes['configuraciones'][-1]['ingresos_esperados'], lunes['configuraciones'][0]['ingresos_esperados'])
+
+    def test_pool_de_procesos_reproducible(self):
+        en_serie = simular_capacidad([2, 3], dias=28, replicas=500, semilla=3, procesos=1, hoy=self.hoy)
+        en_paralelo = simular_capacidad([2, 3], dias=28, replicas=500, semilla=3, procesos=2, hoy=self.hoy)
+
+        self.assertEqual(en_serie, en_paralelo)
+
+    def test_endpoint(self):
+        response = self.client.get('/api/citas/simulacion_capacidad/', {'dotaciones': '2,4', 'replicas': 200, 'semilla': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['resultados'][0]['configuraciones']), 2)
+
+        response = self.client.get('/api/citas/simulacion_capacidad/', {'dotaciones': '0'})
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.get('/api/citas/simulacion_capacidad/', {'dotaciones': '2', 'semilla': -1})
+        self.assertEqual(response.status_code, 400)
+
+    def test_comando_rechaza_semilla_negativa(self):
+        with self.assertRaises(CommandError):
+            call_command('simular_capacidad', '--semilla', '-1', stdout=StringIO())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import unittest
+from datetime import timedelta
+from decimal import Decimal
+from django.test import TestCase
+from django.utils import timezone
+from api.categoriainsumos.models import CategoriaInsumo
+from api.compras.models import Compra, DetalleCompra
+from api.compras.serializers import CompraCreateSerializer
+from api.insumos.models import Insumo
+from api.proveedores.models import Proveedor
+
+
+class CompraTest(TestCase):
+
+    def setUp(self):
+        self.proveedor = Proveedor.objects.create(
+            tipo_persona='juridica',
+            nombre_empresa="Distribuidora Nails",
+            nit="900123456",
+            nombre="Carlos Ruiz",
+            direccion="Calle 10 # 20-30",
+            correo_electronico="ventas@nails.com",
+            celular="3001234567"
+        )
+        categoria = CategoriaInsumo.objects.create(nombre="Esmaltes")
+        self.insumos = Insumo.objects.bulk_create([
+            Insumo(nombre=f"Insumo {i}", cantidad=0, categoria_insumo=categoria)
+            for i in range(40)
+        ])
+
+    def _crear(self, detalles, estado='finalizada'):
+        serializer = CompraCreateSerializer(data={
+            'proveedor': self.proveedor.id,
+            'estado': estado,
+            'detalles': detalles
+        })
+        serializer.is_valid(raise_exception=True)
+        return serializer.save()
+
+    def test_crear_compra_de_40_lineas_con_consultas_constantes(self):
+        detalles = [
+            {'insumo_id': insumo.id, 'cantidad': 2, 'precio_unitario': 1500}
+            for insumo in self.insumos
+        ]
+        # proveedor + in_bulk + INSERT compra + bulk_create + UPDATE costo
+        # + SELECT/INSERT precios por proveedor + INSERT/UPDATE contadores
+        # + UPDATE stock + INSERT historial + aggregate + UPDATE total (+ savepoints)
+        with self.assertNumQueries(21):
+            compra = self._crear(detalles)
+
+        compra.refresh_from_db()
+        self.assertEqual(compra.detalles.count(), 40)
+        self.assertEqual(compra.total, Decimal('120000.00'))
+        self.assertEqual(Insumo.objects.get(pk=self.insumos[0].pk).cantidad, 2)
+
+    def test_calcular_total_actualiza_la_fecha_de_modificacion(self):
+        compra = self._crear([{'insumo_id': self.insumos[0].id, 'cantidad': 2, 'precio_unitario': 100}])
+        antes = timezone.now() - timedelta(days=1)
+        Compra.objects.filter(pk=compra.pk).update(updated_at=antes)
+
+        compra.calcular_total()
+
+        self.assertGreater(Compra.objects.get(pk=compra.pk).updated_at, antes)
+
+    def test_insumos_inexistentes_se_reportan_juntos(self):
+        serializer = CompraCreateSerializer(data={
+            'proveedor': self.proveedor.id,
+            'detalles': [
+                {'insumo_id': 9998, 'cantidad': 1, 'precio_unitario': 100},
+                {'insumo_id': 9999, 'cantidad': 1, 'precio_unitario': 100},
+            ]
+        })
+        self.assertFalse(serializer.is_valid())
+        self.assertIn("9998, 9999", str(serializer.errors['detalles']))
+
+    def test_editar_compra_finalizada_solo_aplica_diferencias(self):
+        a, b, c = self.insumos[:3]
+        compra = self._crear([
+            {'insumo_id': a.id, 'cantidad': 5, 'precio_unitario': 100},
+            {'insumo_id': b.id, 'cantidad': 3, 'precio_unitario': 200},
+        ])
+        detalle_a = compra.detalles.get(insumo=a)
+
+        serializer = CompraCreateSerializer(compra, data={
+            'detalles': [
+                {'insumo_id': a.id, 'cantidad': 5, 'precio_unitario': 100},
+                {'insumo_id': c.id, 'cantidad': 4, 'precio_unitario': 50},
+            ]
+        }, partial=True)
+        serializer.is_valid(raise_exception=True)
+        compra = serializer.save()
+
+        # La línea sin cambios se conserva, la eliminada se borra y la nueva se crea
+        self.assertTrue(DetalleCompra.objects.filter(pk=detalle_a.pk).exists())
+        self.assertEqual(
+            set(compra.detalles.values_list('insumo_id', flat=True)),
+            {a.id, c.id}
+        )
+        self.assertEqual(Compra.objects.get(pk=compra.pk).total, Decimal('700.00'))
+
+        cantidades = dict(Insumo.objects.filter(pk__in=[a.id, b.id, c.id]).values_list('id', 'cantidad'))
+        self.assertEqual(cantidades, {a.id: 5, b.id: 0, c.id: 4})
+
+
+if __name__ == '__main__':
+    unittest.main()
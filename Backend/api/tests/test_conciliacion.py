@@ -0,0 +1,142 @@
+import unittest
+from io import StringIO
+from datetime import date, time, timedelta
+from decimal import Decimal
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.test import APIClient
+from api.categoriainsumos.models import CategoriaInsumo
+from api.citas.models import Cita
+from api.clientes.models import Cliente
+from api.compras.models import Compra, DetalleCompra
+from api.insumos.models import Insumo, MovimientoInsumo
+from api.manicuristas.models import Manicurista
+from api.proveedores.models import Proveedor
+from api.roles.models import Rol
+from api.servicios.models import Servicio
+from api.usuarios.models import Usuario
+from api.utils.conciliacion import conciliar
+from api.ventaservicios.models import VentaServicio, DetalleVentaServicio
+
+
+class ConciliacionTest(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        categoria = CategoriaInsumo.objects.create(nombre="Esmaltes")
+        self.gel = Insumo.objects.create(nombre="Gel", cantidad=0, categoria_insumo=categoria)
+        self.lima = Insumo.objects.create(nombre="Lima", cantidad=0, categoria_insumo=categoria)
+        self.proveedor = Proveedor.objects.create(
+            tipo_persona='juridica', nombre_empresa="Distribuidora Nails", nit="900123456",
+            nombre="Carlos Ruiz", direccion="Calle 10", correo_electronico="ventas@nails.com",
+            celular="3001234567"
+        )
+        self.manicure = Servicio.objects.create(nombre="Manicure", precio=30000, descripcion="Manicure clásico", duracion=45)
+        self.pedicure = Servicio.objects.create(nombre="Pedicure", precio=35000, descripcion="Pedicure clásico", duracion=60)
+        self.cliente = Cliente.objects.create(
+            tipo_documento="CC", documento="1001", nombre="Laura Gómez",
+            celular="3001112233", correo_electronico="laura@mail.com", direccion="Calle 1"
+        )
+        self.manicurista = Manicurista.objects.create(nombre="Ana Pérez")
+
+    def _venta(self):
+        # bulk_create: VentaServicio.save() consulta sus detalles antes de tener pk
+        venta = VentaServicio.objects.bulk_create([
+            VentaServicio(cliente=self.cliente, manicurista=self.manicurista, total=0, porcentaje_comision=10)
+        ])[0]
+        DetalleVentaServicio.objects.create(venta=venta, servicio=self.manicure, cantidad=2, precio_unitario=30000)
+        return venta
+
+    def _compra(self):
+        compra = Compra.objects.create(proveedor=self.proveedor, total=0)
+        DetalleCompra.objects.bulk_create([
+            DetalleCompra(compra=compra, insumo=self.gel, cantidad=3, precio_unitario=1000),
+            DetalleCompra(compra=compra, insumo=self.lima, cantidad=1, precio_unitario=500),
+        ])
+        return compra
+
+    def _cita(self, hora, estado='pendiente'):
+        cita = Cita.objects.create(
+            cliente=self.cliente, manicurista=self.manicurista, servicio=self.manicure,
+            fecha_cita=date.today() + timedelta(days=1), hora_cita=hora, estado=estado
+        )
+        cita.servicios.set([self.manicure, self.pedicure])
+        return cita
+
+    def _desfasar(self):
+        self.venta = self._venta()
+        self._venta()  # una venta que sí cuadra
+        VentaServicio.objects.filter(pk=self.venta.pk).update(total=1, comision_manicurista=0)
+
+        self.compra = self._compra()  # total=0 frente a 3500 de detalles
+        Compra.objects.bulk_create([Compra(proveedor=self.proveedor, total=0)])  # sin detalles: cuadra
+
+        self.abierta = self._cita(time(10, 0))
+        self.cerrada = self._cita(time(11, 0), estado='finalizada')
+        Cita.objects.filter(pk__in=[self.abierta.pk, self.cerrada.pk]).update(precio_total=1, duracion_total=5)
+
+        Insumo.objects.filter(pk=self.gel.pk).update(cantidad=7)  # sin movimientos que lo respalden
+
+    def test_detecta_sin_modificar(self):
+        self._desfasar()
+
+        resultados = conciliar()
+
+        self.assertEqual({n: r['inconsistencias'] for n, r in resultados.items()}, {'ventas': 1, 'compras': 1, 'citas': 1, 'stock': 1, 'consumos': 0})
+        self.assertEqual(resultados['ventas']['muestra'], [{'id': self.venta.id, 'actual': Decimal('1.00'), 'esperado': Decimal('60000.00')}])
+        self.assertEqual(resultados['citas']['muestra'][0]['id'], self.abierta.id)
+        self.assertEqual(Compra.objects.get(pk=self.compra.pk).total, 0)
+        self.assertFalse(MovimientoInsumo.objects.exists())
+
+    def test_corregir_deja_todo_cuadrado(self):
+        self._desfasar()
+
+        resultados = conciliar(corregir=True)
+
+        self.assertEqual({n: r['corregidos'] for n, r in resultados.items()}, {'ventas': 1, 'compras': 1, 'citas': 1, 'stock': 1, 'consumos': 0})
+        venta = VentaServicio.objects.get(pk=self.venta.pk)
+        self.assertEqual((venta.total, venta.comision_manicurista), (Decimal('60000.00'), Decimal('6000.00')))
+        self.assertEqual(Compra.objects.get(pk=self.compra.pk).total, Decimal('3500.00'))
+        abierta = Cita.objects.get(pk=self.abierta.pk)
+        self.assertEqual((abierta.precio_total, abierta.duracion_total), (Decimal('65000.00'), 105))
+        self.assertEqual(Cita.objects.get(pk=self.cerrada.pk).precio_total, Decimal('1.00'))
+        self.assertEqual(Insumo.objects.get(pk=self.gel.pk).cantidad, 7)
+        self.assertEqual(MovimientoInsumo.objects.get().cantidad, 7)
+
+        self.assertTrue(all(r['inconsistencias'] == 0 for r in conciliar().values()))
+
+    def test_consultas_no_dependen_del_volumen(self):
+        for _ in range(30):
+            self._compra()
+        with self.assertNumQueries(1):
+            conciliar(['compras'])
+
+    def test_comando(self):
+        self._desfasar()
+        salida = StringIO()
+
+        call_command('conciliar_datos', '--solo', 'compras,stock', '--corregir', stdout=salida)
+
+        self.assertIn("compras: 1 inconsistencias, 1 corregidas", salida.getvalue())
+        self.assertIn("stock: 1 inconsistencias, 1 corregidas", salida.getvalue())
+        self.assertEqual(VentaServicio.objects.get(pk=self.venta.pk).total, Decimal('1.00'))
+
+    def test_endpoint_solo_para_administradores(self):
+        self.assertIn(self.client.get('/api/conciliacion/').status_code, (401, 403))
+
+        admin = Usuario.objects.create_superuser(
+            correo_electronico="admin@spa.com", password="Clave123*", nombre="Admin",
+            rol=Rol.objects.create(nombre="Administrador")
+        )
+        self.client.force_authenticate(admin)
+        self._desfasar()
+
+        self.assertEqual(self.client.get('/api/conciliacion/?verificaciones=ventas').data['ventas']['inconsistencias'], 1)
+        self.assertEqual(self.client.post('/api/conciliacion/', {'verificaciones': ['otra']}, format='json').status_code, 400)
+
+        response = self.client.post('/api/conciliacion/', {'verificaciones': ['ventas'], 'corregir': True}, format='json')
+        self.assertEqual(response.data['ventas']['corregidos'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
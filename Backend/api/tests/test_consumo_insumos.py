@@ -0,0 +1,132 @@
+import unittest
+from datetime import date, time, timedelta
+from unittest import mock
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from api.categoriainsumos.models import CategoriaInsumo
+from api.citas.consumo import registrar_consumo_citas
+from api.citas.models import Cita
+from api.clientes.models import Cliente
+from api.insumos.models import Insumo, MovimientoInsumo
+from api.insumos.stock import StockInsuficienteError
+from api.manicuristas.models import Manicurista
+from api.servicios.models import Servicio, ServicioHasInsumo
+from api.utils.conciliacion import conciliar
+
+
+class ConsumoInsumosTest(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        categoria = CategoriaInsumo.objects.create(nombre="Consumibles")
+        self.gel = Insumo.objects.create(nombre="Gel", cantidad=20, categoria_insumo=categoria)
+        self.acetona = Insumo.objects.create(nombre="Acetona", cantidad=20, categoria_insumo=categoria)
+        self.lima = Insumo.objects.create(nombre="Lima", cantidad=3, categoria_insumo=categoria)
+
+        self.manicure = Servicio.objects.create(nombre="Manicure gel", precio=40000, descripcion="Manicure con gel", duracion=60)
+        self.pedicure = Servicio.objects.create(nombre="Pedicure", precio=35000, descripcion="Pedicure clásico", duracion=45)
+        ServicioHasInsumo.objects.bulk_create([
+            ServicioHasInsumo(servicio=self.manicure, insumo=self.gel, cantidad=2),
+            ServicioHasInsumo(servicio=self.manicure, insumo=self.lima, cantidad=1),
+            ServicioHasInsumo(servicio=self.pedicure, insumo=self.acetona, cantidad=3),
+            ServicioHasInsumo(servicio=self.pedicure, insumo=self.lima, cantidad=1),
+        ])
+
+        self.cliente = Cliente.objects.create(
+            tipo_documento="CC", documento="1001", nombre="Laura Gómez",
+            celular="3001112233", correo_electronico="laura@mail.com", direccion="Calle 1"
+        )
+        self.manicurista = Manicurista.objects.create(nombre="Ana Pérez")
+
+    def _cita(self, hora, servicios, estado='en_proceso'):
+        cita = Cita.objects.create(
+            cliente=self.cliente,
+            manicurista=self.manicurista,
+            servicio=servicios[0],
+            fecha_cita=date.today() + timedelta(days=1),
+            hora_cita=hora,
+            estado=estado
+        )
+        cita.servicios.set(servicios)
+        return cita
+
+    def _cantidades(self):
+        return dict(Insumo.objects.values_list('nombre', 'cantidad'))
+
+    def test_finalizar_lote_descuenta_receta_agregada(self):
+        c1 = self._cita(time(10, 0), [self.manicure, self.pedicure])
+        c2 = self._cita(time(11, 0), [self.pedicure])
+        pendiente = self._cita(time(12, 0), [self.manicure], estado='pendiente')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                '/api/citas/finalizar_lote/',
+                {'citas': [c1.id, c2.id, pendiente.id]},
+                format='json'
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['no_finalizadas'], [pendiente.id])
+        self.assertEqual(self._cantidades(), {'Gel': 18, 'Acetona': 14, 'Lima': 0})
+        self.assertEqual(
+            MovimientoInsumo.objects.filter(tipo=MovimientoInsumo.TIPO_CONSUMO_SERVICIO).count(),
+            5  # c1: gel, lima, acetona | c2: acetona, lima
+        )
+
+    def test_fallo_de_venta_automatica_se_registra(self):
+        cita = self._cita(time(10, 0), [self.manicure])
+
+        with mock.patch('api.citas.views.CitaViewSet.crear_ventas_automaticas', side_effect=ValueError("sin caja")):
+            with self.assertLogs('api.citas.views', level='ERROR') as logs:
+                response = self.client.post('/api/citas/finalizar_lote/', {'citas': [cita.id]}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([c['id'] for c in response.data['finalizadas']], [cita.id])
+        self.assertIn(f"cita {cita.id}", logs.output[0])
+        self.assertIn("sin caja", logs.output[0])
+
+    def test_consumo_no_se_registra_dos_veces(self):
+        cita = self._cita(time(10, 0), [self.manicure])
+        registrar_consumo_citas([cita.id])
+        registrar_consumo_citas([cita.id])
+        self.assertEqual(self._cantidades()['Gel'], 18)
+
+    def test_stock_insuficiente_registra_consumo_parcial(self):
+        citas = [self._cita(time(10 + i, 0), [self.manicure]) for i in range(4)]
+        registrar_consumo_citas([c.id for c in citas])
+
+        self.assertEqual(self._cantidades()['Lima'], 0)
+        parciales = MovimientoInsumo.objects.filter(insumo=self.lima, motivo__startswith="Consumo parcial")
+        self.assertEqual(parciales.count(), 1)
+
+    def test_fallo_se_registra_y_la_conciliacion_lo_corrige(self):
+        cita = self._cita(time(10, 0), [self.manicure], estado='finalizada')
+        Cita.objects.filter(pk=cita.pk).update(fecha_finalizacion=timezone.now())
+        error = StockInsuficienteError([{'insumo_id': self.gel.id, 'nombre': 'Gel', 'disponible': 0, 'solicitado': 2}])
+
+        with mock.patch('api.citas.consumo.registrar_movimientos', side_effect=error):
+            with self.assertLogs('api.citas.consumo', level='ERROR') as logs:
+                self.assertEqual(registrar_consumo_citas([cita.id]), [])
+        self.assertIn(str(cita.id), logs.output[0])
+
+        resultado = conciliar(['consumos'])['consumos']
+        self.assertEqual((resultado['inconsistencias'], resultado['muestra'][0]['id']), (1, cita.id))
+
+        self.assertEqual(conciliar(['consumos'], corregir=True)['consumos']['corregidos'], 1)
+        self.assertEqual(self._cantidades()['Gel'], 18)
+        self.assertEqual(conciliar(['consumos'])['consumos']['inconsistencias'], 0)
+
+    def test_reporte_de_consumo_por_periodo(self):
+        cita = self._cita(time(10, 0), [self.manicure, self.pedicure])
+        registrar_consumo_citas([cita.id])
+
+        hoy = date.today().isoformat()
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/api/insumos/consumo/?fecha_inicio={hoy}&fecha_fin={hoy}')
+        totales = {fila['insumo__nombre']: fila['total_consumido'] for fila in response.data['insumos']}
+        self.assertEqual(totales, {'Gel': 2, 'Acetona': 3, 'Lima': 2})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import unittest
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+from django.core import mail
+from django.core.mail import get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from api.clientes.models import Cliente
+from api.correos import bandeja
+from api.correos.bandeja import encolar_correo, enviar_pendientes, reencolar_fallidos
+from api.correos.models import CorreoSaliente
+
+
+class BackendCaido(BaseEmailBackend):
+    """Servidor SMTP que rechaza todo, para probar reintentos"""
+
+    def send_messages(self, email_messages):
+        raise ConnectionError("SMTP no disponible")
+
+
+class BandejaCorreosTest(TestCase):
+
+    def _vencer(self):
+        CorreoSaliente.objects.update(proximo_intento=timezone.now() - timedelta(seconds=1))
+
+    def test_la_peticion_solo_encola(self):
+        cliente = Cliente.objects.create(
+            tipo_documento="CC", documento="1001", nombre="Laura Gómez",
+            celular="3001112233", correo_electronico="laura@mail.com", direccion="Calle 1"
+        )
+
+        response = APIClient().post(f'/api/clientes/{cliente.id}/resetear_password/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(mail.outbox), 0)
+        correo = CorreoSaliente.objects.get()
+        self.assertEqual(correo.destinatarios, ['laura@mail.com'])
+        self.assertIn('<html>', correo.cuerpo_html)
+
+    def test_lote_por_una_conexion(self):
+        for i in range(3):
+            encolar_correo(f"Aviso {i}", "Texto", [f"c{i}@mail.com"], html="<p>Texto</p>")
+
+        with mock.patch.object(bandeja, 'get_connection', wraps=get_connection) as conexion:
+            resumen = enviar_pendientes()
+
+        self.assertEqual(conexion.call_count, 1)
+        self.assertEqual(resumen, {'enviados': 3, 'reintentos': 0, 'fallidos': 0})
+        self.assertEqual([m.subject for m in mail.outbox], ['Aviso 0', 'Aviso 1', 'Aviso 2'])
+        self.assertEqual(mail.outbox[0].alternatives[0][1], 'text/html')
+        self.assertEqual(CorreoSaliente.objects.filter(estado=CorreoSaliente.ESTADO_ENVIADO).count(), 3)
+        # Ya enviados: no se vuelven a tomar
+        self.assertEqual(enviar_pendientes(), {'enviados': 0, 'reintentos': 0, 'fallidos': 0})
+
+    @override_settings(EMAIL_BACKEND='api.tests.test_correos.BackendCaido')
+    def test_reintentos_con_espera_y_fallidos(self):
+        encolar_correo("Aviso", "Texto", ["laura@mail.com"])
+
+        enviar_pendientes()
+        correo = CorreoSaliente.objects.get()
+        self.assertEqual((correo.estado, correo.intentos), (CorreoSaliente.ESTADO_PENDIENTE, 1))
+        self.assertGreater(correo.proximo_intento, timezone.now() + timedelta(seconds=bandeja.ESPERA_BASE - 5))
+        self.assertIn("SMTP no disponible", correo.ultimo_error)
+        # Antes de que venza la espera no se reintenta
+        self.assertEqual(enviar_pendientes()['reintentos'], 0)
+
+        for _ in range(bandeja.MAX_INTENTOS - 1):
+            self._vencer()
+            enviar_pendientes()
+        correo.refresh_from_db()
+        self.assertEqual((correo.estado, correo.intentos), (CorreoSaliente.ESTADO_FALLIDO, bandeja.MAX_INTENTOS))
+
+        with override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend'):
+            self.assertEqual(reencolar_fallidos(), 1)
+            call_command('enviar_correos', stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 1)
+        correo.refresh_from_db()
+        self.assertEqual(correo.estado, CorreoSaliente.ESTADO_ENVIADO)
+
+    def test_reserva_vencida_se_retoma(self):
+        correo = encolar_correo("Aviso", "Texto", ["laura@mail.com"])
+        # Un proceso lo tomó y murió antes de registrar el resultado
+        CorreoSaliente.objects.filter(pk=correo.pk).update(
+            estado=CorreoSaliente.ESTADO_ENVIANDO, proximo_intento=timezone.now() + timedelta(minutes=5)
+        )
+        self.assertEqual(enviar_pendientes()['enviados'], 0)
+
+        self._vencer()
+        self.assertEqual(enviar_pendientes()['enviados'], 1)
+
+    def test_sin_destinatarios_no_encola(self):
+        self.assertIsNone(encolar_correo("Aviso", "Texto", [None, '']))
+        self.assertFalse(CorreoSaliente.objects.exists())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+from decimal import Decimal
+from django.test import TestCase
+from rest_framework.test import APIClient
+from api.categoriainsumos.models import CategoriaInsumo
+from api.compras.serializers import CompraCreateSerializer
+from api.insumos.models import Insumo, InsumoHasProveedor
+from api.proveedores.models import Proveedor
+
+
+class CostosInsumosTest(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.esmaltes = CategoriaInsumo.objects.create(nombre="Esmaltes")
+        self.limpieza = CategoriaInsumo.objects.create(nombre="Limpieza")
+        self.gel = Insumo.objects.create(nombre="Gel", cantidad=0, categoria_insumo=self.esmaltes)
+        self.acetona = Insumo.objects.create(nombre="Acetona", cantidad=0, categoria_insumo=self.limpieza)
+        self.nails = self._proveedor("Distribuidora Nails", "900123456")
+        self.belleza = self._proveedor("Belleza Total", "900654321")
+
+    def _proveedor(self, nombre, nit):
+        return Proveedor.objects.create(
+            tipo_persona='juridica', nombre_empresa=nombre, nit=nit, nombre="Contacto",
+            direccion="Calle 10", correo_electronico=f"{nit}@mail.com", celular="3001234567"
+        )
+
+    def _comprar(self, proveedor, detalles, instance=None):
+        serializer = CompraCreateSerializer(instance, data={
+            'proveedor': proveedor.id,
+            'estado': 'finalizada',
+            'detalles': detalles
+        })
+        serializer.is_valid(raise_exception=True)
+        return serializer.save()
+
+    def _costo(self, insumo):
+        return Insumo.objects.get(pk=insumo.pk).costo_promedio
+
+    def test_costo_promedio_ponderado_incremental(self):
+        self._comprar(self.nails, [{'insumo_id': self.gel.id, 'cantidad': 10, 'precio_unitario': 1000}])
+        self.assertEqual(self._costo(self.gel), Decimal('1000'))
+
+        # (10 x 1000 + 5 x 1600) / 15 = 1200
+        compra = self._comprar(self.belleza, [{'insumo_id': self.gel.id, 'cantidad': 5, 'precio_unitario': 1600}])
+        self.assertEqual(self._costo(self.gel), Decimal('1200'))
+
+        # Anular la segunda compra devuelve el costo al valor anterior
+        response = self.client.patch(
+            f'/api/compras/{compra.id}/anular/',
+            {'motivo_anulacion': 'Compra duplicada por error'},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self._costo(self.gel), Decimal('1000'))
+        precio = InsumoHasProveedor.objects.get(insumo=self.gel, proveedor=self.belleza)
+        self.assertEqual((precio.cantidad_comprada, precio.numero_compras), (0, 0))
+
+    def test_editar_compra_finalizada_ajusta_costo(self):
+        compra = self._comprar(self.nails, [{'insumo_id': self.gel.id, 'cantidad': 4, 'precio_unitario': 1000}])
+        self._comprar(self.nails, [{'insumo_id': self.gel.id, 'cantidad': 4, 'precio_unitario': 2000}], instance=compra)
+
+        self.assertEqual(self._costo(self.gel), Decimal('2000'))
+        precio = InsumoHasProveedor.objects.get(insumo=self.gel, proveedor=self.nails)
+        self.assertEqual(precio.precio_promedio, Decimal('2000.00'))
+        self.assertEqual(precio.numero_compras, 1)
+
+    def test_proveedor_mas_barato_primero(self):
+        self._comprar(self.nails, [{'insumo_id': self.gel.id, 'cantidad': 3, 'precio_unitario': 1500}])
+        self._comprar(self.belleza, [{'insumo_id': self.gel.id, 'cantidad': 3, 'precio_unitario': 1100}])
+
+        response = self.client.get(f'/api/insumos/{self.gel.id}/costos/')
+        self.assertEqual(
+            [p['proveedor_nombre'] for p in response.data['proveedores']],
+            ["Belleza Total", "Distribuidora Nails"]
+        )
+
+        response = self.client.get(f'/api/proveedores/{self.nails.id}/precios/')
+        self.assertEqual([p['insumo_nombre'] for p in response.data], ["Gel"])
+
+    def test_valorizacion_por_categoria(self):
+        self._comprar(self.nails, [
+            {'insumo_id': self.gel.id, 'cantidad': 3, 'precio_unitario': 1000},
+            {'insumo_id': self.acetona.id, 'cantidad': 2, 'precio_unitario': 750},
+        ])
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/insumos/valorizacion/')
+        valores = {c['categoria_insumo__nombre']: c['valor'] for c in response.data['categorias']}
+        self.assertEqual(valores, {'Esmaltes': Decimal('3000'), 'Limpieza': Decimal('1500')})
+        self.assertEqual(response.data['valor_total'], Decimal('4500'))
+
+
+if __name__ == '__main__':
+    unittest.main()
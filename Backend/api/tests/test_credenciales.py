@@ -0,0 +1,116 @@
+import unittest
+from io import StringIO
+from unittest import mock
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.test import APIClient
+from api.clientes.models import Cliente
+from api.clientes.serializers import RegistroClienteSerializer
+from api.manicuristas.models import Manicurista
+from api.manicuristas.serializers import ManicuristaSerializer
+from api.roles.models import Rol
+from api.usuarios.models import Usuario
+from api.usuarios.serializers import UsuarioSerializer
+
+
+class HashUnicoTest(TestCase):
+    """Cada operación con credenciales deriva un solo hash y lo comparte entre registros"""
+
+    def setUp(self):
+        self.rol = Rol.objects.create(nombre="Administrador")
+        Rol.objects.create(nombre="Cliente")
+        Rol.objects.create(nombre="Manicurista")
+
+    def _hashes(self):
+        return mock.patch.object(
+            PBKDF2PasswordHasher, 'encode', autospec=True, side_effect=PBKDF2PasswordHasher.encode
+        )
+
+    def _guardar(self, serializer_class, datos):
+        serializer = serializer_class(data=datos)
+        serializer.is_valid(raise_exception=True)
+        return serializer.save()
+
+    def test_registro_cliente(self):
+        with self._hashes() as encode:
+            cliente = self._guardar(RegistroClienteSerializer, {
+                'nombre': 'Laura Gómez', 'tipo_documento': 'CC', 'documento': '1001001', 'celular': '3001112233',
+                'correo_electronico': 'laura@mail.com', 'direccion': 'Calle 1', 'genero': 'F'
+            })['cliente']
+
+        self.assertEqual(encode.call_count, 1)
+        self.assertEqual(cliente.usuario.password, cliente.contraseña_temporal)
+        self.assertTrue(cliente.usuario.check_password(cliente.contraseña_generada))
+
+    def test_registro_manicurista_y_usuario(self):
+        with self._hashes() as encode:
+            manicurista = self._guardar(ManicuristaSerializer, {
+                'nombre': 'Bea Ríos', 'tipo_documento': 'CC', 'numero_documento': '4567890', 'celular': '3001112234',
+                'correo': 'bea@mail.com', 'direccion': 'Calle 2', 'especialidad': 'Pedicure'
+            })
+        self.assertEqual(encode.call_count, 1)
+        self.assertTrue(manicurista.usuario.check_password(manicurista.contraseña_generada))
+
+        with self._hashes() as encode:
+            usuario = self._guardar(UsuarioSerializer, {
+                'nombre': 'Carolina', 'tipo_documento': 'CC', 'documento': '7890123', 'celular': '3001112235',
+                'correo_electronico': 'caro@mail.com', 'direccion': 'Calle 3', 'rol': self.rol.id
+            })
+        self.assertEqual(encode.call_count, 1)
+        self.assertTrue(usuario.check_password(usuario.contraseña_generada))
+        self.assertTrue(usuario.verificar_contraseña_temporal(usuario.contraseña_generada))
+
+    def test_cambio_de_contraseña(self):
+        usuario = Usuario.objects.create_user(
+            correo_electronico='ana@mail.com', password='Inicial1!', nombre='Ana', tipo_documento='CC',
+            documento='1002', celular='3001112236', rol=self.rol
+        )
+        cliente = Cliente.objects.create(
+            tipo_documento='CC', documento='1002', nombre='Ana', celular='3001112236',
+            correo_electronico='ana@mail.com', direccion='Calle 4', usuario=usuario
+        )
+
+        with self._hashes() as encode:
+            cliente.cambiar_contraseña('Nueva123!')
+        self.assertEqual(encode.call_count, 1)
+        usuario.refresh_from_db()
+        self.assertTrue(usuario.check_password('Nueva123!'))
+        self.assertTrue(cliente.verificar_contraseña_temporal('Nueva123!'))
+
+        with self._hashes() as encode:
+            usuario.cambiar_contraseña('Otra456!')
+        self.assertEqual(encode.call_count, 1)
+        self.assertTrue(usuario.check_password('Otra456!'))
+
+    def test_reset_comparte_el_hash_con_el_usuario(self):
+        manicurista = self._guardar(ManicuristaSerializer, {
+            'nombre': 'Bea Ríos', 'tipo_documento': 'CC', 'numero_documento': '4567890', 'celular': '3001112234',
+            'correo': 'bea@mail.com', 'direccion': 'Calle 2', 'especialidad': 'Pedicure'
+        })
+
+        with self._hashes() as encode:
+            response = APIClient().post(f'/api/manicuristas/{manicurista.id}/resetear_password/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(encode.call_count, 1)
+        manicurista.refresh_from_db()
+        self.assertEqual(manicurista.usuario.password, manicurista.contraseña_temporal)
+
+    def test_comando_de_medicion(self):
+        out = StringIO()
+        call_command('medir_credenciales', '--repeticiones', '1', stdout=out)
+
+        lineas = out.getvalue().splitlines()[1:]
+        self.assertEqual(
+            [linea.split(':')[0] for linea in lineas],
+            ['registro cliente', 'registro manicurista', 'registro usuario',
+             'cambio cliente', 'cambio manicurista', 'cambio usuario']
+        )
+        self.assertTrue(all(linea.endswith("1 hashes por operación") for linea in lineas))
+        self.assertFalse(Usuario.objects.exists())
+        self.assertFalse(Cliente.objects.exists())
+
+
+if __name__ == '__main__':
+    unittest.main()
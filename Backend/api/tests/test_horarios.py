@@ -0,0 +1,81 @@
+import unittest
+from datetime import date, time, timedelta
+from django.test import TestCase
+from rest_framework.test import APIClient
+from api.horarios import grillas
+from api.horarios.grillas import obtener_grilla
+from api.horarios.models import DiaFestivo, ExcepcionHorario, HorarioSemanal
+from api.manicuristas.models import Manicurista
+
+
+class GrillasHorarioTest(TestCase):
+
+    def setUp(self):
+        # El rollback de cada test no dispara señales: se limpia la caché de reglas a mano
+        grillas.invalidar()
+        self.addCleanup(grillas.invalidar)
+        self.client = APIClient()
+        self.ana = Manicurista.objects.create(nombre="Ana Pérez")
+        self.bea = Manicurista.objects.create(nombre="Bea Ríos")
+        hoy = date.today()
+        self.lunes = hoy + timedelta(days=7 - hoy.weekday())
+
+    def test_sin_reglas_usa_el_horario_base(self):
+        grilla = obtener_grilla(self.ana.id, self.lunes)
+
+        self.assertEqual(grilla.a_dict(), {'inicio': '10:00', 'fin': '20:00', 'intervalo_minutos': 30})
+        self.assertEqual(grilla.etiquetas[0], '10:00')
+        self.assertEqual(grilla.etiquetas[-1], '19:30')
+
+    def test_precedencia_de_reglas(self):
+        HorarioSemanal.objects.create(dia_semana=0, hora_inicio=time(9, 0), hora_fin=time(18, 0))
+        HorarioSemanal.objects.create(manicurista=self.ana, dia_semana=0, hora_inicio=time(14, 0), hora_fin=time(18, 0))
+        DiaFestivo.objects.create(fecha=self.lunes + timedelta(days=7), nombre="Festivo")
+        ExcepcionHorario.objects.create(
+            manicurista=self.ana, fecha=self.lunes + timedelta(days=7), hora_inicio=time(10, 0), hora_fin=time(12, 0)
+        )
+
+        # Medio tiempo de Ana sobre el horario general
+        self.assertEqual(obtener_grilla(self.ana.id, self.lunes).descripcion, '14:00 - 18:00')
+        self.assertEqual(obtener_grilla(self.bea.id, self.lunes).descripcion, '09:00 - 18:00')
+        # Festivo cerrado para todas salvo la excepción de Ana
+        self.assertFalse(obtener_grilla(self.bea.id, self.lunes + timedelta(days=7)).abierta)
+        self.assertEqual(obtener_grilla(self.ana.id, self.lunes + timedelta(days=7)).descripcion, '10:00 - 12:00')
+
+    def test_grilla_en_cache_e_invalidacion(self):
+        obtener_grilla(self.ana.id, self.lunes)
+
+        with self.assertNumQueries(0):
+            for dias in range(30):
+                obtener_grilla(self.ana.id, self.lunes + timedelta(days=dias))
+
+        HorarioSemanal.objects.create(dia_semana=0, hora_inicio=None, hora_fin=None)
+        self.assertFalse(obtener_grilla(self.ana.id, self.lunes).abierta)
+
+    def test_grillas_iguales_se_comparten(self):
+        self.assertIs(obtener_grilla(self.ana.id, self.lunes), obtener_grilla(self.bea.id, self.lunes))
+
+    def test_disponibilidad_respeta_la_plantilla(self):
+        HorarioSemanal.objects.create(
+            manicurista=self.ana, dia_semana=0, hora_inicio=time(14, 0), hora_fin=time(16, 0), intervalo_minutos=60
+        )
+
+        response = self.client.get('/api/citas/disponibilidad/', {'manicurista': self.ana.id, 'fecha': self.lunes.isoformat()})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['horarios_disponibles'], ['14:00', '15:00'])
+        self.assertEqual(response.data['horario_trabajo'], {'inicio': '14:00', 'fin': '16:00', 'intervalo_minutos': 60})
+
+    def test_rechaza_horario_general_duplicado(self):
+        HorarioSemanal.objects.create(dia_semana=2, hora_inicio=time(9, 0), hora_fin=time(18, 0))
+
+        response = self.client.post('/api/horarios/semanal/', {
+            'dia_semana': 2, 'hora_inicio': '10:00', 'hora_fin': '19:00'
+        }, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(HorarioSemanal.objects.count(), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
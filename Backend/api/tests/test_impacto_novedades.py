@@ -0,0 +1,258 @@
+import unittest
+from io import StringIO
+from datetime import date, time, timedelta
+from unittest import mock
+from django.core import mail
+from django.core.management import call_command
+from django.db import IntegrityError
+from django.test import TestCase
+from rest_framework.test import APIClient
+from api.citas.models import Cita
+from api.clientes.models import Cliente
+from api.correos.models import CorreoSaliente
+from api.horarios import grillas
+from api.horarios.grillas import obtener_grilla
+from api.horarios.models import ExcepcionHorario
+from api.manicuristas.models import Manicurista
+from api.novedades import impacto
+from api.novedades.models import Novedad, NovedadHasCita
+from api.servicios.models import Servicio
+
+
+class AgendaMixin:
+
+    def setUp(self):
+        self.client = APIClient()
+        self.fecha = date.today() + timedelta(days=2)
+        self.ana = Manicurista.objects.create(nombre="Ana Pérez")
+        self.bea = Manicurista.objects.create(nombre="Bea Ríos")
+        self.manicure = Servicio.objects.create(nombre="Manicure", precio=30000, descripcion="Manicure clásico", duracion=90)
+        self.cliente = Cliente.objects.create(
+            tipo_documento="CC", documento="1001", nombre="Laura Gómez",
+            celular="3001112233", correo_electronico="laura@mail.com", direccion="Calle 1"
+        )
+        # Las reglas de horario se cargan una vez por proceso, no por petición
+        obtener_grilla(None, self.fecha)
+
+    def _cita(self, manicurista, hora, estado='pendiente'):
+        return Cita.objects.create(
+            cliente=self.cliente, manicurista=manicurista, servicio=self.manicure,
+            fecha_cita=self.fecha, hora_cita=hora, estado=estado
+        )
+
+    def _ausencia(self, inicio, fin, manicurista=None):
+        return Novedad.objects.create(
+            manicurista=manicurista or self.ana, fecha=self.fecha, estado='ausente',
+            tipo_ausencia='por_horas', hora_inicio_ausencia=inicio, hora_fin_ausencia=fin
+        )
+
+    def _estado(self, cita):
+        cita.refresh_from_db()
+        return cita.estado, cita.manicurista_id
+
+
+class ImpactoNovedadesTest(AgendaMixin, TestCase):
+
+    def test_solapamiento_considera_la_duracion(self):
+        antes = self._cita(self.ana, time(10, 0))      # 10:00-11:30, entra en la ausencia
+        despues = self._cita(self.ana, time(13, 0))    # empieza cuando la ausencia terminó
+        otra = self._cita(self.bea, time(11, 0))
+        novedad = self._ausencia(time(11, 0), time(13, 0))
+
+        with self.assertNumQueries(1):
+            afectadas = impacto.citas_afectadas([novedad])
+
+        self.assertEqual(afectadas, {novedad.id: [antes]})
+        self.assertNotIn(despues, afectadas[novedad.id])
+        self.assertNotIn(otra, afectadas[novedad.id])
+
+    def test_reasigna_a_la_libre_y_cancela_sin_reemplazo(self):
+        libre = self._cita(self.ana, time(10, 0))
+        sin_reemplazo = self._cita(self.ana, time(14, 0))
+        self._cita(self.bea, time(14, 30))  # Bea ocupada a esa hora
+        novedad = Novedad.objects.create(manicurista=self.ana, fecha=self.fecha, estado='ausente', tipo_ausencia='completa')
+
+        impactos = impacto.aplicar([novedad])
+
+        self.assertEqual(len(impactos), 2)
+        self.assertEqual(self._estado(libre), ('pendiente', self.bea.id))
+        self.assertEqual(self._estado(sin_reemplazo), ('cancelada', self.ana.id))
+
+    def test_cita_cancelada_ocupa_la_hora(self):
+        # La restricción única (manicurista, fecha, hora) incluye las citas canceladas
+        self._cita(self.bea, time(10, 0), estado='cancelada')
+        cita = self._cita(self.ana, time(10, 0))
+
+        response = self.client.post('/api/novedades/', {
+            'manicurista': self.ana.id, 'fecha': self.fecha.isoformat(), 'estado': 'ausente',
+            'tipo_ausencia': 'completa'
+        }, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self._estado(cita), ('cancelada', self.ana.id))
+
+    def test_reemplazo_respeta_su_grilla(self):
+        manana = self._cita(self.ana, time(10, 0))
+        tarde = self._cita(self.ana, time(16, 0))
+        # Bea solo atiende de 14:00 a 18:00 ese día (las reglas quedan en el proceso: se descartan al terminar)
+        self.addCleanup(grillas.invalidar)
+        ExcepcionHorario.objects.create(manicurista=self.bea, fecha=self.fecha, hora_inicio=time(14, 0), hora_fin=time(18, 0))
+        novedad = Novedad.objects.create(manicurista=self.ana, fecha=self.fecha, estado='ausente', tipo_ausencia='completa')
+
+        impacto.aplicar([novedad])
+
+        self.assertEqual(self._estado(manana), ('cancelada', self.ana.id))
+        self.assertEqual(self._estado(tarde), ('pendiente', self.bea.id))
+
+    def test_error_al_aplicar_no_deja_la_novedad(self):
+        self._cita(self.ana, time(10, 0))
+
+        with mock.patch.object(impacto, 'aplicar', side_effect=IntegrityError("UNIQUE constraint failed")):
+            response = self.client.post('/api/novedades/', {
+                'manicurista': self.ana.id, 'fecha': self.fecha.isoformat(), 'estado': 'ausente',
+                'tipo_ausencia': 'completa'
+            }, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Novedad.objects.exists())
+
+    def test_anular_revierte_exactamente_lo_aplicado(self):
+        reasignada = self._cita(self.ana, time(10, 0))
+        cancelada = self._cita(self.ana, time(14, 0), estado='en_proceso')
+        self._cita(self.bea, time(14, 0))
+        novedad = Novedad.objects.create(manicurista=self.ana, fecha=self.fecha, estado='ausente', tipo_ausencia='completa')
+        impacto.aplicar([novedad])
+
+        response = self.client.patch(f'/api/novedades/{novedad.id}/anular/', {'motivo_anulacion': 'Se recuperó'}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['citas_restauradas'], 2)
+        self.assertEqual(self._estado(reasignada), ('pendiente', self.ana.id))
+        self.assertEqual(self._estado(cancelada), ('en_proceso', self.ana.id))
+        self.assertFalse(novedad.impactos.filter(revertido=False).exists())
+
+    def test_no_toca_citas_modificadas_despues(self):
+        cita = self._cita(self.ana, time(10, 0))
+        novedad = Novedad.objects.create(manicurista=self.ana, fecha=self.fecha, estado='ausente', tipo_ausencia='completa')
+        impacto.aplicar([novedad], reasignar=False)
+        # Recepción la reactivó a mano con otra manicurista
+        Cita.objects.filter(pk=cita.pk).update(estado='pendiente', manicurista=self.bea)
+
+        self.assertEqual(impacto.revertir(novedad), 0)
+        self.assertEqual(self._estado(cita), ('pendiente', self.bea.id))
+
+    def test_crear_desde_api_y_notificar_en_lote(self):
+        self._cita(self.ana, time(10, 0))
+        self._cita(self.ana, time(12, 0))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/novedades/', {
+                'manicurista': self.ana.id, 'fecha': self.fecha.isoformat(), 'estado': 'ausente',
+                'tipo_ausencia': 'completa', 'reasignar': False
+            }, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Cita.objects.filter(estado='cancelada').count(), 2)
+        self.assertEqual(CorreoSaliente.objects.count(), 2)
+        self.assertEqual(len(mail.outbox), 0)  # nada se envía durante la petición
+
+        call_command('enviar_correos', stdout=StringIO())
+
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(mail.outbox[0].subject, 'Cancelación de tu cita en Spa')
+        self.assertFalse(NovedadHasCita.objects.filter(notificacion_pendiente=True).exists())
+
+    def test_simular_no_guarda_nada(self):
+        cita = self._cita(self.ana, time(10, 0))
+
+        response = self.client.post('/api/novedades/simular_impacto/', {
+            'manicurista': self.ana.id, 'fecha': self.fecha.isoformat(), 'estado': 'ausente',
+            'tipo_ausencia': 'completa'
+        }, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(p['cita'], p['accion'], p['manicurista_nueva']) for p in response.data],
+            [(cita.id, 'reasignada', self.bea.id)]
+        )
+        self.assertFalse(Novedad.objects.exists())
+        self.assertEqual(self._estado(cita), ('pendiente', self.ana.id))
+
+
+class NovedadMasivaTest(AgendaMixin, TestCase):
+
+    def _registrar(self, manicuristas, dias, **extra):
+        return self.client.post('/api/novedades/registro_masivo/', {
+            'manicuristas': [m.id for m in manicuristas],
+            'fecha_inicio': self.fecha.isoformat(),
+            'fecha_fin': (self.fecha + timedelta(days=dias - 1)).isoformat(),
+            'estado': 'ausente', 'tipo_ausencia': 'completa', 'motivo': 'Capacitación',
+            **extra
+        }, format='json')
+
+    def test_registra_pares_y_reporta_conflictos(self):
+        cami = Manicurista.objects.create(nombre="Camila Díaz")
+        existente = Novedad.objects.create(
+            manicurista=self.bea, fecha=self.fecha + timedelta(days=1), estado='ausente', tipo_ausencia='completa'
+        )
+        reasignable = self._cita(self.ana, time(10, 0))
+        Cita.objects.filter(pk=reasignable.pk).update(fecha_cita=self.fecha)
+
+        response = self._registrar([self.ana, self.bea], 3)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['creadas'], 5)
+        self.assertEqual(
+            [(c['manicurista'], c['fecha']) for c in response.data['conflictos']],
+            [(self.bea.id, existente.fecha)]
+        )
+        self.assertEqual(Novedad.objects.filter(motivo='Capacitación').count(), 5)
+        self.assertEqual(response.data['citas_reasignadas'], 1)
+        self.assertEqual(self._estado(reasignable), ('pendiente', cami.id))
+
+    def test_consultas_constantes_por_lote(self):
+        for i in range(4):
+            Manicurista.objects.create(nombre=f"Manicurista {i}")
+        manicuristas = list(Manicurista.objects.all())
+
+        # manicuristas, duplicados, insert, relectura, citas (+ savepoints)
+        with self.assertNumQueries(9):
+            self._registrar(manicuristas[:2], 2)
+        Novedad.objects.all().delete()
+        with self.assertNumQueries(9):
+            self._registrar(manicuristas, 10)
+
+    def test_todo_en_conflicto(self):
+        self._registrar([self.ana], 2)
+        response = self._registrar([self.ana], 2)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(len(response.data['conflictos']), 2)
+
+    def test_valida_cada_par_con_su_jornada(self):
+        # Bea no atiende el segundo día: ese par queda en conflicto y el resto se registra
+        self.addCleanup(grillas.invalidar)
+        sin_jornada = self.fecha + timedelta(days=1)
+        ExcepcionHorario.objects.create(manicurista=self.bea, fecha=sin_jornada)
+        tarde = self.fecha + timedelta(days=2)
+        ExcepcionHorario.objects.create(manicurista=self.bea, fecha=tarde, hora_inicio=time(14, 0), hora_fin=time(18, 0))
+
+        response = self._registrar([self.ana, self.bea], 3)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['creadas'], 5)
+        self.assertEqual(
+            [(c['manicurista'], c['fecha']) for c in response.data['conflictos']],
+            [(self.bea.id, sin_jornada)]
+        )
+        novedad = Novedad.objects.get(manicurista=self.bea, fecha=tarde)
+        self.assertEqual((novedad.hora_inicio_ausencia, novedad.hora_fin_ausencia), (time(14, 0), time(18, 0)))
+
+    def test_valida_el_horario_una_vez(self):
+        response = self._registrar([self.ana], 2, tipo_ausencia='por_horas', hora_inicio_ausencia='15:00', hora_fin_ausencia='12:00')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Novedad.objects.exists())
+
+
+if __name__ == '__main__':
+    unittest.main()
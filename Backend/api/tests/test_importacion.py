@@ -0,0 +1,193 @@
+import json
+import tempfile
+import unittest
+from io import BytesIO, StringIO
+from unittest import mock
+from django.contrib.auth.hashers import check_password
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from api.busqueda.indice import buscar
+from api.clientes import importacion
+from api.clientes.importacion import importar_clientes, leer_filas
+from api.clientes.models import Cliente
+from api.codigorecuperacion.models import CodigoRecuperacion
+from api.correos.models import CorreoSaliente
+from api.roles.models import Rol
+from api.usuarios.models import Usuario
+
+ENCABEZADO = "nombre,tipo_documento,documento,celular,correo_electronico,direccion,genero,password\n"
+
+
+def fila_csv(i, password=''):
+    return f"Cliente {i},CC,{9000 + i},300000{i:04d},c{i}@mail.com,Calle {i},F,{password}\n"
+
+
+def leer_csv(texto):
+    return leer_filas(BytesIO(texto.encode('utf-8')), 'csv')
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class ImportacionClientesTest(TestCase):
+
+    def test_solo_se_hashean_las_contraseñas_del_archivo(self):
+        with mock.patch.object(importacion._Importador, '_hashes', autospec=True, side_effect=importacion._Importador._hashes) as hashes:
+            resultado = importar_clientes(leer_csv(ENCABEZADO + fila_csv(1) + fila_csv(2, password='Secreta123')))
+
+        self.assertEqual((resultado.procesadas, resultado.creados, resultado.errores), (2, 2, []))
+        self.assertEqual(hashes.call_args.args[1], ['Secreta123'])
+        sin_password, con_password = Cliente.objects.select_related('usuario').order_by('documento')
+        self.assertEqual(sin_password.usuario.rol.nombre.lower(), 'cliente')
+        self.assertFalse(sin_password.usuario.has_usable_password())
+        self.assertTrue(sin_password.debe_cambiar_contraseña)
+        self.assertFalse(con_password.debe_cambiar_contraseña)
+        self.assertEqual(con_password.usuario.password, con_password.contraseña_temporal)
+        self.assertTrue(check_password('Secreta123', con_password.usuario.password))
+        # Solo quien no trae contraseña recibe un código de activación, y en el correo
+        codigo = CodigoRecuperacion.objects.get().codigo
+        self.assertEqual(CodigoRecuperacion.objects.get().usuario_id, sin_password.usuario_id)
+        correo = CorreoSaliente.objects.get()
+        self.assertEqual(correo.destinatarios, ['c1@mail.com'])
+        self.assertIn(codigo, correo.cuerpo)
+        # bulk_create no dispara señales: los clientes se indexan explícitamente
+        self.assertEqual(buscar('cliente', 'cliente'), [sin_password.id, con_password.id])
+
+    def test_activacion_con_el_codigo(self):
+        importar_clientes(leer_csv(ENCABEZADO + fila_csv(1)))
+        cliente = Cliente.objects.get()
+        client = APIClient()
+        # Sin contraseña utilizable no hay forma de iniciar sesión hasta activarla
+        self.assertEqual(
+            client.post('/api/clientes/login/', {'documento': '9001', 'contraseña': 'cualquiera'}, format='json').status_code, 401
+        )
+
+        response = client.post('/api/codigo-recuperacion/confirmar-codigo/', {
+            'correo_electronico': 'c1@mail.com', 'codigo': CodigoRecuperacion.objects.get().codigo,
+            'nueva_password': 'Nueva.Clave123',
+        }, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(CodigoRecuperacion.objects.exists())
+        response = client.post('/api/clientes/login/', {'documento': cliente.documento, 'contraseña': 'Nueva.Clave123'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.data['debe_cambiar_contraseña'])
+        cliente.usuario.refresh_from_db()
+        self.assertTrue(cliente.usuario.check_password('Nueva.Clave123'))
+
+    def test_errores_por_fila(self):
+        Cliente.objects.create(
+            tipo_documento="CC", documento="9001", nombre="Existente", celular="3001112233",
+            correo_electronico="otro@mail.com", direccion="Calle 1"
+        )
+        Usuario.objects.create_user(
+            correo_electronico="c2@mail.com", documento="5555", nombre="Usuario", tipo_documento="CC",
+            celular="3001112244", rol=Rol.objects.create(nombre="Cliente")
+        )
+        texto = (
+            ENCABEZADO + fila_csv(1) + fila_csv(2) + fila_csv(3) + fila_csv(3)
+            + "Sin documento,CC,,3001112255,c9@mail.com,Calle,F,\n"
+        )
+
+        resultado = importar_clientes(leer_csv(texto), enviar_correos=False)
+
+        self.assertEqual((resultado.procesadas, resultado.creados), (5, 1))
+        errores = {e['fila']: e['errores'] for e in resultado.errores}
+        self.assertIn("cliente", errores[1]['documento'][0])
+        self.assertIn("correo", errores[2]['correo_electronico'][0])
+        self.assertEqual(errores[4]['documento'], ["Documento repetido en el archivo."])
+        self.assertIn('documento', errores[5])
+        self.assertFalse(CorreoSaliente.objects.exists())
+
+    def test_consultas_por_lote_no_por_fila(self):
+        def consultas(n):
+            texto = ENCABEZADO + ''.join(fila_csv(i) for i in range(n, 2 * n))
+            with CaptureQueriesContext(connection) as contexto:
+                importar_clientes(leer_csv(texto))
+            return len(contexto.captured_queries)
+
+        consultas(2)  # el rol Cliente ya queda creado
+        self.assertEqual(consultas(5), consultas(40))
+
+    def test_jsonl_y_lotes(self):
+        lineas = [json.dumps({
+            'nombre': f"Cliente {i}", 'tipo_documento': 'CC', 'documento': str(7000 + i), 'celular': '3001112233',
+            'correo_electronico': f"j{i}@mail.com", 'direccion': 'Calle', 'genero': 'M', 'estado': False,
+        }) for i in range(5)]
+        archivo = BytesIO(('\n'.join(lineas[:3]) + '\n{no es json\n\n' + '\n'.join(lineas[3:])).encode('utf-8'))
+
+        resultado = importar_clientes(leer_filas(archivo, 'jsonl'), tamano_lote=2)
+
+        self.assertEqual((resultado.procesadas, resultado.creados), (6, 5))
+        self.assertEqual(resultado.errores[0]['fila'], 4)
+        self.assertFalse(Cliente.objects.filter(estado=True).exists())
+
+    def test_pool_de_procesos(self):
+        with mock.patch.object(importacion, 'MIN_PARA_POOL', 1):
+            resultado = importar_clientes(
+                leer_csv(ENCABEZADO + fila_csv(1, password='Clave1234') + fila_csv(2, password='Clave5678')), procesos=2
+            )
+        self.assertEqual(resultado.creados, 2)
+        uno, dos = Cliente.objects.select_related('usuario').order_by('documento')
+        self.assertTrue(uno.usuario.check_password('Clave1234'))
+        self.assertTrue(dos.usuario.check_password('Clave5678'))
+
+    def test_conflicto_al_guardar_solo_marca_sus_filas(self):
+        # Un registro concurrente que la validación por lote no alcanzó a ver
+        importar_clientes(leer_csv(ENCABEZADO + fila_csv(2)))
+        with mock.patch.object(importacion._Importador, '_unicas', lambda self, validas: validas):
+            resultado = importar_clientes(leer_csv(ENCABEZADO + fila_csv(1) + fila_csv(2) + fila_csv(3)))
+
+        self.assertEqual(resultado.creados, 2)
+        self.assertEqual([e['fila'] for e in resultado.errores], [2])
+        self.assertEqual(Cliente.objects.count(), 3)
+        self.assertEqual(Usuario.objects.filter(documento__in=['9001', '9002', '9003']).count(), 3)
+
+    def test_endpoint_y_comando(self):
+        client = APIClient()
+        archivo = SimpleUploadedFile("clientes.csv", (ENCABEZADO + fila_csv(1)).encode('utf-8'))
+        response = client.post('/api/clientes/importar/', {'archivo': archivo}, format='multipart')
+        self.assertIn(response.status_code, (401, 403))
+
+        client.force_authenticate(Usuario.objects.create_superuser(
+            correo_electronico="admin@spa.com", password="Clave123*", nombre="Admin",
+            rol=Rol.objects.create(nombre="Administrador")
+        ))
+        archivo = SimpleUploadedFile("clientes.csv", (ENCABEZADO + fila_csv(1)).encode('utf-8'))
+        response = client.post('/api/clientes/importar/', {'archivo': archivo}, format='multipart')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'procesadas': 1, 'creados': 1, 'errores': []})
+
+        archivo = SimpleUploadedFile("clientes.txt", b"x")
+        response = client.post('/api/clientes/importar/', {'archivo': archivo}, format='multipart')
+        self.assertEqual(response.status_code, 400)
+
+        archivo = SimpleUploadedFile("clientes.csv", (ENCABEZADO + fila_csv(2) + fila_csv(3)).encode('utf-8'))
+        with mock.patch('api.clientes.views.MAX_FILAS_IMPORTACION', 1):
+            response = client.post('/api/clientes/importar/', {'archivo': archivo}, format='multipart')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Cliente.objects.filter(documento='9002').exists())
+
+        # El límite de contraseñas cuenta solo las filas que traen una
+        texto = ENCABEZADO + fila_csv(5, password='Clave1234') + fila_csv(6, password='Clave5678') + fila_csv(7)
+        with mock.patch('api.clientes.views.MAX_CONTRASEÑAS_IMPORTACION', 1):
+            response = client.post('/api/clientes/importar/', {'archivo': SimpleUploadedFile("c.csv", texto.encode('utf-8'))}, format='multipart')
+            self.assertEqual(response.status_code, 400)
+            self.assertIn("contraseñas", response.data['error'])
+            texto = ENCABEZADO + fila_csv(5, password='Clave1234') + fila_csv(6) + fila_csv(7)
+            response = client.post('/api/clientes/importar/', {'archivo': SimpleUploadedFile("c.csv", texto.encode('utf-8'))}, format='multipart')
+            self.assertEqual(response.data['creados'], 3)
+
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', encoding='utf-8') as ruta:
+            ruta.write(ENCABEZADO + fila_csv(1) + fila_csv(2))
+            ruta.flush()
+            out = StringIO()
+            call_command('importar_clientes', ruta.name, '--procesos', '1', stdout=out)
+        self.assertIn("Fila 1: documento", out.getvalue())
+        self.assertIn("2 filas procesadas, 1 clientes creados, 1 con errores", out.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import threading
+import unittest
+from django.db import connection, connections
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from api.categoriainsumos.models import CategoriaInsumo
+from api.insumos.models import Insumo, MovimientoInsumo
+from api.insumos.stock import aplicar_movimientos, StockInsuficienteError
+
+
+class MovimientoInsumoTest(TestCase):
+
+    def setUp(self):
+        self.categoria = CategoriaInsumo.objects.create(nombre="Esmaltes")
+        self.gel = Insumo.objects.create(nombre="Gel", cantidad=10, categoria_insumo=self.categoria)
+        self.acetona = Insumo.objects.create(nombre="Acetona", cantidad=3, categoria_insumo=self.categoria)
+
+    def test_lote_aplica_todas_las_lineas_y_registra_historial(self):
+        aplicar_movimientos(
+            [(self.gel.id, 5), (self.acetona.id, 2), (self.gel.id, 1)],
+            MovimientoInsumo.TIPO_ENTRADA_COMPRA
+        )
+        self.gel.refresh_from_db()
+        self.acetona.refresh_from_db()
+        self.assertEqual(self.gel.cantidad, 16)
+        self.assertEqual(self.acetona.cantidad, 5)
+
+        # Las líneas del mismo insumo se agrupan en un solo movimiento
+        movimientos = MovimientoInsumo.objects.filter(insumo=self.gel)
+        self.assertEqual(movimientos.count(), 1)
+        self.assertEqual(movimientos.get().cantidad, 6)
+
+    def test_lote_usa_un_solo_update(self):
+        with CaptureQueriesContext(connection) as ctx:
+            aplicar_movimientos(
+                [(self.gel.id, -4), (self.acetona.id, 1)],
+                MovimientoInsumo.TIPO_AJUSTE
+            )
+        sentencias = [q['sql'].split()[0] for q in ctx.captured_queries]
+        self.assertEqual(sentencias.count('UPDATE'), 1)
+        self.assertEqual(sentencias.count('INSERT'), 1)
+
+    def test_stock_insuficiente_no_aplica_nada(self):
+        with self.assertRaises(StockInsuficienteError) as ctx:
+            aplicar_movimientos(
+                [(self.gel.id, -2), (self.acetona.id, -5)],
+                MovimientoInsumo.TIPO_AJUSTE
+            )
+        self.assertEqual([f['insumo_id'] for f in ctx.exception.faltantes], [self.acetona.id])
+
+        self.gel.refresh_from_db()
+        self.acetona.refresh_from_db()
+        self.assertEqual(self.gel.cantidad, 10)
+        self.assertEqual(self.acetona.cantidad, 3)
+        self.assertFalse(MovimientoInsumo.objects.exists())
+
+    def test_instancias_desactualizadas_no_pierden_actualizaciones(self):
+        # Dos "peticiones" leen el mismo insumo antes de que cualquiera escriba
+        copia_a = Insumo.objects.get(pk=self.gel.pk)
+        copia_b = Insumo.objects.get(pk=self.gel.pk)
+
+        aplicar_movimientos([(copia_a.id, 7)], MovimientoInsumo.TIPO_ENTRADA_COMPRA)
+        aplicar_movimientos([(copia_b.id, -3)], MovimientoInsumo.TIPO_AJUSTE)
+
+        self.gel.refresh_from_db()
+        self.assertEqual(self.gel.cantidad, 14)
+
+
+@unittest.skipIf(connection.vendor == 'sqlite', "SQLite serializa las escrituras y no permite probar concurrencia real")
+class MovimientoInsumoConcurrenciaTest(TransactionTestCase):
+
+    def test_movimientos_concurrentes_dejan_stock_exacto(self):
+        categoria = CategoriaInsumo.objects.create(nombre="Limas")
+        insumo = Insumo.objects.create(nombre="Lima 180", cantidad=100, categoria_insumo=categoria)
+        hilos, entradas, salidas = 8, 25, 10
+
+        def trabajar(delta):
+            try:
+                for _ in range(entradas if delta > 0 else salidas):
+                    aplicar_movimientos([(insumo.id, delta)], MovimientoInsumo.TIPO_AJUSTE)
+            finally:
+                connections.close_all()
+
+        trabajos = [threading.Thread(target=trabajar, args=(2 if i % 2 else -1,)) for i in range(hilos)]
+        for t in trabajos:
+            t.start()
+        for t in trabajos:
+            t.join()
+
+        insumo.refresh_from_db()
+        esperado = 100 + (hilos // 2) * (entradas * 2 - salidas)
+        self.assertEqual(insumo.cantidad, esperado)
+        self.assertEqual(MovimientoInsumo.objects.filter(insumo=insumo).count(), (hilos // 2) * (entradas + salidas))
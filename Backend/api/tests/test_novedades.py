@@ -3,8 +3,14 @@ from datetime import date, timedelta, time
 from django.core.exceptions import ValidationError
 from django.test import TestCase
 from django.utils import timezone
+from rest_framework.test import APIClient
+from api.citas.models import Cita
+from api.clientes.models import Cliente
+from api.horarios.grillas import obtener_grilla
 from api.manicuristas.models import Manicurista
+from api.novedades import impacto
 from api.novedades.models import Novedad
+from api.servicios.models import Servicio
 
 
 class NovedadTest(TestCase):
@@ -27,7 +33,59 @@ class NovedadTest(TestCase):
         self.assertEqual(novedad.tipo_ausencia, 'completa')
         self.assertEqual(novedad.fecha, self.manana)
 
-    
+
+class NovedadListadoTest(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.servicio = Servicio.objects.create(nombre="Manicure", precio=30000, descripcion="Manicure clásico", duracion=60)
+        self.cliente = Cliente.objects.create(
+            tipo_documento="CC", documento="1001", nombre="Laura Gómez",
+            celular="3001112233", correo_electronico="laura@mail.com", direccion="Calle 1"
+        )
+        self.fecha = timezone.localdate() + timedelta(days=1)
+        # Las reglas de horario se cargan una vez por proceso, no por petición
+        obtener_grilla(None, self.fecha)
+
+    def _novedades(self, cantidad):
+        for i in range(cantidad):
+            manicurista = Manicurista.objects.create(nombre=f"Manicurista {i}")
+            for hora in (time(10, 0), time(12, 0)):
+                Cita.objects.create(
+                    cliente=self.cliente, manicurista=manicurista, servicio=self.servicio,
+                    fecha_cita=self.fecha, hora_cita=hora
+                )
+            novedad = Novedad.objects.create(manicurista=manicurista, fecha=self.fecha, estado='ausente', tipo_ausencia='completa')
+            impacto.aplicar([novedad], reasignar=False)
+
+    def test_listado_con_consultas_constantes(self):
+        self._novedades(1)
+        with self.assertNumQueries(2):
+            self.client.get('/api/novedades/')
+
+        self._novedades(9)
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/novedades/')
+
+        self.assertEqual(len(response.data), 10)
+        self.assertEqual(len(response.data[0]['citas_afectadas']), 2)
+        self.assertEqual(response.data[0]['citas_afectadas'][0]['estado'], 'cancelada')
+
+    def test_detalle_y_novedades_hoy(self):
+        self._novedades(3)
+        novedad = Novedad.objects.first()
+
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/api/novedades/{novedad.id}/')
+        self.assertEqual(response.data['mensaje_personalizado'], f"La manicurista {novedad.manicurista.nombre} se ausentó todo el día (10:00 AM - 8:00 PM).")
+
+        for manicurista in Manicurista.objects.all():
+            Novedad.objects.create(manicurista=manicurista, fecha=timezone.localdate(), estado='tardanza', hora_entrada=time(11, 0))
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/novedades/novedades_hoy/')
+        self.assertEqual(len(response.data), 3)
+
+
 
 if __name__ == '__main__':
     unittest.main()
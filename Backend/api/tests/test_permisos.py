@@ -0,0 +1,107 @@
+import unittest
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from api.authentication import jwt
+from api.roles import permisos
+from api.roles.models import Permiso, Rol, RolHasPermiso
+from api.usuarios.models import Usuario
+
+
+class MatrizPermisosTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        jwt._locales.clear()
+        permisos.invalidar()
+        self.client = APIClient()
+        self.admin = Rol.objects.create(nombre="Administrador")
+        self.recepcion = Rol.objects.create(nombre="Recepción")
+        for nombre in ('ver_usuarios', 'ver_roles', 'editar_roles'):
+            RolHasPermiso.objects.create(rol=self.admin, permiso=Permiso.objects.get(nombre=nombre))
+        self.usuario = self._usuario('recepcion@mail.com', self.recepcion, '1001')
+
+    def _usuario(self, correo, rol, documento):
+        return Usuario.objects.create_user(
+            correo_electronico=correo, password='Clave123!', nombre='Laura Gómez', tipo_documento='CC',
+            documento=documento, celular='3001112233', rol=rol
+        )
+
+    def _autenticar(self, correo):
+        response = self.client.post(
+            '/api/auth/login/', {'correo_electronico': correo, 'password': 'Clave123!'}, format='json'
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+
+    def test_matriz_compilada_sin_consultas(self):
+        self.assertTrue(permisos.tiene_permiso(self.admin.id, 'Ver Usuarios'))
+        with self.assertNumQueries(0):
+            self.assertTrue(permisos.tiene_permiso(self.admin.id, 'editar_roles'))
+            self.assertFalse(permisos.tiene_permiso(self.admin.id, 'eliminar_roles'))
+            self.assertFalse(permisos.tiene_permiso(self.recepcion.id, 'ver_usuarios'))
+
+    def test_rol_o_permiso_inactivo(self):
+        self.admin.estado = 'inactivo'
+        self.admin.save()
+        self.assertFalse(permisos.tiene_permiso(self.admin.id, 'ver_usuarios'))
+
+        self.admin.estado = 'activo'
+        self.admin.save()
+        Permiso.objects.get(nombre='ver_roles').delete()
+        self.assertTrue(permisos.tiene_permiso(self.admin.id, 'ver_usuarios'))
+        self.assertFalse(permisos.tiene_permiso(self.admin.id, 'ver_roles'))
+
+    def test_viewset_exige_permiso(self):
+        self.assertEqual(self.client.get('/api/usuarios/').status_code, 401)
+
+        self._autenticar('recepcion@mail.com')
+        response = self.client.get('/api/usuarios/')
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.data['detail'], "No tiene permiso para realizar esta acción")
+
+        # El login de la vista de usuarios sigue abierto
+        anonimo = APIClient().post('/api/usuarios/login/', {}, format='json')
+        self.assertNotIn(anonimo.status_code, (401, 403))
+
+    def test_cambios_de_permisos_se_ven_de_inmediato(self):
+        self._usuario('admin@mail.com', self.admin, '1002')
+        self._autenticar('admin@mail.com')
+        ver_usuarios = Permiso.objects.get(nombre='ver_usuarios')
+
+        response = self.client.post(
+            f'/api/roles/roles/{self.recepcion.id}/add_permiso/', {'permiso_id': ver_usuarios.id}, format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(permisos.tiene_permiso(self.recepcion.id, 'ver_usuarios'))
+
+        response = self.client.post(
+            f'/api/roles/roles/{self.recepcion.id}/remove_permiso/', {'permiso_id': ver_usuarios.id}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(permisos.tiene_permiso(self.recepcion.id, 'ver_usuarios'))
+
+        response = self.client.patch(
+            f'/api/roles/roles/{self.recepcion.id}/', {'permisos_ids': [ver_usuarios.id]}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(permisos.tiene_permiso(self.recepcion.id, 'ver_usuarios'))
+
+        # Sin 'eliminar_roles' el administrador no puede borrar roles
+        self.assertEqual(self.client.delete(f'/api/roles/roles/{self.recepcion.id}/').status_code, 403)
+
+    def test_ruta_caliente_sin_consultar_permisos(self):
+        self._usuario('admin@mail.com', self.admin, '1002')
+        self._autenticar('admin@mail.com')
+        self.client.get('/api/usuarios/')
+
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get('/api/usuarios/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([q for q in consultas.captured_queries if RolHasPermiso._meta.db_table in q['sql']])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+import unittest
+from io import StringIO
+from datetime import date, timedelta
+from decimal import Decimal
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.test import APIClient
+from api.categoriainsumos.models import CategoriaInsumo
+from api.clientes.models import Cliente
+from api.compras.serializers import CompraCreateSerializer
+from api.insumos.models import Insumo
+from api.manicuristas.models import Manicurista
+from api.popularidad.contadores import registrar, top
+from api.popularidad.models import ContadorPopularidad
+from api.proveedores.models import Proveedor
+from api.servicios.models import Servicio
+from api.ventaservicios.models import VentaServicio, DetalleVentaServicio
+
+SERVICIO = ContadorPopularidad.TIPO_SERVICIO_VENDIDO
+INSUMO = ContadorPopularidad.TIPO_INSUMO_COMPRADO
+
+
+class ContadoresTest(TestCase):
+
+    def setUp(self):
+        self.hoy = date(2025, 6, 15)
+
+    def test_ventanas_suman_los_periodos_correctos(self):
+        registrar(SERVICIO, self.hoy, [(1, 2, 100)])
+        registrar(SERVICIO, self.hoy - timedelta(days=20), [(2, 5, 100)])
+        registrar(SERVICIO, self.hoy - timedelta(days=200), [(3, 9, 100)])
+        registrar(SERVICIO, self.hoy - timedelta(days=800), [(1, 20, 100)])
+
+        def ranking(ventana):
+            return [(f['objeto_id'], f['cantidad']) for f in top(SERVICIO, ventana, hoy=self.hoy)]
+
+        self.assertEqual(ranking('7d'), [(1, 2)])
+        self.assertEqual(ranking('30d'), [(2, 5), (1, 2)])
+        self.assertEqual(ranking('365d'), [(3, 9), (2, 5), (1, 2)])
+        self.assertEqual(ranking('all'), [(1, 22), (3, 9), (2, 5)])
+
+    def test_registros_repetidos_acumulan_en_la_misma_fila(self):
+        for _ in range(3):
+            registrar(INSUMO, self.hoy, [(7, 2, Decimal('10')), (7, 1, Decimal('5'))])
+        registrar(INSUMO, self.hoy, [(7, -4, Decimal('-20'))])
+
+        dia = ContadorPopularidad.objects.get(tipo=INSUMO, periodo='dia', fecha=self.hoy, objeto_id=7)
+        self.assertEqual((dia.cantidad, dia.ingresos), (5, Decimal('25.00')))
+        self.assertEqual(ContadorPopularidad.objects.count(), 2)  # un día y un mes
+
+    def test_ventana_anual_lee_filas_acotadas(self):
+        for i in range(365):
+            registrar(SERVICIO, self.hoy - timedelta(days=i), [(1, 1, 0)])
+
+        self.assertEqual(top(SERVICIO, '365d', hoy=self.hoy)[0]['cantidad'], 365)
+        with self.assertNumQueries(1):
+            top(SERVICIO, 'all', hoy=self.hoy)
+
+    def test_ventana_invalida(self):
+        with self.assertRaises(ValueError):
+            top(SERVICIO, 'semana')
+
+
+class PopularidadFlujosTest(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        categoria = CategoriaInsumo.objects.create(nombre="Esmaltes")
+        self.gel = Insumo.objects.create(nombre="Gel", cantidad=0, categoria_insumo=categoria)
+        self.proveedor = Proveedor.objects.create(
+            tipo_persona='juridica', nombre_empresa="Distribuidora Nails", nit="900123456",
+            nombre="Carlos Ruiz", direccion="Calle 10", correo_electronico="ventas@nails.com",
+            celular="3001234567"
+        )
+        self.servicio = Servicio.objects.create(nombre="Manicure", precio=30000, descripcion="Manicure clásico", duracion=45)
+        self.cliente = Cliente.objects.create(
+            tipo_documento="CC", documento="1001", nombre="Laura Gómez",
+            celular="3001112233", correo_electronico="laura@mail.com", direccion="Calle 1"
+        )
+        self.manicurista = Manicurista.objects.create(nombre="Ana Pérez")
+
+    def _venta(self, estado='pendiente'):
+        # bulk_create: VentaServicio.save() consulta sus detalles antes de tener pk
+        return VentaServicio.objects.bulk_create([
+            VentaServicio(cliente=self.cliente, manicurista=self.manicurista, estado=estado, total=0)
+        ])[0]
+
+    def test_compra_finalizada_y_anulada(self):
+        serializer = CompraCreateSerializer(data={
+            'proveedor': self.proveedor.id,
+            'detalles': [{'insumo_id': self.gel.id, 'cantidad': 6, 'precio_unitario': 1000}]
+        })
+        serializer.is_valid(raise_exception=True)
+        compra = serializer.save()
+
+        response = self.client.get('/api/compra-insumo/top_insumos/')
+        self.assertEqual(response.data, [{'insumo': self.gel.id, 'insumo__nombre': "Gel", 'total_comprado': 6}])
+
+        self.client.patch(f'/api/compras/{compra.id}/anular/', {'motivo_anulacion': 'Pedido cancelado por el proveedor'}, format='json')
+        self.assertEqual(self.client.get('/api/popularidad/insumos/?ventana=7d').data, [])
+
+    def test_venta_pagada_se_cuenta_una_vez(self):
+        venta = self._venta()
+        DetalleVentaServicio.objects.create(venta=venta, servicio=self.servicio, cantidad=2, precio_unitario=30000)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(
+                f'/api/venta-servicios/{venta.id}/actualizar_estado/',
+                {'estado': 'pagada', 'metodo_pago': 'efectivo'},
+                format='json'
+            )
+        with self.captureOnCommitCallbacks(execute=True):
+            venta.refresh_from_db()
+            venta.save()
+
+        response = self.client.get('/api/popularidad/servicios/?ventana=30d')
+        self.assertEqual(response.data, [{'id': self.servicio.id, 'nombre': "Manicure", 'cantidad': 2, 'valor': Decimal('60000.00')}])
+        self.assertEqual([s['id'] for s in self.client.get('/api/servicios/top_vendidos/').data], [self.servicio.id])
+
+    def test_reconstruir_desde_historial(self):
+        venta = self._venta(estado='pagada')
+        DetalleVentaServicio.objects.create(venta=venta, servicio=self.servicio, cantidad=3, precio_unitario=30000)
+        registrar(SERVICIO, date.today(), [(self.servicio.id, 50, 0)])  # conteo desfasado
+
+        call_command('reconstruir_popularidad', stdout=StringIO())
+
+        self.assertEqual(top(SERVICIO, 'all')[0]['cantidad'], 3)
+        self.assertTrue(VentaServicio.objects.get(pk=venta.pk).popularidad_registrada)
+
+
+if __name__ == '__main__':
+    unittest.main()
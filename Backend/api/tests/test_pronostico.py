@@ -0,0 +1,104 @@
+import unittest
+from datetime import date, timedelta
+from decimal import Decimal
+from django.test import TestCase
+from rest_framework.test import APIClient
+from api.abastecimientos.models import Abastecimiento
+from api.categoriainsumos.models import CategoriaInsumo
+from api.compras.models import Compra, DetalleCompra
+from api.insumos.models import Insumo
+from api.insumos.pronostico import pronosticar_insumos
+from api.insumoshasabastecimientos.models import InsumoHasAbastecimiento
+from api.manicuristas.models import Manicurista
+from api.proveedores.models import Proveedor
+
+
+class PronosticoInsumosTest(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.hoy = date.today()
+        categoria = CategoriaInsumo.objects.create(nombre="Consumibles")
+        self.gel = Insumo.objects.create(nombre="Gel", cantidad=10, categoria_insumo=categoria)
+        self.lima = Insumo.objects.create(nombre="Lima", cantidad=100, categoria_insumo=categoria)
+        self.algodon = Insumo.objects.create(nombre="Algodón", cantidad=50, categoria_insumo=categoria)
+        manicurista = Manicurista.objects.create(nombre="Ana Pérez")
+
+        # 30 días de consumo: 2 geles y 1 lima diarios; el algodón no se usa
+        lineas = []
+        for i in range(30):
+            abastecimiento = Abastecimiento.objects.create(
+                fecha=self.hoy - timedelta(days=i), cantidad=1, manicurista=manicurista
+            )
+            lineas.append(InsumoHasAbastecimiento(abastecimiento=abastecimiento, insumo=self.gel, cantidad=2))
+            lineas.append(InsumoHasAbastecimiento(abastecimiento=abastecimiento, insumo=self.lima, cantidad=1))
+        InsumoHasAbastecimiento.objects.bulk_create(lineas)
+
+    def _por_nombre(self, resultado):
+        return {r['nombre']: r for r in resultado}
+
+    def test_estima_agotamiento_y_sugiere_reposicion(self):
+        with self.assertNumQueries(3):
+            resultado = pronosticar_insumos(Insumo.objects.all(), dias=30, cobertura=10, tiempo_entrega=5)
+        pronostico = self._por_nombre(resultado)
+
+        self.assertEqual(resultado[0]['nombre'], "Gel")
+        self.assertEqual(pronostico['Gel']['consumo_diario'], 2.0)
+        self.assertEqual(pronostico['Gel']['dias_para_agotarse'], 5.0)
+        # 2 diarios durante entrega + cobertura (15 días) menos los 10 en stock
+        self.assertEqual(pronostico['Gel']['cantidad_sugerida'], 20)
+        self.assertEqual(pronostico['Lima']['cantidad_sugerida'], 0)
+        self.assertIsNone(pronostico['Algodón']['dias_para_agotarse'])
+
+    def test_agotamiento_lejano_no_se_agota(self):
+        # Mucho stock y un consumo mínimo hace 89 días: la fecha se saldría del rango de date
+        self.algodon.cantidad = 20000
+        self.algodon.save()
+        abastecimiento = Abastecimiento.objects.create(
+            fecha=self.hoy - timedelta(days=89), cantidad=1, manicurista=Manicurista.objects.get()
+        )
+        InsumoHasAbastecimiento.objects.create(abastecimiento=abastecimiento, insumo=self.algodon, cantidad=1)
+
+        pronostico = self._por_nombre(pronosticar_insumos(Insumo.objects.all(), dias=90))
+
+        self.assertEqual(pronostico['Algodón']['consumo_total'], 1)
+        self.assertIsNone(pronostico['Algodón']['dias_para_agotarse'])
+        self.assertIsNone(pronostico['Algodón']['fecha_agotamiento'])
+        self.assertIsNotNone(pronostico['Gel']['fecha_agotamiento'])
+
+    def test_generar_compras_agrupa_por_ultimo_proveedor(self):
+        proveedor = Proveedor.objects.create(
+            tipo_persona='juridica', nombre_empresa="Distribuidora Nails", nit="900123456",
+            nombre="Carlos Ruiz", direccion="Calle 10", correo_electronico="ventas@nails.com",
+            celular="3001234567"
+        )
+        compra = Compra.objects.create(proveedor=proveedor)
+        DetalleCompra.objects.bulk_create([
+            DetalleCompra(compra=compra, insumo=self.gel, cantidad=5, precio_unitario=Decimal('1200')),
+        ])
+        self.lima.cantidad = 0
+        self.lima.save()
+
+        response = self.client.post(
+            '/api/insumos/generar_compras/',
+            {'dias': 30, 'cobertura': 10, 'tiempo_entrega': 5},
+            format='json'
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data['compras']), 1)
+        borrador = Compra.objects.get(pk=response.data['compras'][0]['id'])
+        self.assertEqual(borrador.estado, 'pendiente')
+        self.assertEqual(list(borrador.detalles.values_list('insumo_id', 'cantidad')), [(self.gel.id, 20)])
+        self.assertEqual(borrador.total, Decimal('24000.00'))
+        self.assertEqual([s['nombre'] for s in response.data['sin_proveedor']], ["Lima"])
+        # Los borradores no mueven el inventario
+        self.assertEqual(Insumo.objects.get(pk=self.gel.pk).cantidad, 10)
+
+    def test_parametros_invalidos(self):
+        response = self.client.get('/api/insumos/pronostico/?dias=0')
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
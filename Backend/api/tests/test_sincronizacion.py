@@ -0,0 +1,81 @@
+import unittest
+from datetime import date, time, timedelta
+from django.test import TestCase
+from api.base.sincronizacion import sincronizar
+from api.citas.models import Cita
+from api.citas.serializers import CitaCreateSerializer
+from api.clientes.models import Cliente
+from api.horarios.grillas import obtener_grilla
+from api.manicuristas.models import Manicurista
+from api.roles.models import Permiso, Rol, RolHasPermiso
+from api.roles.serializers import RolSerializer
+from api.servicios.models import Servicio
+
+
+class SincronizarTest(TestCase):
+
+    def setUp(self):
+        self.rol = Rol.objects.create(nombre="Recepción")
+        self.permisos = [Permiso.objects.create(nombre=f"Permiso {i}") for i in range(20)]
+        RolHasPermiso.objects.bulk_create([RolHasPermiso(rol=self.rol, permiso=p) for p in self.permisos[:10]])
+
+    def _sincronizar(self, permisos):
+        return sincronizar(
+            RolHasPermiso,
+            RolHasPermiso.objects.filter(rol=self.rol),
+            {p.id: p for p in permisos},
+            clave='permiso_id',
+            nueva=lambda pk, permiso: RolHasPermiso(rol=self.rol, permiso=permiso),
+        )
+
+    def _actuales(self):
+        return set(RolHasPermiso.objects.filter(rol=self.rol).values_list('permiso_id', flat=True))
+
+    def test_solo_aplica_diferencias(self):
+        deseados = self.permisos[1:10] + self.permisos[15:17]
+        # Una lectura, un DELETE filtrado y un INSERT, sin importar cuántas filas haya
+        with self.assertNumQueries(3):
+            cambios = self._sincronizar(deseados)
+
+        self.assertEqual(len(cambios.creadas), 2)
+        self.assertEqual(len(cambios.eliminadas), 1)
+        self.assertEqual(self._actuales(), {p.id for p in deseados})
+
+        with self.assertNumQueries(1):
+            self.assertFalse(self._sincronizar(deseados).hubo_cambios)
+
+    def test_rol_serializer_update(self):
+        nuevos = self.permisos[5:15]
+        serializer = RolSerializer(self.rol, data={'permisos_ids': [p.id for p in nuevos]}, partial=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+
+        self.assertEqual(self._actuales(), {p.id for p in nuevos})
+
+    def test_cita_update_servicios(self):
+        fecha = date.today() + timedelta(days=7 - date.today().weekday())
+        obtener_grilla(None, fecha)
+        servicios = [
+            Servicio.objects.create(nombre=f"Servicio {i}", precio=10000, descripcion="Servicio", duracion=30)
+            for i in range(3)
+        ]
+        cliente = Cliente.objects.create(
+            tipo_documento="CC", documento="1001", nombre="Laura Gómez",
+            celular="3001112233", correo_electronico="laura@mail.com", direccion="Calle 1"
+        )
+        cita = Cita.objects.create(
+            cliente=cliente, manicurista=Manicurista.objects.create(nombre="Ana Pérez"), servicio=servicios[0],
+            fecha_cita=fecha, hora_cita=time(10, 0)
+        )
+        cita.servicios.set(servicios[:2])
+
+        serializer = CitaCreateSerializer(cita, data={'servicios': [servicios[1].id, servicios[2].id]}, partial=True)
+        serializer.is_valid(raise_exception=True)
+        cita = serializer.save()
+
+        self.assertEqual({s.id for s in cita.servicios.all()}, {servicios[1].id, servicios[2].id})
+        self.assertEqual(cita.duracion_total, 60)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+import io
+import statistics
+import time as reloj
+from contextlib import contextmanager, redirect_stdout
+from django.contrib.auth.hashers import get_hasher
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from api.clientes.serializers import RegistroClienteSerializer
+from api.manicuristas.serializers import ManicuristaSerializer
+from api.roles.models import Rol
+from api.usuarios.serializers import UsuarioSerializer
+
+
+@contextmanager
+def _contar_hashes():
+    """Cuenta las derivaciones del hasher por defecto mientras dura el bloque"""
+    clase = type(get_hasher())
+    original = clase.encode
+    contador = [0]
+
+    def encode(hasher, *args, **kwargs):
+        contador[0] += 1
+        return original(hasher, *args, **kwargs)
+
+    clase.encode = encode
+    try:
+        yield contador
+    finally:
+        clase.encode = original
+
+
+def _guardar(serializer_class, datos):
+    serializer = serializer_class(data=datos)
+    serializer.is_valid(raise_exception=True)
+    return serializer.save()
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide el registro de clientes, manicuristas y usuarios y el cambio de contraseña: "
+        "mediana por operación y hashes derivados. Todo se hace en una transacción que se "
+        "revierte al terminar: la base de datos queda igual"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticiones', type=int, default=5, help="Veces que se ejecuta cada operación")
+
+    def handle(self, *args, **options):
+        repeticiones = options['repeticiones']
+        if repeticiones < 1:
+            raise CommandError("--repeticiones debe ser un entero positivo")
+
+        hasher = get_hasher()
+        self.stdout.write(f"Hasher: {hasher.algorithm} ({getattr(hasher, 'iterations', '-')} iteraciones)")
+
+        with transaction.atomic():
+            self.rol = Rol.objects.get_or_create(nombre='Administrador', defaults={'estado': 'activo'})[0]
+            for nombre in ('Cliente', 'Manicurista'):
+                if not Rol.objects.filter(nombre__iexact=nombre).exists():
+                    Rol.objects.create(nombre=nombre, estado='activo')
+
+            operaciones = [
+                ('registro cliente', self._registrar_cliente),
+                ('registro manicurista', self._registrar_manicurista),
+                ('registro usuario', self._registrar_usuario),
+                ('cambio cliente', lambda i: self.cliente.cambiar_contraseña(f'Cliente{i}!x')),
+                ('cambio manicurista', lambda i: self.manicurista.cambiar_contraseña(f'Manicurista{i}!x')),
+                ('cambio usuario', lambda i: self.usuario.cambiar_contraseña(f'Usuario{i}!x')),
+            ]
+            for nombre, operacion in operaciones:
+                self._reportar(nombre, operacion, repeticiones)
+
+            transaction.set_rollback(True)
+
+    # Cada registro usa datos únicos; el último queda para medir el cambio de contraseña
+
+    def _registrar_cliente(self, i):
+        self.cliente = _guardar(RegistroClienteSerializer, {
+            'nombre': 'Cliente Medicion', 'tipo_documento': 'CC', 'documento': f'91{i:06d}',
+            'celular': f'301{i:07d}', 'correo_electronico': f'cliente{i}@medicion.com',
+            'direccion': 'Calle 1', 'genero': 'F',
+        })['cliente']
+
+    def _registrar_manicurista(self, i):
+        self.manicurista = _guardar(ManicuristaSerializer, {
+            'nombre': 'Manicurista Medicion', 'tipo_documento': 'CC', 'numero_documento': f'92{i:06d}',
+            'celular': f'302{i:07d}', 'correo': f'manicurista{i}@medicion.com',
+            'direccion': 'Calle 2', 'especialidad': 'Pedicure',
+        })
+
+    def _registrar_usuario(self, i):
+        self.usuario = _guardar(UsuarioSerializer, {
+            'nombre': 'Usuario Medicion', 'tipo_documento': 'CC', 'documento': f'93{i:06d}',
+            'celular': f'303{i:07d}', 'correo_electronico': f'usuario{i}@medicion.com',
+            'direccion': 'Calle 3', 'rol': self.rol.id,
+        })
+
+    def _reportar(self, nombre, operacion, repeticiones):
+        tiempos = []
+        with _contar_hashes() as hashes:
+            for i in range(repeticiones):
+                inicio = reloj.perf_counter()
+                # Los print de los modelos no se mezclan con el reporte
+                with redirect_stdout(io.StringIO()):
+                    operacion(i)
+                tiempos.append((reloj.perf_counter() - inicio) * 1000)
+        self.stdout.write(
+            f"{nombre}: mediana {statistics.median(tiempos):.0f} ms, "
+            f"{hashes[0] / repeticiones:g} hashes por operación"
+        )
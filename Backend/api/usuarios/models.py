@@ -11,7 +11,7 @@ import string
 
 
 class UsuarioManager(BaseUserManager):
-    def _create_user(self, correo_electronico, password, is_staff, is_superuser, **extra_fields):
+    def _create_user(self, correo_electronico, password, is_staff, is_superuser, password_hash=None, **extra_fields):
         if not correo_electronico:
             raise ValueError('El correo electrónico es obligatorio')
         
@@ -34,7 +34,11 @@ class UsuarioManager(BaseUserManager):
         if rol: # Si se proporcionó un rol (ya sea instancia o ID que se resolverá luego)
             user.rol = rol
 
-        user.set_password(password)
+        if password_hash:
+            # Hash ya calculado (p. ej. la contraseña temporal del cliente): no se vuelve a derivar
+            user.password = password_hash
+        else:
+            user.set_password(password)
         user.save(using=self._db)
         return user
 
@@ -121,12 +125,17 @@ class Usuario(AbstractBaseUser, PermissionsMixin, BaseModel):
         from django.contrib.auth.hashers import check_password
         return check_password(contraseña, self.contraseña_temporal)
     
+    def asignar_hash(self, contraseña, hash_contraseña):
+        """Usa un hash ya calculado de `contraseña` como contraseña principal (equivale a set_password)"""
+        self.password = hash_contraseña
+        self._password = contraseña
+
     def cambiar_contraseña(self, nueva_contraseña):
-        """Cambia la contraseña temporal por una nueva"""
+        """Cambia la contraseña temporal por una nueva (un solo hash para ambos campos)"""
         print(f"Cambiando contraseña para usuario {self.id}")
         self.contraseña_temporal = make_password(nueva_contraseña)
         self.debe_cambiar_contraseña = False
-        # También actualizar la contraseña principal del usuario
-        self.set_password(nueva_contraseña)
+        # La contraseña principal comparte el mismo hash
+        self.asignar_hash(nueva_contraseña, self.contraseña_temporal)
         self.save(update_fields=['contraseña_temporal', 'debe_cambiar_contraseña', 'password'])
         print(f"Contraseña cambiada. debe_cambiar_contraseña: {self.debe_cambiar_contraseña}")
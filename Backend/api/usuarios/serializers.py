@@ -127,7 +127,7 @@ class UsuarioSerializer(serializers.ModelSerializer):
         if not password_to_set or password_to_set.strip() == '':
             # Generar contraseña temporal
             contraseña_generada = usuario.generar_contraseña_temporal()
-            usuario.set_password(contraseña_generada)
+            usuario.asignar_hash(contraseña_generada, usuario.contraseña_temporal)
             # Agregar la contraseña generada para poder accederla en la vista
             usuario.contraseña_generada = contraseña_generada
         else:
@@ -3,8 +3,8 @@ from rest_framework.response import Response
 from rest_framework.decorators import action
 from django.contrib.auth.hashers import make_password
 from django.db import transaction
-from django.core.mail import send_mail
-from django.conf import settings
+from api.correos.bandeja import encolar_correo
+from api.roles.permissions import TienePermiso
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
 from .models import Usuario
@@ -22,7 +22,10 @@ class UsuarioViewSet(viewsets.ModelViewSet):
     Proporciona operaciones CRUD completas y algunos endpoints adicionales.
     """
     queryset = Usuario.objects.all().order_by('-created_at')
-    # permission_classes = [permissions.IsAuthenticated]
+    permission_classes = [TienePermiso]
+    modulo_permiso = 'usuarios'
+    # El login y el cambio de la contraseña temporal se usan antes de tener sesión
+    permisos_por_accion = {'login': None, 'cambiar_contraseña': None}
 
     def get_serializer_class(self):
         """
@@ -209,14 +212,7 @@ class UsuarioViewSet(viewsets.ModelViewSet):
         ¡Gracias y bienvenido al equipo!
         """
         
-        send_mail(
-            asunto,
-            mensaje_texto,
-            settings.DEFAULT_FROM_EMAIL,
-            [usuario.correo_electronico],
-            html_message=mensaje_html,
-            fail_silently=False,
-        )
+        encolar_correo(asunto, mensaje_texto, [usuario.correo_electronico], html=mensaje_html)
 
     # --- Acciones Personalizadas ---
     @action(detail=False, methods=['get'], url_path='detallado')
@@ -388,14 +384,7 @@ class UsuarioViewSet(viewsets.ModelViewSet):
         ¡Tu cuenta está segura!
         """
         
-        send_mail(
-            asunto,
-            mensaje_texto,
-            settings.DEFAULT_FROM_EMAIL,
-            [usuario.correo_electronico],
-            html_message=mensaje_html,
-            fail_silently=False,
-        )
+        encolar_correo(asunto, mensaje_texto, [usuario.correo_electronico], html=mensaje_html)
             
     @action(detail=True, methods=['post'], url_path='cambiar-password')
     def cambiar_password(self, request, pk=None):
@@ -0,0 +1,231 @@
+"""
+Conciliación de campos desnormalizados.
+
+Cada verificación detecta las filas inconsistentes de toda la tabla con una
+consulta agrupada (GROUP BY ... HAVING) y, si se pide corregir, las actualiza
+por lotes con un UPDATE que recalcula el valor en la propia base de datos.
+"""
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import DecimalField, Exists, F, IntegerField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+TOLERANCIA = Decimal('0.005')
+TAMANO_LOTE = 1000
+MAX_MUESTRA = 20
+
+DINERO = DecimalField(max_digits=14, decimal_places=2)
+
+
+def _suma(modelo, campo, expresion, output_field=DINERO):
+    """Subconsulta correlacionada con la suma de `expresion` de las filas hijas (campo = pk externo)"""
+    return Subquery(
+        modelo.objects.filter(**{campo: OuterRef('pk')})
+        .order_by()
+        .values(campo)
+        .annotate(total=Sum(expresion, output_field=output_field))
+        .values('total'),
+        output_field=output_field
+    )
+
+
+def _descuadre(campo='diferencia'):
+    return Q(**{f'{campo}__gt': TOLERANCIA}) | Q(**{f'{campo}__lt': -TOLERANCIA})
+
+
+def _por_lotes(modelo, ids, **valores):
+    """Aplica el UPDATE a los ids en lotes para no armar un IN gigantesco"""
+    actualizados = 0
+    for i in range(0, len(ids), TAMANO_LOTE):
+        actualizados += modelo.objects.filter(pk__in=ids[i:i + TAMANO_LOTE]).update(**valores)
+    return actualizados
+
+
+def _resultado(descripcion, filas, corregidos):
+    return {
+        'descripcion': descripcion,
+        'inconsistencias': len(filas),
+        'corregidos': corregidos,
+        'muestra': filas[:MAX_MUESTRA],
+    }
+
+
+def conciliar_ventas(corregir=False):
+    """VentaServicio.total frente a la suma de sus detalles menos el descuento"""
+    from api.ventaservicios.models import VentaServicio, DetalleVentaServicio
+
+    filas = list(
+        DetalleVentaServicio.objects
+        .values('venta_id', 'venta__total', 'venta__descuento')
+        .annotate(esperado=Sum('subtotal') - F('venta__descuento'))
+        .annotate(diferencia=F('esperado') - F('venta__total'))
+        .filter(_descuadre())
+        .order_by('venta_id')
+        .values('venta_id', 'venta__total', 'esperado')
+    )
+    filas = [{'id': f['venta_id'], 'actual': f['venta__total'], 'esperado': f['esperado']} for f in filas]
+
+    corregidos = 0
+    if corregir and filas:
+        esperado = _suma(DetalleVentaServicio, 'venta', F('subtotal')) - F('descuento')
+        corregidos = _por_lotes(
+            VentaServicio,
+            [f['id'] for f in filas],
+            total=esperado,
+            comision_manicurista=esperado * F('porcentaje_comision') / Value(100)
+        )
+    return _resultado("Total de ventas vs. suma de sus detalles", filas, corregidos)
+
+
+def conciliar_compras(corregir=False):
+    """Compra.total frente a la suma de cantidad x precio de sus detalles"""
+    from api.compras.models import Compra, DetalleCompra
+
+    subtotal = F('detalles__cantidad') * F('detalles__precio_unitario')
+    filas = list(
+        Compra.objects
+        .values('id', 'total')
+        .annotate(esperado=Coalesce(Sum(subtotal, output_field=DINERO), Value(Decimal('0')), output_field=DINERO))
+        .annotate(diferencia=F('esperado') - F('total'))
+        .filter(_descuadre())
+        .order_by('id')
+        .values('id', 'total', 'esperado')
+    )
+    filas = [{'id': f['id'], 'actual': f['total'], 'esperado': f['esperado']} for f in filas]
+
+    corregidos = 0
+    if corregir and filas:
+        corregidos = _por_lotes(
+            Compra,
+            [f['id'] for f in filas],
+            total=Coalesce(
+                _suma(DetalleCompra, 'compra', F('cantidad') * F('precio_unitario')),
+                Value(Decimal('0')),
+                output_field=DINERO
+            )
+        )
+    return _resultado("Total de compras vs. suma de sus detalles", filas, corregidos)
+
+
+def conciliar_citas(corregir=False):
+    """
+    Cita.precio_total y duracion_total frente a la suma de sus servicios. Solo se
+    revisan citas abiertas: las finalizadas o canceladas conservan lo cobrado.
+    """
+    from api.citas.models import Cita
+
+    Through = Cita.servicios.through
+    filas = list(
+        Through.objects
+        .filter(cita__estado__in=['pendiente', 'en_proceso'])
+        .values('cita_id', 'cita__precio_total', 'cita__duracion_total')
+        .annotate(precio=Sum('servicio__precio'), duracion=Sum('servicio__duracion'))
+        .annotate(diferencia=F('precio') - F('cita__precio_total'))
+        .filter(_descuadre() | ~Q(duracion=F('cita__duracion_total')))
+        .order_by('cita_id')
+    )
+    filas = [
+        {'id': f['cita_id'], 'actual': f['cita__precio_total'], 'esperado': f['precio'],
+         'duracion_actual': f['cita__duracion_total'], 'duracion_esperada': f['duracion']}
+        for f in filas
+    ]
+
+    corregidos = 0
+    if corregir and filas:
+        por_cita = Through.objects.filter(cita_id=OuterRef('pk')).order_by().values('cita_id')
+        corregidos = _por_lotes(
+            Cita,
+            [f['id'] for f in filas],
+            precio_total=Subquery(por_cita.annotate(s=Sum('servicio__precio')).values('s'), output_field=DINERO),
+            duracion_total=Subquery(por_cita.annotate(s=Sum('servicio__duracion')).values('s'), output_field=IntegerField())
+        )
+    return _resultado("Precio y duración de citas abiertas vs. sus servicios", filas, corregidos)
+
+
+def conciliar_stock(corregir=False):
+    """
+    Insumo.cantidad frente al historial de movimientos. La cantidad en stock es
+    la referencia (es lo que se cuenta físicamente): al corregir se registra un
+    movimiento de ajuste por la diferencia para que el historial vuelva a cuadrar,
+    en lugar de mover el stock.
+    """
+    from api.insumos.models import Insumo, MovimientoInsumo
+
+    filas = list(
+        Insumo.objects
+        .values('id', 'nombre', 'cantidad')
+        .annotate(esperado=Coalesce(Sum('movimientos__cantidad'), Value(0)))
+        .exclude(esperado=F('cantidad'))
+        .order_by('id')
+    )
+    filas = [{'id': f['id'], 'nombre': f['nombre'], 'actual': f['cantidad'], 'esperado': f['esperado']} for f in filas]
+
+    corregidos = 0
+    if corregir and filas:
+        corregidos = len(MovimientoInsumo.objects.bulk_create([
+            MovimientoInsumo(
+                insumo_id=f['id'],
+                tipo=MovimientoInsumo.TIPO_AJUSTE,
+                cantidad=f['actual'] - f['esperado'],
+                motivo="Conciliación: diferencia entre el stock y el historial de movimientos"
+            )
+            for f in filas
+        ], batch_size=TAMANO_LOTE))
+    return _resultado("Stock de insumos vs. historial de movimientos", filas, corregidos)
+
+
+def conciliar_consumos(corregir=False):
+    """
+    Citas finalizadas sin el consumo de insumos de su receta. Solo cuentan las
+    recetas que ya existían al finalizar la cita; al corregir se registra el
+    consumo pendiente (registrar_consumo_citas omite las que ya lo tienen).
+    """
+    from api.citas.consumo import registrar_consumo_citas
+    from api.citas.models import Cita
+    from api.insumos.models import MovimientoInsumo
+    from api.servicios.models import ServicioHasInsumo
+
+    filas = list(
+        Cita.objects
+        .filter(estado='finalizada', fecha_finalizacion__isnull=False)
+        .filter(Exists(ServicioHasInsumo.objects.filter(
+            servicio__cita=OuterRef('pk'), created_at__lte=OuterRef('fecha_finalizacion')
+        )))
+        .exclude(Exists(MovimientoInsumo.objects.filter(
+            cita=OuterRef('pk'), tipo=MovimientoInsumo.TIPO_CONSUMO_SERVICIO
+        )))
+        .order_by('id')
+        .values('id', 'fecha_finalizacion')
+    )
+
+    corregidos = 0
+    if corregir and filas:
+        ids = [f['id'] for f in filas]
+        for i in range(0, len(ids), TAMANO_LOTE):
+            corregidos += len({m.cita_id for m in registrar_consumo_citas(ids[i:i + TAMANO_LOTE])})
+    return _resultado("Citas finalizadas sin consumo de insumos registrado", filas, corregidos)
+
+
+VERIFICACIONES = {
+    'ventas': conciliar_ventas,
+    'compras': conciliar_compras,
+    'citas': conciliar_citas,
+    'stock': conciliar_stock,
+    'consumos': conciliar_consumos,
+}
+
+
+def conciliar(verificaciones=None, corregir=False):
+    """
+    Ejecuta las verificaciones indicadas (todas por defecto) y retorna un dict
+    {nombre: resultado}. Con corregir=True todo se aplica en una transacción.
+    """
+    nombres = verificaciones or list(VERIFICACIONES)
+    desconocidas = [n for n in nombres if n not in VERIFICACIONES]
+    if desconocidas:
+        raise ValueError(f"Verificaciones desconocidas: {', '.join(desconocidas)}")
+
+    if not corregir:
+        return {nombre: VERIFICACIONES[nombre]() for nombre in nombres}
+    with transaction.atomic():
+        return {nombre: VERIFICACIONES[nombre](corregir=True) for nombre in nombres}
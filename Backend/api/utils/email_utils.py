@@ -1,17 +1,11 @@
-from django.core.mail import send_mail
 from django.conf import settings
+from api.correos.bandeja import encolar_correo
 
 def enviar_correo(destinatario, asunto, mensaje):
-    """Envía un correo electrónico"""
+    """Deja el correo en la bandeja de salida (lo envía el comando enviar_correos)"""
     try:
-        send_mail(
-            subject=asunto,
-            message=mensaje,
-            from_email=settings.EMAIL_HOST_USER,
-            recipient_list=[destinatario],
-            fail_silently=False,
-        )
+        encolar_correo(asunto, mensaje, [destinatario], remitente=settings.EMAIL_HOST_USER)
         return True
     except Exception as e:
-        print(f"Error al enviar correo: {e}")
-        return False
\ No newline at end of file
+        print(f"Error al encolar correo: {e}")
+        return False
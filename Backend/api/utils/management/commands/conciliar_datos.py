@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+from api.utils.conciliacion import VERIFICACIONES, conciliar
+
+
+class Command(BaseCommand):
+    help = "Detecta (y opcionalmente corrige) totales y stock desnormalizados que no cuadran con sus detalles"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--solo',
+            default='',
+            help=f"Verificaciones separadas por coma ({', '.join(VERIFICACIONES)}). Por defecto todas"
+        )
+        parser.add_argument('--corregir', action='store_true', help="Aplica las correcciones además de reportarlas")
+
+    def handle(self, *args, **options):
+        nombres = [n.strip() for n in options['solo'].split(',') if n.strip()]
+        try:
+            resultados = conciliar(nombres or None, corregir=options['corregir'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        for nombre, resultado in resultados.items():
+            linea = f"{nombre}: {resultado['inconsistencias']} inconsistencias"
+            if options['corregir']:
+                linea += f", {resultado['corregidos']} corregidas"
+            estilo = self.style.WARNING if resultado['inconsistencias'] else self.style.SUCCESS
+            self.stdout.write(estilo(linea))
+            for fila in resultado['muestra']:
+                self.stdout.write(f"  #{fila['id']}: actual={fila['actual']} esperado={fila['esperado']}")
@@ -0,0 +1,6 @@
+from django.urls import path
+from .views import ConciliacionView
+
+urlpatterns = [
+    path('', ConciliacionView.as_view(), name='conciliacion'),
+]
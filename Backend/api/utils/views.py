@@ -0,0 +1,30 @@
+from rest_framework import status
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from .conciliacion import conciliar
+
+
+class ConciliacionView(APIView):
+    """
+    GET: reporta las inconsistencias de todas las verificaciones (o las indicadas
+    en ?verificaciones=ventas,stock).
+    POST {"verificaciones": [...], "corregir": true}: reporta y corrige.
+    """
+    permission_classes = [IsAdminUser]
+
+    def _ejecutar(self, verificaciones, corregir):
+        try:
+            return Response(conciliar(verificaciones or None, corregir=corregir))
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    def get(self, request):
+        verificaciones = [v for v in request.query_params.get('verificaciones', '').split(',') if v]
+        return self._ejecutar(verificaciones, False)
+
+    def post(self, request):
+        verificaciones = request.data.get('verificaciones') or []
+        if not isinstance(verificaciones, list):
+            return Response({"error": "verificaciones debe ser una lista"}, status=status.HTTP_400_BAD_REQUEST)
+        return self._ejecutar(verificaciones, bool(request.data.get('corregir', False)))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-19 05:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ventaservicios', '0004_alter_detalleventaservicio_subtotal_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ventaservicio',
+            name='popularidad_registrada',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Popularidad registrada'),
+        ),
+    ]
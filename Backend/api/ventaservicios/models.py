@@ -119,6 +119,13 @@ class VentaServicio(BaseModel):
         verbose_name="Fecha de pago"
     )
     
+    # Indica si la venta pagada ya se sumó a los contadores de popularidad
+    popularidad_registrada = models.BooleanField(
+        default=False,
+        editable=False,
+        verbose_name="Popularidad registrada"
+    )
+    
     observaciones = models.TextField(
         blank=True,
         null=True,
@@ -346,6 +353,7 @@ class DetalleVentaServicio(BaseModel):
 
 
 # Señales para actualizar totales automáticamente
+from django.db import transaction
 from django.db.models.signals import post_save, post_delete, m2m_changed
 from django.dispatch import receiver
 
@@ -369,3 +377,11 @@ def sincronizar_fecha_con_citas(sender, instance, action, **kwargs):
     """Sincronizar fecha de venta cuando se modifican las citas asociadas"""
     if action in ['post_add', 'post_remove', 'post_clear']:
         instance.sincronizar_con_citas()
+
+@receiver(post_save, sender=VentaServicio)
+def registrar_popularidad_venta(sender, instance, **kwargs):
+    """Suma los servicios de la venta a los contadores de popularidad cuando queda pagada"""
+    if instance.estado == 'pagada' and not instance.popularidad_registrada:
+        from api.popularidad.contadores import registrar_venta_pagada
+        # Después del commit, cuando ya se guardaron todos los detalles de la venta
+        transaction.on_commit(lambda: registrar_venta_pagada(instance.pk))
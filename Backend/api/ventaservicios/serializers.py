@@ -4,6 +4,8 @@ from .models import VentaServicio, DetalleVentaServicio
 from api.clientes.serializers import ClienteSerializer
 from api.servicios.serializers import ServicioSerializer
 from api.manicuristas.serializers import ManicuristaSerializer
+from api.base.campos import PKRelacionadoField
+from api.citas.models import Cita
 
 
 class DetalleVentaServicioSerializer(serializers.ModelSerializer):
@@ -56,6 +58,8 @@ class VentaServicioSerializer(serializers.ModelSerializer):
     fecha_para_mostrar = serializers.SerializerMethodField()
     hora_para_mostrar = serializers.SerializerMethodField()
     
+    serializer_related_field = PKRelacionadoField
+
     class Meta:
         model = VentaServicio
         fields = '__all__'
@@ -115,15 +119,20 @@ class VentaServicioSerializer(serializers.ModelSerializer):
         return data
 
 
+def _cita_mas_reciente(citas):
+    return max(citas, key=lambda cita: (cita.fecha_cita, cita.hora_cita))
+
+
 class VentaServicioCreateSerializer(serializers.ModelSerializer):
     """Serializer específico para crear ventas con múltiples detalles de servicio"""
     
-    # CORREGIDO: Usar ListField para IDs de citas
-    citas = serializers.ListField(
-        child=serializers.IntegerField(),
+    # Citas finalizadas en el orden recibido, resueltas con una sola consulta
+    citas = PKRelacionadoField(
+        queryset=Cita.objects.filter(estado='finalizada'),
+        many=True,
         required=False,
-        allow_empty=True,
-        help_text="Lista de IDs de citas asociadas"
+        help_text="Lista de IDs de citas asociadas",
+        error_messages={'no_disponibles': 'Las siguientes citas no están finalizadas: {ids}'}
     )
     
     # Detalles de la venta para creación/actualización
@@ -157,40 +166,10 @@ class VentaServicioCreateSerializer(serializers.ModelSerializer):
                 )
         return value
 
-    def validate_citas(self, value):
-        """Validar que las citas existan y estén finalizadas"""
-        if not value:
-            return value
-        
-        try:
-            from api.citas.models import Cita
-            
-            # Verificar que todas las citas existan
-            citas_existentes = Cita.objects.filter(id__in=value)
-            if len(citas_existentes) != len(value):
-                citas_no_encontradas = set(value) - set(citas_existentes.values_list('id', flat=True))
-                raise serializers.ValidationError(
-                    f"Las siguientes citas no existen: {list(citas_no_encontradas)}"
-                )
-            
-            # Verificar que todas estén finalizadas
-            citas_no_finalizadas = citas_existentes.exclude(estado='finalizada')
-            if citas_no_finalizadas.exists():
-                ids_no_finalizadas = list(citas_no_finalizadas.values_list('id', flat=True))
-                raise serializers.ValidationError(
-                    f"Las siguientes citas no están finalizadas: {ids_no_finalizadas}"
-                )
-            
-            return value
-            
-        except ImportError:
-            # Si no existe el módulo de citas, permitir cualquier valor
-            return value
-
     def create(self, validated_data):
         """Crear venta con múltiples detalles de servicio y citas"""
         detalles_data = validated_data.pop('detalles')
-        citas_ids = validated_data.pop('citas', [])
+        citas = validated_data.pop('citas', [])
         
         # Crear la venta principal
         venta = VentaServicio.objects.create(**validated_data)
@@ -200,21 +179,16 @@ class VentaServicioCreateSerializer(serializers.ModelSerializer):
             DetalleVentaServicio.objects.create(venta=venta, **detalle_data)
         
         # Asignar citas si se proporcionaron
-        if citas_ids:
-            try:
-                from api.citas.models import Cita
-                citas = Cita.objects.filter(id__in=citas_ids)
-                venta.citas.set(citas)
-                
-                # Establecer cita principal si no se proporcionó
-                if not venta.cita and citas.exists():
-                    venta.cita = citas.first()
-                    venta.save(update_fields=['cita'])
-                
-                # Sincronizar fecha con las citas
-                venta.sincronizar_con_citas() # Corregido el nombre de la función
-            except ImportError:
-                pass
+        if citas:
+            venta.citas.set(citas)
+            
+            # Establecer cita principal si no se proporcionó (la más reciente)
+            if not venta.cita:
+                venta.cita = _cita_mas_reciente(citas)
+                venta.save(update_fields=['cita'])
+            
+            # Sincronizar fecha con las citas
+            venta.sincronizar_con_citas()
         
         # La señal post_save de DetalleVentaServicio se encargará de actualizar el total de la venta
         return venta
@@ -222,7 +196,7 @@ class VentaServicioCreateSerializer(serializers.ModelSerializer):
     def update(self, instance, validated_data):
         """Actualizar venta con múltiples detalles de servicio y citas"""
         detalles_data = validated_data.pop('detalles', None)
-        citas_ids = validated_data.pop('citas', None)
+        citas = validated_data.pop('citas', None)
         
         # Actualizar campos básicos de la venta
         for attr, value in validated_data.items():
@@ -252,20 +226,15 @@ class VentaServicioCreateSerializer(serializers.ModelSerializer):
                     DetalleVentaServicio.objects.create(venta=instance, **detalle_data)
         
         # Actualizar citas si se proporcionaron
-        if citas_ids is not None:
-            try:
-                from api.citas.models import Cita
-                citas = Cita.objects.filter(id__in=citas_ids)
-                instance.citas.set(citas)
-                
-                # Establecer cita principal si no existe
-                if not instance.cita and citas.exists():
-                    instance.cita = citas.first()
-                
-                # Sincronizar fecha con las citas
-                instance.sincronizar_con_citas()
-            except ImportError:
-                pass
+        if citas is not None:
+            instance.citas.set(citas)
+            
+            # Establecer cita principal si no existe (la más reciente)
+            if not instance.cita and citas:
+                instance.cita = _cita_mas_reciente(citas)
+            
+            # Sincronizar fecha con las citas
+            instance.sincronizar_con_citas()
         
         instance.save()
         return instance
@@ -5,6 +5,9 @@ from django.db.models import Q, Count, Sum, Avg
 from django.utils import timezone
 from datetime import datetime, timedelta
 from .models import VentaServicio, DetalleVentaServicio
+from api.popularidad.contadores import top
+from api.popularidad.models import ContadorPopularidad
+from api.servicios.models import Servicio
 from .serializers import (
     VentaServicioSerializer,
     VentaServicioCreateSerializer,
@@ -189,15 +192,13 @@ class VentaServicioViewSet(viewsets.ModelViewSet):
             total=Sum('total')
         ).order_by('-total')
         
-        # Servicios más vendidos (a través de detalles)
-        servicios_top = DetalleVentaServicio.objects.filter(
-            venta__estado='pagada'
-        ).values(
-            'servicio__nombre'
-        ).annotate(
-            total_vendido=Sum('cantidad'),
-            ingresos=Sum('subtotal')
-        ).order_by('-total_vendido')[:10]
+        # Servicios más vendidos (contadores de popularidad de ventas pagadas)
+        filas_top = top(ContadorPopularidad.TIPO_SERVICIO_VENDIDO, 'all', 10)
+        nombres = dict(Servicio.objects.filter(pk__in=[f['objeto_id'] for f in filas_top]).values_list('id', 'nombre'))
+        servicios_top = [
+            {'servicio__nombre': nombres.get(f['objeto_id']), 'total_vendido': f['cantidad'], 'ingresos': f['ingresos']}
+            for f in filas_top
+        ]
         
         # Manicuristas con más ventas
         manicuristas_top = self.get_queryset().values(
@@ -46,17 +46,21 @@ INSTALLED_APPS = [
     'api.abastecimientos',
     'api.authentication',
     'api.base',
+    'api.busqueda',
     'api.categoriainsumos',
     'api.citas',
     'api.clientes',
     'api.codigorecuperacion',
     'api.compras',
+    'api.correos',
     'api.comprahasinsumos',
+    'api.horarios',
     'api.insumos',
     'api.insumoshasabastecimientos',
     'api.liquidaciones',
     'api.manicuristas',
     'api.novedades',
+    'api.popularidad',
     'api.proveedores',
     'api.servicios',
     'api.utils',
@@ -152,7 +156,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.jwt.AutenticacionJWTCacheada',
     ],
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend'